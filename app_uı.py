@@ -1,8 +1,24 @@
 import streamlit as st
+import os
 import time
+import uuid
 from rag_retriever import CourseRetriever
 from rag_generator import RAGGenerator
 from rag_router import QueryRouter
+from main import CourseIntelligenceSystem
+from domain_guard import OUT_OF_DOMAIN_ANSWER
+from course_digest import wants_full_text
+from field_projection import projection_for
+from conversation import ConversationState
+from component_pool import ComponentPool, PoolBusyError
+from course_analytics import CourseAnalytics
+from rag_tracing import start_trace, finish_trace, start_metrics_server
+from rag_profiling import PROFILE_MODE, PROFILE_MODES, RequestProfiler
+from llm_client import Deadline, DEFAULT_BUDGET_S
+
+# Kuyruktaki isteğin durumu bu aralıkla yenilenir
+QUEUE_POLL_S = 0.1
+BUSY_ANSWER = "⚠️ The assistant is handling too many requests right now. Please try again in a moment."
 
 # --- SAYFA AYARLARI ---
 st.set_page_config(
@@ -22,6 +38,10 @@ Yazılım, Bilgisayar, Endüstri, Elektrik-Elektronik bölümlerinin müfredatla
 with st.sidebar:
     st.header("⚙️ Sistem Analizi")
     st.info("Sorgunun nasıl işlendiğini buradan takip edebilirsiniz.")
+    # İsteğe bağlı profil (rag_profiling): açıkken sonraki istek profillenir, en pahalı fonksiyonlar aşağıda
+    profile_on = st.toggle("🔬 Profil (istek başına)", value=PROFILE_MODE is not None)
+    profile_mode = st.radio("Profil modu", PROFILE_MODES, horizontal=True,
+                            index=PROFILE_MODES.index(PROFILE_MODE or "cprofile")) if profile_on else None
     router_status = st.empty()
     retriever_status = st.empty()
 
@@ -30,11 +50,161 @@ with st.sidebar:
 # Modelleri her seferinde tekrar yüklememek için cache kullanıyoruz.
 @st.cache_resource
 def load_system():
-    return {
-        "router": QueryRouter(),
-        "retriever": CourseRetriever(),
-        "generator": RAGGenerator()
-    }
+    # Prometheus için /metrics ucu (isteğe bağlı, süreç başına bir kez)
+    if os.getenv("RAG_METRICS_PORT"):
+        start_metrics_server(os.getenv("RAG_METRICS_PORT"))
+
+    # Paylaşılan bileşenler + sınırlı işçi havuzu (oturumlar aynı nesnelere eşzamanlı ve sınırlı girer)
+    return ComponentPool(
+        router=QueryRouter(),
+        retriever=CourseRetriever(),
+        generator=RAGGenerator(),
+        analytics=CourseAnalytics.from_json()
+    )
+
+
+# --- HAT (İŞÇİ THREAD'İNDE) ---
+# Router -> Retriever -> Generator bileşen havuzunun işçilerinde çalışır; burada Streamlit çağrısı yapılmaz.
+# Adım mesajları `progress` listesine yazılır, arayüz thread'i onları okuyup gösterir.
+def run_pipeline(system, conversation, prompt, progress, request_id=None):
+    progress.append("Soru analiz ediliyor...")
+    trace = start_trace(request_id, query=prompt)
+    deadline = Deadline(DEFAULT_BUDGET_S)
+    retriever = system["retriever"]
+    count = aggregate_result = None
+    full_response = ""
+
+    # Takip sorusu ("and its ECTS?", "what about CE?") önceki turun rotasıyla yerel olarak çözülür
+    follow_up = conversation.resolve(prompt, system["router"])
+    query = follow_up["query"] if follow_up else prompt
+
+    # Öneriden seçilen ya da sadece kod yazılan soru router'ı atlar (doğrudan kod araması)
+    selected_code = None if follow_up else retriever.resolve_course_selection(prompt)
+    verdict = None if selected_code or follow_up else retriever.check_domain(prompt)
+    if follow_up:
+        route_result = follow_up["route"]
+        trace.set(route_skipped="follow_up", rewritten_query=query, reused=follow_up["reuse"])
+        progress.append(f"Takip sorusu: **{query}**")
+    elif selected_code:
+        route_result = CourseIntelligenceSystem.selection_route(selected_code)
+        trace.set(route_skipped="exact_selection")
+    elif verdict and not verdict["in_domain"]:
+        # Alan dışı soru: router, arama ve LLM atlanır, standart ret cevabı döner
+        route_result = {"intent": "out_of_domain", "target_department": "None", "academic_year": "None",
+                        "specific_course_code": "None", "course_type": "None", "search_queries": []}
+        trace.set(short_circuit="out_of_domain", domain_score=verdict["score"])
+    else:
+        # Router Çağır (bütçe azsa / LLM'e ulaşılamazsa kural tabanlı yönlendirme)
+        route_result = system["router"].route_query(prompt, deadline=deadline)
+
+    intent = route_result.get("intent")
+    dept = route_result.get("target_department")
+    year = route_result.get("academic_year")
+    spec_code = route_result.get("specific_course_code")
+    search_keywords = " ".join(route_result.get("search_queries", []))
+
+    # Filtreleri Oluştur
+    filters = {}
+    if dept and dept != "None": filters["department"] = dept
+    if route_result.get("course_type") != "None": filters["type"] = route_result.get("course_type")
+    numeric_filters = route_result.get("numeric_filters")
+    if numeric_filters and numeric_filters != "None": filters["numeric_filters"] = numeric_filters
+    curriculum = route_result.get("curriculum_version")
+    if curriculum and curriculum != "None": filters["curriculum_version"] = curriculum
+
+    # Context varsayılan olarak ders özetleri; ayrıntı sorulursa tam doküman
+    detail = "full" if wants_full_text(query) else None
+    # Sadece gereken ders alanları (not sistemi, konular...) getirilir
+    fields = projection_for(route_result, query)
+
+    trace.set(intent=intent, filters=filters, route=route_result, context_detail=detail or "digest",
+              fields=fields)
+    progress.append(f"Niyet Algılandı: **{intent.upper()}**")
+
+    # --- ADIM 2: RETRIEVER (VERİ ÇEKME) ---
+    progress.append("Veritabanı taranıyor...")
+    context = None
+    # Takip sorusu önceki turla aynı aramaysa önceki sonuçlar kullanılır (gerekirse sadece yeni alanlar)
+    reused = None
+    if follow_up and follow_up["reuse"] and intent not in ("count", "aggregate"):
+        reused = conversation.reuse_context(retriever, fields=fields, detail=detail)
+        trace.set(reused_context=bool(reused))
+    if intent == "out_of_domain":
+        full_response = OUT_OF_DOMAIN_ANSWER.format(topic=verdict["topic"])
+        context = full_response
+
+    # A) SAYMA (COUNT)
+    if intent == "count":
+        count = retriever.count_courses(filters=filters)
+        context = f"SYSTEM_MESSAGE: The user asked to count. The database found exactly {count} courses matching the criteria."
+        full_response = f"📊 **Analiz Sonucu:** Veritabanında kriterlerinize uyan tam **{count}** adet ders bulundu."
+
+    # A2) TOPLAMA / ORTALAMA (AGGREGATE) — ECTS, saat, ağırlıklar tam hesaplanır
+    elif intent == "aggregate":
+        analytics = system["analytics"]
+        aggregate_result = analytics.aggregate_from_route(route_result)
+        full_response = analytics.format_result(aggregate_result)
+        context = full_response
+
+    # A2b) TAKİP SORUSU — önceki turun sonuçları
+    elif reused:
+        context = reused
+
+    # A3) ÖN KOŞUL (PREREQUISITE) — grafikten kesin zincir
+    elif intent == "prerequisite" and spec_code and spec_code != "None":
+        context = retriever.describe_prerequisites(spec_code)
+
+    # B) LİSTELEME (METADATA)
+    elif (intent == "list_curriculum" or year != "None") and dept != "None":
+        context = retriever.get_courses_by_metadata(dept, year, route_result.get("semester"),
+                                                    numeric_filters=filters.get("numeric_filters"),
+                                                    curriculum=filters.get("curriculum_version"))
+
+    # C) TAM EŞLEŞME (EXACT MATCH)
+    elif spec_code and spec_code != "None":
+        context = retriever.retrieve_exact_match(spec_code, detail=detail, fields=fields)
+
+    # D) SEMANTİK ARAMA (FALLBACK)
+    if not context and intent not in ("count", "aggregate"):
+        context = retriever.retrieve_context(search_keywords, n_results=10, filters=filters, detail=detail,
+                                             fields=fields)
+
+    if not context and intent not in ("count", "aggregate"):
+        context = "No records found."
+
+    # --- ADIM 3: GENERATOR (CEVAP ÜRETME) ---
+    if intent not in ("count", "aggregate", "out_of_domain"):
+        progress.append("Cevap hazırlanıyor...")
+
+        # Prompt Düzenleme (main.py mantığı)
+        final_query = query
+        if intent == "compare":
+            final_query += "\n(CRITICAL: Present answer as a MARKDOWN TABLE)."
+        elif intent == "prerequisite":
+            final_query += "\n(IMPORTANT: Use the prerequisite chain and semesters exactly as given.)"
+
+        full_response = system["generator"].generate_answer(final_query, context, deadline=deadline,
+                                                            history=conversation.history_text())
+
+    finish_trace(trace)
+    conversation.record(prompt, full_response, route=route_result,
+                        context=None if intent in ("count", "aggregate") else context,
+                        fields=fields, detail=detail)
+    return {"intent": intent, "context": context, "count": count, "aggregate_result": aggregate_result,
+            "full_response": full_response, "trace": trace}
+
+
+def run_profiled_pipeline(system, conversation, prompt, progress, mode):
+    """run_pipeline'ı işçi thread'inde profiller; sonuca 'profile' (rag_profiling.RequestProfile) eklenir."""
+    request_id = uuid.uuid4().hex[:12]
+    profiler = RequestProfiler(request_id, mode).start()
+    try:
+        result = run_pipeline(system, conversation, prompt, progress, request_id=request_id)
+    finally:
+        profile = profiler.stop()
+    result["trace"].set(profile=profile.path)
+    result["profile"] = profile
+    return result
 
 
 # Sistemi Yükle
@@ -47,13 +217,35 @@ if "system" not in st.session_state:
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Konuşma durumu: son turun rotası / bulunan dersleri ve sıkıştırılmış geçmiş (takip soruları için)
+if "conversation" not in st.session_state:
+    st.session_state.conversation = ConversationState()
+
+# --- HIZLI DERS ARAMA (OTOMATİK TAMAMLAMA) ---
+# Öneriler bellek içi indeksten gelir (router / LLM yok); seçilen ders doğrudan kod aramasına gider.
+with st.sidebar:
+    st.header("🔎 Hızlı Ders Arama")
+    partial = st.text_input("Ders kodu veya adı", placeholder="SE 3, Data Str...")
+    if partial:
+        suggestions = st.session_state.system["retriever"].autocomplete(partial)
+        if not suggestions:
+            st.caption("Eşleşen ders yok.")
+        for suggestion in suggestions:
+            if st.button(suggestion["label"], key=f"suggest_{suggestion['code']}", use_container_width=True):
+                st.session_state.selected_course = suggestion
+
 # --- GEÇMİŞ MESAJLARI EKRAÑA YAZ ---
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
 # --- KULLANICI GİRDİSİ VE İŞLEM ---
-if prompt := st.chat_input("Dersler, müfredat veya karşılaştırma hakkında sorun..."):
+selected_course = st.session_state.pop("selected_course", None)
+prompt = st.chat_input("Dersler, müfredat veya karşılaştırma hakkında sorun...")
+if not prompt and selected_course:
+    prompt = selected_course["label"]
+
+if prompt:
 
     # 1. Kullanıcı Mesajını Göster
     st.session_state.messages.append({"role": "user", "content": prompt})
@@ -65,83 +257,80 @@ if prompt := st.chat_input("Dersler, müfredat veya karşılaştırma hakkında
         message_placeholder = st.empty()
         full_response = ""
 
-        # --- ADIM 1: ROUTER (NİYET ANALİZİ) ---
         with st.status("🧠 Düşünülüyor...", expanded=True) as status:
-            st.write("Soru analiz ediliyor...")
-            start_time = time.time()
-
-            # Router Çağır
-            router = st.session_state.system["router"]
-            route_result = router.route_query(prompt)
-
-            # Yan Menüye Analiz Sonuçlarını Bas
-            with router_status.container():
-                st.subheader("🔍 Router Çıktısı")
-                st.json(route_result)
-
-            intent = route_result.get("intent")
-            dept = route_result.get("target_department")
-            year = route_result.get("academic_year")
-            spec_code = route_result.get("specific_course_code")
-            search_keywords = " ".join(route_result.get("search_queries", []))
-
-            # Filtreleri Oluştur
-            filters = {}
-            if dept and dept != "None": filters["department"] = dept
-            if route_result.get("course_type") != "None": filters["type"] = route_result.get("course_type")
-
-            st.write(f"Niyet Algılandı: **{intent.upper()}**")
-
-            # --- ADIM 2: RETRIEVER (VERİ ÇEKME) ---
-            st.write("Veritabanı taranıyor...")
-            retriever = st.session_state.system["retriever"]
-            context = None
-
-            # A) SAYMA (COUNT)
-            if intent == "count":
-                count = retriever.count_courses(filters=filters)
-                context = f"SYSTEM_MESSAGE: The user asked to count. The database found exactly {count} courses matching the criteria."
-                full_response = f"📊 **Analiz Sonucu:** Veritabanında kriterlerinize uyan tam **{count}** adet ders bulundu."
-
-            # B) LİSTELEME (METADATA)
-            elif (intent == "list_curriculum" or year != "None") and dept != "None":
-                context = retriever.get_courses_by_metadata(dept, year, route_result.get("semester"))
-
-            # C) TAM EŞLEŞME (EXACT MATCH)
-            elif spec_code and spec_code != "None":
-                context = retriever.retrieve_exact_match(spec_code)
-
-            # D) SEMANTİK ARAMA (FALLBACK)
-            if not context and intent != "count":
-                context = retriever.retrieve_context(search_keywords, n_results=10, filters=filters)
-
-            if not context and intent != "count":
-                context = "No records found."
-
-            # Yan Menüye Context Bilgisi
-            with retriever_status.container():
-                st.subheader("📂 Bulunan Veri")
-                if intent == "count":
-                    st.write(f"Sayım Sonucu: {count}")
+            system = st.session_state.system
+            progress = []
+            try:
+                # Hat, bileşen havuzunun işçilerinde çalışır; arayüz sıradaki yeri ve adımları gösterir
+                if profile_mode:
+                    ticket = system.submit(run_profiled_pipeline, system, st.session_state.conversation, prompt,
+                                           progress, profile_mode)
                 else:
-                    st.text(context[:500] + "..." if context else "Veri Yok")
+                    ticket = system.submit(run_pipeline, system, st.session_state.conversation, prompt, progress)
+            except PoolBusyError:
+                ticket = None
+                full_response = BUSY_ANSWER
+                status.update(label="Sistem meşgul", state="error", expanded=False)
+
+            if ticket is not None:
+                queue_note = st.empty()
+                shown = 0
+                while not ticket.done():
+                    position = ticket.position()
+                    if position:
+                        queue_note.info(f"⏳ Sırada bekleniyor: önünüzde {position - 1} istek var "
+                                        f"({system.stats()['active']} istek işleniyor).")
+                    else:
+                        queue_note.empty()
+                    for message in progress[shown:]:
+                        st.write(message)
+                    shown = len(progress)
+                    time.sleep(QUEUE_POLL_S)
+                queue_note.empty()
+                for message in progress[shown:]:
+                    st.write(message)
+
+                result = ticket.result()
+                intent, context, trace = result["intent"], result["context"], result["trace"]
+                full_response = result["full_response"]
 
-            # --- ADIM 3: GENERATOR (CEVAP ÜRETME) ---
-            if intent != "count":
-                st.write("Cevap hazırlanıyor...")
-                generator = st.session_state.system["generator"]
+                # Yan Menüye Context Bilgisi
+                with retriever_status.container():
+                    st.subheader("📂 Bulunan Veri")
+                    if intent == "count":
+                        st.write(f"Sayım Sonucu: {result['count']}")
+                    elif intent == "aggregate":
+                        st.json(result["aggregate_result"], expanded=False)
+                    else:
+                        st.text(context[:500] + "..." if context else "Veri Yok")
 
-                # Prompt Düzenleme (main.py mantığı)
-                final_query = prompt
-                if intent == "compare":
-                    final_query += "\n(CRITICAL: Present answer as a MARKDOWN TABLE)."
+                # Yan Menüye İstek İzini Bas (aşama süreleri, filtreler, hit sayıları, token'lar)
+                with router_status.container():
+                    st.subheader("🔍 İstek İzi (Trace)")
+                    st.caption(f"Toplam: {trace.total_ms:.0f} ms")
+                    st.table([
+                        {"Aşama": name, "Süre (ms)": round(ms, 1)}
+                        for name, ms in trace.stage_totals().items()
+                    ])
+                    st.json(trace.to_dict(), expanded=False)
 
-                full_response = generator.generate_answer(final_query, context)
+                    # Profil: öz süreye göre en pahalı fonksiyonlar (tam profil dosyada)
+                    profile = result.get("profile")
+                    if profile is not None:
+                        st.subheader("🔬 Profil")
+                        st.caption(f"{profile.mode} · {profile.total_ms:.0f} ms · {profile.path}")
+                        if profile.top:
+                            st.table([
+                                {"Fonksiyon": row["function"], "Öz süre (ms)": row["self_ms"], "%": row["self_pct"]}
+                                for row in profile.top[:10]
+                            ])
+                        else:
+                            st.caption("Örnek alınamadı (istek örnekleme aralığından kısa sürdü).")
 
-            status.update(label="Tamamlandı!", state="complete", expanded=False)
+                status.update(label="Tamamlandı!", state="complete", expanded=False)
 
         # 3. Cevabı Ekrana Bas
         message_placeholder.markdown(full_response)
 
         # Geçmişe Ekle
-        st.session_state.messages.append({"role": "assistant", "content": full_response})
\ No newline at end of file
+        st.session_state.messages.append({"role": "assistant", "content": full_response})
@@ -0,0 +1,6 @@
+"""
+Offline performans ölçüm araçları.
+
+Chroma Cloud ve Groq yerine yerel koleksiyon ve sahte Groq sunucusu kullanır;
+böylece sonuçlar ağdan bağımsız olarak commit'ler arasında karşılaştırılabilir.
+"""
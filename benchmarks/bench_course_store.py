@@ -0,0 +1,108 @@
+"""
+Ders verisini yükleme süresi ve bellek (RSS) karşılaştırması: JSON vs. SQLite ders deposu.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_course_store --repeat 5
+
+Her yöntem ayrı bir alt süreçte ölçülür; böylece bir yöntemin bıraktığı bellek diğerini etkilemez.
+  json        : json.load (bugünkü yol)
+  store       : CourseStore -> tüm kayıtlar (vector_create.load_course_data'nın yolu)
+  store_full  : store + liste alanları da çözülmüş (konular, kazanımlar, değerlendirme)
+  store_lookup: sadece depoyu açıp kodla arama (retriever'ın birebir eşleşme yolu)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.run_benchmark import percentile
+
+METHODS = ("json", "store", "store_full", "store_lookup")
+
+
+def current_rss_kb():
+    """Anlık RSS (KB). /proc yoksa (macOS/Windows) tepe değere düşer."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        return 0
+
+
+def measure(method, json_file, store_file):
+    """Alt süreçte çalışır: tek bir yükleme yapar ve (süre ms, RSS artışı KB) döner."""
+    from course_store import CourseStore
+
+    rss_before = current_rss_kb()
+    start = time.perf_counter()
+
+    if method == "json":
+        with open(json_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    elif method == "store_lookup":
+        store = CourseStore(store_file)
+        data = store.find_by_code("SE 115")
+    else:
+        store = CourseStore(store_file)
+        data = list(store)
+        if method == "store_full":
+            for course in data:
+                course.weekly_topics, course.learning_outcomes, course.evaluation_system
+        store.close()
+
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    rss_delta = current_rss_kb() - rss_before
+    assert data
+    return {"ms": elapsed_ms, "rss_kb": rss_delta}
+
+
+def run_child(method, args):
+    out = subprocess.check_output(
+        [sys.executable, "-m", "benchmarks.bench_course_store", "--child", method,
+         "--json-file", args.json_file, "--store-file", args.store_file],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON vs ders deposu yükleme süresi / RSS")
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--store-file", default=None, help="Varsayılan: JSON'un yanındaki .db")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", choices=METHODS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    from course_store import build_course_store, store_path_for
+
+    args.store_file = args.store_file or store_path_for(args.json_file)
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.json_file, args.store_file)))
+        return
+
+    if not os.path.exists(args.store_file):
+        with open(args.json_file, "r", encoding="utf-8") as f:
+            build_course_store(json.load(f), args.store_file, source=os.path.basename(args.json_file))
+
+    print(f"JSON : {os.path.getsize(args.json_file) / 1024:.0f} KB   "
+          f"Depo : {os.path.getsize(args.store_file) / 1024:.0f} KB")
+    print(f"\n{'YÖNTEM':<14}{'p50 ms':>10}{'min ms':>10}{'RSS +KB':>10}")
+    for method in METHODS:
+        samples = [run_child(method, args) for _ in range(args.repeat)]
+        times = [s["ms"] for s in samples]
+        rss = [s["rss_kb"] for s in samples]
+        print(f"{method:<14}{percentile(times, 50):>10.2f}{min(times):>10.2f}{percentile(rss, 50):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Kompakt ders özetlerinin (course_digest.py) Generator context'inde sağladığı token tasarrufu (tamamen offline).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_digests --embedding hash
+    python -m benchmarks.bench_digests --embedding hash --chunking section
+
+Altın soru seti sahte Groq sunucusuyla iki kez oynatılır: retriever CONTEXT_MODE="full" (tam ders dokümanı)
+ve "digest" (özet; ayrıntı soran sorular yine tam dokümanı alır). Generator'a giden context yakalanır;
+niyet başına ortalama context token'ı ve tasarruf raporlanır. LLM'e gitmeyen sorular (count, aggregate,
+alan dışı) ayrıca sayılır.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+from collections import defaultdict
+
+from benchmarks.fake_groq import FakeGroqServer, estimate_tokens
+from benchmarks.run_benchmark import GOLDEN_FILE, build_system
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ("full", "digest")
+
+
+def capture_contexts(system):
+    """Generator'a giden context'leri biriktiren sarmalayıcıyı takar; biriken listeyi döner."""
+    captured = []
+    original = system.generator.generate_answer
+
+    def generate_answer(user_query, retrieved_context, deadline=None, history=None):
+        captured.append(retrieved_context or "")
+        return original(user_query, retrieved_context, deadline=deadline, history=history)
+
+    system.generator.generate_answer = generate_answer
+    return captured
+
+
+def run(args):
+    with open(args.golden, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    server = FakeGroqServer(routes={q["question"]: q["route"] for q in golden}).start()
+    os.environ["GROQ_API_KEY"] = "fake-benchmark-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["GROQ_RPM"] = "0"
+    os.environ["GROQ_TPM"] = "0"
+
+    tokens = {mode: defaultdict(list) for mode in MODES}
+    skipped = defaultdict(int)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            system = build_system(args.embedding, args.json_file, args.chunking)
+        captured = capture_contexts(system)
+        for mode in MODES:
+            system.retriever.CONTEXT_MODE = mode
+            for q in golden:
+                captured.clear()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    system.answer(q["question"], request_id=f"{q['id']}-{mode}")
+                intent = q["route"].get("intent", "search")
+                if not captured:
+                    if mode == MODES[0]:
+                        skipped[intent] += 1
+                    continue
+                tokens[mode][intent].append(estimate_tokens(captured[-1]))
+    finally:
+        server.stop()
+
+    rows = []
+    for intent in sorted(tokens["full"]):
+        full, digest = tokens["full"][intent], tokens["digest"][intent]
+        full_mean = sum(full) / len(full)
+        digest_mean = sum(digest) / len(digest) if digest else 0.0
+        rows.append({"intent": intent, "questions": len(full), "full_tokens_mean": round(full_mean, 1),
+                     "digest_tokens_mean": round(digest_mean, 1),
+                     "saving_pct": round((1 - digest_mean / full_mean) * 100.0, 1) if full_mean else 0.0})
+    all_full = sum(sum(v) for v in tokens["full"].values())
+    all_digest = sum(sum(v) for v in tokens["digest"].values())
+    return {"embedding": args.embedding, "chunking": args.chunking, "intents": rows,
+            "total": {"full_tokens": all_full, "digest_tokens": all_digest,
+                      "saving_pct": round((1 - all_digest / all_full) * 100.0, 1) if all_full else 0.0},
+            "without_llm": dict(skipped)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ders özeti context'i: niyet başına token tasarrufu")
+    parser.add_argument("--golden", default=GOLDEN_FILE)
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--embedding", choices=["minilm", "hash"], default="minilm")
+    parser.add_argument("--chunking", choices=["course", "section"], default="course")
+    parser.add_argument("--output", default=os.path.join(HERE, "results", "bench_digests.json"))
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"\n{'NİYET':<18}{'soru':>6}{'tam (token)':>13}{'özet (token)':>14}{'tasarruf':>10}")
+    for row in results["intents"]:
+        print(f"{row['intent']:<18}{row['questions']:>6}{row['full_tokens_mean']:>13.0f}"
+              f"{row['digest_tokens_mean']:>14.0f}{row['saving_pct']:>9.1f}%")
+    total = results["total"]
+    print(f"{'TOPLAM':<18}{'':>6}{total['full_tokens']:>13}{total['digest_tokens']:>14}{total['saving_pct']:>9.1f}%")
+    if results["without_llm"]:
+        print(f"LLM'e gitmeyen sorular: {results['without_llm']}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"📁 Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+HNSW indeksinin (hnsw_index.py) korpus büyüdükçe recall@k ve gecikmesini ölçer (tamamen offline).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_hnsw --embedding hash --sizes 1000,10000,100000
+
+Gerçek veri ~1k parça olduğundan büyük korpuslar gerçek parça embedding'lerinin gürültülü
+kopyalarıyla üretilir (kümelenmiş yapı korunur); her kopyaya sentetik fakülte / bölüm / yıl verilir.
+Her boyut için:
+  kurulum süresi, kaydetme ve mmap ile açılış süresi (yeniden başlatma = graf kurulmaz),
+  filtresiz / yıl / bölüm / bölüm + yıl ön filtreli sorgularda recall@k (tam aramaya göre),
+  HNSW, numpy tam arama ve bugünkü LocalCollection (satır başına `where`) için p50 / p99,
+  %1 artımlı ekleme ve silme süresi ve sonrasında recall@k.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.run_benchmark import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FACULTY_DEPARTMENTS = 40
+YEARS = ("1", "2", "3", "4", "Any")
+# LocalCollection her sorguda tüm satırlarda `where` değerlendirdiği için az sorguyla ölçülür
+LOCAL_QUERIES = 20
+
+
+def base_vectors(json_file, embedding):
+    """Gerçek ders bölüm parçalarının normalize embedding'leri."""
+    from local_collection import HashEmbeddingFunction, default_embedding_function
+    from vector_create import build_section_records, load_course_data
+
+    embedding_fn = HashEmbeddingFunction() if embedding == "hash" else default_embedding_function()
+    with contextlib.redirect_stdout(io.StringIO()):
+        documents, _, _ = build_section_records(load_course_data(json_file))
+    vectors = np.asarray(embedding_fn(documents), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def perturb(base, count, noise, rng):
+    rows = base[rng.integers(0, len(base), count)]
+    rows = rows + rng.normal(scale=noise / np.sqrt(base.shape[1]), size=rows.shape).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def synthetic_metadata(count, rng):
+    from vector_create import department_flag, year_flag
+
+    metadatas = []
+    for department, year in zip(rng.integers(0, FACULTY_DEPARTMENTS, count), rng.integers(0, len(YEARS), count)):
+        name = f"Department {department:02d}"
+        metadatas.append({"department": name, "year": YEARS[year], department_flag(name): True,
+                          year_flag(YEARS[year]): True})
+    return metadatas
+
+
+def filter_modes(rng):
+    from vector_create import department_flag, year_flag
+
+    department = f"Department {rng.integers(0, FACULTY_DEPARTMENTS):02d}"
+    year = YEARS[rng.integers(0, 4)]
+    return {
+        "yok": None,
+        # Geniş filtre (~%20): graf filtreli gezilir; dar filtreler alt kümede tam aramaya düşer
+        "yıl": {year_flag(year): True},
+        "bölüm": {department_flag(department): True},
+        "bölüm+yıl": {"$and": [{department_flag(department): True}, {year_flag(year): True}]},
+    }
+
+
+def exact_top(vectors, mask, query, k):
+    positions = np.flatnonzero(mask)
+    sims = vectors[positions] @ query
+    k = min(k, len(positions))
+    order = np.argpartition(-sims, k - 1)[:k]
+    return positions[order[np.argsort(-sims[order])]].tolist()
+
+
+def measure(collection, vectors, queries, k, rng, local=None):
+    """Filtre türü başına recall@k ve gecikmeler (ms)."""
+    rows = []
+    for mode, where in filter_modes(rng).items():
+        live = ~collection.index.deleted[:collection.index.count]
+        mask = collection._mask(where)
+        mask = live if mask is None else mask & live
+        hnsw_ms, exact_ms, local_ms, recalls = [], [], [], []
+        for i, q in enumerate(queries):
+            start = time.perf_counter()
+            hits = collection.query(query_embeddings=[q], n_results=k, where=where, include=[])["ids"][0]
+            hnsw_ms.append((time.perf_counter() - start) * 1000.0)
+
+            start = time.perf_counter()
+            truth = exact_top(vectors, mask, q, k)
+            exact_ms.append((time.perf_counter() - start) * 1000.0)
+            truth_ids = {collection.ids[p] for p in truth}
+            recalls.append(len(truth_ids & set(hits)) / len(truth_ids) if truth_ids else 1.0)
+
+            if local is not None and i < LOCAL_QUERIES:
+                start = time.perf_counter()
+                local.query(query_embeddings=[q], n_results=k, where=where, include=[])
+                local_ms.append((time.perf_counter() - start) * 1000.0)
+
+        rows.append({
+            "filter": mode, "matching": int(mask.sum()),
+            "recall": round(float(np.mean(recalls)), 4),
+            "hnsw_p50_ms": round(percentile(hnsw_ms, 50), 3), "hnsw_p99_ms": round(percentile(hnsw_ms, 99), 3),
+            "exact_p50_ms": round(percentile(exact_ms, 50), 3), "exact_p99_ms": round(percentile(exact_ms, 99), 3),
+            "local_p99_ms": round(percentile(local_ms, 99), 3) if local_ms else None,
+        })
+    return rows
+
+
+def bench_size(size, base, args, rng):
+    from hnsw_index import HNSWCollection
+    from local_collection import LocalCollection
+
+    vectors = perturb(base, size, args.noise, rng)
+    metadatas = synthetic_metadata(size, rng)
+    ids = [f"doc-{i}" for i in range(size)]
+    documents = [""] * size
+    queries = perturb(base, args.queries, args.noise, rng)
+
+    collection = HNSWCollection("bench", embedding_function=lambda texts: None, M=args.M,
+                                ef_construction=args.ef_construction, ef_search=args.ef_search)
+    start = time.perf_counter()
+    collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=vectors)
+    build_s = time.perf_counter() - start
+
+    directory = tempfile.mkdtemp(prefix="bench_hnsw_")
+    try:
+        path = os.path.join(directory, "bench.hnsw")
+        start = time.perf_counter()
+        collection.save(path)
+        save_s = time.perf_counter() - start
+        start = time.perf_counter()
+        collection = HNSWCollection.load(path, embedding_function=lambda texts: None)
+        load_ms = (time.perf_counter() - start) * 1000.0
+
+        local = LocalCollection("bench", embedding_function=lambda texts: None)
+        local.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=vectors)
+        rows = measure(collection, vectors, queries, args.k, rng, local)
+
+        # %1 artımlı ekleme + %1 silme (ingest farkı), ardından recall
+        churn = max(1, size // 100)
+        fresh = perturb(base, churn, args.noise, rng)
+        start = time.perf_counter()
+        collection.add(ids=[f"new-{i}" for i in range(churn)], documents=[""] * churn,
+                       metadatas=synthetic_metadata(churn, rng), embeddings=fresh)
+        insert_ms = (time.perf_counter() - start) * 1000.0 / churn
+        start = time.perf_counter()
+        collection.delete(ids=[f"doc-{i}" for i in rng.choice(size, churn, replace=False)])
+        delete_ms = (time.perf_counter() - start) * 1000.0
+        after = measure(collection, np.vstack([vectors, fresh]), queries, args.k, rng)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {"size": size, "build_s": round(build_s, 2), "save_s": round(save_s, 3), "load_ms": round(load_ms, 2),
+            "filters": rows, "insert_ms_per_doc": round(insert_ms, 3), "delete_ms": round(delete_ms, 3),
+            "recall_after_churn": after[0]["recall"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW recall@k / gecikme ölçümü (1k -> 100k parça)")
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--embedding", choices=["minilm", "hash"], default="minilm")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.6, help="Sentetik kopyaların gürültü büyüklüğü")
+    parser.add_argument("--M", type=int, default=None)
+    parser.add_argument("--ef-construction", type=int, default=None)
+    parser.add_argument("--ef-search", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=os.path.join(HERE, "results", "bench_hnsw.json"))
+    args = parser.parse_args()
+
+    import hnsw_index
+    args.M = args.M or hnsw_index.DEFAULT_M
+    args.ef_construction = args.ef_construction or hnsw_index.DEFAULT_EF_CONSTRUCTION
+    args.ef_search = args.ef_search or hnsw_index.DEFAULT_EF_SEARCH
+
+    rng = np.random.default_rng(args.seed)
+    base = base_vectors(args.json_file, args.embedding)
+    print(f"📂 {len(base)} gerçek parça embedding'i; M={args.M}, ef_construction={args.ef_construction}, "
+          f"ef_search={args.ef_search}")
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"⏳ {size} parça kuruluyor...")
+        result = bench_size(size, base, args, rng)
+        results.append(result)
+        print(f"   kurulum {result['build_s']} s, kaydetme {result['save_s']} s, "
+              f"mmap açılış {result['load_ms']} ms; "
+              f"%1 ekleme {result['insert_ms_per_doc']} ms/parça, %1 silme {result['delete_ms']} ms, "
+              f"sonrasında recall {result['recall_after_churn']:.3f}")
+
+    print(f"\n{'PARÇA':>8} {'FİLTRE':<11}{'eşleşen':>9}{'recall':>8}{'hnsw p50':>10}{'p99':>8}"
+          f"{'tam p50':>9}{'p99':>8}{'Local p99':>11}")
+    for result in results:
+        for row in result["filters"]:
+            local = f"{row['local_p99_ms']:>11.2f}" if row["local_p99_ms"] is not None else f"{'-':>11}"
+            print(f"{result['size']:>8} {row['filter']:<11}{row['matching']:>9}{row['recall']:>8.3f}"
+                  f"{row['hnsw_p50_ms']:>10.2f}{row['hnsw_p99_ms']:>8.2f}"
+                  f"{row['exact_p50_ms']:>9.2f}{row['exact_p99_ms']:>8.2f}{local}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"embedding": args.embedding, "M": args.M, "ef_construction": args.ef_construction,
+                   "ef_search": args.ef_search, "k": args.k, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"📁 Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+İndeksleme (ingest) maliyeti: ortak dersler tekilleştirilmeden vs. içerik özetiyle tekilleştirilerek.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_ingest --embedding hash --repeat 3
+
+Her mod için ders ve bölüm koleksiyonları yerel olarak (local_collection.LocalCollection) kurulur:
+  kayıt        : embed edilen doküman sayısı
+  indeks KB    : vektör matrisi + doküman metni + metadata (JSON) boyutu
+  hazırlık ms  : build_records / build_section_records
+  embed ms     : embedding + koleksiyona ekleme
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+from benchmarks.run_benchmark import percentile
+
+MODES = {"bölüm başına": False, "tekil (dedup)": True}
+
+
+def index_bytes(collection):
+    """Koleksiyonun kalıcı olarak saklanacak kısmının yaklaşık boyutu (byte)."""
+    text = sum(len(doc.encode("utf-8")) for doc in collection.documents)
+    meta = sum(len(json.dumps(m, ensure_ascii=False).encode("utf-8")) for m in collection.metadatas)
+    return collection._embeddings.nbytes + text + meta
+
+
+def ingest(course_data, dedup, embedding_fn):
+    from local_collection import LocalCollection
+    from vector_create import SECTION_COLLECTION_NAME, build_records, build_section_records
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        records = build_records(course_data, dedup=dedup)
+    sections = build_section_records(course_data, dedup=dedup)
+    prepare_ms = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    collection = LocalCollection(embedding_function=embedding_fn)
+    collection.add(ids=records[2], documents=records[0], metadatas=records[1])
+    section_collection = LocalCollection(name=SECTION_COLLECTION_NAME, embedding_function=embedding_fn)
+    section_collection.add(ids=sections[2], documents=sections[0], metadatas=sections[1])
+    embed_ms = (time.perf_counter() - start) * 1000.0
+
+    return {
+        "records": collection.count(),
+        "sections": section_collection.count(),
+        "index_kb": (index_bytes(collection) + index_bytes(section_collection)) / 1024,
+        "prepare_ms": prepare_ms,
+        "embed_ms": embed_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ortak ders tekilleştirmesinin indeks boyutu / ingest süresine etkisi")
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--embedding", choices=["minilm", "hash"], default="minilm")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Sonuçları JSON olarak da yaz")
+    args = parser.parse_args()
+
+    from local_collection import HashEmbeddingFunction, default_embedding_function
+    from vector_create import group_shared_courses, load_course_data
+
+    course_data = load_course_data(args.json_file)
+    embedding_fn = HashEmbeddingFunction() if args.embedding == "hash" else default_embedding_function()
+    groups = group_shared_courses(course_data)
+    print(f"📂 {len(course_data)} ders satırı, {len(groups)} farklı içerik "
+          f"({sum(1 for g in groups if len(g) > 1)} ortak ders)")
+
+    results = {}
+    print(f"\n{'MOD':<16}{'kayıt':>7}{'bölüm':>7}{'indeks KB':>11}{'hazırlık ms':>13}{'embed ms':>10}")
+    for label, dedup in MODES.items():
+        runs = [ingest(course_data, dedup, embedding_fn) for _ in range(args.repeat)]
+        summary = {
+            "records": runs[0]["records"],
+            "sections": runs[0]["sections"],
+            "index_kb": round(runs[0]["index_kb"], 1),
+            "prepare_ms": round(percentile([r["prepare_ms"] for r in runs], 50), 2),
+            "embed_ms": round(percentile([r["embed_ms"] for r in runs], 50), 2),
+        }
+        results[label] = summary
+        print(f"{label:<16}{summary['records']:>7}{summary['sections']:>7}{summary['index_kb']:>11.0f}"
+              f"{summary['prepare_ms']:>13.1f}{summary['embed_ms']:>10.1f}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"embedding": args.embedding, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"📁 Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Ders sayfası ayrıştırma hızı: eski yol (tam BeautifulSoup ağacı, html.parser, etiket başına `find(string=...)`)
+vs. webScraping.parse_course_details'in iki yolu (tek geçişte etiket araması):
+  strained (html.parser): BeautifulSoup ağacına sadece gereken alt ağaçlar girer (lxml yokken),
+  lxml (C tree)         : sayfa lxml ile ayrıştırılır, alanlar doğrudan lxml ağacından okunur (varsayılan).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_parsing --rounds 3
+    python -m benchmarks.bench_parsing --fetch 40        # ders sayfalarını indirip önbelleğe alır (ağ gerekir)
+
+Sayfalar önbellek klasöründen (`<ders kodu>.html`) okunur. Önbellek boşsa ders verisinden gerçek sayfanın
+yapısında (head, menü, etiket tablosu, değerlendirme / haftalık konu tabloları, program çıktıları matrisi)
+sentetik sayfalar üretilir. Her yöntemin çıktısı eski yolla birebir karşılaştırılır; sayfa/sn raporlanır.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from html import escape
+
+from bs4 import BeautifulSoup
+
+from benchmarks.run_benchmark import percentile
+from webScraping import HTML_PARSER, OUTPUT_FILE, clean_text, parse_course_details
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(HERE, "cache", "syllabus")
+# Sentetik sayfada ders başına program çıktısı matrisi satırı (gerçek sayfalardaki büyük tablo)
+PROGRAM_OUTCOME_ROWS = 14
+WEEK_PREFIX = re.compile(r"^Week \d+: ")
+
+
+def legacy_parse(html):
+    """webScraping.get_course_details'in eski ayrıştırması (karşılaştırma için birebir kopya)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    details = {}
+
+    try:
+        details['local_credit'] = clean_text(soup.find("div", id="ieu_credit").get_text())
+        ects_div = soup.find("div", id="ects_credit")
+        details['ects_confirmed'] = clean_text(ects_div.get_text()) if ects_div else ""
+
+        sem_div = soup.find("div", id="semester")
+        details['semester_detail'] = clean_text(sem_div.get_text()) if sem_div else ""
+
+        theo_div = soup.find("div", id="weekly_hours")
+        details['theory_hours'] = clean_text(theo_div.get_text()) if theo_div else "0"
+
+        lab_div = soup.find("div", id="app_hours")
+        details['lab_hours'] = clean_text(lab_div.get_text()) if lab_div else "0"
+    except AttributeError:
+        details.update({'local_credit': "0", 'ects_confirmed': "0", 'theory_hours': "0", 'lab_hours': "0"})
+
+    evaluation_data = []
+    eval_table = soup.find("table", id="evaluation_table1")
+    if eval_table:
+        for row in eval_table.find_all("tr"):
+            cols = row.find_all("td")
+            if len(cols) >= 3:
+                activity_name = clean_text(cols[0].get_text())
+                count = clean_text(cols[1].get_text())
+                percentage = clean_text(cols[2].get_text())
+                if percentage and percentage not in ["-", "0", ""]:
+                    evaluation_data.append({"activity": activity_name, "count": count,
+                                            "weight_percent": percentage})
+    details['evaluation_system'] = evaluation_data
+
+    def get_text_by_label(label_list):
+        for label in label_list:
+            tag = soup.find("strong", string=lambda t: t and label in t)
+            if tag:
+                content_td = tag.find_parent("td").find_next_sibling("td")
+                return clean_text(content_td.get_text())
+        return "None"
+
+    details['objectives'] = get_text_by_label(["Course Objectives"])
+    details['description'] = get_text_by_label(["Course Description"])
+    details['prerequisites_text'] = get_text_by_label(["Prerequisites", "Prerequisite"])
+
+    outcomes_list = []
+    ul_tag = soup.find("ul", id="outcome")
+    if ul_tag:
+        outcomes_list = [clean_text(li.get_text()) for li in ul_tag.find_all("li")]
+    details['learning_outcomes'] = outcomes_list
+
+    weekly_topics = []
+    weeks_table = soup.find("table", id="weeks")
+    if weeks_table:
+        for row in weeks_table.find_all("tr", id=lambda x: x and x.startswith('hafta_')):
+            cols = row.find_all("td")
+            if len(cols) >= 2:
+                weekly_topics.append(f"Week {clean_text(cols[0].get_text())}: {clean_text(cols[1].get_text())}")
+    details['weekly_topics'] = weekly_topics
+    return details
+
+
+def label_row(label, value):
+    return (f'<tr><td class="text-bold"><strong>{escape(label)}</strong></td>'
+            f'<td colspan="5">{escape(str(value))}</td></tr>')
+
+
+def synthetic_page(course):
+    """Ders kaydından ects.ieu.edu.tr ders sayfasının yapısında HTML (ağ yokken ölçüm için)."""
+    menu = "".join(f'<li><a href="akademik.php?section=d{i}.cs.ieu.edu.tr&lang=en">Department {i}</a></li>'
+                   for i in range(40))
+    evaluation = "".join(
+        f"<tr><td>{escape(str(e.get('activity', '')))}</td><td>{escape(str(e.get('count', '')))}</td>"
+        f"<td>{escape(str(e.get('weight_percent', '')))}</td><td></td></tr>"
+        for e in course.get("evaluation_system") or [])
+    weeks = "".join(
+        f'<tr id="hafta_{i}"><td>{i}</td><td>{escape(WEEK_PREFIX.sub("", str(topic)))}</td>'
+        f"<td>Lecture notes, chapter {i}</td></tr>"
+        for i, topic in enumerate(course.get("weekly_topics") or [], 1))
+    outcomes = "".join(f"<li>{escape(str(o))}</li>" for o in course.get("learning_outcomes") or [])
+    program_outcomes = "".join(
+        f"<tr><td>{i}</td><td>To be able to apply knowledge of mathematics, science and engineering "
+        f"to problem {i}.</td>" + "".join(f'<td class="text-center">{"X" if (i + j) % 3 == 0 else ""}</td>'
+                                           for j in range(1, 6)) + "</tr>"
+        for i in range(1, PROGRAM_OUTCOME_ROWS + 1))
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{escape(course['course_code'])}</title>
+<link rel="stylesheet" href="css/bootstrap.min.css"><script src="js/jquery.min.js"></script>
+<script>var lang = "en"; function toggle(id) {{ document.getElementById(id).classList.toggle("open"); }}</script>
+</head><body><div class="container"><nav class="navbar"><ul class="nav">{menu}</ul></nav>
+<div class="row"><div class="col-md-12"><h3>{escape(course['course_name'])}</h3>
+<table class="table table-bordered table-condensed">
+<tr><td><strong>Course Name</strong></td><td><strong>Code</strong></td><td><strong>Semester</strong></td>
+<td><strong>Theory (hour/week)</strong></td><td><strong>Application/Lab (hour/week)</strong></td>
+<td><strong>Local Credits</strong></td><td><strong>ECTS</strong></td></tr>
+<tr><td>{escape(course['course_name'])}</td><td>{escape(course['course_code'])}</td>
+<td><div id="semester">{escape(str(course.get('semester', '')))}</div></td>
+<td><div id="weekly_hours">{escape(str(course.get('theory_hours', '')))}</div></td>
+<td><div id="app_hours">{escape(str(course.get('lab_hours', '')))}</div></td>
+<td><div id="ieu_credit">{escape(str(course.get('local_credit', '')))}</div></td>
+<td><div id="ects_credit">{escape(str(course.get('ects', '')))}</div></td></tr>
+</table>
+<table class="table table-bordered table-condensed">
+{label_row("Prerequisites", course.get("prerequisites", "None"))}
+{label_row("Course Language", "English")}
+{label_row("Course Type", course.get("type", ""))}
+{label_row("Course Level", "First Cycle")}
+{label_row("Mode of Delivery", "face to face")}
+{label_row("Course Objectives", course.get("objectives", ""))}
+<tr><td class="text-bold"><strong>Learning Outcomes</strong></td><td colspan="5">
+The students who succeeded in this course;<ul id="outcome">{outcomes}</ul></td></tr>
+{label_row("Course Description", course.get("description", ""))}
+</table>
+<h4>WEEKLY SUBJECTS AND RELATED PREPARATION STUDIES</h4>
+<table class="table table-bordered" id="weeks"><tr><td>Week</td><td>Subjects</td><td>Required Materials</td></tr>
+{weeks}</table>
+<h4>EVALUATION SYSTEM</h4>
+<table class="table table-bordered" id="evaluation_table1">{evaluation}</table>
+<h4>COURSE'S CONTRIBUTION TO PROGRAM</h4>
+<table class="table table-bordered" id="program_outcomes">{program_outcomes}</table>
+</div></div><footer><p>Izmir University of Economics</p></footer></div></body></html>"""
+
+
+def cache_name(course):
+    return re.sub(r"[^A-Za-z0-9]+", "_", course["course_code"]).strip("_") + ".html"
+
+
+def fetch_pages(courses, cache_dir, limit):
+    """Ders bağlantılarındaki sayfaları önbelleğe indirir (kibarca, sırayla)."""
+    import requests
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fetched = 0
+    for course in courses:
+        path = os.path.join(cache_dir, cache_name(course))
+        if fetched >= limit or not course.get("link") or os.path.exists(path):
+            continue
+        try:
+            response = requests.get(course["link"], timeout=12)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"  ⚠️ {course['course_code']} indirilemedi: {e}")
+            continue
+        with open(path, "wb") as f:
+            f.write(response.content)
+        fetched += 1
+        time.sleep(0.1)
+    print(f"  {fetched} sayfa önbelleğe alındı: {cache_dir}")
+
+
+def load_pages(courses, cache_dir, limit):
+    """[(ad, html bayt)]: önbellekteki sayfalar, yoksa sentetik sayfalar."""
+    if os.path.isdir(cache_dir):
+        names = sorted(n for n in os.listdir(cache_dir) if n.endswith(".html"))[:limit]
+        if names:
+            pages = []
+            for name in names:
+                with open(os.path.join(cache_dir, name), "rb") as f:
+                    pages.append((name, f.read()))
+            return pages, "cache"
+    unique = {}
+    for course in courses:
+        unique.setdefault(cache_name(course), course)
+    pages = [(name, synthetic_page(course).encode("utf-8")) for name, course in list(unique.items())[:limit]]
+    return pages, "synthetic"
+
+
+def outcome(parse, html):
+    """Ayrıştırma sonucu; hata fırlatan sayfa get_course_details'te None olur, burada hata tipiyle karşılaştırılır."""
+    try:
+        return parse(html)
+    except Exception as e:
+        return f"error: {type(e).__name__}"
+
+
+def methods():
+    result = {"legacy (html.parser, full tree)": legacy_parse,
+              "strained (html.parser)": lambda html: parse_course_details(html, parser="html.parser")}
+    if HTML_PARSER != "html.parser":
+        result[f"{HTML_PARSER} (C tree)"] = lambda html: parse_course_details(html, parser=HTML_PARSER)
+    return result
+
+
+def run(args):
+    with open(args.json_file, "r", encoding="utf-8") as f:
+        courses = json.load(f)
+    if args.fetch:
+        fetch_pages(courses, args.cache_dir, args.fetch)
+    pages, source = load_pages(courses, args.cache_dir, args.limit)
+    if not pages:
+        print("Ayrıştırılacak sayfa yok.")
+        sys.exit(1)
+
+    expected = [outcome(legacy_parse, html) for _, html in pages]
+    rows = []
+    for name, parse in methods().items():
+        mismatches = [page for (page, html), want in zip(pages, expected) if outcome(parse, html) != want]
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            for _, html in pages:
+                outcome(parse, html)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        rows.append({"method": name, "pages_per_s": round(len(pages) / best, 1),
+                     "ms_per_page_p50": round(percentile(timings, 50) / len(pages) * 1000.0, 3),
+                     "mismatches": len(mismatches), "mismatched_pages": mismatches[:10]})
+    baseline = rows[0]["pages_per_s"]
+    for row in rows:
+        row["speedup"] = round(row["pages_per_s"] / baseline, 2) if baseline else 0.0
+    return {"source": source, "pages": len(pages),
+            "bytes_mean": round(sum(len(html) for _, html in pages) / len(pages)),
+            "rounds": args.rounds, "methods": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ders sayfası ayrıştırma: eski yol vs. hedefli ayrıştırma")
+    parser.add_argument("--json-file", default=OUTPUT_FILE)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--fetch", type=int, default=0, help="Önbelleğe en fazla bu kadar sayfa indir")
+    parser.add_argument("--limit", type=int, default=400, help="Ölçülecek en fazla sayfa")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--output", default=os.path.join(HERE, "results", "bench_parsing.json"))
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"\n{results['pages']} sayfa ({results['source']}, ortalama {results['bytes_mean'] / 1024:.1f} KB), "
+          f"{results['rounds']} tur")
+    print(f"{'YÖNTEM':<34}{'sayfa/sn':>10}{'ms/sayfa':>10}{'hız':>7}{'farklı':>8}")
+    for row in results["methods"]:
+        print(f"{row['method']:<34}{row['pages_per_s']:>10.1f}{row['ms_per_page_p50']:>10.2f}"
+              f"{row['speedup']:>6.2f}x{row['mismatches']:>8}")
+        if row["mismatched_pages"]:
+            print(f"   farklı çıktı: {', '.join(row['mismatched_pages'])}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"📁 Sonuçlar kaydedildi: {args.output}")
+    if any(row["mismatches"] for row in results["methods"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
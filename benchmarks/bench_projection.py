@@ -0,0 +1,129 @@
+"""
+Niyete göre alan projeksiyonunun (field_projection.py) context boyutu ve depo okumasına etkisi (offline).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_projection --embedding hash
+    python -m benchmarks.bench_projection --embedding hash --chunking section
+
+benchmarks/projection_queries.json'daki alan odaklı sorular kural tabanlı router'dan geçirilir ve
+main.py'deki gibi cevaplanacak context üretilir (kod varsa birebir arama, yoksa vektör araması):
+  tam      : CONTEXT_MODE="full", projeksiyon yok
+  özet     : CONTEXT_MODE="digest" (varsayılan), projeksiyon yok
+  projeksiyon : özet + `fields`
+Raporlanan: soru başına context token'ı, ders deposundan okunan bayt ve retrieval süresi.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+from benchmarks.fake_groq import estimate_tokens
+from benchmarks.run_benchmark import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+QUERIES_FILE = os.path.join(HERE, "projection_queries.json")
+MODES = ("full", "digest", "projection")
+
+
+class CountingStore:
+    """CourseStore sarmalayıcısı: find_by_code'un döndürdüğü alan değerlerinin toplam boyutunu sayar."""
+
+    def __init__(self, store):
+        self.store = store
+        self.bytes_read = 0
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def find_by_code(self, course_code, columns=None):
+        records = self.store.find_by_code(course_code, columns=columns)
+        for record in records:
+            self.bytes_read += sum(len(str(v).encode("utf-8")) for v in record.to_dict().values())
+        return records
+
+
+def build_retriever(args):
+    from course_digest import CourseDigests
+    from course_store import open_course_store
+    from local_collection import HashEmbeddingFunction, build_local_collection, build_local_section_collection
+    from rag_retriever import CourseRetriever
+    from vector_create import load_course_data
+
+    embedding_fn = HashEmbeddingFunction() if args.embedding == "hash" else None
+    collection = build_local_collection(args.json_file, embedding_function=embedding_fn)
+    section_collection = None
+    if args.chunking == "section":
+        section_collection = build_local_section_collection(args.json_file,
+                                                            embedding_function=collection.embedding_function)
+    store = CountingStore(open_course_store())
+    return CourseRetriever(collection=collection, section_collection=section_collection, store=store,
+                           digests=CourseDigests.from_courses(load_course_data(args.json_file)))
+
+
+def context_for(retriever, route, query, fields):
+    """main.py'deki birebir arama / vektör araması sırası (liste niyetleri bu ölçümde yok)."""
+    codes = route.get("specific_course_code")
+    codes = [] if codes in (None, "None") else codes if isinstance(codes, list) else [codes]
+    found = [c for c in (retriever.retrieve_exact_match(code, fields=fields) for code in codes) if c]
+    if found:
+        return "\n\n".join(found)
+    return retriever.retrieve_context(" ".join(route.get("search_queries") or [query]), n_results=3, fields=fields)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alan projeksiyonu: context token'ı / depo okuması")
+    parser.add_argument("--queries", default=QUERIES_FILE)
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--embedding", choices=["minilm", "hash"], default="minilm")
+    parser.add_argument("--chunking", choices=["course", "section"], default="course")
+    parser.add_argument("--output", default=os.path.join(HERE, "results", "bench_projection.json"))
+    args = parser.parse_args()
+
+    from field_projection import projection_for
+    from rag_router import QueryRouter
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    with contextlib.redirect_stdout(io.StringIO()):
+        retriever = build_retriever(args)
+    router = QueryRouter(client=object())  # sadece kural tabanlı yönlendirme kullanılır
+
+    rows = []
+    for q in queries:
+        route = router.rule_based_route(q["query"])
+        fields = projection_for(route, q["query"])
+        row = {"id": q["id"], "query": q["query"], "fields": list(fields or [])}
+        for mode in MODES:
+            retriever.CONTEXT_MODE = "full" if mode == "full" else "digest"
+            retriever.store.bytes_read = 0
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                context = context_for(retriever, route, q["query"], fields if mode == "projection" else None)
+            row[mode] = {"tokens": estimate_tokens(context or ""), "store_bytes": retriever.store.bytes_read,
+                         "ms": round((time.perf_counter() - start) * 1000.0, 3)}
+        rows.append(row)
+
+    print(f"\n{'SORU':<5}{'ALANLAR':<26}" + "".join(f"{m + ' tok':>16}" for m in MODES) + f"{'depo B (tam/proj)':>20}")
+    for row in rows:
+        print(f"{row['id']:<5}{','.join(row['fields']) or '-':<26}"
+              + "".join(f"{row[m]['tokens']:>16}" for m in MODES)
+              + f"{str(row['full']['store_bytes']) + '/' + str(row['projection']['store_bytes']):>20}")
+    summary = {}
+    for mode in MODES:
+        summary[mode] = {"tokens": sum(r[mode]["tokens"] for r in rows),
+                         "store_bytes": sum(r[mode]["store_bytes"] for r in rows),
+                         "p50_ms": round(percentile([r[mode]["ms"] for r in rows], 50), 3)}
+    print(" ".join(f"{m}: {s['tokens']} token, {s['store_bytes']} B depo, p50 {s['p50_ms']} ms;"
+                   for m, s in summary.items()))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"embedding": args.embedding, "chunking": args.chunking, "summary": summary, "queries": rows},
+                  f, ensure_ascii=False, indent=2)
+    print(f"📁 Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
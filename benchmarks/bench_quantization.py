@@ -0,0 +1,145 @@
+"""
+HNSW indeksinde düşük hassasiyetli vektör saklamanın (hnsw_index.PRECISIONS) bellek / gecikme / recall@k ölçümü.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_quantization --embedding hash --sizes real,20000
+
+Graf bir kez float32 ile kurulur; her hassasiyet için kodlar üretilip kaydedilir ve indeks mmap ile açılır.
+  real : gerçek ders bölüm parçaları + gerçek metadata, sorgular benchmarks/eval_queries.json
+         (bu boyutta arama tam taramadır: kodlarla ilk geçiş + float32 ile yeniden puanlama)
+  N    : gerçek parçaların gürültülü N kopyası (bench_hnsw ile aynı sentetik bölüm / yıl; graf gezintisi)
+Raporlanan: sorgu yolunun bellekte tuttuğu boyut (kodlar + graf), mmap'li float32 dosyası, açılış süresi,
+filtre türü başına recall@k (float32 tam aramaya göre) ve p50 / p99.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_hnsw import base_vectors, exact_top, filter_modes, perturb, synthetic_metadata
+from benchmarks.run_benchmark import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EVAL_QUERIES = os.path.join(HERE, "eval_queries.json")
+
+
+def real_corpus(json_file, embedding_fn):
+    """Gerçek bölüm parçaları: (vektörler, metadata, sorgu vektörleri, filtre türleri)."""
+    from vector_create import build_section_records, department_flag, load_course_data
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        documents, metadatas, _ = build_section_records(load_course_data(json_file))
+    vectors = np.asarray(embedding_fn(documents), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    with open(EVAL_QUERIES, "r", encoding="utf-8") as f:
+        queries = np.asarray(embedding_fn([q["query"] for q in json.load(f)]), dtype=np.float32)
+    modes = {"yok": None, "bölüm": {department_flag("Software Engineering"): True}}
+    return vectors, metadatas, queries, modes
+
+
+def synthetic_corpus(size, base, args, rng):
+    vectors = perturb(base, size, args.noise, rng)
+    return vectors, synthetic_metadata(size, rng), perturb(base, args.queries, args.noise, rng), filter_modes(rng)
+
+
+def measure(collection, vectors, queries, modes, k):
+    rows = []
+    for mode, where in modes.items():
+        mask = collection._mask(where)
+        mask = np.ones(len(vectors), dtype=bool) if mask is None else mask
+        timings, recalls = [], []
+        for q in queries:
+            q = q / np.linalg.norm(q)
+            start = time.perf_counter()
+            hits = collection.query(query_embeddings=[q], n_results=k, where=where, include=[])["ids"][0]
+            timings.append((time.perf_counter() - start) * 1000.0)
+            truth = {collection.ids[p] for p in exact_top(vectors, mask, q, k)}
+            recalls.append(len(truth & set(hits)) / len(truth) if truth else 1.0)
+        rows.append({"filter": mode, "matching": int(mask.sum()), "recall": round(float(np.mean(recalls)), 4),
+                     "p50_ms": round(percentile(timings, 50), 3), "p99_ms": round(percentile(timings, 99), 3)})
+    return rows
+
+
+def bench_corpus(label, vectors, metadatas, queries, modes, args):
+    from hnsw_index import PRECISIONS, HNSWCollection
+
+    ids = [f"doc-{i}" for i in range(len(vectors))]
+    collection = HNSWCollection("bench", embedding_function=lambda texts: None, precision="float32")
+    start = time.perf_counter()
+    collection.add(ids=ids, documents=[""] * len(ids), metadatas=metadatas, embeddings=vectors)
+    build_s = time.perf_counter() - start
+    print(f"   {label}: {len(ids)} parça, kurulum {build_s:.1f} s")
+
+    directory = tempfile.mkdtemp(prefix="bench_quant_")
+    results = []
+    try:
+        for precision in PRECISIONS:
+            path = os.path.join(directory, f"{precision}.hnsw")
+            collection.index.set_precision(precision)
+            collection.save(path)
+            start = time.perf_counter()
+            loaded = HNSWCollection.load(path, embedding_function=lambda texts: None)
+            load_ms = (time.perf_counter() - start) * 1000.0
+
+            memory = loaded.index.memory_bytes()
+            results.append({
+                "corpus": label, "size": len(ids), "precision": precision, "load_ms": round(load_ms, 2),
+                "codes_mb": round(memory["codes"] / 2 ** 20, 3), "graph_mb": round(memory["graph"] / 2 ** 20, 3),
+                # float32'de sorgu yolu doğrudan mmap'li vektörleri okur; diğerlerinde sadece yeniden puanlanan satırlar
+                "query_path_mb": round((memory["codes"] + memory["graph"]
+                                        + (memory["vectors"] if precision == "float32" else 0)) / 2 ** 20, 3),
+                "float32_file_mb": round(memory["vectors"] / 2 ** 20, 3),
+                "filters": measure(loaded, vectors, queries, modes, args.k),
+            })
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW float16 / int8 / binary saklama: bellek, gecikme, recall@k")
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--embedding", choices=["minilm", "hash"], default="minilm")
+    parser.add_argument("--sizes", default="real,20000", help="'real' = gerçek korpus; sayı = sentetik boyut")
+    parser.add_argument("--queries", type=int, default=200, help="Sentetik korpusta sorgu sayısı")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=os.path.join(HERE, "results", "bench_quantization.json"))
+    args = parser.parse_args()
+
+    from local_collection import HashEmbeddingFunction, default_embedding_function
+
+    embedding_fn = HashEmbeddingFunction() if args.embedding == "hash" else default_embedding_function()
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for size in args.sizes.split(","):
+        if size == "real":
+            results += bench_corpus("gerçek", *real_corpus(args.json_file, embedding_fn), args)
+        else:
+            base = base_vectors(args.json_file, args.embedding)
+            results += bench_corpus("sentetik", *synthetic_corpus(int(size), base, args, rng), args)
+
+    print(f"\n{'KORPUS':<10}{'PARÇA':>7} {'HASSASİYET':<10}{'sorgu yolu MB':>14}{'kod MB':>8}{'float32 MB':>11}"
+          f"{'açılış ms':>10}  {'FİLTRE':<10}{'recall':>7}{'p50':>8}{'p99':>8}")
+    for row in results:
+        for i, f in enumerate(row["filters"]):
+            head = (f"{row['corpus']:<10}{row['size']:>7} {row['precision']:<10}{row['query_path_mb']:>14.2f}"
+                    f"{row['codes_mb']:>8.2f}{row['float32_file_mb']:>11.2f}{row['load_ms']:>10.1f}") if i == 0 \
+                else " " * 70
+            print(f"{head}  {f['filter']:<10}{f['recall']:>7.3f}{f['p50_ms']:>8.2f}{f['p99_ms']:>8.2f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"embedding": args.embedding, "k": args.k, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"📁 Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
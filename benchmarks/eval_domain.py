@@ -0,0 +1,93 @@
+"""
+Alan dışı soru kısa devresinin (domain_guard.py) eşik kalibrasyonu ve testi (tamamen offline).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.eval_domain --embedding hash
+
+Etiketli küme (benchmarks/domain_queries.json) sınıf dengesi korunarak iki parçaya bölünür;
+eşik bir parçada kalibre edilip diğerinde test edilir (ve tersi). Raporlanan:
+  yanlış ret  : reddedilen alan içi soru oranı (0 olmalı — bu sorular LLM cevabını kaybeder)
+  alan dışı ret: kısa devre edilen alan dışı soru oranı (router + arama + LLM tasarrufu)
+Son olarak tüm küme ile kalibre edilen eşik ve soru başına kontrol süresi yazdırılır.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+from benchmarks.run_benchmark import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def split_folds(labeled):
+    """Her sınıfı sırayla iki parçaya dağıtır (tekrarlanabilir, tabakalı)."""
+    folds = ([], [])
+    for label in (True, False):
+        for i, q in enumerate(q for q in labeled if q["in_domain"] == label):
+            folds[i % 2].append(q)
+    return folds
+
+
+def rates(guard, embedding_fn, queries):
+    verdicts = [guard.check(q["query"], embedding_fn) for q in queries]
+    inside = [v for v, q in zip(verdicts, queries) if q["in_domain"]]
+    outside = [v for v, q in zip(verdicts, queries) if not q["in_domain"]]
+    false_reject = sum(1 for v in inside if not v["in_domain"]) / len(inside) if inside else 0.0
+    rejected = sum(1 for v in outside if not v["in_domain"]) / len(outside) if outside else 0.0
+    return false_reject, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alan dışı soru eşiği kalibrasyonu / testi")
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--embedding", choices=["minilm", "hash"], default="minilm")
+    parser.add_argument("--output", default=os.path.join(HERE, "results", "eval_domain.json"))
+    args = parser.parse_args()
+
+    from domain_guard import DomainGuard, load_labeled_queries
+    from local_collection import HashEmbeddingFunction, build_local_collection
+
+    embedding_fn = HashEmbeddingFunction() if args.embedding == "hash" else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        collection = build_local_collection(args.json_file, embedding_function=embedding_fn)
+    embedding_fn = collection.embedding_function
+    guard = DomainGuard.from_collection(collection)
+    labeled = load_labeled_queries()
+
+    print(f"📂 {sum(q['in_domain'] for q in labeled)} alan içi, {sum(not q['in_domain'] for q in labeled)} "
+          f"alan dışı soru; {len(guard.departments)} bölüm merkezi, {len(guard.vectors)} ders vektörü")
+    print(f"\n{'KALİBRASYON -> TEST':<22}{'eşik':>8}{'yanlış ret':>12}{'alan dışı ret':>15}")
+
+    folds = split_folds(labeled)
+    fold_results = []
+    for name, calibration, test in (("A -> B", folds[0], folds[1]), ("B -> A", folds[1], folds[0])):
+        guard.calibrate(embedding_fn, calibration)
+        false_reject, rejected = rates(guard, embedding_fn, test)
+        fold_results.append({"fold": name, "threshold": round(guard.threshold, 4),
+                             "false_reject": round(false_reject, 4), "out_of_domain_rejected": round(rejected, 4)})
+        print(f"{name:<22}{guard.threshold:>8.3f}{false_reject:>12.1%}{rejected:>15.1%}")
+
+    guard.calibrate(embedding_fn, labeled)
+    false_reject, rejected = rates(guard, embedding_fn, labeled)
+    print(f"{'tümü (nihai eşik)':<22}{guard.threshold:>8.3f}{false_reject:>12.1%}{rejected:>15.1%}")
+
+    timings = []
+    for q in labeled:
+        start = time.perf_counter()
+        guard.check(q["query"], embedding_fn)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    print(f"\nSoru başına kontrol: p50 {percentile(timings, 50):.3f} ms, p95 {percentile(timings, 95):.3f} ms")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"embedding": args.embedding, "folds": fold_results, "threshold": round(guard.threshold, 4),
+                   "false_reject": round(false_reject, 4), "out_of_domain_rejected": round(rejected, 4),
+                   "check_p50_ms": round(percentile(timings, 50), 4)}, f, ensure_ascii=False, indent=2)
+    print(f"📁 Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
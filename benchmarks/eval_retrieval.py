@@ -0,0 +1,194 @@
+"""
+retrieve_context ayarları için kalite / maliyet / gecikme taraması (tamamen offline).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.eval_retrieval --embedding hash
+    python -m benchmarks.eval_retrieval --n-results 3 4 6 --max-distance 1.4 1.6 none
+    python -m benchmarks.eval_retrieval --embedding hash --chunking section
+    python -m benchmarks.eval_retrieval --embedding hash --no-dedup   # ortak dersler bölüm başına ayrı kayıt
+
+Etiketli sorguları (benchmarks/eval_queries.json) yerel koleksiyona karşı her ayar
+kombinasyonu için çalıştırır ve recall@k, MRR, context token'ı ve gecikmeyi raporlar.
+Sonunda en iyi recall'dan `--recall-tolerance` kadar düşük kalan en ucuz ayar önerilir.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import re
+import time
+
+from benchmarks.fake_groq import estimate_tokens
+from benchmarks.run_benchmark import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+QUERIES_FILE = os.path.join(HERE, "eval_queries.json")
+COURSE_HEADER = re.compile(r"^\[COURSE: (.+?) - ", re.MULTILINE)
+
+# Taranacak ayarlar ve varsayılan değer aralıkları
+KNOBS = {
+    "n_results": [3, 4, 6, 10],
+    "FETCH_MULTIPLIER": [2, 3, 5],
+    "FILTERED_FETCH_LIMIT": [20, 50, 100],
+    "MAX_DISTANCE": [1.2, 1.4, 1.6, None],
+    "HEAD_DOC_CHARS": [400, 1000],
+    "TAIL_DOC_CHARS": [200, 400],
+    "SECTION_FETCH_MULTIPLIER": [2, 4],
+}
+
+
+class CachedEmbedding:
+    """Aynı sorgu her konfigürasyonda tekrar embed edilmesin; ölçülen süre saf arama süresi olur."""
+
+    def __init__(self, embedding_fn):
+        self.embedding_fn = embedding_fn
+        self.cache = {}
+
+    def __call__(self, input):
+        key = tuple(input)
+        if key not in self.cache:
+            self.cache[key] = self.embedding_fn(list(input))
+        return self.cache[key]
+
+
+def returned_codes(context):
+    """retrieve_context çıktısındaki ders kodlarını sırasıyla (tekrarsız) döner."""
+    codes = []
+    for code in COURSE_HEADER.findall(context or ""):
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+def score(codes, expected, k):
+    top = codes[:k]
+    hits = [c for c in expected if c in top]
+    recall = len(hits) / len(expected) if expected else 1.0
+    rr = 0.0
+    for rank, code in enumerate(top, 1):
+        if code in expected:
+            rr = 1.0 / rank
+            break
+    return recall, rr
+
+
+def evaluate(retriever, queries, config):
+    for knob, value in config.items():
+        if knob != "n_results":
+            setattr(retriever, knob, value)
+
+    n_results = config["n_results"]
+    recalls, rrs, tokens, latencies = [], [], [], []
+
+    for q in queries:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            context = retriever.retrieve_context(q["query"], n_results=n_results, filters=q.get("filters"))
+        latencies.append((time.perf_counter() - start) * 1000.0)
+
+        recall, rr = score(returned_codes(context), q["expected"], n_results)
+        recalls.append(recall)
+        rrs.append(rr)
+        tokens.append(estimate_tokens(context or ""))
+
+    return {
+        "config": config,
+        "recall_at_k": round(sum(recalls) / len(recalls), 4),
+        "mrr": round(sum(rrs) / len(rrs), 4),
+        "context_tokens_mean": round(sum(tokens) / len(tokens), 1),
+        "latency_p50_ms": round(percentile(latencies, 50), 3),
+        "latency_p95_ms": round(percentile(latencies, 95), 3),
+    }
+
+
+def recommend(results, tolerance):
+    """En iyi recall'a `tolerance` kadar yakın olan ayarlar içinden en az token harcayanı seçer."""
+    best_recall = max(r["recall_at_k"] for r in results)
+    eligible = [r for r in results if r["recall_at_k"] >= best_recall - tolerance]
+    return min(eligible, key=lambda r: (r["context_tokens_mean"], r["latency_p50_ms"], -r["mrr"]))
+
+
+def parse_grid(args):
+    grid = {}
+    for knob, default in KNOBS.items():
+        values = getattr(args, knob.lower())
+        if values is None:
+            grid[knob] = default
+            continue
+        parsed = []
+        for v in values:
+            if str(v).lower() == "none":
+                parsed.append(None)
+            elif knob == "MAX_DISTANCE":
+                parsed.append(float(v))
+            else:
+                parsed.append(int(v))
+        grid[knob] = parsed
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="retrieve_context recall / maliyet taraması")
+    parser.add_argument("--queries", default=QUERIES_FILE)
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--embedding", choices=["minilm", "hash"], default="minilm")
+    parser.add_argument("--chunking", choices=["course", "section"], default="course",
+                        help="'section' bölüm parçalarını arayıp derslere gruplar")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Ortak dersleri tekilleştirmeden (bölüm başına ayrı kayıt) indeksle")
+    parser.add_argument("--recall-tolerance", type=float, default=0.02)
+    parser.add_argument("--output", default=os.path.join(HERE, "results", "eval_retrieval.json"))
+    for knob in KNOBS:
+        parser.add_argument(f"--{knob.lower().replace('_', '-')}", dest=knob.lower(), nargs="+")
+    args = parser.parse_args()
+
+    from local_collection import HashEmbeddingFunction, build_local_collection, build_local_section_collection
+    from rag_retriever import CourseRetriever
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    embedding_fn = HashEmbeddingFunction() if args.embedding == "hash" else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        collection = build_local_collection(args.json_file, embedding_function=embedding_fn, dedup=not args.no_dedup)
+        section_collection = None
+        if args.chunking == "section":
+            section_collection = build_local_section_collection(
+                args.json_file, embedding_function=collection.embedding_function, dedup=not args.no_dedup
+            )
+        retriever = CourseRetriever(collection=collection,
+                                    embedding_function=CachedEmbedding(collection.embedding_function),
+                                    section_collection=section_collection)
+
+    # Bölüm çarpanı sadece section modunda anlamlı; course modunda ızgarayı büyütmesin
+    if args.chunking == "course" and args.section_fetch_multiplier is None:
+        args.section_fetch_multiplier = [CourseRetriever.SECTION_FETCH_MULTIPLIER]
+
+    grid = parse_grid(args)
+    knobs = list(grid)
+    results = []
+    for values in itertools.product(*(grid[k] for k in knobs)):
+        results.append(evaluate(retriever, queries, dict(zip(knobs, values))))
+
+    results.sort(key=lambda r: (-r["recall_at_k"], r["context_tokens_mean"]))
+    best = recommend(results, args.recall_tolerance)
+
+    print(f"\n{'recall@k':>9}{'MRR':>8}{'tokens':>9}{'p50 ms':>9}  config")
+    for r in results[:15]:
+        print(f"{r['recall_at_k']:>9.3f}{r['mrr']:>8.3f}{r['context_tokens_mean']:>9.0f}"
+              f"{r['latency_p50_ms']:>9.2f}  {r['config']}")
+    print(f"\n✅ Önerilen (recall toleransı {args.recall_tolerance}): {best['config']}")
+    print(f"   recall@k={best['recall_at_k']} MRR={best['mrr']} tokens={best['context_tokens_mean']}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"embedding": args.embedding, "chunking": args.chunking, "dedup": not args.no_dedup,
+                   "queries": len(queries), "grid": grid,
+                   "recommended": best, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"📁 Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
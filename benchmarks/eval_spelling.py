@@ -0,0 +1,190 @@
+"""
+Yazım düzeltmesinin (spell_correction.py) kendini amorti edip etmediğini ölçer (tamamen offline).
+
+Kullanım (repo kökünden):
+    python -m benchmarks.eval_spelling --embedding hash --variants 3
+
+Etiketli sorgular (benchmarks/eval_queries.json) hem olduğu gibi hem de yapay yazım hatalarıyla
+(kelime başına bir silme / ekleme / değiştirme / yer değiştirme, sabit tohumla) çalıştırılır.
+Her sorgu düzeltme kapalı ve açık iki kez aranır; raporlanan:
+  düzeltilen %   : düzeltmenin sorguyu değiştirdiği oran
+  sonuç değişen %: döndürülen ders listesinin değiştiği oran
+  recall kapalı / açık, sayım isabeti kapalı / açık (count_courses, hatasız sorgunun sayısıyla aynı mı)
+ve kelime başına düzeltme süresi.
+
+"hatasız" set yalnızca ders metinlerinde geçen kelimelerden oluşur; yanlış düzeltmeyi ölçemez.
+"sözlük dışı" set doğru yazılmış ama kelime hazinesinde olmayan kelimeleri ("courses on compilers")
+düzeltmenin ne sıklıkla başka bir kelimeye çevirdiğini (yanlış düzeltme %) raporlar.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import string
+import time
+
+from benchmarks.eval_retrieval import QUERIES_FILE, returned_codes, score
+from benchmarks.run_benchmark import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Doğru yazılmış, ders metinlerinde geçmeyen (ya da sadece başka çekimiyle geçen) kelimeler
+OUT_OF_VOCABULARY_WORDS = (
+    "compilers", "compiler", "drones", "drone", "startup", "welding", "singing", "cooking", "robots",
+    "blockchain", "cybersecurity", "painting", "swimming", "accounting", "quantum", "investing", "hacking",
+    "astronomy", "sports", "nursing", "medicine", "gardening", "psychology", "poetry", "gaming", "dancing",
+    "farming", "biology", "chemistry", "geology", "marketing", "finance", "banking", "photography",
+    "aerodynamics", "welders", "podcasts", "cryptocurrency",
+)
+OUT_OF_VOCABULARY_TEMPLATES = ("courses on {}", "is there a {} course", "how many courses cover {}")
+
+
+def make_typo(word, rng):
+    """Kelimeye tek bir klavye hatası ekler (5 harften kısa kelimelere dokunmaz)."""
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(("delete", "insert", "replace", "transpose"))
+    if kind == "delete":
+        return word[:i] + word[i + 1:]
+    if kind == "insert":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if kind == "replace":
+        return word[:i] + rng.choice(string.ascii_lowercase.replace(word[i], "")) + word[i + 1:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def typo_queries(queries, variants, seed):
+    rng = random.Random(seed)
+    result = []
+    for q in queries:
+        for n in range(variants):
+            words = q["query"].split()
+            # En az bir kelime bozulsun
+            target = rng.choice([i for i, w in enumerate(words) if len(w) >= 5] or [0])
+            words[target] = make_typo(words[target], rng)
+            result.append({**q, "id": f"{q['id']}-typo{n}", "query": " ".join(words), "clean": q["query"]})
+    return result
+
+
+def false_corrections(corrector, words):
+    """Sözlük dışı ama doğru yazılmış kelimeler: kaç tanesi başka bir kelimeye çevrildi."""
+    words = [w for w in words if w not in corrector]
+    changed = [(w, corrector.lookup(w)) for w in words if corrector.lookup(w) != w]
+    queries = [t.format(w) for w in words for t in OUT_OF_VOCABULARY_TEMPLATES]
+    changed_queries = sum(1 for q in queries if corrector.correct(q)[1])
+    return {
+        "set": "sözlük dışı",
+        "words": len(words),
+        "queries": len(queries),
+        "false_correction_pct": round(100.0 * len(changed) / len(words), 1) if words else 0.0,
+        "queries_changed_pct": round(100.0 * changed_queries / len(queries), 1) if queries else 0.0,
+        "false_corrections": [f"{a}->{b}" for a, b in changed],
+    }
+
+
+def run(retriever, queries, n_results, correction):
+    retriever.SPELL_CORRECTION = correction
+    rows = []
+    for q in queries:
+        with contextlib.redirect_stdout(io.StringIO()):
+            context = retriever.retrieve_context(q["query"], n_results=n_results, filters=q.get("filters"))
+            count = retriever.count_courses(q.get("filters") or {}, q["query"], "both")
+        codes = returned_codes(context)
+        rows.append({"codes": codes, "recall": score(codes, q["expected"], n_results)[0], "count": count})
+    return rows
+
+
+def evaluate_set(name, retriever, queries, n_results, clean_counts):
+    off = run(retriever, queries, n_results, correction=False)
+    on = run(retriever, queries, n_results, correction=True)
+    corrected = sum(1 for q in queries if retriever.spell_corrector.correct(q["query"])[1])
+    changed = sum(1 for a, b in zip(off, on) if a["codes"] != b["codes"])
+    expected_counts = [clean_counts[q.get("clean", q["query"])] for q in queries]
+
+    def mean(values):
+        return round(sum(values) / len(values), 4) if values else 0.0
+
+    return {
+        "set": name,
+        "queries": len(queries),
+        "corrected_pct": round(100.0 * corrected / len(queries), 1),
+        "results_changed_pct": round(100.0 * changed / len(queries), 1),
+        "recall_off": mean([r["recall"] for r in off]),
+        "recall_on": mean([r["recall"] for r in on]),
+        "count_match_off": mean([float(r["count"] == c) for r, c in zip(off, expected_counts)]),
+        "count_match_on": mean([float(r["count"] == c) for r, c in zip(on, expected_counts)]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yazım düzeltmesinin arama sonuçlarına etkisi")
+    parser.add_argument("--queries", default=QUERIES_FILE)
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--embedding", choices=["minilm", "hash"], default="minilm")
+    parser.add_argument("--n-results", type=int, default=4)
+    parser.add_argument("--variants", type=int, default=3, help="Sorgu başına yazım hatalı varyant sayısı")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=os.path.join(HERE, "results", "eval_spelling.json"))
+    args = parser.parse_args()
+
+    from local_collection import HashEmbeddingFunction, build_local_collection
+    from rag_retriever import CourseRetriever
+    from spell_correction import SpellCorrector
+    from vector_create import load_course_data
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    course_data = load_course_data(args.json_file)
+    embedding_fn = HashEmbeddingFunction() if args.embedding == "hash" else None
+    corrector = SpellCorrector.from_courses(course_data)
+    with contextlib.redirect_stdout(io.StringIO()):
+        collection = build_local_collection(args.json_file, embedding_function=embedding_fn)
+        retriever = CourseRetriever(collection=collection, spell_corrector=corrector)
+
+    clean_counts = {}
+    retriever.SPELL_CORRECTION = False
+    for q in queries:
+        with contextlib.redirect_stdout(io.StringIO()):
+            clean_counts[q["query"]] = retriever.count_courses(q.get("filters") or {}, q["query"], "both")
+
+    typos = typo_queries(queries, args.variants, args.seed)
+    results = [
+        evaluate_set("hatasız", retriever, queries, args.n_results, clean_counts),
+        evaluate_set("yazım hatalı", retriever, typos, args.n_results, clean_counts),
+    ]
+    out_of_vocabulary = false_corrections(corrector, OUT_OF_VOCABULARY_WORDS)
+
+    # Kelime başına düzeltme süresi (önbellek boşken)
+    timings = []
+    for q in typos:
+        for word in q["query"].lower().split():
+            corrector._cache.clear()
+            start = time.perf_counter()
+            corrector.lookup(word)
+            timings.append((time.perf_counter() - start) * 1e6)
+
+    print(f"\n{'SET':<14}{'sorgu':>6}{'düzeltilen %':>14}{'sonuç değişen %':>17}"
+          f"{'recall kapalı':>15}{'açık':>7}{'sayım kapalı':>14}{'açık':>7}")
+    for r in results:
+        print(f"{r['set']:<14}{r['queries']:>6}{r['corrected_pct']:>14.1f}{r['results_changed_pct']:>17.1f}"
+              f"{r['recall_off']:>15.3f}{r['recall_on']:>7.3f}{r['count_match_off']:>14.3f}{r['count_match_on']:>7.3f}")
+    print(f"\n{out_of_vocabulary['set']}: {out_of_vocabulary['words']} kelime, yanlış düzeltme "
+          f"{out_of_vocabulary['false_correction_pct']:.1f}% (sorgu: {out_of_vocabulary['queries_changed_pct']:.1f}%)"
+          f" {', '.join(out_of_vocabulary['false_corrections'])}")
+    print(f"\nKelime başına düzeltme: p50 {percentile(timings, 50):.1f} µs, p95 {percentile(timings, 95):.1f} µs "
+          f"({len(corrector)} kelimelik sözlük)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"embedding": args.embedding, "n_results": args.n_results, "variants": args.variants,
+                   "results": results,
+                   "out_of_vocabulary": out_of_vocabulary, "lookup_p50_us": round(percentile(timings, 50), 2),
+                   "lookup_p95_us": round(percentile(timings, 95), 2)}, f, ensure_ascii=False, indent=2)
+    print(f"📁 Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
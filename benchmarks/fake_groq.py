@@ -0,0 +1,147 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ROUTE = {
+    "intent": "search",
+    "target_department": "None",
+    "course_type": "None",
+    "specific_course_code": "None",
+    "academic_year": "None",
+    "semester": "None",
+    "search_scope": "both"
+}
+
+
+def estimate_tokens(text):
+    # Llama tokenizer'ı için kaba tahmin: ~4 karakter = 1 token
+    return max(1, len(text) // 4)
+
+
+class FakeGroqServer:
+    """
+    Groq'un OpenAI uyumlu '/openai/v1/chat/completions' ucunu taklit eden yerel HTTP sunucusu.
+    Gerçek `groq` istemcisi GROQ_BASE_URL ile buraya yönlendirilir; böylece HTTP/JSON
+    maliyeti de ölçüme dahil olur.
+
+    - Router çağrıları (response_format=json_object) için `routes` sözlüğünden hazır JSON döner.
+    - Generator çağrıları için context uzunluğuna bağlı sabit bir cevap döner.
+    - Her iki rol için gecikme (ms) ve rastgele sapma (jitter) ayarlanabilir.
+    - `error_rate` oranında çağrı `error_status` (varsayılan 503) ile başarısız olur.
+    """
+
+    def __init__(self, routes=None, router_latency_ms=0.0, generator_latency_ms=0.0,
+                 jitter_ms=0.0, error_rate=0.0, error_status=503, seed=42, host="127.0.0.1", port=0):
+        self.routes = routes or {}
+        self.router_latency_ms = router_latency_ms
+        self.generator_latency_ms = generator_latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {"router": 0, "generator": 0, "errors": 0}
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                status, result = server.complete(payload)
+                body = json.dumps(result).encode("utf-8")
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _sleep(self, base_ms):
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        delay = max(0.0, base_ms + jitter) / 1000.0
+        if delay:
+            time.sleep(delay)
+
+    def _route_for(self, user_message):
+        route = dict(DEFAULT_ROUTE)
+        route["search_queries"] = [user_message]
+        route.update(self.routes.get(user_message.strip(), {}))
+        return route
+
+    def _should_fail(self):
+        with self._lock:
+            failed = self.error_rate and self._random.random() < self.error_rate
+            if failed:
+                self.calls["errors"] += 1
+            return failed
+
+    def complete(self, payload):
+        """(HTTP durum kodu, JSON gövdesi) döner."""
+        if self._should_fail():
+            return self.error_status, {"error": {"message": "fake-groq injected failure", "type": "server_error"}}
+
+        messages = payload.get("messages", [])
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        user_message = messages[-1].get("content", "") if messages else ""
+        is_router = (payload.get("response_format") or {}).get("type") == "json_object"
+
+        if is_router:
+            role = "router"
+            self._sleep(self.router_latency_ms)
+            content = json.dumps(self._route_for(user_message))
+        else:
+            role = "generator"
+            self._sleep(self.generator_latency_ms)
+            content = f"[fake-groq] Answer generated from {len(prompt)} characters of context."
+
+        with self._lock:
+            self.calls[role] += 1
+
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        return 200, {
+            "id": f"fake-{role}-{self.calls[role]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,239 @@
+"""
+Uçtan uca offline benchmark.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.run_benchmark --embedding hash --rounds 5
+    python -m benchmarks.run_benchmark --baseline benchmarks/results/abc1234.json
+
+CourseIntelligenceSystem'i yerel koleksiyon + sahte Groq sunucusu ile çalıştırır,
+altın soru setini tekrar oynatır ve aşama bazında p50/p95/p99 değerlerini JSON'a yazar.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+from collections import defaultdict
+
+from benchmarks.fake_groq import FakeGroqServer
+from rag_tracing import METRICS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_FILE = os.path.join(HERE, "golden_questions.json")
+RESULTS_DIR = os.path.join(HERE, "results")
+
+
+def percentile(values, pct):
+    """Doğrusal interpolasyonlu yüzdelik (numpy'nin varsayılanı ile aynı)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def build_system(embedding, json_file, chunking="course", sharded=False):
+    # Ağır importlar burada: GROQ_* ortam değişkenleri ayarlandıktan sonra yapılmalı.
+    from course_analytics import CourseAnalytics
+    from course_digest import CourseDigests
+    from course_store import is_store_fresh, open_course_store, store_path_for
+    from curriculum_views import CurriculumViews
+    from local_collection import HashEmbeddingFunction, build_local_collection, build_local_section_collection
+    from main import CourseIntelligenceSystem
+    from prerequisite_graph import PrerequisiteGraph
+    from rag_generator import RAGGenerator
+    from rag_retriever import CourseRetriever
+    from rag_router import QueryRouter
+    from shards import build_local_shards, default_shard_courses
+    from spell_correction import SpellCorrector
+    from vector_create import load_course_data
+
+    all_courses = load_course_data(json_file)
+    course_data = default_shard_courses(all_courses)
+    embedding_fn = HashEmbeddingFunction() if embedding == "hash" else None
+    if sharded:
+        # Fakülte / müfredat sürümü parçaları (shards.py) üzerinden eşzamanlı fan-out
+        collection = build_local_shards(all_courses, embedding_function=embedding_fn)
+    else:
+        collection = build_local_collection(json_file, embedding_function=embedding_fn)
+    store_file = store_path_for(json_file)
+    store = open_course_store(store_file) if is_store_fresh(json_file, store_file) else None
+    section_collection = None
+    if chunking == "section":
+        if sharded:
+            section_collection = build_local_shards(all_courses, embedding_function=collection.embedding_function,
+                                                    sections=True)
+        else:
+            section_collection = build_local_section_collection(
+                json_file, embedding_function=collection.embedding_function
+            )
+
+    return CourseIntelligenceSystem(
+        router=QueryRouter(),
+        retriever=CourseRetriever(collection=collection, section_collection=section_collection, store=store,
+                                  prerequisites=PrerequisiteGraph.from_courses(course_data),
+                                  curriculum_views=CurriculumViews.from_courses(course_data),
+                                  spell_corrector=SpellCorrector.from_courses(course_data),
+                                  digests=CourseDigests.from_courses(all_courses)),
+        generator=RAGGenerator(),
+        analytics=CourseAnalytics.from_json(json_file)
+    )
+
+
+def run_benchmark(args):
+    with open(args.golden, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    routes = {q["question"]: q["route"] for q in golden}
+    server = FakeGroqServer(
+        routes=routes,
+        router_latency_ms=args.router_latency_ms,
+        generator_latency_ms=args.generator_latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+    ).start()
+
+    os.environ["GROQ_API_KEY"] = "fake-benchmark-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    # Hız sınırlayıcı varsayılan olarak kapalı; --rpm/--tpm ile Groq kotası taklit edilebilir
+    os.environ["GROQ_RPM"] = str(args.rpm)
+    os.environ["GROQ_TPM"] = str(args.tpm)
+
+    try:
+        setup_start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            system = build_system(args.embedding, args.json_file, args.chunking, args.sharded)
+        setup_ms = (time.perf_counter() - setup_start) * 1000.0
+
+        stage_samples = defaultdict(list)
+        category_samples = defaultdict(list)
+        question_samples = defaultdict(list)
+
+        total_rounds = args.warmup + args.rounds
+        for round_no in range(total_rounds):
+            for q in golden:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    system.answer(q["question"], request_id=f"{q['id']}-r{round_no}", budget_s=args.budget_s)
+                elapsed = (time.perf_counter() - start) * 1000.0
+
+                if round_no < args.warmup:
+                    continue
+
+                # Aşama süreleri istek izindeki span'lerden gelir (route, embed, vector_query, ...)
+                for stage, ms in system.last_trace.stage_totals().items():
+                    stage_samples[stage].append(ms)
+                stage_samples["end_to_end"].append(elapsed)
+                category_samples[q["category"]].append(elapsed)
+                question_samples[q["id"]].append(elapsed)
+    finally:
+        server.stop()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "embedding": args.embedding,
+            "chunking": args.chunking,
+            "sharded": args.sharded,
+            "rounds": args.rounds,
+            "warmup": args.warmup,
+            "questions": len(golden),
+            "router_latency_ms": args.router_latency_ms,
+            "generator_latency_ms": args.generator_latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "budget_s": args.budget_s,
+            "rpm": args.rpm,
+            "tpm": args.tpm,
+            "setup_ms": round(setup_ms, 3),
+            "llm_calls": dict(server.calls),
+        },
+        "stages": {stage: summarize(v) for stage, v in stage_samples.items()},
+        "categories": {cat: summarize(v) for cat, v in category_samples.items()},
+        "questions": {qid: summarize(v) for qid, v in question_samples.items()},
+        "prometheus": METRICS.to_prometheus(),
+    }
+
+
+def print_report(results, baseline=None):
+    print(f"\n{'AŞAMA':<16}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}")
+    for section in ("stages", "categories"):
+        for name, stats in sorted(results[section].items()):
+            line = f"{name:<16}{stats['p50_ms']:>12.2f}{stats['p95_ms']:>12.2f}{stats['p99_ms']:>12.2f}"
+            old = (baseline or {}).get(section, {}).get(name)
+            if old and old["p95_ms"]:
+                delta = (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100.0
+                line += f"   p95 {delta:+.1f}% (vs {baseline['meta']['commit']})"
+            print(line)
+        print("-" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline uçtan uca benchmark")
+    parser.add_argument("--golden", default=GOLDEN_FILE)
+    parser.add_argument("--json-file", default="all_engineering_curricula.json")
+    parser.add_argument("--embedding", choices=["minilm", "hash"], default="minilm",
+                        help="'hash' model indirmeden tamamen offline çalışır")
+    parser.add_argument("--chunking", choices=["course", "section"], default="course",
+                        help="Retriever'ın ders bazlı mı bölüm bazlı mı arayacağı")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Tek koleksiyon yerine fakülte / müfredat sürümü parçaları (shards.py)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--router-latency-ms", type=float, default=150.0)
+    parser.add_argument("--generator-latency-ms", type=float, default=600.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Sahte Groq çağrılarının bu oranı 503 ile başarısız olur")
+    parser.add_argument("--rpm", type=int, default=0, help="LLM zamanlayıcısı istek/dk sınırı (0 = kapalı)")
+    parser.add_argument("--tpm", type=int, default=0, help="LLM zamanlayıcısı token/dk sınırı (0 = kapalı)")
+    parser.add_argument("--budget-s", type=float, default=None,
+                        help="Soru başına gecikme bütçesi (varsayılan: RAG_LATENCY_BUDGET_S)")
+    parser.add_argument("--output", help="Varsayılan: benchmarks/results/<commit>.json")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(results, baseline)
+    print(f"📁 Sonuçlar kaydedildi: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Eşzamanlı Streamlit oturumları için thread-safe bileşen havuzu.
+
+app_uı.py'deki load_system() bir st.cache_resource tekiliydi: tek QueryRouter, tek CourseRetriever
+(Chroma istemcisi ve torch modeliyle) ve tek RAGGenerator her tarayıcı oturumunun script thread'inden
+aynı anda çağrılıyordu; thread güvenliği garanti değildi ve ağır çağrılara sınır yoktu.
+
+- Paylaşılan, salt okunur embedding modeli `GuardedEmbeddingFunction` ile sarılır: aynı anda en fazla
+  RAG_EMBED_CONCURRENCY çağrı (semafor). Torch tek forward'da zaten tüm çekirdekleri kullanır;
+  eşzamanlı forward'lar sadece bellek ve önbellek çekişmesi getirir.
+- Thread başına istemci gereken yer ders deposudur (course_store.CourseStore: her thread kendi salt okunur
+  SQLite bağlantısını açar). LLM istemcisi (llm_client, kilitli devre kesici + zamanlayıcı) ve Chroma'nın
+  HTTP istemcisi thread-safe'dir, paylaşılır. Retriever'ın tembel indeksleri açılışta bir kez kurulur.
+- Her oturum hattını `PipelinePool`'a gönderir: RAG_WORKERS işçi (varsayılan çekirdek sayısı), en fazla
+  RAG_MAX_QUEUE bekleyen iş; kuyruk doluysa `PoolBusyError` (bellek sınırsız büyümez).
+  Dönen bilet (`PipelineTicket`) sıradaki yeri verir; arayüz bunu gösterir.
+- Toplu modda (main.py --batch) model `BatchingEmbeddingFunction` ile sarılır: işçilerden aynı anda gelen
+  sorgular kısa bir pencerede toplanıp tek forward'da embed edilir, sonuçlar metin başına önbelleklenir.
+
+    pool = ComponentPool(router=QueryRouter(), retriever=CourseRetriever(), generator=RAGGenerator(),
+                         analytics=CourseAnalytics.from_json())
+    ticket = pool.submit(run_pipeline, pool, conversation, prompt)
+    ticket.position()  # 0 = çalışıyor / bitti, 1 = sıradaki ...
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from rag_tracing import METRICS, record_cache
+
+EMBED_CONCURRENCY = int(os.getenv("RAG_EMBED_CONCURRENCY", "1"))
+WORKERS = int(os.getenv("RAG_WORKERS", str(os.cpu_count() or 1)))
+MAX_QUEUE = int(os.getenv("RAG_MAX_QUEUE", "32"))
+# Toplu embedding: en fazla bu kadar metin tek çağrıda, ilk istekten sonra bu kadar beklenerek toplanır
+EMBED_BATCH_SIZE = 64
+EMBED_BATCH_WINDOW_S = 0.005
+EMBED_CACHE_SIZE = 8192
+
+METRICS.describe("rag_pipeline_waiting", "Pipeline requests waiting for a worker.")
+METRICS.describe("rag_pipeline_active", "Pipeline requests currently running.")
+METRICS.describe("rag_pipeline_rejected_total", "Pipeline requests rejected because the queue was full.")
+
+
+class PoolBusyError(Exception):
+    """Bekleyen iş sayısı kuyruk sınırına ulaştı."""
+
+
+class GuardedEmbeddingFunction:
+    """Paylaşılan embedding modelini semaforla sarar; diğer öznitelikler (name, ...) modele aynen gider."""
+
+    def __init__(self, embedding_function, max_concurrent=EMBED_CONCURRENCY):
+        self.embedding_function = embedding_function
+        self._semaphore = threading.BoundedSemaphore(max(1, max_concurrent))
+
+    def __call__(self, input):
+        with self._semaphore:
+            return self.embedding_function(input)
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["embedding_function"], name)
+
+
+class BatchingEmbeddingFunction:
+    """
+    Eşzamanlı çağrıları toplayıp modeli tek seferde çağıran, metin başına önbellekli sarmalayıcı.
+    Aynı anda tek toplu çağrı çalışır (model paylaşılır); bekleyen metinler bir sonraki topluya girer.
+    """
+
+    def __init__(self, embedding_function, batch_size=EMBED_BATCH_SIZE, window_s=EMBED_BATCH_WINDOW_S,
+                 cache_size=EMBED_CACHE_SIZE):
+        self.embedding_function = embedding_function
+        self.batch_size = batch_size
+        self.window_s = window_s
+        self.cache_size = cache_size
+        self._cond = threading.Condition()
+        self._cache = OrderedDict()  # metin -> vektör (LRU)
+        self._pending = []  # embed edilmeyi bekleyen metinler, geliş sırasıyla
+        self._inflight = set()  # çalışan topludaki metinler
+        self._running = False
+        self.model_calls = 0
+
+    def _store(self, texts, vectors):
+        for text, vector in zip(texts, vectors):
+            self._cache[text] = vector
+            self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _run_batch(self):
+        """Lider çağıran: pencere boyunca bekleyip biriken metinleri tek çağrıda embed eder."""
+        self._running = True
+        self._cond.release()
+        try:
+            time.sleep(self.window_s)
+        finally:
+            self._cond.acquire()
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        self._inflight = set(batch)
+        self._cond.release()
+        try:
+            vectors = self.embedding_function(batch)
+        finally:
+            self._cond.acquire()
+            self._running = False
+            self._inflight = set()
+            self._cond.notify_all()
+        self.model_calls += 1
+        self._store(batch, vectors)
+
+    def __call__(self, input):
+        texts = list(input)
+        with self._cond:
+            for text in texts:
+                record_cache("embedding", text in self._cache)
+            result = {}
+            while True:
+                for text in texts:
+                    if text not in result and text in self._cache:
+                        result[text] = self._cache[text]
+                        self._cache.move_to_end(text)
+                missing = [t for t in texts if t not in result]
+                if not missing:
+                    break
+                for text in missing:
+                    # Sırada ya da çalışan toplu çağrıda olmayan metin sıraya girer (önbellekten düşen /
+                    # başarısız topluda kalan dahil)
+                    if text not in self._pending and text not in self._inflight:
+                        self._pending.append(text)
+                if self._running:
+                    self._cond.wait()
+                else:
+                    self._run_batch()
+        return [result[text] for text in texts]
+
+    def prefetch(self, texts):
+        """Bilinen metinleri (örn. tüm soruların konuları) önceden parça parça embed eder."""
+        unique = list(dict.fromkeys(t for t in texts if t))
+        for start in range(0, len(unique), self.batch_size):
+            self(unique[start:start + self.batch_size])
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["embedding_function"], name)
+
+
+class PipelineTicket:
+    """Havuza gönderilmiş tek iş: sıradaki yeri ve sonucu."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.future = None
+
+    def position(self):
+        return self.pool.position(self)
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+class PipelinePool:
+    """Sınırlı işçi havuzu + sınırlı FIFO kuyruk (başlamamış işler sıradaki yerlerini bilir)."""
+
+    def __init__(self, workers=WORKERS, max_queue=MAX_QUEUE):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pipeline")
+        self._lock = threading.Lock()
+        self._waiting = []  # başlamamış biletler, gönderim sırasıyla
+        self._active = 0
+
+    def _publish(self):
+        METRICS.set_gauge("rag_pipeline_waiting", len(self._waiting))
+        METRICS.set_gauge("rag_pipeline_active", self._active)
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if len(self._waiting) >= self.max_queue:
+                METRICS.inc("rag_pipeline_rejected_total")
+                raise PoolBusyError(f"Kuyruk dolu ({self.max_queue} bekleyen istek)")
+            ticket = PipelineTicket(self)
+            self._waiting.append(ticket)
+            ticket.future = self._executor.submit(self._run, ticket, fn, args, kwargs)
+            self._publish()
+        return ticket
+
+    def _run(self, ticket, fn, args, kwargs):
+        with self._lock:
+            self._waiting.remove(ticket)
+            self._active += 1
+            self._publish()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._publish()
+
+    def position(self, ticket):
+        """Kuyruktaki yer (1 = sıradaki); iş başladıysa ya da bittiyse 0."""
+        with self._lock:
+            return self._waiting.index(ticket) + 1 if ticket in self._waiting else 0
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "active": self._active, "waiting": len(self._waiting)}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class ComponentPool:
+    """
+    Süreç genelinde paylaşılan bileşenler + işçi havuzu. `pool["retriever"]` gibi erişim
+    (app_uı.py'deki eski sözlükle aynı) arayüz thread'inde sadece bellek içi işler için kullanılır.
+    """
+
+    def __init__(self, router, retriever, generator, analytics, workers=WORKERS, max_queue=MAX_QUEUE,
+                 embed_concurrency=EMBED_CONCURRENCY):
+        embedding_fn = retriever.embedding_fn
+        if embedding_fn is not None and not isinstance(embedding_fn, GuardedEmbeddingFunction):
+            retriever.embedding_fn = GuardedEmbeddingFunction(embedding_fn, embed_concurrency)
+        self.components = {"router": router, "retriever": retriever, "generator": generator,
+                           "analytics": analytics}
+        self.warm_up()
+        self.pipeline = PipelinePool(workers, max_queue)
+
+    def __getitem__(self, name):
+        return self.components[name]
+
+    def warm_up(self):
+        """Tembel indeksler (tamamlama, ön koşul, yazım, alan dışı) ilk istekte değil açılışta kurulur."""
+        retriever = self.components["retriever"]
+        for name in ("autocomplete_index", "prerequisites", "spell_corrector", "domain_guard"):
+            try:
+                getattr(retriever, name)
+            except Exception as e:
+                print(f"⚠️ {name} önceden kurulamadı (ilk istekte denenecek): {e}")
+
+    def submit(self, fn, *args, **kwargs):
+        return self.pipeline.submit(fn, *args, **kwargs)
+
+    def stats(self):
+        return self.pipeline.stats()
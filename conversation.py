@@ -0,0 +1,176 @@
+"""
+Oturum başına konuşma durumu: takip sorularının yerel çözümü ve sınırlı, sıkıştırılmış geçmiş.
+
+Her tur router -> retrieval -> generation hattını baştan çalıştırıyordu; "and its ECTS?" ya da
+"what about CE?" gibi takip soruları tam aramayı tekrarlıyor ve neye atıf yaptıklarını kaybediyordu.
+`ConversationState` (Streamlit'te st.session_state'te, CLI'da run döngüsü başına bir tane) son turun
+çalışma kümesini tutar: yönlendirilmiş rota, context'e giren ders kodları ve context'in kendisi.
+
+- Takip sorusu (kısa; "and / what about ..." ile başlayan ya da "its / them ..." zamiri taşıyan) LLM
+  router'a gitmez: zamir çalışma kümesindeki ders kodlarıyla değiştirilir, kural tabanlı router
+  (QueryRouter.rule_based_route) sadece yeni soruda geçen yuvaları (bölüm, yıl, dönem, tür, kod, aralık,
+  sürüm, alanlar) çıkarır ve bunlar önceki rotanın üstüne yazılır.
+- Niyet, filtreler, kodlar ve arama kelimeleri değişmediyse tekrar arama yapılmaz (`reuse`): aynı alanlar
+  isteniyorsa önceki context, başka alanlar isteniyorsa çalışma kümesindeki derslerin sadece o alanları
+  (kod ile birebir arama; vektör araması yok) kullanılır.
+- Geçmiş son MAX_TURNS turla sınırlı ve sıkıştırılmıştır (soru + cevabın ilk cümlesi); Generator'a bu
+  kısa özet gider, prompt tur sayısıyla büyümez.
+
+    conversation = ConversationState()
+    follow_up = conversation.resolve("and its ECTS?", router)
+    # {"query": "and SE 302 ECTS?", "route": {...}, "reuse": True}
+"""
+import re
+from collections import deque
+
+from course_digest import one_line
+from field_projection import UNPROJECTED_INTENTS, fields_from_text
+from rag_router import COURSE_CODE_PATTERN, ROUTE_STOPWORDS
+
+MAX_TURNS = 4
+# Bundan uzun sorular kendi başına sorudur (zamir taşısa da router'a gider)
+MAX_FOLLOW_UP_WORDS = 8
+QUESTION_MAX_CHARS = 160
+ANSWER_MAX_CHARS = 240
+# Soru metninde zamirin yerine yazılacak en fazla ders kodu (çalışma kümesi yine tümünü tutar)
+MAX_REFERENT_CODES = 5
+
+FOLLOW_UP_PATTERN = re.compile(r"^\s*(and|also|but|what about|how about|same for|what of)\b", re.IGNORECASE)
+REFERENCE_PATTERN = re.compile(
+    r"\b(this course|that course|these courses|those courses|this one|that one|its|it|they|them|their|these"
+    r"|those|both)\b",
+    re.IGNORECASE,
+)
+# Konu değişikliği sayılmayacak kelimeler (ROUTE_STOPWORDS ve alan kelimelerine ek olarak)
+FOLLOW_UP_STOPWORDS = {
+    "also", "but", "same", "ones", "one", "this", "that", "these", "those", "its", "it", "they", "them", "their",
+    "both", "more", "than", "less", "fewer", "at", "least", "most", "over", "under", "above", "below", "exactly",
+    "up", "lab", "labs", "theory", "hours", "hour", "local", "instead", "then", "please", "tell",
+}
+# Context'teki ders başlıkları (rag_retriever: birebir eşleşme ve arama sonuçları)
+CONTEXT_CODE_PATTERN = re.compile(r"(?:\[COURSE: |=== EXACT MATCH FOUND: )([A-Z]{2,5} ?\d{3,4})")
+# Takip sorusu vermezse önceki turdan taşınan filtre yuvaları
+CARRIED_SLOTS = ("target_department", "academic_year", "semester", "course_type", "numeric_filters",
+                 "curriculum_version")
+# Aynı aramayı tanımlayan yuvalar: hepsi aynıysa önceki sonuçlar yeniden kullanılır
+QUERY_SLOTS = ("intent", "specific_course_code", "search_queries") + CARRIED_SLOTS
+
+
+def _is_set(value):
+    return value not in (None, "None", "", [])
+
+
+def compress_answer(answer, max_chars=ANSWER_MAX_CHARS):
+    """Cevabın markdown'sız ilk cümlesi (tablolar / listeler geçmişe taşınmaz)."""
+    return one_line(re.sub(r"[*#|`>_]+|-{3,}", " ", str(answer or "")), max_chars)
+
+
+class ConversationState:
+    def __init__(self, max_turns=MAX_TURNS):
+        # (soru, sıkıştırılmış cevap); en eskisi kendiliğinden düşer
+        self.history = deque(maxlen=max_turns)
+        self.clear_working_set()
+
+    def clear_working_set(self):
+        self.route = None
+        self.codes = []
+        self.context = None
+        self.fields = None
+        self.detail = None
+
+    def is_follow_up(self, query_text):
+        text = str(query_text or "")
+        if self.route is None or len(text.split()) > MAX_FOLLOW_UP_WORDS:
+            return False
+        return bool(FOLLOW_UP_PATTERN.search(text) or REFERENCE_PATTERN.search(text))
+
+    @staticmethod
+    def topic_words(query_text):
+        """Takip sorusunun kendi arama kelimeleri (soru, filtre, zamir ve alan kelimeleri hariç)."""
+        words = re.findall(r"[a-z0-9+#]+", COURSE_CODE_PATTERN.sub(" ", str(query_text).lower()))
+        return [w for w in words if w not in ROUTE_STOPWORDS and w not in FOLLOW_UP_STOPWORDS
+                and not w.isdigit() and not fields_from_text(w)]
+
+    def _rewrite(self, query_text):
+        """Zamiri çalışma kümesindeki ders kodlarıyla değiştirir ('and its ECTS?' -> 'and SE 302 ECTS?')."""
+        if not self.codes or len(self.codes) > MAX_REFERENT_CODES or COURSE_CODE_PATTERN.search(query_text):
+            return query_text
+        return REFERENCE_PATTERN.sub(" and ".join(self.codes), query_text, count=1)
+
+    def resolve(self, query_text, router):
+        """
+        Takip sorusunu önceki turun rotasıyla birleştirir; takip sorusu değilse None.
+        Dönen: {"query": yeniden yazılmış soru, "route": rota, "reuse": önceki sonuçlar kullanılabilir mi}.
+        """
+        if not self.is_follow_up(query_text):
+            return None
+        query_text = str(query_text).strip()
+        rewritten = self._rewrite(query_text)
+        local = router.rule_based_route(rewritten)
+
+        slots = QUERY_SLOTS
+        if local.get("intent", "search") != "search":
+            # Soru kendi niyetini taşıyor ("and its prerequisites?"): eksik filtreler önceki turdan
+            route = dict(local)
+            for slot in CARRIED_SLOTS:
+                if not _is_set(route.get(slot)) and _is_set(self.route.get(slot)):
+                    route[slot] = self.route[slot]
+        else:
+            route = dict(self.route)
+            changed = [slot for slot in CARRIED_SLOTS if _is_set(local.get(slot))]
+            route.update({slot: local[slot] for slot in changed})
+            topic = self.topic_words(query_text)
+            if rewritten == query_text and _is_set(local.get("specific_course_code")):
+                # "what about SE 310?": yeni ders, aynı soru
+                route["specific_course_code"] = local["specific_course_code"]
+                codes = local["specific_course_code"]
+                route["search_queries"] = codes if isinstance(codes, list) else [codes]
+            elif rewritten == query_text and (changed or topic):
+                # Filtre ya da konu değişti ve zamir yok: önceki derslere atıf değil, yeni arama
+                route["specific_course_code"] = "None"
+            elif rewritten != query_text and (changed or topic):
+                # "Is it hard?": zamir çalışma kümesini gösterir; yeni konu o derslerde aranır
+                route["specific_course_code"] = self.codes[0] if len(self.codes) == 1 else list(self.codes)
+            if topic:
+                route["search_queries"] = [" ".join(topic)]
+            route["fields"] = local.get("fields", "None")
+            if _is_set(route["fields"]) and route.get("intent") in UNPROJECTED_INTENTS | {"prerequisite"}:
+                # "and its ECTS?" sayım / liste / ön koşul sorusundan sonra: dersin alanları aranır; aynı dersler
+                # çalışma kümesindeyse onlar kullanılır
+                route["intent"] = "search"
+                slots = QUERY_SLOTS[1:]
+
+        reuse = all(route.get(slot) == self.route.get(slot) for slot in slots)
+        return {"query": rewritten, "route": route, "reuse": reuse}
+
+    def reuse_context(self, retriever, fields=None, detail=None):
+        """Önceki turun sonuçlarından context; yeniden kullanılamıyorsa None (normal arama yapılır)."""
+        if fields == self.fields and detail == self.detail:
+            return self.context
+        if not self.codes:
+            return None
+        found = [c for c in (retriever.retrieve_exact_match(code, detail=detail, fields=fields)
+                             for code in self.codes) if c]
+        return "\n\n".join(found) or None
+
+    def record(self, query_text, answer, route=None, context=None, fields=None, detail=None):
+        """Turu geçmişe ekler ve çalışma kümesini günceller (alan dışı / rotasız turda temizlenir)."""
+        self.history.append((one_line(query_text, QUESTION_MAX_CHARS), compress_answer(answer)))
+        if not route or route.get("intent") == "out_of_domain":
+            self.clear_working_set()
+            return
+        codes = []
+        for code in CONTEXT_CODE_PATTERN.findall(context or ""):
+            if code not in codes:
+                codes.append(code)
+        spec_code = route.get("specific_course_code")
+        if not codes and _is_set(spec_code):
+            codes = spec_code if isinstance(spec_code, list) else [spec_code]
+        self.route, self.codes, self.context = route, codes, context
+        self.fields, self.detail = fields, detail
+
+    def history_text(self):
+        """Generator için sıkıştırılmış geçmiş; geçmiş yoksa None."""
+        if not self.history:
+            return None
+        return "\n".join(f"Q: {question}\nA: {answer}" for question, answer in self.history)
@@ -0,0 +1,253 @@
+"""
+ECTS / kredi / saat / değerlendirme ağırlıkları için yapılandırılmış analiz motoru (SQLite, bellek içi).
+
+"Total ECTS", "ortalama ders saati", "final sınavı ağırlığı" gibi sorular artık vektör aramasına ve
+LLM'in aritmetiğine bırakılmaz: dersler yüklenirken tipli sütunlara (REAL/INTEGER) yazılır ve
+SUM / AVG / MIN / MAX / COUNT bölüm, yıl, dönem veya türe göre gruplanarak tam olarak hesaplanır.
+
+    analytics = CourseAnalytics.from_json()
+    analytics.aggregate("ects", "sum", group_by="year", filters={"target_department": "Software Engineering"})
+"""
+import sqlite3
+import threading
+
+from rag_tracing import span
+from shards import default_shard_courses
+from vector_create import JSON_FILE, get_academic_year, load_course_data, normalize_evaluation, to_number
+
+# Router'ın kullanabileceği metrikler -> SQL ifadesi
+METRIC_EXPRESSIONS = {
+    "ects": "c.ects",
+    "local_credit": "c.local_credit",
+    "theory_hours": "c.theory_hours",
+    "lab_hours": "c.lab_hours",
+    "weekly_hours": "c.theory_hours + c.lab_hours",
+    "course_count": "1",
+    "evaluation_weight": "e.weight_percent",
+}
+METRIC_LABELS = {
+    "ects": "ECTS",
+    "local_credit": "local credits",
+    "theory_hours": "theory hours per week",
+    "lab_hours": "lab hours per week",
+    "weekly_hours": "weekly contact hours",
+    "course_count": "courses",
+    "evaluation_weight": "evaluation weight (%)",
+}
+AGGREGATE_FUNCTIONS = {"sum": "SUM", "avg": "AVG", "min": "MIN", "max": "MAX", "count": "COUNT"}
+FUNCTION_LABELS = {"sum": "Total", "avg": "Average", "min": "Minimum", "max": "Maximum", "count": "Number of"}
+GROUP_COLUMNS = {"department": "c.department", "year": "c.year", "semester": "c.semester",
+                 "term": "c.term", "type": "c.type"}
+# numeric_filters operatörleri -> SQL
+RANGE_SQL = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "eq": "="}
+# Müfredattaki seçmeli ders kutuları (ELEC xxx / POOL xxx): kredi bilgisi taşımaz
+PLACEHOLDER_PREFIXES = ("ELEC", "POOL")
+
+
+def is_placeholder(course_code):
+    return str(course_code or "").upper().startswith(PLACEHOLDER_PREFIXES)
+
+
+def get_term(semester):
+    """'2. Year Spring Semester' -> 'Spring', 'Elective Courses' -> None."""
+    for term in ("Fall", "Spring"):
+        if term in (semester or ""):
+            return term
+    return None
+
+
+def _as_list(value):
+    if value in (None, "None", "", []):
+        return []
+    return [str(v) for v in value] if isinstance(value, list) else [str(value)]
+
+
+class CourseAnalytics:
+    """Tipli ders tablosu üzerinde tam (yaklaşık değil) toplama sorguları."""
+
+    def __init__(self, courses):
+        # Streamlit birden çok thread'den çağırabilir; tek bağlantı kilitle korunur
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE courses (
+                idx INTEGER PRIMARY KEY, course_code TEXT, course_name TEXT, department TEXT,
+                semester TEXT, year TEXT, term TEXT, type TEXT, is_placeholder INTEGER,
+                ects REAL, local_credit REAL, theory_hours REAL, lab_hours REAL
+            );
+            CREATE TABLE evaluation (
+                course_idx INTEGER REFERENCES courses(idx), activity TEXT,
+                count INTEGER, weight_percent REAL
+            );
+            CREATE INDEX idx_evaluation_course ON evaluation (course_idx);
+        """)
+
+        course_rows, evaluation_rows = [], []
+        for index, course in enumerate(courses):
+            semester = course.get("semester", "")
+            course_rows.append((
+                index, course.get("course_code"), course.get("course_name"), course.get("department"),
+                semester, get_academic_year(semester), get_term(semester), course.get("type"),
+                int(is_placeholder(course.get("course_code"))),
+                to_number(course.get("ects")), to_number(course.get("local_credit")),
+                to_number(course.get("theory_hours")), to_number(course.get("lab_hours")),
+            ))
+            for item in normalize_evaluation(course.get("evaluation_system")):
+                evaluation_rows.append((index, item["activity"], item["count"], item["weight_percent"]))
+
+        self.conn.executemany(f"INSERT INTO courses VALUES ({', '.join('?' * 13)})", course_rows)
+        self.conn.executemany("INSERT INTO evaluation VALUES (?, ?, ?, ?)", evaluation_rows)
+        self.conn.commit()
+
+    @classmethod
+    def from_json(cls, json_file=JSON_FILE):
+        """Ders deposu / JSON'dan (vector_create.load_course_data) kurar; sadece varsayılan müfredat sürümü."""
+        return cls(default_shard_courses(load_course_data(json_file)))
+
+    def _where(self, filters, activity):
+        """
+        Router filtrelerini SQL'e çevirir. Sayma kurallarıyla (CourseRetriever._check_counting_rules) aynı kapsam:
+        - Yıl verildiyse o yılların dersleri,
+        - Yıl yok ve 'Elective' soruluyorsa seçmeli havuzu (year = 'Any'),
+        - Aksi halde (ders kodu da verilmediyse) sadece dönemlere yerleşmiş müfredat dersleri
+          (havuz iki kez sayılmasın).
+        """
+        filters = filters or {}
+        clauses, params = ["c.is_placeholder = 0"], []
+
+        def add_in(column, values):
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+        codes = [c.upper().strip() for c in _as_list(filters.get("specific_course_code"))]
+        departments = _as_list(filters.get("target_department") or filters.get("department"))
+        years = _as_list(filters.get("academic_year") or filters.get("year"))
+        terms = _as_list(filters.get("semester"))
+        course_type = filters.get("course_type") or filters.get("type")
+
+        if codes:
+            add_in("c.course_code", codes)
+            if not departments:
+                # Ortak dersler (örn. MATH 153) her bölümde ayrı satır; bölüm sorulmadıysa bir kez say
+                clauses.append("c.idx IN (SELECT MIN(idx) FROM courses GROUP BY course_code)")
+        if departments:
+            add_in("c.department", departments)
+        if years:
+            add_in("c.year", years)
+        elif course_type == "Elective":
+            clauses.append("c.year = 'Any'")
+        elif not codes:
+            clauses.append("c.year != 'Any'")
+        if terms:
+            add_in("c.term", terms)
+        if course_type in ("Mandatory", "Elective"):
+            clauses.append("c.type = ?")
+            params.append(course_type)
+        numeric_filters = filters.get("numeric_filters")
+        if isinstance(numeric_filters, dict):
+            numeric_filters = [numeric_filters]
+        for condition in numeric_filters if isinstance(numeric_filters, list) else []:
+            column = METRIC_EXPRESSIONS.get(condition.get("field"))
+            operator = RANGE_SQL.get(condition.get("op"))
+            value = to_number(condition.get("value"))
+            if column and operator and value is not None and condition.get("field") not in (
+                    "course_count", "evaluation_weight"):
+                clauses.append(f"({column}) {operator} ?")
+                params.append(value)
+        if activity:
+            clauses.append("LOWER(e.activity) LIKE ?")
+            params.append(f"%{activity.lower()}%")
+
+        return " AND ".join(clauses), params
+
+    def aggregate(self, metric="ects", function="sum", group_by=None, filters=None, activity=None):
+        """
+        Tek bir toplama sorgusu. Dönen sözlük:
+        {"metric", "function", "group_by", "rows": [{"group", "value", "courses"}], "placeholders"}
+        `placeholders`: kapsama giren ama kredi bilgisi olmayan seçmeli kutusu (ELEC/POOL) sayısı.
+        """
+        metric = metric if metric in METRIC_EXPRESSIONS else "ects"
+        function = function if function in AGGREGATE_FUNCTIONS else "sum"
+        if metric == "course_count":
+            function = "count"
+        group_by = group_by if group_by in GROUP_COLUMNS else None
+        use_evaluation = metric == "evaluation_weight"
+        # Etkinlik verilmediyse ağırlıklar etkinlik başına ayrılır: tüm etkinliklerin toplamı (~%100) ya da
+        # ortalaması anlamsızdır ("total evaluation weight of SE 302")
+        per_activity = use_evaluation and not activity
+
+        with span("aggregate", metric=metric, function=function, group_by=group_by, filters=filters) as agg_span:
+            where, params = self._where(filters, activity if use_evaluation else None)
+            source = "courses c JOIN evaluation e ON e.course_idx = c.idx" if use_evaluation else "courses c"
+            group_cols = [col for col in (GROUP_COLUMNS.get(group_by), "e.activity" if per_activity else None) if col]
+            select_group = f"{group_cols[0]} AS grp" if group_by else "NULL AS grp"
+            select_activity = "e.activity" if per_activity else "NULL"
+
+            sql = (f"SELECT {select_group}, {select_activity}, "
+                   f"{AGGREGATE_FUNCTIONS[function]}({METRIC_EXPRESSIONS[metric]}), "
+                   f"COUNT(DISTINCT c.idx) FROM {source} WHERE {where}")
+            if group_cols:
+                sql += f" GROUP BY {', '.join(group_cols)} ORDER BY {', '.join(group_cols)}"
+
+            placeholder_where, placeholder_params = self._where(filters, None)
+            placeholder_sql = ("SELECT COUNT(*) FROM courses c WHERE "
+                               + placeholder_where.replace("c.is_placeholder = 0", "c.is_placeholder = 1"))
+
+            with self._lock:
+                rows = self.conn.execute(sql, params).fetchall()
+                placeholders = self.conn.execute(placeholder_sql, placeholder_params).fetchone()[0]
+
+            result = {
+                "metric": metric,
+                "function": function,
+                "group_by": group_by,
+                "activity": activity if use_evaluation else None,
+                "per_activity": per_activity,
+                "rows": [{"group": g, "activity": a, "value": round(v, 2) if isinstance(v, float) else v,
+                          "courses": n}
+                         for g, a, v, n in rows if n],
+                "placeholders": placeholders,
+            }
+            agg_span.set(hit_count=sum(r["courses"] for r in result["rows"]))
+            return result
+
+    def aggregate_from_route(self, route_result):
+        """Router JSON'undaki aggregate_* alanlarını okuyup aggregate() çağırır."""
+        def field(name):
+            value = route_result.get(name)
+            return None if value in (None, "None", "") else value
+
+        return self.aggregate(
+            metric=field("aggregate_metric") or "ects",
+            function=field("aggregate_function") or "sum",
+            group_by=field("group_by"),
+            filters=route_result,
+            activity=field("evaluation_activity"),
+        )
+
+    @staticmethod
+    def format_result(result):
+        """Toplama sonucunu LLM'e gitmeden kullanıcıya gösterilecek metne çevirir."""
+        label = METRIC_LABELS[result["metric"]]
+        if result["activity"]:
+            label = f"{result['activity'].title()} {label}"
+        title = f"{FUNCTION_LABELS[result['function']]} {label}"
+        if result.get("per_activity"):
+            title += " by activity"
+
+        if not result["rows"]:
+            return f"📊 ANALİTİK SONUÇ:\nNo courses matched the criteria for **{title}**."
+
+        lines = [f"📊 ANALİTİK SONUÇ: **{title}**"]
+        for row in result["rows"]:
+            value = row["value"]
+            value = f"{value:g}" if isinstance(value, float) else value
+            group = f"Year {row['group']}" if result["group_by"] == "year" else row["group"]
+            labels = [str(part) for part in (group if result["group_by"] else None, row.get("activity")) if part]
+            prefix = f"- {' / '.join(labels)}: " if labels else "- "
+            lines.append(f"{prefix}**{value}** (over {row['courses']} course{'s' if row['courses'] != 1 else ''})")
+
+        if result["placeholders"]:
+            lines.append(f"\n_Note: {result['placeholders']} elective slot(s) (ELEC/POOL) have no credit "
+                         f"data in the curriculum and are not included._")
+        return "\n".join(lines)
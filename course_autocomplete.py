@@ -0,0 +1,108 @@
+"""
+Ders kodu ve adı için otomatik tamamlama (sıralı dizi + bisect).
+
+"SE 3", "se3", "Data Str", "structures" gibi yarım girdiler router / LLM'e gitmeden
+bellek içi indeksten tamamlanır:
+
+- Anahtarlar normalize edilir (küçük harf, noktalama yerine boşluk): ders kodu (boşluklu ve
+  boşluksuz), ders adının tamamı ve adın her kelimeden başlayan son ekleri ("structures and algorithms"),
+- Tüm anahtarlar tek bir sıralı listededir; önek araması bisect ile başlangıcı bulup
+  önek bitene kadar ilerler,
+- Sıralama: kod eşleşmesi > ad başı eşleşmesi > ad içi kelime eşleşmesi, sonra ders kodu.
+
+İndeks retriever'daki gibi sadece varsayılan müfredat sürümünün derslerinden kurulur (aynı kodun eski
+sürümdeki adı öneri olarak çıkmasın):
+
+    index = CourseAutocomplete(default_shard_courses(load_course_data()))
+    index.complete("data str")   # [{"code": "SE 115"...}, ...]
+    index.resolve("SE 302")      # tam seçim -> "SE 302" (router atlanır)
+"""
+import re
+from bisect import bisect_left
+
+from course_analytics import is_placeholder
+
+# Eşleşme türleri (küçük olan önce gelir)
+MATCH_CODE, MATCH_NAME, MATCH_TOKEN = 0, 1, 2
+DEFAULT_LIMIT = 8
+
+
+def normalize(text):
+    """'Data Str.' -> 'data str'; 'SE-302' -> 'se 302'."""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", str(text or "").lower()).split())
+
+
+def suggestion_label(code, name):
+    return f"{code} — {name}"
+
+
+class CourseAutocomplete:
+    """Ders kodu / adı önek indeksi. Sorgu O(log n + eşleşme sayısı)."""
+
+    def __init__(self, courses):
+        # Aynı kod birden çok bölümde olabilir; kod başına tek öneri
+        self.entries = []
+        seen = set()
+        for course in courses:
+            code = str(course.get('course_code') or '').upper().strip()
+            if not code or code in seen or is_placeholder(code):
+                continue
+            seen.add(code)
+            self.entries.append((code, str(course.get('course_name') or '').strip()))
+
+        keys = []
+        self._exact = {}  # normalize edilmiş kod / etiket -> entry
+        for i, (code, name) in enumerate(self.entries):
+            code_key = normalize(code)
+            for key in {code_key, code_key.replace(" ", "")}:
+                keys.append((key, MATCH_CODE, i))
+                self._exact[key] = i
+            self._exact[normalize(suggestion_label(code, name))] = i
+
+            tokens = normalize(name).split()
+            for start in range(len(tokens)):
+                keys.append((" ".join(tokens[start:]), MATCH_NAME if start == 0 else MATCH_TOKEN, i))
+
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._refs = [(kind, i) for _, kind, i in keys]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def complete(self, prefix, limit=DEFAULT_LIMIT):
+        """Önekle başlayan en iyi `limit` ders: [{"code", "name", "label"}, ...]."""
+        query = normalize(prefix)
+        if not query:
+            return []
+
+        best = {}
+        position = bisect_left(self._keys, query)
+        while position < len(self._keys) and self._keys[position].startswith(query):
+            kind, i = self._refs[position]
+            if kind < best.get(i, MATCH_TOKEN + 1):
+                best[i] = kind
+            position += 1
+
+        ranked = sorted(best.items(), key=lambda item: (item[1], self.entries[item[0]][0]))[:limit]
+        return [
+            {"code": self.entries[i][0], "name": self.entries[i][1],
+             "label": suggestion_label(*self.entries[i])}
+            for i, _ in ranked
+        ]
+
+    def resolve(self, text):
+        """Girdi tam bir ders kodu ya da seçilmiş öneri etiketiyse ders kodunu, değilse None döner."""
+        i = self._exact.get(normalize(text))
+        return self.entries[i][0] if i is not None else None
+
+
+if __name__ == "__main__":
+    import sys
+
+    from shards import default_shard_courses
+    from vector_create import load_course_data
+
+    index = CourseAutocomplete(default_shard_courses(load_course_data()))
+    for prefix in sys.argv[1:] or ["SE 3", "data str"]:
+        print(f"{prefix!r}: " + ", ".join(s["label"] for s in index.complete(prefix)))
@@ -0,0 +1,265 @@
+"""
+Derslerin kompakt özetleri (digest): Generator'ın varsayılan context'i.
+
+vector_create.build_course_document'in "COURSE DETAILS" şablonu ders başına yüzlerce token tutar
+(boş bölüm başlıkları, 16 satırlık haftalık konu listesi, tekrar eden "Review of the Semester" satırları);
+Groq gecikmesi ve maliyeti n_results ile doğrusal büyür. Ingest sırasında her ders için soru-cevap
+açısından kayıpsız bir özet çıkarılır:
+
+  kod, ad, ECTS, tür / dönem, ön koşul, tek satırlık açıklama, ana konular, değerlendirme dağılımı
+
+- Çıkarım deterministiktir: açıklamanın (yoksa amaçların) ilk cümlesi, dolgu satırları ("Midterm",
+  "Review of the Semester", sunumlar) atılmış ve tekilleştirilmiş haftalık konular,
+  "Midterm 30%, Final Exam 40%" biçiminde ağırlıklar.
+- İsteğe bağlı, offline toplu LLM özeti (`LLMSummarizer`, `python vector_create.py --llm-digests`):
+  açıklama satırı yerine tek cümlelik özet yazılır. Özetleyici `{anahtar: ders}` alıp `{anahtar: cümle}`
+  dönen herhangi bir çağrılabilir olabilir (testte / benchmark'ta sabit bir fonksiyonla değiştirilir).
+- Özetler içerik özetine (vector_create.content_hash, metadata'daki `content_hash`) göre saklanır
+  (`<veri>.digests.json`, sürümlü); tam doküman koleksiyonda olduğu gibi durur ve sadece istenirse
+  (`wants_full_text`: haftalık program, öğrenme çıktıları, "in detail") context'e girer.
+
+    digests = load_course_digests()
+    digests.text(meta["content_hash"])
+    # "Summary: ...\nTopics: Software Processes; Agile Software Development; ...\nEvaluation: Project 30%, ..."
+"""
+import json
+import os
+import re
+
+from derived_artefacts import artefact_path, build_artefact, load_artefact
+from vector_create import (JSON_FILE, build_placement, content_hash, format_number, format_placements,
+                           group_shared_courses, list_departments, normalize_evaluation)
+
+DIGEST_VERSION = 1
+DIGESTS_SUFFIX = ".digests.json"
+DESCRIPTION_MAX_CHARS = 400
+MAX_TOPICS = 14
+# Açıklaması ve konusu olmayan derslerde içeriği anlatan ilk öğrenme çıktıları
+FALLBACK_OUTCOMES = 3
+# Haftalık programda içerik taşımayan satırlar (küçük harfe çevrilip noktalama atıldıktan sonra)
+FILLER_TOPICS = frozenset("""
+review of the semester|semester review|course review|review|general review|midterm|midterm exam|midterm exams
+|final|final exam|final exams|exam|quiz|introduction|course introduction|project meeting|project presentations
+|project presentation|presentations|student presentations|student summative presentations|holiday|no class
+""".replace("\n", "").split("|"))
+# Bu ifadeleri içeren sorular özetle cevaplanamaz: tam doküman getirilir
+FULL_TEXT_PATTERN = re.compile(
+    r"\b(week\s*\d+|weekly|week by week|learning outcomes?|outcomes?|objectives?|syllabus|in detail|detailed"
+    r"|full (description|details|text)|workload|lab hours|theory hours|local credits?)\b",
+    re.IGNORECASE,
+)
+
+
+def digests_path_for(json_file):
+    return artefact_path(json_file, DIGESTS_SUFFIX)
+
+
+def wants_full_text(query_text):
+    """Soru özetin kapsamadığı ayrıntıyı mı istiyor? ('What is taught in week 5 of SE 302?' -> True)"""
+    return bool(FULL_TEXT_PATTERN.search(str(query_text or "")))
+
+
+def one_line(text, max_chars=DESCRIPTION_MAX_CHARS):
+    """İlk cümle, boşlukları sadeleştirilmiş ve kelime sınırından `max_chars`'a kısaltılmış."""
+    text = re.sub(r"\s+", " ", str(text or "")).strip()
+    if not text or text == "N/A":
+        return ""
+    sentence = re.split(r"(?<=[.!?])\s+(?=[A-Z])", text, maxsplit=1)[0]
+    if len(sentence) <= max_chars:
+        return sentence
+    return sentence[:max_chars].rsplit(" ", 1)[0].rstrip(",;:") + "..."
+
+
+def key_topics(course, limit=MAX_TOPICS):
+    """'Week N:' önekleri ve dolgu satırları atılmış, sırası korunarak tekilleştirilmiş haftalık konular."""
+    topics, seen = [], set()
+    for item in course.get('weekly_topics') or []:
+        topic = re.sub(r"^\s*week\s*\d+\s*[:.-]?\s*", "", str(item), flags=re.IGNORECASE).strip().rstrip(".:;")
+        key = re.sub(r"[^a-z0-9 ]+", "", topic.lower()).strip()
+        if not key or key in FILLER_TOPICS or key in seen:
+            continue
+        seen.add(key)
+        topics.append(topic)
+        if len(topics) >= limit:
+            break
+    return topics
+
+
+def evaluation_breakdown(course):
+    """'Quizzes / Studio Critiques (3) 10%, Midterm 30%, Final Exam 40%' (birden çok olanlarda adet)."""
+    return ", ".join(
+        f"{item['activity']} {'(' + str(item['count']) + ') ' if item['count'] > 1 else ''}"
+        f"{format_number(item['weight_percent'])}%"
+        for item in normalize_evaluation(course.get('evaluation_system'))
+    )
+
+
+def extract_digest(course, placements=None):
+    """Tek dersin deterministik özeti (JSON'a yazılabilir sözlük)."""
+    placements = placements or [build_placement(course)]
+    prerequisites = str(course.get('prerequisites') or '').strip()
+    description = one_line(course.get('description')) or one_line(course.get('objectives'))
+    topics = key_topics(course)
+    outcomes = []
+    if not description and not topics:
+        outcomes = [one_line(o) for o in (course.get('learning_outcomes') or [])[:FALLBACK_OUTCOMES]]
+    return {
+        "course_code": str(course.get('course_code', '')),
+        "course_name": str(course.get('course_name', '')),
+        "ects": str(course.get('ects', '')),
+        "type": format_placements(placements, 'type'),
+        "semester": format_placements(placements, 'semester'),
+        "departments": ", ".join(list_departments(placements)),
+        "prerequisites": "" if prerequisites in ("", "None", "N/A") else prerequisites,
+        "description": description,
+        "topics": topics,
+        "outcomes": [o for o in outcomes if o],
+        "evaluation": evaluation_breakdown(course),
+        "summary": "",
+    }
+
+
+def format_digest(digest, header=True):
+    """
+    Generator'a giden kompakt metin. `header=False`: kod / ad / ECTS / tür satırı atlanır
+    (retriever'ın ders başlığı bunları zaten taşır).
+    """
+    lines = []
+    if header:
+        lines.append(f"{digest['course_code']} - {digest['course_name']} | {digest['ects']} ECTS | "
+                     f"{digest['type']} | {digest['semester']}")
+    if digest["prerequisites"]:
+        lines.append(f"Prerequisites: {digest['prerequisites']}")
+    summary = digest.get("summary") or digest["description"]
+    if summary:
+        lines.append(f"Summary: {summary}")
+    if digest["topics"]:
+        lines.append(f"Topics: {'; '.join(digest['topics'])}")
+    if digest.get("outcomes"):
+        lines.append(f"Outcomes: {'; '.join(digest['outcomes'])}")
+    if digest["evaluation"]:
+        lines.append(f"Evaluation: {digest['evaluation']}")
+    return "\n".join(lines)
+
+
+class LLMSummarizer:
+    """
+    Offline toplu özetleyici: `batch_size` dersi tek istekte gönderir, JSON {anahtar: cümle} bekler.
+    Ingest'te bir kez çalışır; başarısız olan grupta deterministik açıklama kalır.
+    """
+    BATCH_SIZE = 20
+    MAX_WORDS = 30
+
+    def __init__(self, client=None, model_name="llama-3.1-8b-instant", batch_size=BATCH_SIZE):
+        from llm_client import get_llm_client
+        self.client = client or get_llm_client()
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+    def _prompt(self, batch):
+        courses = {key: {"name": course.get('course_name'), "description": course.get('description'),
+                         "objectives": course.get('objectives')} for key, course in batch}
+        return (
+            f"For each course below, write ONE plain sentence (max {self.MAX_WORDS} words) stating what it teaches. "
+            "Use only the given text. Return a JSON object mapping each key to its sentence.\n\n"
+            + json.dumps(courses, ensure_ascii=False)
+        )
+
+    def __call__(self, courses):
+        from llm_scheduler import PRIORITY_GENERATE
+
+        items = list(courses.items())
+        summaries = {}
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            try:
+                response = self.client.chat(
+                    messages=[{"role": "user", "content": self._prompt(batch)}],
+                    model=self.model_name,
+                    priority=PRIORITY_GENERATE,
+                    temperature=0.0,
+                    response_format={"type": "json_object"},
+                )
+                result = json.loads(response.choices[0].message.content)
+            except Exception as e:
+                print(f"   ⚠️ Özet grubu {start // self.batch_size + 1} atlandı: {e}")
+                continue
+            summaries.update({key: one_line(result[key]) for key, _ in batch if isinstance(result.get(key), str)})
+            print(f"   -> {min(start + self.batch_size, len(items))}/{len(items)} ders özetlendi...")
+        return summaries
+
+
+class CourseDigests:
+    """content_hash -> özet. Ortak dersler (aynı içerik) tek özet paylaşır."""
+
+    def __init__(self, digests, model=""):
+        self.digests = digests
+        # Özet satırlarını yazan model ("" = sadece deterministik çıkarım)
+        self.model = model
+
+    @classmethod
+    def from_courses(cls, courses, summarizer=None, model=""):
+        digests, members_of = {}, {}
+        for members in group_shared_courses(courses):
+            _, course = members[0]
+            key = content_hash(course)
+            if key in digests:
+                # Aynı içerik farklı parçalarda (müfredat sürümü) ayrı gruplanmış olabilir
+                continue
+            digests[key] = extract_digest(course, [build_placement(c) for _, c in members])
+            members_of[key] = course
+
+        if summarizer is not None:
+            for key, summary in summarizer(members_of).items():
+                if key in digests and summary:
+                    digests[key]["summary"] = summary
+        return cls(digests, model=model if summarizer is not None else "")
+
+    def __len__(self):
+        return len(self.digests)
+
+    def get(self, key):
+        return self.digests.get(key) if key else None
+
+    def text(self, key, header=False):
+        """Özet metni; özet yoksa None (çağıran tam dokümana düşer)."""
+        digest = self.get(key)
+        return format_digest(digest, header=header) if digest else None
+
+    # --- KALICILIK ---
+    def to_dict(self):
+        return {"version": DIGEST_VERSION, "model": self.model, "digests": self.digests}
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != DIGEST_VERSION:
+            raise ValueError(f"Ders özetleri sürümü uyumsuz: {path}")
+        return cls(data["digests"], model=data.get("model", ""))
+
+
+def build_course_digests(json_file=JSON_FILE, courses=None, summarizer=None, model=""):
+    """
+    Ingest adımı: özetleri çıkarır (isteğe bağlı LLM özetiyle) ve kaydeder. Özetler içerik özetine göre
+    saklandığından tüm müfredat sürümlerinden kurulur (her parçanın kaydı kendi özetini bulur).
+    """
+    return build_artefact(lambda c: CourseDigests.from_courses(c, summarizer=summarizer, model=model),
+                          json_file, DIGESTS_SUFFIX, courses, all_versions=True)
+
+
+def load_course_digests(json_file=JSON_FILE):
+    """Kayıtlı özetler ya da veriden deterministik olarak yeniden kurulanlar; veri yoksa None (tam dokümanlar)."""
+    return load_artefact(CourseDigests.load, json_file, DIGESTS_SUFFIX, "Ders özetleri", build=build_course_digests)
+
+
+if __name__ == "__main__":
+    d = build_course_digests()
+    print(f"✅ {len(d)} ders özeti -> {digests_path_for(JSON_FILE)}")
@@ -0,0 +1,247 @@
+"""
+Scraper çıktısı için kompakt ders deposu (SQLite).
+
+`all_engineering_curricula.json` (indent=4, ~23k satır) her araçta baştan parse edilmek yerine
+bir kez SQLite dosyasına yazılır:
+
+- Dosya salt okunur açılır ve `mmap_size` ile belleğe eşlenir; satırlar ihtiyaç anında okunur,
+- Her satır `__slots__`'lu bir CourseRecord'a dönüşür (dict başına ek yük yok),
+- Bölüm / dönem / tür gibi tekrar eden metinler `sys.intern` ile tek kopya tutulur,
+- Liste alanları (haftalık konular, kazanımlar, değerlendirme) ilk erişimde çözülür,
+- `columns` ile sadece gereken sütunlar okunabilir (alan projeksiyonu, field_projection.py),
+- Her thread kendi salt okunur bağlantısını kullanır (component_pool.py: eşzamanlı oturumlar).
+
+CourseRecord `.get()` desteklediği için vector_create'teki dict tabanlı kod aynen çalışır.
+
+Kullanım:
+    python course_store.py                      # JSON -> .db
+    store = open_course_store()                 # dosya yoksa None
+    for course in store.records(department="Software Engineering"): ...
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+STORE_FILE = 'all_engineering_curricula.db'
+SCHEMA_VERSION = 2
+MMAP_SIZE = 64 * 1024 * 1024
+
+# Scraper'ın ürettiği alanlar (JSON'daki sırayla)
+SCALAR_FIELDS = (
+    "department", "course_code", "course_name", "semester", "type", "ects", "local_credit",
+    "theory_hours", "lab_hours", "prerequisites", "description", "objectives", "link",
+    "faculty", "curriculum",
+)
+LIST_FIELDS = ("evaluation_system", "weekly_topics", "learning_outcomes")
+INTERNED_FIELDS = ("department", "semester", "type", "faculty", "curriculum")
+FIELD_ORDER = (
+    "department", "course_code", "course_name", "semester", "type", "ects", "local_credit",
+    "theory_hours", "lab_hours", "evaluation_system", "prerequisites", "description", "objectives",
+    "weekly_topics", "learning_outcomes", "link", "faculty", "curriculum",
+)
+COLUMNS = SCALAR_FIELDS + LIST_FIELDS
+
+
+def store_path_for(json_file):
+    """'x.json' -> 'x.db' (depo her zaman kaynak JSON'un yanında durur)."""
+    return os.path.splitext(json_file)[0] + ".db"
+
+
+class CourseRecord:
+    """Tek bir ders. Liste alanları ham JSON metni olarak tutulur, ilk erişimde çözülür."""
+
+    __slots__ = ("index",) + SCALAR_FIELDS + tuple("_" + name for name in LIST_FIELDS)
+
+    def __init__(self, index, values, columns=COLUMNS):
+        self.index = index
+        if columns is not COLUMNS:
+            # Projeksiyonla okunan kayıt: seçilmeyen alanlar boş (None) kalır
+            for name in COLUMNS:
+                setattr(self, "_" + name if name in LIST_FIELDS else name, None)
+        for name, value in zip(columns, values):
+            if name in LIST_FIELDS:
+                name = "_" + name
+            elif name in INTERNED_FIELDS and value is not None:
+                value = sys.intern(value)
+            setattr(self, name, value)
+
+    def _decoded(self, name):
+        value = getattr(self, "_" + name)
+        if isinstance(value, str):
+            value = json.loads(value)
+            setattr(self, "_" + name, value)
+        return value
+
+    evaluation_system = property(lambda self: self._decoded("evaluation_system"))
+    weekly_topics = property(lambda self: self._decoded("weekly_topics"))
+    learning_outcomes = property(lambda self: self._decoded("learning_outcomes"))
+
+    def get(self, key, default=None):
+        # dict.get ile aynı: alan yoksa (NULL) varsayılan döner
+        value = getattr(self, key, None) if key in FIELD_ORDER else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in FIELD_ORDER:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        """Scraper JSON'undaki sözlüğün aynısı."""
+        return {name: getattr(self, name) for name in FIELD_ORDER if getattr(self, name) is not None}
+
+    def __repr__(self):
+        return f"CourseRecord({self.index}, {self.course_code!r}, {self.department!r})"
+
+
+def build_course_store(courses, store_file=STORE_FILE, source=None):
+    """Ders listesini (scraper çıktısı) SQLite deposuna yazar. Yarım kalan dosya bırakmamak için tmp + rename."""
+    tmp_file = store_file + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    conn = sqlite3.connect(tmp_file)
+    try:
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(
+            "CREATE TABLE courses (idx INTEGER PRIMARY KEY, "
+            + ", ".join(f"{name} TEXT" for name in COLUMNS) + ")"
+        )
+        rows = []
+        for index, course in enumerate(courses):
+            row = [index]
+            for name in COLUMNS:
+                value = course.get(name)
+                if name in LIST_FIELDS and value is not None:
+                    value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+                row.append(value)
+            rows.append(row)
+        conn.executemany(
+            f"INSERT INTO courses VALUES ({', '.join('?' * (len(COLUMNS) + 1))})", rows
+        )
+        conn.execute("CREATE INDEX idx_courses_code ON courses (course_code)")
+        conn.execute("CREATE INDEX idx_courses_department ON courses (department)")
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("schema_version", str(SCHEMA_VERSION)),
+            ("source", source or ""),
+            ("course_count", str(len(rows))),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_file, store_file)
+    return store_file
+
+
+class CourseStore:
+    """Salt okunur, mmap'li ders deposu. Kayıtlar ihtiyaç anında (satır satır) okunur."""
+
+    def __init__(self, store_file=STORE_FILE, mmap_size=MMAP_SIZE):
+        self.store_file = store_file
+        self.mmap_size = mmap_size
+        # thread -> bağlantı: bir sqlite3 bağlantısı thread'ler arasında güvenle paylaşılamaz
+        self._connections = {}
+        self._lock = threading.Lock()
+
+        version = self.conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if not version or int(version[0]) != SCHEMA_VERSION:
+            self.close()
+            raise ValueError(f"Ders deposu şeması uyumsuz: {store_file} (yeniden oluşturun)")
+
+    @property
+    def conn(self):
+        """Çağıran thread'in bağlantısı (ilk kullanımda açılır; dosya mmap'li, sayfalar ortak)."""
+        thread = threading.current_thread()
+        conn = self._connections.get(thread)
+        if conn is None:
+            # check_same_thread=False: close() ve temizlik başka thread'den kapatabilsin
+            conn = sqlite3.connect(f"file:{self.store_file}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+            with self._lock:
+                # Biten thread'lerin bağlantıları kapatılır (Streamlit her çalıştırmada yeni thread açar)
+                for dead in [t for t in self._connections if not t.is_alive()]:
+                    self._connections.pop(dead).close()
+                self._connections[thread] = conn
+        return conn
+
+    def _select(self, where="", params=(), columns=None):
+        columns = COLUMNS if columns is None else tuple(c for c in COLUMNS if c in columns)
+        sql = f"SELECT idx, {', '.join(columns)} FROM courses {where} ORDER BY idx"
+        for row in self.conn.execute(sql, params):
+            yield CourseRecord(row[0], row[1:], columns)
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0]
+
+    def __iter__(self):
+        return self._select()
+
+    def get(self, index):
+        for record in self._select("WHERE idx = ?", (index,)):
+            return record
+        return None
+
+    def find_by_code(self, course_code, columns=None):
+        """Ders koduna göre kayıtlar (aynı kod birden çok bölümde olabilir). `columns`: sadece bu sütunlar."""
+        return list(self._select("WHERE course_code = ?", (course_code,), columns))
+
+    def records(self, department=None, semester=None, course_type=None):
+        """Eşitlik filtreleriyle kayıt üreteci. `department` liste de olabilir (OR)."""
+        clauses, params = [], []
+        if department:
+            departments = department if isinstance(department, list) else [department]
+            clauses.append(f"department IN ({', '.join('?' * len(departments))})")
+            params.extend(departments)
+        if semester:
+            clauses.append("semester = ?")
+            params.append(semester)
+        if course_type:
+            clauses.append("type = ?")
+            params.append(course_type)
+        where = "WHERE " + " AND ".join(clauses) if clauses else ""
+        return self._select(where, params)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+
+
+def is_store_fresh(json_file, store_file):
+    """Depo var ve kaynak JSON'dan eski değilse True."""
+    if not os.path.exists(store_file):
+        return False
+    if not os.path.exists(json_file):
+        return True
+    return os.path.getmtime(store_file) >= os.path.getmtime(json_file)
+
+
+def open_course_store(store_file=STORE_FILE):
+    """Depo dosyası varsa açar, yoksa (veya şema eskiyse) None döner."""
+    if not os.path.exists(store_file):
+        return None
+    try:
+        return CourseStore(store_file)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"⚠️ Ders deposu açılamadı, JSON kullanılacak: {e}")
+        return None
+
+
+def main():
+    json_file = sys.argv[1] if len(sys.argv) > 1 else 'all_engineering_curricula.json'
+    store_file = sys.argv[2] if len(sys.argv) > 2 else store_path_for(json_file)
+
+    with open(json_file, 'r', encoding='utf-8') as f:
+        courses = json.load(f)
+
+    build_course_store(courses, store_file, source=os.path.basename(json_file))
+    print(f"✅ {len(courses)} ders '{store_file}' deposuna yazıldı "
+          f"({os.path.getsize(json_file) / 1024:.0f} KB JSON -> {os.path.getsize(store_file) / 1024:.0f} KB).")
+
+
+if __name__ == "__main__":
+    main()
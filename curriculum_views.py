@@ -0,0 +1,119 @@
+"""
+Önceden hesaplanmış müfredat görünümleri (list_curriculum soruları için).
+
+Müfredat listesi sorularının uzayı küçüktür: 4 bölüm × 8 dönem (+ seçmeli havuzu) × tür.
+Ingest sırasında her (bölüm, dönem, tür) görünümü sıralı ve biçimlenmiş satırlar olarak
+hesaplanır ve veri dosyasının yanına kaydedilir (`<veri>.views.json`, sürümlü).
+
+Sorgu anında koleksiyona / depoya gidilmez; istenen bölüm ve yıl kombinasyonlarına (liste = OR)
+uyan görünümler sıralı birleştirilir (heapq.merge) ve tekrarlayan satırlar atılır.
+
+    views = load_curriculum_views()
+    views.lines(["Software Engineering", "Computer Engineering"], year=["2", "3"], semester="Fall")
+"""
+import heapq
+import json
+import os
+
+from derived_artefacts import artefact_path, build_artefact, load_artefact
+from vector_create import JSON_FILE, format_number, get_academic_year, to_number
+
+VIEWS_VERSION = 1
+VIEWS_SUFFIX = ".views.json"
+
+
+def views_path_for(json_file):
+    return artefact_path(json_file, VIEWS_SUFFIX)
+
+
+def format_course_line(code, name, ects, course_type):
+    """Müfredat listesindeki tek satır (CourseRetriever.get_courses_by_metadata ile aynı biçim)."""
+    return f"- {code} {name} ({format_number(ects)} ECTS) [{course_type}]"
+
+
+def _as_list(value):
+    return [str(v) for v in value] if isinstance(value, list) else [str(value)]
+
+
+class CurriculumViews:
+    """(bölüm, dönem, tür) -> sıralı satırlar. Sorgular görünümlerin birleştirilmesidir."""
+
+    def __init__(self, views):
+        # views: [{"department", "semester", "year", "type", "lines": [...]}, ...]
+        self.views = views
+
+    @classmethod
+    def from_courses(cls, courses):
+        grouped = {}
+        for course in courses:
+            key = (str(course.get('department', '')), str(course.get('semester', '')), str(course.get('type', '')))
+            grouped.setdefault(key, set()).add(format_course_line(
+                course.get('course_code'), course.get('course_name'), to_number(course.get('ects')), key[2]
+            ))
+
+        views = [
+            {"department": department, "semester": semester, "year": get_academic_year(semester),
+             "type": course_type, "lines": sorted(lines)}
+            for (department, semester, course_type), lines in sorted(grouped.items())
+        ]
+        return cls(views)
+
+    def __len__(self):
+        return len(self.views)
+
+    def lines(self, department=None, year=None, semester=None, course_type=None):
+        """
+        Filtrelere uyan görünümlerin birleşimi (sıralı, tekrarsız).
+        `department` ve `year` liste olabilir (OR); `semester` dönem adında geçen metindir ("Fall").
+        """
+        departments = _as_list(department) if department else None
+        years = _as_list(year) if year else None
+
+        selected = [
+            view["lines"] for view in self.views
+            if (departments is None or view["department"] in departments)
+            and (years is None or view["year"] in years)
+            and (not semester or semester in view["semester"])
+            and (not course_type or view["type"] == course_type)
+        ]
+
+        merged = []
+        for line in heapq.merge(*selected):
+            if not merged or merged[-1] != line:
+                merged.append(line)
+        return merged
+
+    # --- KALICILIK ---
+    def to_dict(self):
+        return {"version": VIEWS_VERSION, "views": self.views}
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != VIEWS_VERSION:
+            raise ValueError(f"Müfredat görünümleri sürümü uyumsuz: {path}")
+        return cls(data["views"])
+
+
+def build_curriculum_views(json_file=JSON_FILE, courses=None):
+    """Ingest adımı: görünümleri hesaplar ve kaydeder (bkz. derived_artefacts.build_artefact)."""
+    return build_artefact(CurriculumViews.from_courses, json_file, VIEWS_SUFFIX, courses)
+
+
+def load_curriculum_views(json_file=JSON_FILE):
+    """Kayıtlı görünümler ya da veriden yeniden kurulanlar; veri yoksa None."""
+    return load_artefact(CurriculumViews.load, json_file, VIEWS_SUFFIX, "Müfredat görünümleri",
+                         build=build_curriculum_views)
+
+
+if __name__ == "__main__":
+    v = build_curriculum_views()
+    print(f"✅ {len(v)} müfredat görünümü -> {views_path_for(JSON_FILE)}")
@@ -0,0 +1,66 @@
+"""
+Veri dosyasından türetilip yanına kaydedilen çıktılar için ortak yol, tazelik ve yükle-ya-da-kur mantığı.
+
+Müfredat görünümleri (.views.json), ön koşul grafiği (.prereq.json), yazım sözlüğü (.spell.json),
+ders özetleri (.digests.json) ve alan kontrolü (.domain.npz) aynı yaşam döngüsünü paylaşır:
+  - ingest (vector_create.py) ya da modülün kendi `__main__`'i çıktıyı kurar ve kaydeder,
+  - çalışma zamanında kayıtlı çıktı veri dosyasından eski değilse yüklenir; eskiyse (scraper JSON'u
+    yeniden yazdı) ya da okunamıyorsa veriden yeniden kurulup kaydedilir.
+Yeniden kurulum ingest ile aynı ders listesini kullanır: bölüm bazlı çıktılar sadece varsayılan müfredat
+sürümünden (shards.default_shard_courses), içerik özetine göre saklanan ders özetleri tüm parçalardan.
+
+    views = load_artefact(CurriculumViews.load, json_file, VIEWS_SUFFIX, "Müfredat görünümleri",
+                          build=build_curriculum_views)
+"""
+import json
+import os
+
+from shards import default_shard_courses
+from vector_create import load_course_data
+
+# Kayıtlı çıktı okunurken beklenen hatalar: sürüm uyuşmazlığı, eksik alan, bozuk / yarım dosya
+LOAD_ERRORS = (ValueError, KeyError, OSError, json.JSONDecodeError)
+
+
+def artefact_path(json_file, suffix):
+    """'x.json', '.views.json' -> 'x.views.json'"""
+    return os.path.splitext(json_file)[0] + suffix
+
+
+def is_fresh(path, json_file):
+    """Kayıtlı çıktı var ve veri dosyasından eski değil (veri dosyası yoksa kayıtlı çıktı geçerlidir)."""
+    return os.path.exists(path) and (not os.path.exists(json_file)
+                                     or os.path.getmtime(path) >= os.path.getmtime(json_file))
+
+
+def source_courses(json_file, all_versions=False):
+    """Çıktının kurulacağı dersler: varsayılan müfredat sürümü; `all_versions` ile tüm parçalar."""
+    course_data = load_course_data(json_file)
+    return course_data if all_versions else default_shard_courses(course_data)
+
+
+def build_artefact(from_courses, json_file, suffix, courses=None, all_versions=False):
+    """
+    Ingest adımı: `from_courses(dersler)` ile kurar ve veri dosyasının yanına kaydeder.
+    Dersler verilmediyse veri dosyasından okunur (bkz. source_courses).
+    """
+    courses = courses if courses is not None else source_courses(json_file, all_versions)
+    artefact = from_courses(courses)
+    artefact.save(artefact_path(json_file, suffix))
+    return artefact
+
+
+def load_artefact(loader, json_file, suffix, label, build=None):
+    """
+    Kayıtlı çıktı güncelse `loader(yol)` ile yükler; değilse `build(json_file)` ile yeniden kurar.
+    `build` verilmeyen çıktılar (veriden kurulamayanlar) tazelik bakılmadan yüklenir. Kurulamıyorsa None.
+    """
+    path = artefact_path(json_file, suffix)
+    if os.path.exists(path) and (build is None or is_fresh(path, json_file)):
+        try:
+            return loader(path)
+        except LOAD_ERRORS as e:
+            print(f"⚠️ {label} okunamadı{', yeniden kuruluyor' if build is not None else ''}: {e}")
+    if build is None or not os.path.exists(json_file):
+        return None
+    return build(json_file)
@@ -0,0 +1,190 @@
+"""
+Alan dışı (out-of-domain) soru kısa devresi.
+
+"Hogwarts", "yemek tarifi", "astroloji" gibi sorular bugüne kadar router + vektör araması +
+LLM üretimi maliyetini ödedikten sonra Generator prompt'undaki talimatla reddediliyordu.
+Ingest sırasında ders embedding'leri ve bölüm merkezleri (centroid) kaydedilir; sorunun konu
+kelimelerinin embedding'i en yakın derse ve en yakın bölüm merkezine göre puanlanır.
+Puan kalibre edilmiş eşiğin altındaysa standart ret cevabı hiç LLM'e gitmeden döner.
+
+- Eşik, etiketli alan içi / alan dışı soru kümesiyle (benchmarks/domain_queries.json) kalibre edilir:
+  alan içi hiçbir soru reddedilmeyecek şekilde, en düşük alan içi puan ile onun altındaki en
+  yüksek alan dışı puanın ortası seçilir,
+- Ders kodu içeren ("SE 999") ya da konu kelimesi kalmayan ("how many mandatory courses") sorular
+  yapısal olarak alan içidir; onlara puan bakılmaz,
+- Ortak kalıp kelimeler ("course", "engineering", "which", ...) puanlamadan önce atılır.
+
+    guard = load_domain_guard()
+    guard.check("Which engineering course teaches cooking?", embedding_fn)
+    # {"in_domain": False, "topic": "cooking", "score": 0.09, ...}
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+from derived_artefacts import artefact_path, load_artefact
+from vector_create import JSON_FILE
+
+GUARD_VERSION = 1
+GUARD_SUFFIX = ".domain.npz"
+DOMAIN_QUERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "domain_queries.json")
+OUT_OF_DOMAIN_ANSWER = "I could not find any information regarding {topic} in the engineering curriculum."
+COURSE_CODE_PATTERN = re.compile(r"\b[A-Za-z]{2,5}\s?\d{3,4}\b")
+# Soru kalıbı ve her alan içi soruda geçebilecek genel kelimeler: konu puanına katılmaz
+GENERIC_WORDS = frozenset("""
+a an the is are was were be been there any some do does did you your i my me we our us it its this that
+which what who whom how where when why can could should would will shall may might must
+of on in at to for from by with about into and or not no than more most
+course courses class classes lesson lessons subject subjects teach teaches taught teaching
+offer offered offers have has cover covers covered covering topic topics content contents
+department departments engineering engineer engineers program programme curriculum university
+elective electives mandatory compulsory student students year years semester semesters
+tell give show list find compare difference between many much take takes taking need needs required require
+se ce ee ie eee first second third fourth 1st 2nd 3rd 4th freshman sophomore junior senior
+""".split())
+
+
+def domain_path_for(json_file):
+    return artefact_path(json_file, GUARD_SUFFIX)
+
+
+def query_topic(text):
+    """Sorudan konu kelimelerini çıkarır: 'Which engineering course teaches cooking?' -> 'cooking'."""
+    return " ".join(w for w in re.findall(r"[a-z0-9]+", str(text or "").lower()) if w not in GENERIC_WORDS)
+
+
+def _normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def calibrate_threshold(in_scores, out_scores):
+    """
+    Alan içi hiçbir soru reddedilmesin: eşik, en düşük alan içi puan ile onun altında kalan
+    en yüksek alan dışı puanın ortası. Altında alan dışı puan yoksa küçük bir pay bırakılır.
+    """
+    lowest_in = min(in_scores)
+    below = [s for s in out_scores if s < lowest_in]
+    return (lowest_in + max(below)) / 2.0 if below else lowest_in - 0.01
+
+
+def load_labeled_queries(path=DOMAIN_QUERIES_FILE):
+    """[{"query": str, "in_domain": bool}, ...]; dosya yoksa boş liste."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class DomainGuard:
+    """Ders embedding'leri + bölüm merkezleri üzerinde en yakın komşu benzerliği ile alan kontrolü."""
+
+    def __init__(self, vectors, centroids, departments, threshold=None, model=""):
+        self.vectors = _normalize_rows(vectors)
+        self.centroids = _normalize_rows(centroids)
+        self.departments = list(departments)
+        # None: henüz kalibre edilmedi, hiçbir soru reddedilmez
+        self.threshold = threshold
+        self.model = model
+
+    @classmethod
+    def from_collection(cls, collection, model=""):
+        """Koleksiyondaki ders embedding'lerinden kurar (ortak dersler tüm bölümlerinin merkezine katılır)."""
+        result = collection.get(include=["embeddings", "metadatas"])
+        vectors = _normalize_rows(result["embeddings"])
+
+        members = {}
+        for row, meta in enumerate(result["metadatas"]):
+            if meta.get("placements"):
+                departments = {p["department"] for p in json.loads(meta["placements"])}
+            else:
+                departments = {meta.get("department")}
+            for department in departments:
+                members.setdefault(department, []).append(row)
+
+        departments = sorted(d for d in members if d)
+        centroids = [vectors[members[d]].mean(axis=0) for d in departments]
+        return cls(vectors, centroids, departments, model=model)
+
+    def _embed(self, texts, embedding_fn):
+        return _normalize_rows(embedding_fn(list(texts)))
+
+    def score(self, query_vector):
+        """(puan, en yakın bölüm): en yakın ders ve en yakın bölüm merkezi benzerliğinin büyüğü."""
+        nearest_course = float((self.vectors @ query_vector).max()) if len(self.vectors) else 0.0
+        centroid_scores = self.centroids @ query_vector if len(self.centroids) else np.zeros(0)
+        best = int(centroid_scores.argmax()) if len(centroid_scores) else None
+        nearest_centroid = float(centroid_scores[best]) if best is not None else 0.0
+        return max(nearest_course, nearest_centroid), self.departments[best] if best is not None else None
+
+    def check(self, text, embedding_fn):
+        """{"in_domain", "topic", "score", "department", "reason"} döner."""
+        topic = query_topic(text)
+        if COURSE_CODE_PATTERN.search(str(text or "")):
+            return {"in_domain": True, "topic": topic, "score": None, "department": None, "reason": "course_code"}
+        if not topic:
+            return {"in_domain": True, "topic": topic, "score": None, "department": None, "reason": "no_topic"}
+
+        score, department = self.score(self._embed([topic], embedding_fn)[0])
+        in_domain = self.threshold is None or score >= self.threshold
+        return {"in_domain": in_domain, "topic": topic, "score": round(score, 4), "department": department,
+                "reason": "similarity"}
+
+    def scores(self, texts, embedding_fn):
+        """Kalibrasyon için: konu kelimesi kalan soruların puanları (None = yapısal alan içi)."""
+        topics = [query_topic(t) if not COURSE_CODE_PATTERN.search(t) else "" for t in texts]
+        scored = [i for i, topic in enumerate(topics) if topic]
+        result = [None] * len(texts)
+        if scored:
+            vectors = self._embed([topics[i] for i in scored], embedding_fn)
+            for i, vector in zip(scored, vectors):
+                result[i] = self.score(vector)[0]
+        return result
+
+    def calibrate(self, embedding_fn, labeled=None):
+        """Etiketli kümeyle eşiği belirler ve ayarlar; kümede iki sınıftan örnek yoksa eşik değişmez."""
+        labeled = labeled if labeled is not None else load_labeled_queries()
+        scores = self.scores([q["query"] for q in labeled], embedding_fn)
+        in_scores = [s for s, q in zip(scores, labeled) if s is not None and q["in_domain"]]
+        out_scores = [s for s, q in zip(scores, labeled) if s is not None and not q["in_domain"]]
+        if in_scores and out_scores:
+            self.threshold = calibrate_threshold(in_scores, out_scores)
+        return self.threshold
+
+    # --- KALICILIK ---
+    def save(self, path):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, version=GUARD_VERSION, vectors=self.vectors, centroids=self.centroids,
+                 departments=np.array(self.departments), model=np.array(self.model),
+                 threshold=np.array(np.nan if self.threshold is None else self.threshold))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != GUARD_VERSION:
+                raise ValueError(f"Alan kontrolü dosyası sürümü uyumsuz: {path}")
+            threshold = float(data["threshold"])
+            return cls(data["vectors"], data["centroids"], data["departments"].tolist(),
+                       threshold=None if np.isnan(threshold) else threshold, model=str(data["model"]))
+
+
+def build_domain_guard(collection, embedding_fn, json_file=JSON_FILE, model=""):
+    """Ingest adımı: koleksiyondan kurar, etiketli kümeyle kalibre eder ve veri dosyasının yanına kaydeder."""
+    guard = DomainGuard.from_collection(collection, model=model)
+    guard.calibrate(embedding_fn)
+    guard.save(domain_path_for(json_file))
+    return guard
+
+
+def load_domain_guard(json_file=JSON_FILE):
+    """
+    Kayıtlı alan kontrolünü yükler; yoksa veya okunamazsa None (kısa devre kapalı). Embedding gerektirdiği
+    için çalışma zamanında yeniden kurulmaz, sadece ingest'te (build_domain_guard) güncellenir.
+    """
+    return load_artefact(DomainGuard.load, json_file, GUARD_SUFFIX, "Alan kontrolü dosyası")
@@ -0,0 +1,75 @@
+"""
+Niyete göre alan projeksiyonu (retrieval sonuçlarında sadece gereken ders alanları).
+
+retrieve_context ve kod ile birebir arama her soruda dersin tüm metnini (başlık, açıklama,
+değerlendirme, konular, kazanımlar) döndürüyordu. Oysa "SE 302'nin notlandırması" sorusu sadece
+değerlendirme bölümünü, "hangi konular" sorusu sadece haftalık konuları ister.
+
+Ders alanları ayrı ayrı adreslenebilir durumda saklanır:
+  - bölüm koleksiyonu: her parçanın `section` metadata'sı (overview / objectives / weekly_topics /
+    learning_outcomes / evaluation) -> projeksiyon sorguya `section $in [...]` koşulu olarak iner,
+  - ders deposu (course_store.py): alanlar ayrı sütunlar -> sadece gereken sütunlar SELECT edilir.
+
+Projeksiyon: router'ın isteğe bağlı `fields` ipucu, yoksa sorudaki anahtar kelimeler. Liste / sayma /
+toplama niyetlerinde ve hiçbir alan belirgin değilse projeksiyon yoktur (None: özet ya da tam metin).
+
+    projection_for({"intent": "search", "fields": "None"}, "What is the grading of SE 302?")
+    # ("evaluation",)
+"""
+import re
+
+from vector_create import SECTION_TITLES
+
+FIELDS = tuple(SECTION_TITLES)
+FIELD_PATTERNS = {
+    "overview": re.compile(r"\b(ects|credits?|prerequisites?|pre-requisites?|(theory|lab|weekly) hours|workload)\b"),
+    "objectives": re.compile(r"\b(objectives?|aims?|goals?|purpose)\b"),
+    "weekly_topics": re.compile(r"\b(topics?|weekly|week\s*\d+|syllabus|schedule)\b"),
+    "learning_outcomes": re.compile(r"\b(learning outcomes?|outcomes?|skills?|competenc(e|es|ies)|be able to)\b"),
+    "evaluation": re.compile(r"\b(grad(e|es|ed|ing)|evaluat(ed|ion)|assess(ed|ment)|exams?|midterms?|final exams?"
+                             r"|weights?|weighting|percentage|quiz(zes)?|homeworks?|assignments?)\b"),
+}
+# Bu niyetlerde ders içeriği ya context'e girmez ya da liste satırıdır: projeksiyon uygulanmaz
+UNPROJECTED_INTENTS = {"count", "aggregate", "list_curriculum"}
+# Her projeksiyonda okunan sütunlar: ders başlığı ve varsayılan müfredat sürümü seçimi (shards.py)
+HEADER_COLUMNS = ("department", "course_code", "course_name", "semester", "type", "ects", "faculty", "curriculum")
+# Alan -> ders deposundaki kaynak sütunlar (vector_create.build_section_texts ile aynı)
+FIELD_COLUMNS = {
+    "overview": ("local_credit", "theory_hours", "lab_hours", "prerequisites", "description"),
+    "objectives": ("objectives",),
+    "weekly_topics": ("weekly_topics",),
+    "learning_outcomes": ("learning_outcomes",),
+    "evaluation": ("evaluation_system",),
+}
+
+
+def normalize_fields(value):
+    """Router ipucu ('evaluation', ['weekly_topics', ...], 'None') -> FIELDS sırasıyla geçerli alanlar ya da None."""
+    if not value or value == "None":
+        return None
+    values = {str(v).strip().lower() for v in (value if isinstance(value, list) else [value])}
+    fields = tuple(f for f in FIELDS if f in values)
+    return fields or None
+
+
+def fields_from_text(text):
+    """Sorudaki anahtar kelimelerden alanlar; hiçbiri ya da hepsi eşleşirse None (projeksiyon gereksiz)."""
+    text = str(text or "").lower()
+    fields = tuple(f for f in FIELDS if FIELD_PATTERNS[f].search(text))
+    return fields if fields and len(fields) < len(FIELDS) else None
+
+
+def projection_for(route_result, query_text):
+    """Yönlendirilmiş niyet + soru -> istenecek alanlar (None = projeksiyon yok)."""
+    route_result = route_result or {}
+    if route_result.get("intent") in UNPROJECTED_INTENTS:
+        return None
+    return normalize_fields(route_result.get("fields")) or fields_from_text(query_text)
+
+
+def columns_for(fields):
+    """Projeksiyon için ders deposundan okunacak sütunlar (başlık sütunları + alanların kaynakları)."""
+    columns = list(HEADER_COLUMNS)
+    for field in fields:
+        columns.extend(c for c in FIELD_COLUMNS[field] if c not in columns)
+    return tuple(columns)
@@ -0,0 +1,676 @@
+"""
+Kalıcı HNSW (Hierarchical Navigable Small World) yaklaşık en yakın komşu indeksi.
+
+Scraper tüm fakültelere ve müfredat yıllarına genişletildiğinde on binlerce parça olacak;
+LocalCollection'ın kaba kuvvet taraması (her sorguda tüm satırlar + satır başına `where`
+değerlendirmesi) ve her istekte Cloud'a gitmek bu boyutta gecikmeyi tutamaz.
+
+- HNSWIndex: katmanlı küçük dünya grafı (Malkov & Yashunin). Üst katmanlar seyrek, katman 0
+  her düğüm için 2*M komşu tutar; arama üstten aşağı açgözlü iner, katman 0'da `ef` genişliğinde arar.
+- Ön filtreleme (bölüm / yıl): filtre bir boolean maskeye çevrilir. Aranacak kayıt azsa (BRUTE_FORCE_LIMIT,
+  seçicilikle ölçeklenir) o alt kümede tam arama yapılır; çoksa graf tüm düğümler üzerinden gezilir,
+  sonuca sadece maskeye uyanlar alınır ve `ef` seçicilikle orantılı büyütülür.
+- Kalıcılık: vektörler ve katman 0 komşuları .npy olarak yazılır, yüklemede `mmap` ile eşlenir
+  (yeniden başlatmada graf kurulmaz, sayfalar ihtiyaç anında okunur). İlk değişiklikte belleğe kopyalanır.
+- Artımlı ekleme / silme: ekleme grafa düğüm ekler; silme işaretlenir (tombstone) ve sonuçlardan
+  çıkarılır. Silinenlerin oranı REBUILD_RATIO'yu aşınca graf canlı kayıtlardan yeniden kurulur.
+- Düşük hassasiyetli saklama (`precision`): sorgu yolu float32 yerine bellekteki kompakt kodlarla
+  (float16, boyut başına ölçekli int8 ya da işaret bitleri = binary) puanlar. Graf gezintisi / tam tarama
+  bu yaklaşık puanlarla aday bulur; adaylar mmap'li float32 dosyasından kesin puanla yeniden sıralanır
+  (sadece aday satırların sayfaları okunur, dosya süreçler arasında sayfa önbelleğinde paylaşılır).
+  Graf her zaman float32 ile kurulur; mod `RAG_HNSW_PRECISION` ile seçilir (benchmarks/bench_quantization.py).
+
+HNSWCollection, Chroma Collection API'sini (add / upsert / get / query / count / delete) taşır;
+CourseRetriever'a LocalCollection gibi doğrudan verilebilir. Retriever'da `RAG_INDEX_BACKEND=hnsw`
+ile Cloud yerine ingest'te kaydedilen indeks kullanılır.
+
+Kullanım:
+    python hnsw_index.py            # JSON -> parça başına <veri>.<koleksiyon>.hnsw/ (varsa sadece fark uygulanır)
+"""
+import heapq
+import json
+import os
+import shutil
+
+import numpy as np
+
+from local_collection import _compare, default_embedding_function
+from rag_tracing import record_cache
+from vector_create import COLLECTION_NAME, JSON_FILE, build_records, build_section_records, load_course_data
+
+HNSW_VERSION = 1
+DEFAULT_M = 16
+DEFAULT_EF_CONSTRUCTION = 64
+DEFAULT_EF_SEARCH = 128
+# Aranacak (filtreye uyan) kayıt sayısı bunun altındaysa graf yerine numpy ile tam arama yapılır:
+# bu boyuta kadar tek matris çarpımı Python'daki graf gezintisinden hızlı ve kesin (benchmarks/bench_hnsw.py)
+BRUTE_FORCE_LIMIT = 8192
+# Silinmiş (tombstone) düğüm oranı bunu aşınca graf canlı kayıtlardan yeniden kurulur
+REBUILD_RATIO = 0.3
+# Sorgu yolunda bellekte tutulan vektör kodları; float32 dışındakilerde adaylar float32 ile yeniden puanlanır
+PRECISIONS = ("float32", "float16", "int8", "binary")
+DEFAULT_PRECISION = os.getenv("RAG_HNSW_PRECISION", "float32").lower()
+# Tam taramada yaklaşık puanla k * RESCORE_FACTOR aday çekilip kesin puanla sıralanır
+# (graf gezintisinde `ef` adayın hepsi yeniden puanlanır)
+RESCORE_FACTORS = {"float32": 1, "float16": 2, "int8": 4, "binary": 40}
+
+
+def hnsw_path_for(json_file, name=COLLECTION_NAME):
+    """'x.json' -> 'x.<koleksiyon>.hnsw' (dizin)."""
+    return f"{os.path.splitext(json_file)[0]}.{name}.hnsw"
+
+
+def _normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class HNSWIndex:
+    """Normalize vektörlerde kosinüs uzaklığı (1 - benzerlik) ile HNSW grafı. Düğüm no = ekleme sırası."""
+
+    def __init__(self, dim, M=DEFAULT_M, ef_construction=DEFAULT_EF_CONSTRUCTION, ef_search=DEFAULT_EF_SEARCH,
+                 seed=42, precision=DEFAULT_PRECISION):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Bilinmeyen hassasiyet: {precision} (seçenekler: {', '.join(PRECISIONS)})")
+        self.dim = dim
+        self.precision = precision
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._level_mult = 1.0 / np.log(M)
+        self._rng = np.random.default_rng(seed)
+
+        self.count = 0
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        # Sorgu yolundaki kompakt kodlar (float32'de None: doğrudan `vectors` kullanılır); int8 için boyut ölçekleri
+        self.codes = self._empty_codes(0)
+        self.scale = None
+        self.links0 = np.full((0, 2 * M), -1, dtype=np.int32)  # -1: boş komşu yuvası
+        self.levels = np.zeros(0, dtype=np.int8)
+        self.deleted = np.zeros(0, dtype=bool)
+        self.upper = []  # upper[l - 1] = {düğüm: [komşular]} (l >= 1 katmanları, az düğüm)
+        self.entry_point = -1
+        self.max_level = -1
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def live_count(self):
+        return self.count - int(self.deleted[:self.count].sum())
+
+    # --- KODLAMA ---
+    def _empty_codes(self, capacity):
+        if self.precision == "float32":
+            return None
+        if self.precision == "binary":
+            return np.zeros((capacity, (self.dim + 7) // 8), dtype=np.uint8)
+        return np.zeros((capacity, self.dim), dtype=np.float16 if self.precision == "float16" else np.int8)
+
+    def _encode(self, vectors):
+        if self.precision == "float16":
+            return vectors.astype(np.float16)
+        if self.precision == "int8":
+            return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+        return np.packbits(vectors > 0, axis=-1)
+
+    def set_precision(self, precision):
+        """Kodları mevcut float32 vektörlerden yeniden üretir (graf değişmez)."""
+        if precision not in PRECISIONS:
+            raise ValueError(f"Bilinmeyen hassasiyet: {precision} (seçenekler: {', '.join(PRECISIONS)})")
+        self.precision = precision
+        self.scale = None
+        self.codes = self._empty_codes(len(self.vectors))
+        if self.codes is not None and self.count:
+            vectors = np.asarray(self.vectors[:self.count])
+            self._fit_scale(vectors)
+            self.codes[:self.count] = self._encode(vectors)
+
+    def _fit_scale(self, vectors):
+        """int8: boyut başına simetrik ölçek (ilk veriden; sonraki eklemeler sınıra kırpılır)."""
+        if self.precision == "int8" and self.scale is None and len(vectors):
+            self.scale = np.maximum(np.abs(vectors).max(axis=0), 1e-6).astype(np.float32) / 127.0
+
+    def _scorer(self, query):
+        """Düğüm dizisi -> sorguya benzerlik fonksiyonu (precision'a göre yaklaşık)."""
+        if self.precision == "float32":
+            return lambda nodes: self.vectors[nodes] @ query
+        if self.precision == "float16":
+            return lambda nodes: self.codes[nodes].astype(np.float32) @ query
+        if self.precision == "int8":
+            scaled = (query * self.scale).astype(np.float32)
+            return lambda nodes: self.codes[nodes] @ scaled
+        # binary: ±1 kodlarla float sorgunun çarpımı (asimetrik: sorgu tam hassasiyette kalır). Hamming'e göre
+        # yavaş ama seyrek vektörlerde (hash embedding'de boyutların ~%60'ı sıfır) recall çok daha yüksek
+        total = float(query.sum())
+        norm = np.sqrt(self.dim)
+        return lambda nodes: (2.0 * (np.unpackbits(self.codes[nodes], axis=-1, count=self.dim) @ query) - total) / norm
+
+    def memory_bytes(self):
+        """{"codes", "graph", "vectors", "vectors_resident"}: sorgu yolunun bellekteki ve dosyadaki boyutu."""
+        graph = self.links0[:self.count].nbytes + self.levels[:self.count].nbytes + self.deleted[:self.count].nbytes
+        graph += sum(len(links) for layer in self.upper for links in layer.values()) * 8
+        return {
+            "codes": self.codes[:self.count].nbytes if self.codes is not None else 0,
+            "graph": graph,
+            "vectors": self.count * self.dim * 4,
+            # mmap'li float32 dosyası bellekte sayılmaz (sadece okunan sayfalar, süreçler arası paylaşımlı)
+            "vectors_resident": 0 if isinstance(self.vectors, np.memmap) else self.count * self.dim * 4,
+        }
+
+    # --- BELLEK ---
+    def _ensure_capacity(self, needed):
+        """Diziler ikiye katlanarak büyür; mmap'li (salt okunur) diziler de bu sırada belleğe kopyalanır."""
+        capacity = len(self.vectors)
+        if needed <= capacity and self.vectors.flags.writeable:
+            return
+        capacity = max(needed, 2 * capacity, 1024) if needed > capacity else capacity
+
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        links0 = np.full((capacity, 2 * self.M), -1, dtype=np.int32)
+        levels = np.zeros(capacity, dtype=np.int8)
+        deleted = np.zeros(capacity, dtype=bool)
+        codes = self._empty_codes(capacity)
+        if codes is not None:
+            codes[:self.count] = self.codes[:self.count]
+        self.codes = codes
+        vectors[:self.count] = self.vectors[:self.count]
+        links0[:self.count] = self.links0[:self.count]
+        levels[:self.count] = self.levels[:self.count]
+        deleted[:self.count] = self.deleted[:self.count]
+        self.vectors, self.links0, self.levels, self.deleted = vectors, links0, levels, deleted
+
+    # --- GRAF ---
+    def _neighbors(self, node, level):
+        if level == 0:
+            row = self.links0[node]
+            return row[row >= 0].tolist()
+        return self.upper[level - 1].get(node, [])
+
+    def _set_neighbors(self, node, level, neighbors):
+        if level == 0:
+            self.links0[node] = -1
+            self.links0[node, :len(neighbors)] = neighbors
+        else:
+            self.upper[level - 1][node] = list(neighbors)
+
+    def _search_layer(self, query, entry, ef, level, allowed=None, score=None):
+        """
+        Tek katmanda `ef` genişlikli arama; artan uzaklığa göre [(uzaklık, düğüm)] döner.
+        `allowed` verilirse graf yine tüm düğümler üzerinden gezilir ama sonuca sadece izinliler girer.
+        `score` verilmezse (kurulum) kesin float32 benzerliği kullanılır.
+        """
+        visited = np.zeros(self.count, dtype=bool)
+        visited[[node for _, node in entry]] = True
+        candidates = list(entry)
+        heapq.heapify(candidates)
+        results = [(-d, n) for d, n in entry if allowed is None or allowed[n]]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            dist, node = heapq.heappop(candidates)
+            if len(results) >= ef and dist > -results[0][0]:
+                break
+            links = self.links0[node] if level == 0 else np.asarray(self.upper[level - 1].get(node, []), dtype=np.int32)
+            links = links[links >= 0]
+            fresh = links[~visited[links]]
+            if not fresh.size:
+                continue
+            visited[fresh] = True
+            dists = 1.0 - (self.vectors[fresh] @ query if score is None else score(fresh))
+            if len(results) >= ef:
+                # Mevcut en kötü sonuçtan uzak komşular hiç kuyruğa girmez (toplu eleme)
+                closer = dists < -results[0][0]
+                fresh, dists = fresh[closer], dists[closer]
+            for neighbor, d in zip(fresh.tolist(), dists.tolist()):
+                if len(results) < ef or d < -results[0][0]:
+                    heapq.heappush(candidates, (d, neighbor))
+                    if allowed is None or allowed[neighbor]:
+                        heapq.heappush(results, (-d, neighbor))
+                        if len(results) > ef:
+                            heapq.heappop(results)
+
+        return sorted((-d, n) for d, n in results)
+
+    def _select_neighbors(self, candidates, m):
+        """
+        Sezgisel komşu seçimi: aday, seçilmiş komşuların hepsine sorgudan daha uzaksa alınır
+        (kümeler arası köprüler korunur). Yer kalırsa elenen en yakınlarla doldurulur.
+        """
+        if len(candidates) <= m:
+            return [n for _, n in candidates]
+        nodes = [n for _, n in candidates]
+        # Aday i, seçilmiş bir j'ye sorgudan daha yakınsa (s_ij > 1 - d_i) engellenir
+        limits = 1.0 - np.array([d for d, _ in candidates], dtype=np.float32)
+        vectors = self.vectors[nodes]
+        pairwise = vectors @ vectors.T
+        blocked = np.zeros(len(nodes), dtype=bool)
+        selected, skipped = [], []
+        for i, node in enumerate(nodes):
+            if len(selected) >= m:
+                break
+            if blocked[i]:
+                skipped.append(node)
+                continue
+            selected.append(node)
+            blocked |= pairwise[i] > limits
+        return selected + skipped[:m - len(selected)]
+
+    def _random_level(self):
+        return int(-np.log(1.0 - self._rng.random()) * self._level_mult)
+
+    def _insert(self, vector):
+        node = self.count
+        self._ensure_capacity(node + 1)
+        self.vectors[node] = vector
+        if self.codes is not None:
+            self.codes[node] = self._encode(vector)
+        level = self._random_level()
+        self.levels[node] = min(level, 127)
+        self.count += 1
+        while len(self.upper) < level:
+            self.upper.append({})
+
+        if self.entry_point < 0:
+            self.entry_point, self.max_level = node, level
+            for l in range(1, level + 1):
+                self.upper[l - 1][node] = []
+            return node
+
+        entry = [(float(1.0 - self.vectors[self.entry_point] @ vector), self.entry_point)]
+        for l in range(self.max_level, level, -1):
+            entry = self._search_layer(vector, entry, 1, l)
+
+        for l in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(vector, entry, self.ef_construction, l)
+            max_links = 2 * self.M if l == 0 else self.M
+            neighbors = self._select_neighbors(found, self.M)
+            self._set_neighbors(node, l, neighbors)
+            for neighbor in neighbors:
+                links = self._neighbors(neighbor, l) + [node]
+                if len(links) > max_links:
+                    dists = (1.0 - self.vectors[links] @ self.vectors[neighbor]).tolist()
+                    links = self._select_neighbors(sorted(zip(dists, links)), max_links)
+                self._set_neighbors(neighbor, l, links)
+            entry = found
+
+        for l in range(self.max_level + 1, level + 1):
+            self.upper[l - 1][node] = []
+        if level > self.max_level:
+            self.entry_point, self.max_level = node, level
+        return node
+
+    def add(self, vectors):
+        """Vektörleri (normalize edilerek) ekler; düğüm numaralarını döner."""
+        vectors = _normalize_rows(vectors)
+        self._ensure_capacity(self.count + len(vectors))
+        self._fit_scale(vectors)
+        return [self._insert(v) for v in vectors]
+
+    def remove(self, nodes):
+        """Düğümleri silinmiş işaretler (graf gezintisinde kalır, sonuçlara girmez)."""
+        self.deleted[list(nodes)] = True
+
+    # --- ARAMA ---
+    def search(self, query, k, allowed=None, ef=None):
+        """
+        En yakın `k` canlı düğüm: [(uzaklık, düğüm)]. `allowed`: düğüm başına boolean ön filtre maskesi.
+        """
+        if self.count == 0 or k <= 0:
+            return []
+        query = _normalize_rows(query)[0]
+        deleted = self.deleted[:self.count]
+        if deleted.any():
+            allowed = ~deleted if allowed is None else allowed & ~deleted
+
+        ef = max(ef or self.ef_search, k)
+        score = self._scorer(query)
+        allowed_count = self.count if allowed is None else int(allowed.sum())
+        # Tam arama maliyeti izinli kayıt sayısıyla, filtreli graf gezintisi count / izinli oranıyla büyür:
+        # izinli^2 <= LIMIT * count ise tam arama ucuzdur (filtresizde: count <= LIMIT)
+        if allowed_count <= ef or allowed_count ** 2 <= BRUTE_FORCE_LIMIT * self.count:
+            positions = np.arange(self.count) if allowed is None else np.flatnonzero(allowed)
+            found = self._exact(score, k * RESCORE_FACTORS[self.precision], positions)
+        else:
+            if allowed is not None:
+                # Seçici filtrede sonuç kümesi dolana kadar daha geniş gezilir
+                ef = min(self.count, int(ef * self.count / allowed_count))
+            entry = [(float(1.0 - score(np.array([self.entry_point]))[0]), self.entry_point)]
+            for l in range(self.max_level, 0, -1):
+                entry = self._search_layer(query, entry, 1, l, score=score)
+            found = self._search_layer(query, entry, ef, 0, allowed, score=score)
+        return self._rescore(query, found, k)
+
+    def _exact(self, score, k, positions):
+        if not len(positions):
+            return []
+        sims = score(positions)
+        k = min(k, len(positions))
+        order = np.argpartition(-sims, k - 1)[:k]
+        order = order[np.argsort(-sims[order])]
+        return [(float(1.0 - sims[i]), int(positions[i])) for i in order]
+
+    def _rescore(self, query, found, k):
+        """Yaklaşık puanla bulunan adaylar float32 vektörlerle (mmap) kesin puanlanıp ilk `k` döner."""
+        if self.precision == "float32" or not found:
+            return found[:k]
+        # Sıralı okuma: aday satırları dosya sırasıyla (mmap sayfaları ardışık)
+        nodes = np.sort(np.fromiter((n for _, n in found), dtype=np.int64, count=len(found)))
+        return self._exact(lambda positions: self.vectors[positions] @ query, k, nodes)
+
+    # --- KALICILIK ---
+    def save(self, directory):
+        np.save(os.path.join(directory, "vectors.npy"), self.vectors[:self.count])
+        np.save(os.path.join(directory, "links0.npy"), self.links0[:self.count])
+        np.save(os.path.join(directory, "levels.npy"), self.levels[:self.count])
+        np.save(os.path.join(directory, "deleted.npy"), self.deleted[:self.count])
+        if self.codes is not None:
+            np.save(os.path.join(directory, "codes.npy"), self.codes[:self.count])
+        if self.scale is not None:
+            np.save(os.path.join(directory, "scale.npy"), self.scale)
+        header = {
+            "version": HNSW_VERSION, "dim": self.dim, "M": self.M, "ef_construction": self.ef_construction,
+            "ef_search": self.ef_search, "precision": self.precision, "count": self.count,
+            "entry_point": self.entry_point,
+            "max_level": self.max_level,
+            "upper": [{str(node): links for node, links in layer.items()} for layer in self.upper],
+        }
+        with open(os.path.join(directory, "graph.json"), "w", encoding="utf-8") as f:
+            json.dump(header, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        with open(os.path.join(directory, "graph.json"), "r", encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("version") != HNSW_VERSION:
+            raise ValueError(f"HNSW indeksi sürümü uyumsuz: {directory}")
+
+        index = cls(header["dim"], header["M"], header["ef_construction"], header["ef_search"],
+                    seed=header["count"], precision=header.get("precision", "float32"))
+        mode = "r" if mmap else None
+        index.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mode)
+        # Kodlar sorgu yolunda her adımda okunduğu için belleğe alınır; float32 dosyası mmap'li kalır
+        if index.precision != "float32":
+            index.codes = np.load(os.path.join(directory, "codes.npy"))
+        if os.path.exists(os.path.join(directory, "scale.npy")):
+            index.scale = np.load(os.path.join(directory, "scale.npy"))
+        index.links0 = np.load(os.path.join(directory, "links0.npy"), mmap_mode=mode)
+        index.levels = np.load(os.path.join(directory, "levels.npy"))
+        index.deleted = np.load(os.path.join(directory, "deleted.npy"))
+        index.count = header["count"]
+        if len(index.vectors) != index.count or len(index.links0) != index.count or \
+                (index.codes is not None and len(index.codes) != index.count):
+            raise ValueError(f"HNSW indeksi eksik yazılmış: {directory}")
+        index.entry_point, index.max_level = header["entry_point"], header["max_level"]
+        index.upper = [{int(node): links for node, links in layer.items()} for layer in header["upper"]]
+        return index
+
+
+class HNSWCollection:
+    """
+    Chroma Collection API'sinin HNSW indeksli, diske kalıcı karşılığı.
+    Uzaklıklar LocalCollection / Chroma'daki gibi normalize vektörlerde karesel L2 (0..4) döner.
+    """
+
+    def __init__(self, name=COLLECTION_NAME, embedding_function=None, path=None, index=None, **index_args):
+        self.name = name
+        self.path = path
+        self.embedding_function = embedding_function or default_embedding_function()
+        self.index = index
+        self._index_args = index_args
+        # Düğüm no -> kayıt; silinen kayıtların id'si None olur (düğüm numaraları kaymaz)
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        self._positions = {}  # id -> düğüm no (sadece canlılar)
+        self._masks = {}  # (alan, operatör, değer) -> boolean maske (filtre önbelleği)
+
+    def _embed(self, texts):
+        return _normalize_rows(self.embedding_function(list(texts)))
+
+    def count(self):
+        return len(self._positions)
+
+    # --- FİLTRE ---
+    def _leaf_mask(self, key, op, operand):
+        cache_key = (key, op, json.dumps(operand, sort_keys=True))
+        mask = self._masks.get(cache_key)
+        hit = mask is not None and len(mask) == len(self.ids)
+        record_cache("hnsw_filter", hit)
+        if not hit:
+            start = 0 if mask is None else len(mask)
+            fresh = np.fromiter((_compare(meta.get(key), op, operand) for meta in self.metadatas[start:]),
+                                dtype=bool, count=len(self.ids) - start)
+            mask = fresh if mask is None else np.concatenate([mask, fresh])
+            self._masks[cache_key] = mask
+        return mask
+
+    def _mask(self, where):
+        """Chroma 'where' sözdizimini düğüm başına boolean maskeye çevirir; filtre yoksa None."""
+        if not where:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, cond in where.items():
+            if key == "$and":
+                for clause in cond:
+                    mask &= self._mask(clause)
+            elif key == "$or":
+                mask &= np.logical_or.reduce([self._mask(clause) for clause in cond])
+            elif isinstance(cond, dict):
+                for op, operand in cond.items():
+                    mask &= self._leaf_mask(key, op, operand)
+            else:
+                mask &= self._leaf_mask(key, "$eq", cond)
+        return mask
+
+    def _live_positions(self, where=None, ids=None):
+        if ids is not None:
+            positions = [self._positions[i] for i in ids if i in self._positions]
+            mask = self._mask(where)
+            return [p for p in positions if mask is None or mask[p]]
+        mask = self._mask(where)
+        live = ~self.index.deleted[:self.index.count] if self.index is not None else np.zeros(0, dtype=bool)
+        return np.flatnonzero(live if mask is None else live & mask).tolist()
+
+    # --- YAZMA ---
+    def add(self, ids, documents=None, metadatas=None, embeddings=None):
+        if not ids:
+            return
+        for doc_id in ids:
+            if doc_id in self._positions:
+                raise ValueError(f"ID zaten mevcut: {doc_id}")
+        vectors = self._embed(documents) if embeddings is None else _normalize_rows(embeddings)
+        if self.index is None:
+            self.index = HNSWIndex(vectors.shape[1], **self._index_args)
+
+        nodes = self.index.add(vectors)
+        self.ids.extend(ids)
+        self.documents.extend(documents or [None] * len(ids))
+        self.metadatas.extend(metadatas or [{}] * len(ids))
+        for doc_id, node in zip(ids, nodes):
+            self._positions[doc_id] = node
+
+    def delete(self, ids=None, where=None):
+        drop = set(ids or [])
+        if where:
+            drop.update(self.ids[p] for p in self._live_positions(where))
+        nodes = [self._positions.pop(doc_id) for doc_id in drop if doc_id in self._positions]
+        if not nodes:
+            return
+        self.index.remove(nodes)
+        for node in nodes:
+            self.ids[node], self.documents[node], self.metadatas[node] = None, None, {}
+
+        if len(self.ids) - len(self._positions) > REBUILD_RATIO * len(self.ids):
+            self.rebuild()
+
+    def upsert(self, ids, documents=None, metadatas=None, embeddings=None):
+        self.delete(ids=[i for i in ids if i in self._positions])
+        self.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def rebuild(self):
+        """Silinmiş düğümleri atıp grafı canlı kayıtlardan (mevcut vektörlerle) yeniden kurar."""
+        live = self._live_positions()
+        old = self.index
+        self.index = HNSWIndex(old.dim, old.M, old.ef_construction, old.ef_search, precision=old.precision)
+        self.ids = [self.ids[p] for p in live]
+        self.documents = [self.documents[p] for p in live]
+        self.metadatas = [self.metadatas[p] for p in live]
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._masks = {}
+        if live:
+            self.index.add(old.vectors[live])
+
+    # --- OKUMA ---
+    def get(self, ids=None, where=None, include=None, limit=None, offset=None):
+        include = include or ["documents", "metadatas"]
+        positions = self._live_positions(where, ids)
+        positions = positions[offset or 0:]
+        if limit is not None:
+            positions = positions[:limit]
+
+        result = {"ids": [self.ids[p] for p in positions]}
+        if "documents" in include:
+            result["documents"] = [self.documents[p] for p in positions]
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadatas[p] for p in positions]
+        if "embeddings" in include:
+            result["embeddings"] = np.asarray(self.index.vectors[positions]) if positions else np.zeros((0, 0))
+        return result
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None, include=None, ef=None):
+        include = include or ["documents", "metadatas", "distances"]
+        query_vectors = self._embed(query_texts) if query_embeddings is None else _normalize_rows(query_embeddings)
+        allowed = self._mask(where)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        for q in query_vectors:
+            hits = self.index.search(q, n_results, allowed=allowed, ef=ef) if self.index is not None else []
+            top = [node for _, node in hits]
+            result["ids"].append([self.ids[p] for p in top])
+            result["documents"].append([self.documents[p] for p in top])
+            result["metadatas"].append([self.metadatas[p] for p in top])
+            # Kosinüs uzaklığı (1 - s) -> normalize vektörlerde karesel L2 (2 - 2s)
+            result["distances"].append([2.0 * d for d, _ in hits])
+
+        return {k: v for k, v in result.items() if k == "ids" or k in include}
+
+    # --- KALICILIK ---
+    def save(self, path=None):
+        """Geçici dizine yazıp eskisiyle yer değiştirir (yarım yazılmış indeks hiç okunmaz)."""
+        path = path or self.path
+        tmp_path, old_path = path + ".tmp", path + ".old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        if self.index is not None:
+            self.index.save(tmp_path)
+        with open(os.path.join(tmp_path, "records.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": HNSW_VERSION, "name": self.name, "ids": self.ids, "documents": self.documents,
+                       "metadatas": self.metadatas}, f, ensure_ascii=False, separators=(",", ":"))
+
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        self.path = path
+        return path
+
+    @classmethod
+    def load(cls, path, embedding_function=None, mmap=True):
+        with open(os.path.join(path, "records.json"), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        if records.get("version") != HNSW_VERSION:
+            raise ValueError(f"HNSW koleksiyonu sürümü uyumsuz: {path}")
+
+        index = HNSWIndex.load(path, mmap=mmap) if os.path.exists(os.path.join(path, "graph.json")) else None
+        collection = cls(records["name"], embedding_function, path=path, index=index)
+        collection.ids, collection.documents, collection.metadatas = (
+            records["ids"], records["documents"], records["metadatas"])
+        if index is not None and index.count != len(collection.ids):
+            raise ValueError(f"HNSW indeksi ile kayıtlar uyumsuz: {path}")
+        collection._positions = {doc_id: i for i, doc_id in enumerate(collection.ids) if doc_id is not None}
+        return collection
+
+
+def open_hnsw_collection(path, embedding_function=None):
+    """Kayıtlı koleksiyonu (graf mmap ile) açar; yoksa veya okunamazsa None."""
+    if not os.path.isdir(path):
+        return None
+    try:
+        return HNSWCollection.load(path, embedding_function=embedding_function)
+    except (ValueError, KeyError, OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ HNSW indeksi okunamadı ({path}): {e}")
+        return None
+
+
+def sync_collection(collection, documents, metadatas, ids):
+    """
+    Ingest farkını uygular: kaybolan ya da içeriği değişen kayıtlar silinir, yeni / değişenler eklenir.
+    Değişmeyen kayıtlar yeniden embed edilmez. (eklenen, silinen) sayılarını döner.
+    """
+    wanted = {doc_id: (doc, meta) for doc_id, doc, meta in zip(ids, documents, metadatas)}
+    existing = collection.get(include=["documents", "metadatas"])
+    stale = [doc_id for doc_id, doc, meta in zip(existing["ids"], existing["documents"], existing["metadatas"])
+             if wanted.get(doc_id) != (doc, meta)]
+    collection.delete(ids=stale)
+
+    fresh = [i for i, doc_id in enumerate(ids) if doc_id not in collection._positions]
+    collection.add(ids=[ids[i] for i in fresh], documents=[documents[i] for i in fresh],
+                   metadatas=[metadatas[i] for i in fresh])
+    return len(fresh), len(stale)
+
+
+def hnsw_enabled(json_file=JSON_FILE, manifest=None):
+    """Ingest'te HNSW indeksi de güncellensin mi? (Daha önce bir kez kurulduysa: parça ya da eski tek indeks)"""
+    names = [COLLECTION_NAME] + [s["collection"] for s in (manifest or {}).get("shards", [])]
+    return any(os.path.isdir(hnsw_path_for(json_file, name)) for name in names)
+
+
+def sync_hnsw_collections(json_file=JSON_FILE, embedding_function=None, course_data=None, manifest=None):
+    """
+    Her parçanın (shards.py) ders ve bölüm koleksiyonu için HNSW indeksini kurar ya da artımlı günceller
+    ve kaydeder. Parçalar birbirinden bağımsızdır; değişmeyen parçada fark boştur.
+    """
+    from shards import build_shard_manifest, group_by_shard
+
+    course_data = course_data if course_data is not None else load_course_data(json_file)
+    embedding_function = embedding_function or default_embedding_function()
+    manifest = manifest or build_shard_manifest(course_data)
+    groups = group_by_shard(course_data)
+    collections = []
+    for shard in manifest["shards"]:
+        courses = groups.get((shard["faculty"], shard["curriculum"]), [])
+        for name, build in ((shard["collection"], build_records), (shard["section_collection"], build_section_records)):
+            path = hnsw_path_for(json_file, name)
+            collection = (open_hnsw_collection(path, embedding_function)
+                          or HNSWCollection(name, embedding_function, path=path, precision=DEFAULT_PRECISION))
+            if collection.index is not None and collection.index.precision != DEFAULT_PRECISION:
+                # RAG_HNSW_PRECISION değişti: kodlar float32 vektörlerden yeniden üretilir, graf korunur
+                collection.index.set_precision(DEFAULT_PRECISION)
+            documents, metadatas, ids = build(courses)
+            added, removed = sync_collection(collection, documents, metadatas, ids)
+            collection.save(path)
+            print(f"🕸️ HNSW '{name}': +{added} / -{removed} kayıt, toplam {collection.count()} -> {path}")
+            collections.append(collection)
+    return collections
+
+
+def main():
+    from shards import build_shard_manifest, carry_over_digests, load_shard_manifest, save_shard_manifest
+
+    course_data = load_course_data(JSON_FILE)
+    manifest = build_shard_manifest(course_data)
+    sync_hnsw_collections(JSON_FILE, course_data=course_data, manifest=manifest)
+    # Cloud koleksiyonlarına dokunulmadı: onların içerik özetleri korunur
+    save_shard_manifest(carry_over_digests(manifest, load_shard_manifest(JSON_FILE), set()), JSON_FILE)
+
+
+if __name__ == "__main__":
+    main()
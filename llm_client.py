@@ -0,0 +1,260 @@
+"""
+Router ve Generator'ın paylaştığı Groq istemci katmanı.
+
+- Tek bir bağlantı havuzu (httpx) ve çağrı başına zaman aşımı
+- 429 / 5xx / bağlantı hatalarında jitter'lı üstel geri çekilme ile yeniden deneme
+- Art arda hatalarda devre kesici (circuit breaker)
+- İsteğin toplam gecikme bütçesini (Deadline) aşmayan zaman aşımları
+- RPM/TPM sınırları için öncelikli kuyruk (llm_scheduler)
+"""
+import os
+import random
+import threading
+import time
+
+import groq
+import httpx
+from dotenv import load_dotenv
+
+from llm_scheduler import (PRIORITY_GENERATE, DEFAULT_COMPLETION_TOKENS, estimate_prompt_tokens,
+                           get_scheduler)
+from rag_tracing import METRICS, current_span
+
+load_dotenv()
+
+# Bir sorunun uçtan uca varsayılan gecikme bütçesi (sn)
+DEFAULT_BUDGET_S = float(os.getenv("RAG_LATENCY_BUDGET_S", "12"))
+
+METRICS.describe("rag_llm_retries_total", "Retried LLM calls by reason.")
+METRICS.describe("rag_llm_failures_total", "LLM calls that failed after retries, by reason.")
+METRICS.describe("rag_llm_circuit_open", "1 while the LLM circuit breaker is open.")
+
+
+class LLMUnavailableError(Exception):
+    """LLM'e ulaşılamadı (yeniden denemeler tükendi, devre açık veya bütçe bitti)."""
+
+
+class DeadlineExceededError(LLMUnavailableError):
+    """İsteğin gecikme bütçesi LLM çağrısına yetmiyor."""
+
+
+class Deadline:
+    """Bir isteğin uçtan uca gecikme bütçesi. Bileşenlere aşağı doğru geçirilir."""
+
+    def __init__(self, budget_s, clock=time.monotonic):
+        self.budget_s = budget_s
+        self.clock = clock
+        self.start = clock()
+
+    def elapsed(self):
+        return self.clock() - self.start
+
+    def remaining(self):
+        return max(0.0, self.budget_s - self.elapsed())
+
+    def expired(self):
+        return self.remaining() <= 0.0
+
+
+class CircuitBreaker:
+    """
+    closed -> (failure_threshold ardışık hata) -> open -> (reset_timeout_s) -> half_open
+    half_open durumunda tek bir deneme çağrısına izin verilir; başarılıysa closed, değilse tekrar open.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout_s=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open":
+                if self.clock() - self.opened_at < self.reset_timeout_s:
+                    return False
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open":
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+        METRICS.set_gauge("rag_llm_circuit_open", 0)
+
+    def release(self):
+        """Hiç gönderilmeyen bir çağrı için alınan half_open deneme hakkını geri bırakır."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = self.clock()
+        if self.state == "open":
+            METRICS.set_gauge("rag_llm_circuit_open", 1)
+
+
+class LLMClient:
+    """Groq sohbet çağrıları için havuzlu, zaman aşımlı ve dayanıklı istemci."""
+
+    RETRYABLE_STATUS = {408, 409, 429}
+
+    def __init__(self, api_key=None, timeout_s=None, max_retries=None, backoff_base_s=0.25,
+                 backoff_max_s=4.0, min_call_s=0.3, breaker=None, client=None, scheduler=None,
+                 sleep=time.sleep, rng=None):
+        self.timeout_s = timeout_s if timeout_s is not None else float(os.getenv("GROQ_TIMEOUT_S", "15"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("GROQ_MAX_RETRIES", "2"))
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.min_call_s = min_call_s
+        self.breaker = breaker or CircuitBreaker()
+        self.scheduler = scheduler
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+
+        if client is not None:
+            self.client = client
+            return
+
+        api_key = api_key or os.getenv("GROQ_API_KEY")
+        if not api_key:
+            raise ValueError("Groq API Key bulunamadı!")
+
+        # Yeniden denemeyi biz yönetiyoruz (max_retries=0); bağlantılar tüm çağrılarda paylaşılır.
+        self.client = groq.Groq(
+            api_key=api_key,
+            max_retries=0,
+            timeout=self.timeout_s,
+            http_client=groq.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            ),
+        )
+
+    def _retry_reason(self, exc):
+        """Yeniden denenebilir hata ise kısa bir sebep, değilse None döner."""
+        if isinstance(exc, groq.APITimeoutError):
+            return "timeout"
+        if isinstance(exc, groq.APIConnectionError):
+            return "connection"
+        status = getattr(exc, "status_code", None)
+        if status is not None and (status in self.RETRYABLE_STATUS or status >= 500):
+            return str(status)
+        return None
+
+    def _backoff(self, attempt, exc):
+        # Sunucu Retry-After verdiyse ona uy, yoksa "full jitter" üstel geri çekilme
+        response = getattr(exc, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), self.backoff_max_s)
+        except ValueError:
+            pass
+        cap = min(self.backoff_max_s, self.backoff_base_s * (2 ** (attempt - 1)))
+        return self.rng.uniform(0, cap)
+
+    def chat(self, messages, model, deadline=None, priority=PRIORITY_GENERATE, **kwargs):
+        """
+        chat.completions.create sarmalayıcısı. Başarısızlıkta LLMUnavailableError fırlatır;
+        çağıran taraf kural tabanlı / deterministik yola düşmekle sorumludur.
+        Zamanlayıcı varsa her deneme öncesinde `priority` ile hız sınırı kuyruğuna girilir.
+        """
+        estimated_tokens = estimate_prompt_tokens(messages) + (
+            kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS.get(priority, 600)
+        )
+
+        # Devre kesici çağrı başına bir kez sorulur; aynı çağrının yeniden denemeleri ayrıca sayılmaz.
+        if not self.breaker.allow():
+            METRICS.inc("rag_llm_failures_total", {"reason": "circuit_open"})
+            raise LLMUnavailableError("LLM devre kesicisi açık")
+
+        attempt = 0
+        while True:
+            timeout = self.timeout_s
+            if deadline is not None:
+                remaining = deadline.remaining()
+                if remaining < self.min_call_s:
+                    self._give_up("deadline")
+                    raise DeadlineExceededError(f"Kalan bütçe yetersiz ({remaining:.2f} sn)")
+                timeout = min(timeout, remaining)
+
+            if self.scheduler is not None:
+                try:
+                    self.scheduler.acquire(estimated_tokens, priority, deadline)
+                except DeadlineExceededError:
+                    self._give_up("rate_limit_wait")
+                    raise
+                if deadline is not None:
+                    timeout = min(timeout, max(deadline.remaining(), self.min_call_s))
+
+            try:
+                response = self.client.chat.completions.create(
+                    messages=messages, model=model, timeout=timeout, **kwargs
+                )
+                self.breaker.record_success()
+                if self.scheduler is not None:
+                    usage = getattr(response, "usage", None)
+                    self.scheduler.settle(estimated_tokens, getattr(usage, "total_tokens", None))
+                return response
+
+            except Exception as e:
+                if self.scheduler is not None:
+                    # Başarısız denemenin ayırdığı token'lar kovaya geri döner (kesinti sırasında kova boşalmasın)
+                    self.scheduler.settle(estimated_tokens, 0)
+                reason = self._retry_reason(e)
+                if reason is None:
+                    # 400/401 gibi hatalar tekrar denenmez; sunucu ayakta olduğu için devreyi de açmaz
+                    self.breaker.record_success()
+                    METRICS.inc("rag_llm_failures_total", {"reason": type(e).__name__})
+                    raise LLMUnavailableError(str(e)) from e
+
+                attempt += 1
+                if attempt > self.max_retries:
+                    self._give_up(reason, failed=True)
+                    raise LLMUnavailableError(f"{reason}: {e}") from e
+
+                delay = self._backoff(attempt, e)
+                if deadline is not None and delay + self.min_call_s >= deadline.remaining():
+                    self._give_up("deadline", failed=True)
+                    raise DeadlineExceededError(f"Yeniden deneme bütçeye sığmıyor ({reason})") from e
+
+                METRICS.inc("rag_llm_retries_total", {"reason": reason})
+                s = current_span()
+                if s is not None:
+                    s.set(retries=attempt)
+                self.sleep(delay)
+
+    def _give_up(self, reason, failed=False):
+        METRICS.inc("rag_llm_failures_total", {"reason": reason})
+        if failed:
+            self.breaker.record_failure()
+        else:
+            # Sunucuya hiç gidilmedi; half_open deneme hakkı serbest kalsın
+            self.breaker.release()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Süreç genelinde paylaşılan LLMClient (bağlantı havuzu ve devre kesici ortak)."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient(scheduler=get_scheduler())
+        return _shared_client
@@ -0,0 +1,188 @@
+"""
+Giden LLM çağrıları için süreç genelinde hız sınırlayıcı ve öncelikli kuyruk.
+
+Groq hem dakikalık istek (RPM) hem de dakikalık token (TPM) sınırı uygular. Aynı anda
+çalışan Streamlit oturumlarının bu sınırlara çarpıp toplu hata almaması için:
+
+- İki token bucket (istek ve token) ile çağrılar gönderilmeden önce yavaşlatılır,
+- Token ihtiyacı prompt uzunluğundan önceden tahmin edilir, cevap gelince gerçek değerle düzeltilir,
+- Bekleyen çağrılar önceliğe göre sıralanır: kısa ve kritik yoldaki Router çağrıları
+  uzun Generator çağrılarının önüne geçer.
+
+Saat (`clock`) ve bekleme (`wait`) dışarıdan verilebildiği için sahte saatle test edilebilir:
+
+    clock = FakeClock()
+    scheduler = LLMScheduler(60, 6000, clock=clock, wait=lambda cond, t: clock.advance(t or 0))
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from rag_tracing import METRICS, current_span
+
+PRIORITY_ROUTER = 0
+PRIORITY_GENERATE = 10
+PRIORITY_NAMES = {PRIORITY_ROUTER: "router", PRIORITY_GENERATE: "generate"}
+
+# Cevap uzunluğu için varsayılan tahminler (max_tokens verilmediğinde)
+DEFAULT_COMPLETION_TOKENS = {PRIORITY_ROUTER: 150, PRIORITY_GENERATE: 600}
+
+METRICS.describe("rag_llm_queue_depth", "LLM calls waiting for rate-limit capacity.")
+METRICS.describe("rag_llm_queue_wait_seconds", "Time LLM calls spent waiting in the scheduler queue.")
+METRICS.describe("rag_llm_queue_rejected_total", "LLM calls dropped because the wait exceeded their deadline.")
+
+
+def estimate_prompt_tokens(messages):
+    """Llama tokenizer'ı için kaba tahmin: ~4 karakter = 1 token, mesaj başına küçük ek yük."""
+    return sum(len(m.get("content") or "") // 4 + 4 for m in messages)
+
+
+class TokenBucket:
+    """`capacity` kadar birikebilen, saniyede `rate` dolan kova. Bakiye eksiye düşebilir (borç)."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def time_until(self, amount, now=None):
+        """`amount` harcanabilmesi için beklenmesi gereken süre (sn); 0 = hemen."""
+        self._refill(self.clock() if now is None else now)
+        missing = amount - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def consume(self, amount, now=None):
+        self._refill(self.clock() if now is None else now)
+        self.tokens -= amount
+
+    def refund(self, amount):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Ticket:
+    __slots__ = ("priority", "tokens", "enqueued_at")
+
+    def __init__(self, priority, tokens, enqueued_at):
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued_at = enqueued_at
+
+
+class LLMScheduler:
+    """RPM + TPM token bucket'ları ve öncelikli bekleme kuyruğu."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, clock=time.monotonic, wait=None):
+        self.clock = clock
+        self.request_bucket = TokenBucket(requests_per_minute / 60.0, requests_per_minute, clock)
+        self.token_bucket = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute, clock)
+        self._wait = wait or (lambda cond, timeout: cond.wait(timeout))
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
+    def _publish_depth(self):
+        METRICS.set_gauge("rag_llm_queue_depth", len(self._queue))
+
+    def _remove(self, ticket):
+        self._queue = [entry for entry in self._queue if entry[2] is not ticket]
+        heapq.heapify(self._queue)
+        self._publish_depth()
+        self._cond.notify_all()
+
+    def acquire(self, estimated_tokens, priority=PRIORITY_GENERATE, deadline=None):
+        """
+        Kapasite açılana kadar bekler ve bekleme süresini (sn) döner.
+        Beklenen süre `deadline`ı aşacaksa kuyruktan çıkar ve DeadlineExceededError fırlatır.
+        """
+        from llm_client import DeadlineExceededError
+
+        # Tek başına kovadan büyük bir istek sonsuza kadar beklemesin
+        tokens = min(float(estimated_tokens), self.token_bucket.capacity)
+        name = PRIORITY_NAMES.get(priority, str(priority))
+
+        with self._cond:
+            ticket = _Ticket(priority, tokens, self.clock())
+            heapq.heappush(self._queue, (priority, next(self._seq), ticket))
+            self._publish_depth()
+
+            try:
+                while True:
+                    now = self.clock()
+                    timeout = None
+                    if self._queue[0][2] is ticket:
+                        timeout = max(self.request_bucket.time_until(1, now),
+                                      self.token_bucket.time_until(tokens, now))
+                        if timeout <= 0:
+                            self.request_bucket.consume(1, now)
+                            self.token_bucket.consume(tokens, now)
+                            heapq.heappop(self._queue)
+                            self._publish_depth()
+                            self._cond.notify_all()
+
+                            waited = now - ticket.enqueued_at
+                            METRICS.observe("rag_llm_queue_wait_seconds", waited, {"priority": name})
+                            s = current_span()
+                            if s is not None:
+                                s.set(queue_wait_ms=round(waited * 1000.0, 2))
+                            return waited
+
+                    if deadline is not None:
+                        remaining = deadline.remaining()
+                        if remaining <= 0 or (timeout is not None and timeout > remaining):
+                            METRICS.inc("rag_llm_queue_rejected_total", {"priority": name})
+                            raise DeadlineExceededError(
+                                f"Hız sınırı beklemesi bütçeyi aşıyor ({timeout or 0:.2f} sn)"
+                            )
+                        timeout = remaining if timeout is None else timeout
+
+                    self._wait(self._cond, timeout)
+            except BaseException:
+                self._remove(ticket)
+                raise
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Cevap geldikten sonra tahmini token'ı gerçek kullanımla düzeltir."""
+        if actual_tokens is None:
+            return
+        estimated = min(float(estimated_tokens), self.token_bucket.capacity)
+        with self._cond:
+            diff = float(actual_tokens) - estimated
+            if diff > 0:
+                self.token_bucket.consume(diff)
+            elif diff < 0:
+                self.token_bucket.refund(-diff)
+                self._cond.notify_all()
+
+
+_shared_scheduler = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Ortam değişkenlerinden kurulan paylaşılan zamanlayıcı.
+    GROQ_RPM / GROQ_TPM (varsayılan: llama-3.1-8b-instant ücretsiz katmanı 30 / 6000);
+    GROQ_RPM=0 zamanlayıcıyı kapatır.
+    """
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            rpm = int(os.getenv("GROQ_RPM", "30"))
+            tpm = int(os.getenv("GROQ_TPM", "6000"))
+            if rpm <= 0 or tpm <= 0:
+                return None
+            _shared_scheduler = LLMScheduler(rpm, tpm)
+        return _shared_scheduler
@@ -0,0 +1,208 @@
+import hashlib
+import re
+import numpy as np
+
+from vector_create import (COLLECTION_NAME, SECTION_COLLECTION_NAME, JSON_FILE, load_course_data,
+                           build_records, build_section_records)
+
+
+class HashEmbeddingFunction:
+    """
+    Ağ bağlantısı gerektirmeyen, deterministik 'feature hashing' embedding'i.
+    MiniLM modeli indirilemediğinde (CI, benchmark makinesi) yerine kullanılır.
+    Kelimeler ve 3'lü harf grupları sabit boyutlu bir vektöre hash'lenir.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _features(self, text):
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        for word in words:
+            yield word, 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], 0.5
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vec = np.zeros(self.dim, dtype=np.float32)
+            for feature, weight in self._features(text):
+                h = int.from_bytes(hashlib.md5(feature.encode("utf-8")).digest()[:4], "little")
+                vec[h % self.dim] += weight if h & 0x80000000 else -weight
+            vectors.append(vec)
+        return vectors
+
+
+def default_embedding_function():
+    from chromadb.utils import embedding_functions
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+
+
+def _compare(value, op, operand):
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if value is None or isinstance(value, str) != isinstance(operand, str):
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise ValueError(f"Desteklenmeyen operatör: {op}")
+
+
+def match_where(meta, where):
+    """Chroma 'where' sözdizimini ($and, $or, $in, $gt ...) tek bir metadata üzerinde değerlendirir."""
+    if not where:
+        return True
+
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(match_where(meta, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(match_where(meta, c) for c in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = meta.get(key)
+            if not all(_compare(value, op, operand) for op, operand in cond.items()):
+                return False
+        elif meta.get(key) != cond:
+            return False
+    return True
+
+
+class LocalCollection:
+    """
+    Chroma Collection API'sinin (add / get / query / count / delete) bellek içi karşılığı.
+    CourseRetriever'a doğrudan verilebilir; uzaklıklar Chroma'daki gibi
+    normalize vektörler üzerinde karesel L2 (0..4) olarak döner.
+    """
+
+    def __init__(self, name=COLLECTION_NAME, embedding_function=None):
+        self.name = name
+        self.embedding_function = embedding_function or default_embedding_function()
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        self._embeddings = np.zeros((0, 0), dtype=np.float32)
+        self._index = {}
+
+    def _embed(self, texts):
+        vectors = np.asarray(self.embedding_function(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def count(self):
+        return len(self.ids)
+
+    def add(self, ids, documents=None, metadatas=None, embeddings=None):
+        # Önce tüm id'ler kontrol edilir: hata durumunda koleksiyon hiç değişmemiş olmalı
+        for doc_id in ids:
+            if doc_id in self._index:
+                raise ValueError(f"ID zaten mevcut: {doc_id}")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Aynı ID bir eklemede birden fazla kez verildi")
+        if embeddings is None:
+            embeddings = self._embed(documents)
+        else:
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+
+        for i, doc_id in enumerate(ids):
+            self._index[doc_id] = len(self.ids) + i
+
+        self.ids.extend(ids)
+        self.documents.extend(documents or [None] * len(ids))
+        self.metadatas.extend(metadatas or [{}] * len(ids))
+        if self._embeddings.size:
+            self._embeddings = np.vstack([self._embeddings, embeddings])
+        else:
+            self._embeddings = embeddings
+
+    def delete(self, ids=None, where=None):
+        drop = set(ids or [])
+        if where:
+            drop.update(doc_id for doc_id, meta in zip(self.ids, self.metadatas) if match_where(meta, where))
+        keep = [i for i, doc_id in enumerate(self.ids) if doc_id not in drop]
+
+        self.ids = [self.ids[i] for i in keep]
+        self.documents = [self.documents[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self._embeddings = self._embeddings[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+        self._index = {doc_id: i for i, doc_id in enumerate(self.ids)}
+
+    def _candidates(self, where, ids=None):
+        positions = range(len(self.ids)) if ids is None else [self._index[i] for i in ids if i in self._index]
+        return [i for i in positions if match_where(self.metadatas[i], where)]
+
+    def get(self, ids=None, where=None, include=None, limit=None, offset=None):
+        include = include or ["documents", "metadatas"]
+        positions = self._candidates(where, ids)
+        positions = positions[offset or 0:]
+        if limit is not None:
+            positions = positions[:limit]
+
+        result = {"ids": [self.ids[i] for i in positions]}
+        if "documents" in include:
+            result["documents"] = [self.documents[i] for i in positions]
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadatas[i] for i in positions]
+        if "embeddings" in include:
+            result["embeddings"] = self._embeddings[positions]
+        return result
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None, include=None):
+        include = include or ["documents", "metadatas", "distances"]
+        if query_embeddings is None:
+            query_vectors = self._embed(query_texts)
+        else:
+            query_vectors = np.asarray(query_embeddings, dtype=np.float32)
+
+        positions = np.asarray(self._candidates(where), dtype=np.int64)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        for q in query_vectors:
+            if not len(positions):
+                top, dists = [], []
+            else:
+                sims = self._embeddings[positions] @ q
+                k = min(n_results, len(positions))
+                order = np.argpartition(-sims, k - 1)[:k]
+                order = order[np.argsort(-sims[order])]
+                top = positions[order].tolist()
+                dists = (2.0 - 2.0 * sims[order]).tolist()
+
+            result["ids"].append([self.ids[i] for i in top])
+            result["documents"].append([self.documents[i] for i in top])
+            result["metadatas"].append([self.metadatas[i] for i in top])
+            result["distances"].append(dists)
+
+        return {k: v for k, v in result.items() if k == "ids" or k in include}
+
+
+def build_local_collection(json_file=JSON_FILE, embedding_function=None, dedup=True):
+    """Scraper JSON'undan, Chroma Cloud'a hiç gitmeden yerel bir koleksiyon kurar."""
+    collection = LocalCollection(embedding_function=embedding_function)
+    documents, metadatas, ids = build_records(load_course_data(json_file), dedup=dedup)
+    collection.add(ids=ids, documents=documents, metadatas=metadatas)
+    return collection
+
+
+def build_local_section_collection(json_file=JSON_FILE, embedding_function=None, dedup=True):
+    """Bölüm seviyesindeki parçalardan (vector_create.build_section_records) yerel koleksiyon kurar."""
+    collection = LocalCollection(name=SECTION_COLLECTION_NAME, embedding_function=embedding_function)
+    documents, metadatas, ids = build_section_records(load_course_data(json_file), dedup=dedup)
+    collection.add(ids=ids, documents=documents, metadatas=metadatas)
+    return collection
@@ -1,22 +1,77 @@
+import os
+import sys
+import csv
 import time
 import json
+import logging
+import argparse
+from collections import defaultdict
 from rag_retriever import CourseRetriever
 from rag_generator import RAGGenerator
 from rag_router import QueryRouter
+from course_analytics import CourseAnalytics
+from llm_client import Deadline, DEFAULT_BUDGET_S
+from domain_guard import OUT_OF_DOMAIN_ANSWER, query_topic
+from course_digest import wants_full_text
+from field_projection import projection_for
+from conversation import ConversationState
+from component_pool import WORKERS, BatchingEmbeddingFunction, PipelinePool
+from rag_tracing import start_trace, finish_trace, progress, record_error, start_metrics_server
+from rag_profiling import PROFILE_MODE, PROFILE_MODES, RequestProfiler, profile_mode
+
+
+def load_batch_questions(path):
+    """
+    Toplu soru dosyası -> [{"id", "question"}].
+    JSONL: her satır {"id": ..., "question": ...} ("query" de olur) ya da düz metin (JSON string).
+    CSV: "question" sütunu (yoksa ilk sütun), isteğe bağlı "id". Boş sorular atlanır; id yoksa satır sırası.
+    """
+    rows = []
+    if path.lower().endswith(".csv"):
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames or []
+            column = "question" if "question" in fieldnames else (fieldnames[0] if fieldnames else None)
+            for row in reader:
+                rows.append((row.get("id"), row.get(column)))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if isinstance(item, str):
+                    rows.append((None, item))
+                else:
+                    rows.append((item.get("id"), item.get("question") or item.get("query")))
+    return [{"id": str(qid) if qid not in (None, "") else f"q{i + 1}", "question": str(question).strip()}
+            for i, (qid, question) in enumerate(rows) if question and str(question).strip()]
 
 
 class CourseIntelligenceSystem:
-    def __init__(self):
+    # Kalan bütçe bunun altındaysa Generator'a daha kısa context gönderilir
+    SHORT_CONTEXT_BUDGET_S = 4.0
+    SHORT_CONTEXT_RESULTS = 2
+
+    def __init__(self, router=None, retriever=None, generator=None, analytics=None, profile=None):
+        # Bileşenler dışarıdan verilebilir (yerel koleksiyon, sahte LLM, benchmark).
+        self.last_trace = None
+        # İstek başına profil (rag_profiling): 'cprofile' / 'sample'; verilmezse RAG_PROFILE, o da yoksa kapalı
+        self.profile = profile_mode(profile) or PROFILE_MODE
+        self.last_profile = None
         print("\n🚀 AKILLI DERS SİSTEMİ BAŞLATILIYOR...")
 
         print("1. [Router] Trafik Polisi (Llama 3.1) devreye alınıyor...")
-        self.router = QueryRouter()
+        self.router = router or QueryRouter()
 
         print("2. [Retriever] Veritabanı Bağlantısı (ChromaDB) kontrol ediliyor...")
-        self.retriever = CourseRetriever()
+        self.retriever = retriever or CourseRetriever()
 
         print("3. [Generator] Yaratıcı Yazar (Groq) hazırlanıyor...")
-        self.generator = RAGGenerator()
+        self.generator = generator or RAGGenerator()
+
+        print("4. [Analytics] ECTS / saat / ağırlık tablosu (SQLite) kuruluyor...")
+        self.analytics = analytics or CourseAnalytics.from_json()
 
         print("\n✅ SİSTEM HAZIR! (Çıkmak için 'q' yazın)\n")
 
@@ -49,121 +104,365 @@ class CourseIntelligenceSystem:
         if semester and semester not in ["None", None]:
             filters["semester"] = semester
 
-        return filters if filters else None
+        # 5. Sayısal aralıklar (numeric_filters -> numeric_filters): ECTS / kredi / saat
+        numeric_filters = route_result.get("numeric_filters")
+        if numeric_filters and numeric_filters not in ["None", None]:
+            filters["numeric_filters"] = numeric_filters
 
-    def run(self):
-        while True:
-            print("-" * 60)
-            user_query = input("SORU SORUN: ")
+        # 6. Müfredat sürümü (curriculum_version -> curriculum_version): verilmezse güncel sürüm
+        curriculum = route_result.get("curriculum_version")
+        if curriculum and curriculum not in ["None", None]:
+            filters["curriculum_version"] = curriculum
 
-            if user_query.lower() in ['q', 'exit', 'quit']:
-                print("👋 Sistem kapatılıyor. İyi çalışmalar!")
-                break
-
-            start_time = time.time()
+        return filters if filters else None
 
-            # --- ADIM 1: ANALİZ (ROUTER) ---
-            print("🔍 Analiz yapılıyor...", end="\r")
+    @staticmethod
+    def selection_route(course_code):
+        """Otomatik tamamlamadan seçilen ders için router çıktısı yerine geçen sabit rota (kod araması)."""
+        return {"intent": "search", "specific_course_code": course_code, "search_queries": [course_code],
+                "search_scope": "both", "target_department": "None", "academic_year": "None",
+                "course_type": "None", "semester": "None"}
 
+    def answer(self, user_query, request_id=None, budget_s=None, conversation=None, profile=None):
+        """
+        Tek bir soruyu Router -> Retriever -> Generator hattından geçirir ve cevabı döner.
+        `budget_s` uçtan uca gecikme bütçesidir; azaldıkça sistem kademeli olarak
+        kural tabanlı yönlendirmeye, kısa context'e ve deterministik cevaba düşer.
+        `conversation` (conversation.ConversationState) verilirse takip soruları önceki turun
+        sonuçlarıyla çözülür ve tur oraya kaydedilir.
+        İsteğin izi (span'ler, süreler, token'lar) `self.last_trace` içinde saklanır.
+        `profile` ('cprofile' / 'sample'; verilmezse sistemin modu) açıksa istek profillenir,
+        sonuç `self.last_profile` içinde (dosya yolu + en çok öz-süre harcayan fonksiyonlar).
+        """
+        deadline = Deadline(budget_s or DEFAULT_BUDGET_S)
+        trace = start_trace(request_id, query=user_query, budget_s=deadline.budget_s)
+        mode = self.profile if profile is None else profile_mode(profile)
+        profiler = RequestProfiler(trace.request_id, mode).start() if mode else None
+        turn = {}
+        try:
+            response = self._answer(user_query, trace, deadline, conversation, turn)
+            if conversation is not None:
+                conversation.record(user_query, response, **turn)
+            return response
+        finally:
+            self.last_profile = profiler.stop() if profiler is not None else None
+            if self.last_profile is not None:
+                trace.set(profile=self.last_profile.path)
+            self.last_trace = finish_trace(trace)
+
+    def _answer(self, user_query, trace, deadline, conversation=None, turn=None):
+        # `turn`: konuşma kaydı için bu turun rotası, context'i ve alanları burada doldurulur
+        turn = turn if turn is not None else {}
+
+        # --- ADIM 1: ANALİZ (ROUTER) ---
+        progress("🔍 Analiz yapılıyor...", end="\r")
+
+        # Takip sorusu ("and its ECTS?", "what about CE?"): önceki turun rotası üzerinden yerel olarak çözülür
+        follow_up = conversation.resolve(user_query, self.router) if conversation is not None else None
+
+        # Soru sadece bir ders kodu / seçilmiş öneriyse ("SE 302") router'a gitmeye gerek yok
+        selected_code = None if follow_up else self.retriever.resolve_course_selection(user_query)
+
+        # Alan dışı soru (örn. "cooking", "astrology"): router, arama ve LLM hiç çağrılmadan ret
+        if not selected_code and not follow_up:
+            verdict = self.retriever.check_domain(user_query)
+            if verdict and not verdict["in_domain"]:
+                trace.set(short_circuit="out_of_domain", domain_score=verdict["score"])
+                return OUT_OF_DOMAIN_ANSWER.format(topic=verdict["topic"])
+
+        if follow_up:
+            route_result = follow_up["route"]
+            user_query = follow_up["query"]
+            trace.set(route_skipped="follow_up", rewritten_query=user_query, reused=follow_up["reuse"])
+        elif selected_code:
+            route_result = self.selection_route(selected_code)
+            trace.set(route_skipped="exact_selection")
+        else:
             # Router Hatası olursa sistem çökmesin diye try-except
             try:
-                route_result = self.router.route_query(user_query)
+                route_result = self.router.route_query(user_query, deadline=deadline)
             except Exception as e:
-                print(f"\n❌ Router Hatası: {e}")
+                record_error("route", e, "Router Hatası")
                 route_result = {"intent": "search", "search_queries": [user_query]}
 
-            intent = route_result.get("intent")
-            spec_code = route_result.get("specific_course_code")
-            filters = self._build_filters(route_result)
-            search_keywords_list = route_result.get("search_queries", [user_query])
-            search_scope = route_result.get("search_scope", "both")
-
-            # --- GÜVENLİK ÖNLEMİ (CRASH FIX: LISTE DESTEĞİ) ---
-            # Hata veren kısım düzeltildi: Liste gelirse döngüyle, String gelirse direk ekle.
-            if spec_code and spec_code != "None":
-                if isinstance(spec_code, list):
-                    # Eğer çoklu ders kodu geldiyse (örn: Compare IE 372 vs SE 216)
-                    for code in spec_code:
-                        if code not in search_keywords_list:
-                            search_keywords_list.insert(0, code)
-                else:
-                    # Tekil ders kodu
-                    if spec_code not in search_keywords_list:
-                        search_keywords_list.insert(0, spec_code)
-
-            search_keywords = " ".join(search_keywords_list)
-
-            print(f"⚙️  Niyet: {intent.upper()} | Filtre: {filters} | Arama: '{search_keywords}'")
-
-            # --- ADIM 2: EYLEM (EXECUTION) ---
-
-            # SENARYO A: SAYMA / NİCEL SORULAR (COUNT)
-            if intent == "count":
-                count = self.retriever.count_courses(filters=filters,search_keyword=search_keywords,
-                    search_scope=search_scope)
-                print(f"\n📊 ANALİTİK SONUÇ:")
-                print(f"Veritabanında kriterlerinize uyan tam **{count}** adet ders bulundu.")
-
-            # SENARYO B: ARAMA ve KARŞILAŞTIRMA (SEARCH / COMPARE)
+        turn["route"] = route_result
+        intent = route_result.get("intent")
+        spec_code = route_result.get("specific_course_code")
+        filters = self._build_filters(route_result)
+        search_keywords_list = list(route_result.get("search_queries", [user_query]))
+        search_scope = route_result.get("search_scope", "both")
+
+        # --- GÜVENLİK ÖNLEMİ (CRASH FIX: LISTE DESTEĞİ) ---
+        # Hata veren kısım düzeltildi: Liste gelirse döngüyle, String gelirse direk ekle.
+        if spec_code and spec_code != "None":
+            if isinstance(spec_code, list):
+                # Eğer çoklu ders kodu geldiyse (örn: Compare IE 372 vs SE 216)
+                for code in spec_code:
+                    if code not in search_keywords_list:
+                        search_keywords_list.insert(0, code)
             else:
-                context = None
-
-                # --- STRATEJİ 1: KESİN EŞLEŞME (EXACT MATCH - LISTE DESTEKLİ) ---
-                if spec_code and spec_code != "None":
-                    print(f"🔍 Kod bazlı kesin arama yapılıyor...")
-
-                    if isinstance(spec_code, list):
-                        # Liste geldiyse (örn: Compare X vs Y), hepsi için tek tek ara ve birleştir
-                        found_contexts = []
-                        for code in spec_code:
-                            res = self.retriever.retrieve_exact_match(code)
-                            if res:
-                                found_contexts.append(res)
-
-                        if found_contexts:
-                            context = "\n\n".join(found_contexts)
-                            print(f"   ✅ {len(found_contexts)} adet ders için kesin eşleşme bulundu.")
+                # Tekil ders kodu
+                if spec_code not in search_keywords_list:
+                    search_keywords_list.insert(0, spec_code)
+
+        search_keywords = " ".join(search_keywords_list)
+        # Context varsayılan olarak ders özetleri; özetin kapsamadığı ayrıntı sorulursa tam doküman getirilir
+        detail = "full" if wants_full_text(user_query) else None
+        # Soru dersin sadece bazı alanlarını istiyorsa (not sistemi, konular...) sadece onlar getirilir
+        fields = projection_for(route_result, user_query)
+        turn.update(fields=fields, detail=detail)
+
+        progress(f"⚙️  Niyet: {intent.upper()} | Filtre: {filters} | Arama: '{search_keywords}'")
+        trace.set(intent=intent, filters=filters, search_keywords=search_keywords, route=route_result,
+                  context_detail=detail or "digest", fields=fields)
+
+        # --- ADIM 2: EYLEM (EXECUTION) ---
+
+        # SENARYO A: SAYMA / NİCEL SORULAR (COUNT)
+        if intent == "count":
+            count = self.retriever.count_courses(filters=filters,search_keyword=search_keywords,
+                search_scope=search_scope)
+            return (f"📊 ANALİTİK SONUÇ:\n"
+                    f"Veritabanında kriterlerinize uyan tam **{count}** adet ders bulundu.")
+
+        # SENARYO A2: TOPLAMA / ORTALAMA (AGGREGATE) — tipli tablodan tam hesap, LLM'e gitmez
+        if intent == "aggregate":
+            return self.analytics.format_result(self.analytics.aggregate_from_route(route_result))
+
+        # Takip sorusu önceki turla aynı aramaysa: önceki sonuçlar (gerekirse sadece istenen alanları) kullanılır
+        context = None
+        if follow_up and follow_up["reuse"]:
+            context = conversation.reuse_context(self.retriever, fields=fields, detail=detail)
+            trace.set(reused_context=bool(context))
+
+        # SENARYO A3: ÖN KOŞUL (PREREQUISITE) — grafikten kesin zincir; LLM sadece anlatır
+        if not context and intent == "prerequisite" and spec_code and spec_code != "None":
+            context = self.retriever.describe_prerequisites(spec_code)
+            if deadline.remaining() < self.generator.MIN_LLM_BUDGET_S:
+                trace.set(degraded="deterministic_prerequisite")
+                return context
+
+        # SENARYO B: MÜFREDAT LİSTELEME (LIST) — metadata'dan doğrudan liste
+        if not context and intent == "list_curriculum" and filters and filters.get("target_department"):
+            context = self.retriever.get_courses_by_metadata(
+                filters["target_department"], filters.get("academic_year"), filters.get("semester"),
+                numeric_filters=filters.get("numeric_filters"), curriculum=filters.get("curriculum_version")
+            )
+            # Bütçe azsa liste zaten yapılandırılmış bir cevap: LLM'e gitmeden döndür
+            if deadline.remaining() < self.generator.MIN_LLM_BUDGET_S:
+                trace.set(degraded="deterministic_list")
+                return f"Courses matching your criteria:\n{context}"
+
+        # SENARYO C: ARAMA ve KARŞILAŞTIRMA (SEARCH / COMPARE)
+
+        # --- STRATEJİ 1: KESİN EŞLEŞME (EXACT MATCH - LISTE DESTEKLİ) ---
+        if not context and spec_code and spec_code != "None":
+            progress(f"🔍 Kod bazlı kesin arama yapılıyor...")
+
+            if isinstance(spec_code, list):
+                # Liste geldiyse (örn: Compare X vs Y), hepsi için tek tek ara ve birleştir
+                found_contexts = []
+                for code in spec_code:
+                    res = self.retriever.retrieve_exact_match(code, detail=detail, fields=fields)
+                    if res:
+                        found_contexts.append(res)
+
+                if found_contexts:
+                    context = "\n\n".join(found_contexts)
+                    progress(f"   ✅ {len(found_contexts)} adet ders için kesin eşleşme bulundu.")
 
+            else:
+                # Tekil kod geldiyse
+                context = self.retriever.retrieve_exact_match(spec_code, detail=detail, fields=fields)
+
+        # --- STRATEJİ 2: VEKTÖR ARAMASI (SEMANTIC SEARCH) ---
+        # Eğer kesin eşleşme YOKSA veya YETERSİZSE (karşılaştırma için) vektör araması da yap
+        if not context:
+            # n_results ayarı
+            n_results = 4 if intent == "compare" else 3
+
+            # Eğer listede birden fazla ders varsa, limit artırılabilir
+            if isinstance(spec_code, list) and len(spec_code) > 1:
+                n_results = 6
+
+            # Bütçe azaldıysa Generator'a daha kısa context gönder
+            if deadline.remaining() < self.SHORT_CONTEXT_BUDGET_S:
+                n_results = min(n_results, self.SHORT_CONTEXT_RESULTS)
+                trace.set(degraded="short_context")
+
+            # Veriyi Getir
+            context = self.retriever.retrieve_context(search_keywords or user_query, n_results=n_results,
+                                                      filters=filters, detail=detail, fields=fields)
+
+        # Hâlâ veri yoksa
+        if not context:
+            progress("⚠️ Veritabanında yeterli bilgi bulunamadı. Genel bilgiyle cevaplanacak.")
+            context = "No specific database records found matching the criteria."
+
+        turn["context"] = context
+
+        # Cevabı Üret
+        progress("⏳ Cevap yazılıyor...", end="\r")
+
+        # Karşılaştırma ise Prompt'a ek talimat ekle
+        final_query = user_query
+        if intent == "compare":
+            final_query += "\n(IMPORTANT: Compare the courses side-by-side. Use a structured format.)"
+        elif intent == "prerequisite":
+            final_query += "\n(IMPORTANT: Use the prerequisite chain and semesters exactly as given in the context.)"
+
+        history = conversation.history_text() if conversation is not None else None
+        return self.generator.generate_answer(final_query, context, deadline=deadline, history=history)
+
+    def _answer_batch_item(self, item, budget_s=None, quiet=True):
+        """Toplu modda tek soru: cevap + kendi izi (işçiler paylaşılan `last_trace`i kullanmaz)."""
+        deadline = Deadline(budget_s or DEFAULT_BUDGET_S)
+        # quiet: soru başına ilerleme mesajları (progress) yazılmaz; sys.stdout'a dokunulmaz
+        trace = start_trace(item["id"], quiet=quiet, query=item["question"], budget_s=deadline.budget_s, batch=True)
+        profiler = RequestProfiler(trace.request_id, self.profile).start() if self.profile else None
+        record = {"id": item["id"], "question": item["question"]}
+        try:
+            record["answer"] = self._answer(item["question"], trace, deadline)
+        except Exception as e:
+            record_error("batch", e, "Toplu Soru Hatası")
+            record.update(answer=None, error=f"{type(e).__name__}: {e}")
+        finally:
+            if profiler is not None:
+                record["profile"] = profiler.stop().path
+                trace.set(profile=record["profile"])
+            finish_trace(trace)
+        record.update(intent=trace.attributes.get("intent"), total_ms=round(trace.total_ms, 2),
+                      stages={name: round(ms, 2) for name, ms in trace.stage_totals().items()})
+        return record, trace
+
+    def run_batch(self, questions, output_file, workers=WORKERS, budget_s=None, quiet=True):
+        """
+        Soruları (load_batch_questions) `workers` işçiyle paralel cevaplar; cevaplar aşama süreleriyle
+        girdi sırasıyla JSONL'e yazılır. Tek sistem örneği paylaşıldığı için tüm önbellekler (yazım, özet,
+        depo, görünümler, embedding) sorular arasında ortaktır; aynı soru bir kez cevaplanır.
+        Özet (soru/sn, aşama payları) döner ve `<çıktı>.summary.json` dosyasına yazılır.
+        """
+        start = time.perf_counter()
+        # İşçilerden eşzamanlı gelen sorgu embedding'leri tek model çağrısında toplanır. Sarmalayıcı (önbelleği
+        # ve toplama penceresiyle) sadece bu çalıştırma içindir; sonra etkileşimli çağrılar asıl fonksiyona döner
+        original_fn = embedding_fn = self.retriever.embedding_fn
+        if embedding_fn is not None and not isinstance(embedding_fn, BatchingEmbeddingFunction):
+            embedding_fn = self.retriever.embedding_fn = BatchingEmbeddingFunction(embedding_fn)
+
+        # Aynı soru (boşluk / büyük harf farkı dışında) bir kez cevaplanır
+        unique = {}
+        for item in questions:
+            unique.setdefault(" ".join(item["question"].lower().split()), item)
+
+        pipeline = PipelinePool(workers, max_queue=max(1, len(unique)))
+        traces, errors = [], 0
+        try:
+            # Alan dışı kontrolünün embed edeceği konular tüm sorular için tek seferde hesaplanır
+            if embedding_fn is not None and self.retriever.DOMAIN_GUARD:
+                embedding_fn.prefetch([query_topic(item["question"]) for item in unique.values()])
+
+            tickets = {key: pipeline.submit(self._answer_batch_item, item, budget_s, quiet)
+                       for key, item in unique.items()}
+            with open(output_file, "w", encoding="utf-8") as out:
+                for done, item in enumerate(questions, 1):
+                    key = " ".join(item["question"].lower().split())
+                    record, trace = tickets[key].result()
+                    if record["id"] != item["id"]:
+                        # Tekrarlanan soru: ilk cevabın kopyası, süre harcanmadı
+                        record = dict(record, id=item["id"], question=item["question"], duplicate_of=record["id"],
+                                      total_ms=0.0, stages={})
                     else:
-                        # Tekil kod geldiyse
-                        context = self.retriever.retrieve_exact_match(spec_code)
-
-                # --- STRATEJİ 2: VEKTÖR ARAMASI (SEMANTIC SEARCH) ---
-                # Eğer kesin eşleşme YOKSA veya YETERSİZSE (karşılaştırma için) vektör araması da yap
-                if not context:
-                    # n_results ayarı
-                    n_results = 4 if intent == "compare" else 3
-
-                    # Eğer listede birden fazla ders varsa, limit artırılabilir
-                    if isinstance(spec_code, list) and len(spec_code) > 1:
-                        n_results = 6
+                        traces.append(trace)
+                        errors += "error" in record
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    if done % 25 == 0 or done == len(questions):
+                        print(f"   -> {done}/{len(questions)} soru cevaplandı...", file=sys.stderr)
+        finally:
+            pipeline.shutdown()
+            self.retriever.embedding_fn = original_fn
+
+        summary = self._batch_summary(questions, traces, errors, workers, time.perf_counter() - start, embedding_fn)
+        summary_file = os.path.splitext(output_file)[0] + ".summary.json"
+        with open(summary_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        print(f"\n📊 {summary['questions']} soru ({summary['unique']} farklı, {summary['errors']} hata) "
+              f"{summary['wall_s']:.1f} sn'de: {summary['questions_per_s']:.2f} soru/sn, "
+              f"ortalama gecikme {summary['mean_latency_ms']:.0f} ms ({workers} işçi)")
+        for name, share in summary["stage_share_pct"].items():
+            print(f"   {name:<16}{share:>6.1f}%  ({summary['stage_ms'][name]:.0f} ms)")
+        print(f"📁 Cevaplar: {output_file} | Özet: {summary_file}")
+        return summary
+
+    @staticmethod
+    def _batch_summary(questions, traces, errors, workers, wall_s, embedding_fn=None):
+        """Soru/sn ve aşama payları: üst düzey span'lerin soru başına toplam gecikmedeki payı."""
+        total_ms = sum(trace.total_ms for trace in traces)
+        stage_ms = defaultdict(float)
+        for trace in traces:
+            for s in trace.spans:
+                # İç içe span'ler (metadata_fetch, vector_query...) üst aşamalarının içinde sayılır
+                if s.parent is None:
+                    stage_ms[s.name] += s.duration_ms
+        stage_ms["other"] = max(0.0, total_ms - sum(stage_ms.values()))
+        stage_ms = dict(sorted(stage_ms.items(), key=lambda kv: -kv[1]))
+        return {
+            "questions": len(questions), "unique": len(traces), "errors": errors, "workers": workers,
+            "wall_s": round(wall_s, 3),
+            "questions_per_s": round(len(questions) / wall_s, 3) if wall_s else 0.0,
+            "mean_latency_ms": round(total_ms / len(traces), 2) if traces else 0.0,
+            "stage_ms": {name: round(ms, 2) for name, ms in stage_ms.items()},
+            "stage_share_pct": {name: round(ms / total_ms * 100.0, 1) if total_ms else 0.0
+                                for name, ms in stage_ms.items()},
+            "embedding_model_calls": getattr(embedding_fn, "model_calls", None),
+        }
 
-                    # Veriyi Getir
-                    context = self.retriever.retrieve_context(search_keywords, n_results=n_results, filters=filters)
-
-                # Hâlâ veri yoksa
-                if not context:
-                    print("⚠️ Veritabanında yeterli bilgi bulunamadı. Genel bilgiyle cevaplanacak.")
-                    context = "No specific database records found matching the criteria."
+    def run(self):
+        # Oturum boyunca tek konuşma: takip soruları önceki turun sonuçlarını kullanır
+        conversation = ConversationState()
+        while True:
+            print("-" * 60)
+            user_query = input("SORU SORUN: ")
 
-                # Cevabı Üret
-                print("⏳ Cevap yazılıyor...", end="\r")
+            if user_query.lower() in ['q', 'exit', 'quit']:
+                print("👋 Sistem kapatılıyor. İyi çalışmalar!")
+                break
 
-                # Karşılaştırma ise Prompt'a ek talimat ekle
-                final_query = user_query
-                if intent == "compare":
-                    final_query += "\n(IMPORTANT: Compare the courses side-by-side. Use a structured format.)"
+            start_time = time.time()
 
-                response = self.generator.generate_answer(final_query, context)
+            response = self.answer(user_query, conversation=conversation)
 
-                print("\n🤖 ASİSTAN CEVABI:")
-                print(response)
+            print("\n🤖 ASİSTAN CEVABI:")
+            print(response)
 
-            # Süre Bilgisi
+            # Süre Bilgisi (aşama kırılımıyla)
             elapsed = round(time.time() - start_time, 2)
-            print(f"\n(İşlem Süresi: {elapsed} sn)")
+            stages = " | ".join(f"{name}: {ms:.0f} ms" for name, ms in self.last_trace.stage_totals().items())
+            print(f"\n(İşlem Süresi: {elapsed} sn — {stages})")
+            if self.last_profile is not None:
+                print(f"🔬 Profil ({self.last_profile.mode}, {self.last_profile.path}): {self.last_profile.summary()}")
 
 
 if __name__ == "__main__":
-    app = CourseIntelligenceSystem()
-    app.run()
\ No newline at end of file
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s [%(name)s] %(message)s")
+
+    # Prometheus için /metrics ucu (isteğe bağlı)
+    if os.getenv("RAG_METRICS_PORT"):
+        start_metrics_server(os.getenv("RAG_METRICS_PORT"))
+
+    parser = argparse.ArgumentParser(description="İEÜ akıllı ders asistanı (etkileşimli ya da toplu soru dosyası)")
+    parser.add_argument("--batch", help="Soru dosyası (JSONL ya da CSV); verilmezse etkileşimli mod")
+    parser.add_argument("--output", help="Cevap dosyası (JSONL); varsayılan: <girdi>.answers.jsonl")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Paralel işçi sayısı")
+    parser.add_argument("--budget-s", type=float, default=None, help="Soru başına gecikme bütçesi (sn)")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILE_MODES,
+                        help="Her isteği profille (varsayılan cprofile; RAG_PROFILE ile de açılır)")
+    args = parser.parse_args()
+
+    app = CourseIntelligenceSystem(profile=args.profile)
+    if args.batch:
+        app.run_batch(load_batch_questions(args.batch),
+                      args.output or os.path.splitext(args.batch)[0] + ".answers.jsonl",
+                      workers=args.workers, budget_s=args.budget_s)
+    else:
+        app.run()
\ No newline at end of file
@@ -0,0 +1,321 @@
+"""
+Ön koşul (prerequisite) grafiği.
+
+Scraper'daki serbest metin alanı ("SE 115To succeed (To get a grade of at least DD)",
+"MATH 153To get a grade of at least FDorMATH 109To get a grade of at least FD",
+"To be a senior (4th year) student") ingest sırasında yönlü bir grafa çevrilir:
+
+- Her ders için ön koşullar AND ile bağlı gruplar, grup içindeki dersler OR alternatifidir
+  ("A and B or C" sitede "A ve (B veya C)" olarak listelenir),
+- Geçişli ön koşullar, bağımlı dersler ve en erken alınabilecek dönem yükleme anında hesaplanır;
+  sorgular sözlük erişimi kadar (mikrosaniye) sürer,
+- Grafik JSON olarak veri dosyasının yanına kaydedilir (`<veri>.prereq.json`).
+
+    graph = load_prerequisite_graph()
+    graph.transitive_prerequisites("SE 302")
+    graph.earliest_semester("SE 302")
+"""
+import json
+import os
+import re
+
+from derived_artefacts import artefact_path, build_artefact, load_artefact
+from vector_create import JSON_FILE, get_academic_year
+
+GRAPH_VERSION = 1
+GRAPH_SUFFIX = ".prereq.json"
+SEMESTERS_PER_YEAR = 2
+MAX_SEMESTER = 8
+
+CODE_PATTERN = re.compile(r"([A-Z]{2,5})\s?(\d{3,4})")
+# Ders kodunu izleyen koşul metni
+CONDITIONS = [
+    ("To succeed", "pass"),  # En az DD ile geçmiş olmak
+    ("To get a grade of at least FD", "min_fd"),  # En az FD almış olmak
+    ("To attend the classes", "attend"),  # Derse kayıtlı olmuş ve NA/W dışında not almış olmak
+]
+# Ders dışı koşullar -> en erken dönem
+STANDING_RULES = [
+    (re.compile(r"senior|4th year", re.IGNORECASE), 7),
+    (re.compile(r"junior|3th year|3rd year", re.IGNORECASE), 5),
+    (re.compile(r"sophomore|2nd year", re.IGNORECASE), 3),
+]
+ECTS_RULE = re.compile(r"at least (\d+) ECTS", re.IGNORECASE)
+ECTS_PER_SEMESTER = 30
+
+
+def normalize_code(code):
+    """'se302', 'SE  302' -> 'SE 302'."""
+    match = CODE_PATTERN.search(str(code or "").upper())
+    return f"{match.group(1)} {match.group(2)}" if match else str(code or "").upper().strip()
+
+
+def graph_path_for(json_file):
+    return artefact_path(json_file, GRAPH_SUFFIX)
+
+
+def semester_index(semester):
+    """'2. Year Spring Semester' -> 4; seçmeli havuzu / bilinmeyen -> None."""
+    year = get_academic_year(semester)
+    if not year.isdigit():
+        return None
+    return (int(year) - 1) * SEMESTERS_PER_YEAR + (2 if "Spring" in (semester or "") else 1)
+
+
+def semester_label(index):
+    """4 -> '2. Year Spring Semester'."""
+    year = (index - 1) // SEMESTERS_PER_YEAR + 1
+    term = "Fall" if index % SEMESTERS_PER_YEAR == 1 else "Spring"
+    return f"{year}. Year {term} Semester"
+
+
+def _parse_alternative(part):
+    match = CODE_PATTERN.search(part)
+    if not match:
+        return None
+    condition = next((name for marker, name in CONDITIONS if marker in part), "pass")
+    return {"code": f"{match.group(1)} {match.group(2)}", "condition": condition}
+
+
+def parse_prerequisites(text):
+    """
+    Serbest metni yapıya çevirir:
+    {"groups": [[{"code", "condition"}, ...], ...], "min_semester": int | None, "note": str | None}
+    `groups` AND ile, grup içi alternatifler OR ile bağlıdır.
+    """
+    text = (text or "").strip()
+    result = {"groups": [], "min_semester": None, "note": None}
+    if not text or text == "None":
+        return result
+
+    # Ders kodu yoksa (sınıf / ECTS şartı) tek bir "durum" koşuludur
+    if not CODE_PATTERN.search(text):
+        result["note"] = text
+        for pattern, min_semester in STANDING_RULES:
+            if pattern.search(text):
+                result["min_semester"] = min_semester
+                break
+        ects = ECTS_RULE.search(text)
+        if ects:
+            result["min_semester"] = int(ects.group(1)) // ECTS_PER_SEMESTER + 1
+        return result
+
+    # Bağlaçlar koşul metnine bitişik: "...at least DD)andCE 303...", "...FDorMATH 109..."
+    for and_part in re.split(r"(?<=[a-zA-Z)])and(?=[A-Z]{2,5}\s?\d)", text):
+        group = []
+        for or_part in re.split(r"(?:(?<=[a-zA-Z)])|^)or(?=[A-Z]{2,5}\s?\d)", and_part):
+            alternative = _parse_alternative(or_part)
+            if alternative and alternative not in group:
+                group.append(alternative)
+        if group:
+            result["groups"].append(group)
+    return result
+
+
+class PrerequisiteGraph:
+    """Ders kodu -> ön koşul grupları; geçişli kapanışlar ve en erken dönemler önceden hesaplanır."""
+
+    def __init__(self, nodes):
+        # nodes: {code: {"name", "departments", "semester_index", "groups", "min_semester", "note"}}
+        self.nodes = nodes
+        self._ancestors = {}
+        self._dependents = {}
+        self._earliest = {}
+        self._precompute()
+
+    @classmethod
+    def from_courses(cls, courses):
+        nodes = {}
+        for course in courses:
+            code = normalize_code(course.get("course_code"))
+            if not code:
+                continue
+            parsed = parse_prerequisites(course.get("prerequisites"))
+            node = nodes.setdefault(code, {
+                "name": course.get("course_name", ""),
+                "departments": [],
+                "semester_index": None,
+                "groups": [],
+                "min_semester": None,
+                "note": None,
+            })
+            department = course.get("department")
+            if department and department not in node["departments"]:
+                node["departments"].append(department)
+
+            # Ortak dersler (MATH 153 vb.) birden çok bölümde: en erken planlandığı dönem esas alınır
+            index = semester_index(course.get("semester"))
+            if index and (node["semester_index"] is None or index < node["semester_index"]):
+                node["semester_index"] = index
+
+            if parsed["groups"] and not node["groups"]:
+                node["groups"] = parsed["groups"]
+            if parsed["min_semester"]:
+                node["min_semester"] = max(node["min_semester"] or 0, parsed["min_semester"])
+            if parsed["note"]:
+                node["note"] = parsed["note"]
+        return cls(nodes)
+
+    def _precompute(self):
+        for code, node in self.nodes.items():
+            for group in node["groups"]:
+                for alternative in group:
+                    dependents = self._dependents.setdefault(alternative["code"], [])
+                    if code not in dependents:
+                        dependents.append(code)
+
+        for code in self.nodes:
+            self._ancestors[code] = self._collect_ancestors(code, set())
+            self._earliest_for(code, set())
+
+    def _collect_ancestors(self, code, visiting):
+        """Derinlik öncelikli; en temel dersler önce gelecek şekilde (topolojik) sıralı."""
+        if code in self._ancestors:
+            return self._ancestors[code]
+        ordered = []
+        visiting.add(code)
+        for group in self.nodes.get(code, {}).get("groups", []):
+            for alternative in group:
+                prereq = alternative["code"]
+                if prereq in visiting:
+                    continue  # Veri hatasından kaynaklı döngü
+                for ancestor in self._collect_ancestors(prereq, visiting) + [prereq]:
+                    if ancestor not in ordered:
+                        ordered.append(ancestor)
+        visiting.discard(code)
+        return ordered
+
+    def _earliest_for(self, code, visiting):
+        """
+        En erken dönem = max(durum şartı, her AND grubu için en erken alternatif + 1).
+        Sonuç dersin açıldığı döneme (Güz/Bahar) yuvarlanır.
+        """
+        if code in self._earliest:
+            return self._earliest[code]
+        node = self.nodes.get(code)
+        if node is None:
+            return 1  # Veride olmayan ön koşul (başka fakülte dersi): ilk dönemde alınabilir sayılır
+
+        visiting.add(code)
+        earliest = node["min_semester"] or 1
+        for group in node["groups"]:
+            options = [self._earliest_for(a["code"], visiting) + 1
+                       for a in group if a["code"] not in visiting]
+            if options:
+                earliest = max(earliest, min(options))
+        visiting.discard(code)
+
+        # Sadece Güz ya da sadece Bahar'da açılan ders: aynı döneme denk gelene kadar ilerlet
+        planned = node["semester_index"]
+        if planned and earliest % SEMESTERS_PER_YEAR != planned % SEMESTERS_PER_YEAR:
+            earliest += 1
+        earliest = min(earliest, MAX_SEMESTER)
+        self._earliest[code] = earliest
+        return earliest
+
+    # --- SORGULAR ---
+    def __contains__(self, code):
+        return normalize_code(code) in self.nodes
+
+    def direct_prerequisites(self, code):
+        """AND grupları; her grup OR alternatifleri listesi."""
+        return self.nodes.get(normalize_code(code), {}).get("groups", [])
+
+    def transitive_prerequisites(self, code):
+        return list(self._ancestors.get(normalize_code(code), []))
+
+    def dependents(self, code, transitive=False):
+        code = normalize_code(code)
+        direct = list(self._dependents.get(code, []))
+        if not transitive:
+            return direct
+        ordered, stack = [], list(direct)
+        while stack:
+            current = stack.pop(0)
+            if current not in ordered:
+                ordered.append(current)
+                stack.extend(self._dependents.get(current, []))
+        return ordered
+
+    def earliest_semester(self, code):
+        code = normalize_code(code)
+        return self._earliest.get(code) if code in self.nodes else None
+
+    def describe(self, code):
+        """Generator'a verilecek (veya doğrudan gösterilecek) kesin ön koşul özeti."""
+        code = normalize_code(code)
+        node = self.nodes.get(code)
+        if node is None:
+            # Müfredatta olmayan ama ön koşul olarak geçen ders (örn. CE 303): en azından bağımlıları bilinir
+            dependents = self.dependents(code, transitive=True)
+            if not dependents:
+                return f"No prerequisite information found for {code}."
+            return (f"=== PREREQUISITES: {code} ===\n"
+                    f"{code} is not listed in the curriculum data, but it is a prerequisite for: "
+                    + ", ".join(dependents))
+
+        condition_text = {"pass": "pass (at least DD)", "min_fd": "at least FD", "attend": "attended (not NA/W)"}
+        lines = [f"=== PREREQUISITES: {code} - {node['name']} ==="]
+
+        if node["groups"]:
+            requirements = []
+            for group in node["groups"]:
+                requirements.append(" OR ".join(
+                    f"{a['code']} [{condition_text.get(a['condition'], a['condition'])}]" for a in group
+                ))
+            lines.append("Direct prerequisites: " + " AND ".join(f"({r})" if " OR " in r else r
+                                                                  for r in requirements))
+        else:
+            lines.append("Direct prerequisites: None")
+        if node["note"]:
+            lines.append(f"Standing requirement: {node['note']}")
+
+        chain = self.transitive_prerequisites(code)
+        lines.append("Full prerequisite chain (take in this order): " + (", ".join(chain) if chain else "None"))
+
+        dependents = self.dependents(code, transitive=True)
+        lines.append("Courses that require it (directly or indirectly): "
+                     + (", ".join(dependents) if dependents else "None"))
+
+        earliest = self.earliest_semester(code)
+        planned = node["semester_index"]
+        lines.append(f"Earliest feasible semester: {semester_label(earliest)}"
+                     + (f" (planned in curriculum: {semester_label(planned)})" if planned else ""))
+        return "\n".join(lines)
+
+    # --- KALICILIK ---
+    def to_dict(self):
+        return {"version": GRAPH_VERSION, "nodes": self.nodes}
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != GRAPH_VERSION:
+            raise ValueError(f"Ön koşul grafiği sürümü uyumsuz: {path}")
+        return cls(data["nodes"])
+
+
+def build_prerequisite_graph(json_file=JSON_FILE, courses=None):
+    """Ingest adımı: grafiği kurar ve kaydeder (bkz. derived_artefacts.build_artefact)."""
+    return build_artefact(PrerequisiteGraph.from_courses, json_file, GRAPH_SUFFIX, courses)
+
+
+def load_prerequisite_graph(json_file=JSON_FILE):
+    """Kayıtlı grafik ya da veriden yeniden kurulan; veri yoksa boş grafik (sorgular boş döner)."""
+    graph = load_artefact(PrerequisiteGraph.load, json_file, GRAPH_SUFFIX, "Ön koşul grafiği",
+                          build=build_prerequisite_graph)
+    return graph if graph is not None else PrerequisiteGraph({})
+
+
+if __name__ == "__main__":
+    g = build_prerequisite_graph()
+    linked = sum(1 for node in g.nodes.values() if node["groups"])
+    print(f"✅ {len(g.nodes)} ders, {linked} tanesinin ders ön koşulu var -> {graph_path_for(JSON_FILE)}")
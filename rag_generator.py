@@ -1,27 +1,41 @@
-import os
 from dotenv import load_dotenv
-from groq import Groq
+from llm_client import get_llm_client
+from llm_scheduler import PRIORITY_GENERATE
+from rag_tracing import span, record_error, record_llm_usage
 
 # .env dosyasını yükle
 load_dotenv()
 
 
 class RAGGenerator:
-    def __init__(self):
-        # API Anahtarını al
-        self.api_key = os.getenv("GROQ_API_KEY")
-        if not self.api_key:
-            raise ValueError("HATA: GROQ_API_KEY bulunamadı!")
+    # Kalan gecikme bütçesi bunun altındaysa LLM çağrılmaz, deterministik cevap döner
+    MIN_LLM_BUDGET_S = 1.5
+    # Deterministik cevapta gösterilecek en fazla context karakteri
+    FALLBACK_MAX_CHARS = 3000
 
-        # Groq İstemcisi
-        self.client = Groq(api_key=self.api_key)
+    def __init__(self, client=None):
+        # Paylaşılan (havuzlu, yeniden denemeli) Groq istemcisi
+        self.client = client or get_llm_client()
 
         # Model: Llama 3.3 (En güncel ve güçlü model)
         self.model_name = "llama-3.1-8b-instant"
 
-    def generate_answer(self, user_query, retrieved_context):
+    def fallback_answer(self, retrieved_context):
+        """LLM'e ulaşılamadığında veritabanı kayıtlarını olduğu gibi (kısaltarak) gösterir."""
+        context = retrieved_context or "No records found."
+        if len(context) > self.FALLBACK_MAX_CHARS:
+            context = context[:self.FALLBACK_MAX_CHARS] + "\n..."
+        return (
+            "⚠️ The AI assistant is temporarily unavailable, "
+            "so here are the matching records from the curriculum database:\n\n"
+            f"{context}"
+        )
+
+    def generate_answer(self, user_query, retrieved_context, deadline=None, history=None):
         """
         Retriever'dan gelen GERÇEK veriyi kullanarak cevap üretir.
+        `deadline` verilirse ve kalan bütçe azsa LLM yerine deterministik cevap döner.
+        `history`: önceki turların sıkıştırılmış özeti (conversation.py); sadece atıfları çözmek için.
         """
 
         # --- SİSTEM TALİMATI ---
@@ -64,27 +78,48 @@ class RAGGenerator:
             - Keep answers professional, academic, concise, and helpful. Avoid unnecessary fluff be simple.
         """
 
+        # Konuşma geçmişi (sınırlı ve sıkıştırılmış; kaynak yine sadece context)
+        history_block = ""
+        if history:
+            history_block = f"""
+        CONVERSATION SO FAR (earlier turns, for resolving references only):
+        {history}
+
+        ----------------
+"""
+
         # Kullanıcı Mesajı
         user_message = f"""
         CONTEXT INFORMATION (Database Results):
         {retrieved_context}
 
         ----------------
-
+{history_block}
         STUDENT QUESTION:
         {user_query}
         """
 
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                model=self.model_name,
-                temperature=0.0,
-            )
-            return chat_completion.choices[0].message.content
-
-        except Exception as e:
-            return f"LLM Hatası: {str(e)}"
\ No newline at end of file
+        with span("generate", model=self.model_name, context_chars=len(retrieved_context or ""),
+                  history_chars=len(history or "")) as gen_span:
+            if deadline is not None and deadline.remaining() < self.MIN_LLM_BUDGET_S:
+                gen_span.set(fallback="budget")
+                return self.fallback_answer(retrieved_context)
+
+            try:
+                chat_completion = self.client.chat(
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_message}
+                    ],
+                    model=self.model_name,
+                    deadline=deadline,
+                    priority=PRIORITY_GENERATE,
+                    temperature=0.0,
+                )
+                record_llm_usage("generator", chat_completion, gen_span)
+                return chat_completion.choices[0].message.content
+
+            except Exception as e:
+                record_error("generate", e, "LLM Hatası")
+                gen_span.set(fallback="records")
+                return self.fallback_answer(retrieved_context)
@@ -0,0 +1,190 @@
+"""
+Tek bir isteğin (sorunun) isteğe bağlı profili: zamanın nereye gittiği (_clean_search_term,
+retrieve_context / count_courses içindeki Python filtre döngüleri, embedding, ağ).
+
+Span süreleri (rag_tracing) aşama düzeyinde kalır; profil fonksiyon düzeyine iner. Açma yolları:
+  - ortam değişkeni: RAG_PROFILE=cprofile | sample (RAG_PROFILE_DIR, RAG_PROFILE_INTERVAL_MS),
+  - CLI: `python main.py --profile [cprofile|sample]`,
+  - arayüz: app_uı.py yan menüsündeki "Profil" anahtarı.
+
+İki mod:
+  - cprofile: deterministik; `<istek id>.pstats` (snakeviz / `python -m pstats` ile açılır).
+    Süreçte aynı anda tek cProfile çalışabilir; meşgulse istek örnekleme moduna düşer.
+  - sample  : örnekleyici; isteğin thread'inin yığını aralıkla okunur, `<istek id>.collapsed`
+    (flamegraph.pl / speedscope biçimi) yazılır. Eşzamanlı isteklerde de çalışır.
+Her iki mod da en çok öz-süre (self time) harcayan fonksiyonları döner; hata ayıklama paneli bunları gösterir.
+Kapalıyken hiçbir kanca kurulmaz: çağıran `RequestProfiler`'ı sadece mod verilmişse oluşturur.
+
+    profiler = RequestProfiler(trace.request_id, "sample").start()
+    ...
+    profile = profiler.stop()
+    profile.top  # [{"function": "rag_retriever.py:412(_clean_search_term)", "self_ms": 41.2, "self_pct": 18.3}, ...]
+"""
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from rag_tracing import METRICS
+
+PROFILE_MODES = ("cprofile", "sample")
+# Ortam değişkeni ve CLI'da kabul edilen eş anlamlılar
+MODE_ALIASES = {"1": "cprofile", "true": "cprofile", "on": "cprofile", "pstats": "cprofile",
+                "collapsed": "sample", "sampling": "sample"}
+PROFILE_DIR = os.getenv("RAG_PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL_S = float(os.getenv("RAG_PROFILE_INTERVAL_MS", "5")) / 1000.0
+TOP_FUNCTIONS = 15
+
+# cProfile süreç başına tek aktif profilleyiciyi destekler (3.12+ sys.monitoring)
+_CPROFILE_LOCK = threading.Lock()
+
+METRICS.describe("rag_profiled_requests_total", "Requests run under the on-demand profiler.")
+
+
+def profile_mode(value):
+    """'cprofile' / 'sample' / eş anlamlısı -> mod; boş, '0', 'off' -> None (profil kapalı)."""
+    value = str(value or "").strip().lower()
+    if value in ("", "0", "false", "off", "none"):
+        return None
+    value = MODE_ALIASES.get(value, value)
+    if value not in PROFILE_MODES:
+        raise ValueError(f"Bilinmeyen profil modu: {value} (seçenekler: {', '.join(PROFILE_MODES)})")
+    return value
+
+
+PROFILE_MODE = profile_mode(os.getenv("RAG_PROFILE"))
+
+
+def _frame_label(filename, lineno, name):
+    """pstats biçiminde kısa ad: 'rag_retriever.py:412(_clean_search_term)'; yerleşikler olduğu gibi."""
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{lineno}({name})"
+
+
+class RequestProfile:
+    """Bitmiş profil: mod, yazılan dosya, örnek / çağrı sayısı ve öz-süreye göre en pahalı fonksiyonlar."""
+
+    def __init__(self, request_id, mode, path, total_ms, top, samples=None):
+        self.request_id = request_id
+        self.mode = mode
+        self.path = path
+        self.total_ms = total_ms
+        self.top = top
+        self.samples = samples
+
+    def to_dict(self):
+        return {"request_id": self.request_id, "mode": self.mode, "path": self.path,
+                "total_ms": round(self.total_ms, 2), "samples": self.samples, "top": self.top}
+
+    def summary(self, limit=5):
+        """Tek satırlık özet (CLI çıktısı için)."""
+        return " | ".join(f"{row['function']} {row['self_ms']:.0f} ms" for row in self.top[:limit])
+
+
+class _StackSampler(threading.Thread):
+    """Hedef thread'in yığınını `interval_s` aralıkla okur; yığın (kökten yaprağa) -> örnek sayısı."""
+
+    def __init__(self, thread_id, interval_s):
+        super().__init__(name="rag-profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class RequestProfiler:
+    """Tek isteği çağıran thread'de profiller; `stop()` dosyayı yazar ve `RequestProfile` döner."""
+
+    def __init__(self, request_id, mode=PROFILE_MODE, out_dir=PROFILE_DIR, interval_s=SAMPLE_INTERVAL_S,
+                 top_n=TOP_FUNCTIONS):
+        self.request_id = str(request_id)
+        self.mode = profile_mode(mode) or "cprofile"
+        self.out_dir = out_dir
+        self.interval_s = interval_s
+        self.top_n = top_n
+        self._profiler = None
+        self._sampler = None
+        self._start = None
+
+    def start(self):
+        if self.mode == "cprofile" and not _CPROFILE_LOCK.acquire(blocking=False):
+            print(f"⚠️ Başka bir istek cProfile ile profilleniyor; {self.request_id} örneklenecek.")
+            self.mode = "sample"
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = _StackSampler(threading.get_ident(), self.interval_s)
+            self._sampler.start()
+        self._start = time.perf_counter()
+        return self
+
+    def _path(self, extension):
+        os.makedirs(self.out_dir, exist_ok=True)
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.request_id)
+        return os.path.join(self.out_dir, f"{safe_id}.{extension}")
+
+    def stop(self):
+        total_ms = (time.perf_counter() - self._start) * 1000.0
+        METRICS.inc("rag_profiled_requests_total", {"mode": self.mode})
+        if self._profiler is not None:
+            try:
+                self._profiler.disable()
+            finally:
+                _CPROFILE_LOCK.release()
+            return self._finish_cprofile(total_ms)
+        self._sampler.stop()
+        return self._finish_sample(total_ms)
+
+    def _finish_cprofile(self, total_ms):
+        path = self._path("pstats")
+        self._profiler.dump_stats(path)
+        stats = pstats.Stats(self._profiler).stats
+        # (dosya, satır, fonksiyon) -> (ilkel çağrı, toplam çağrı, öz süre, kümülatif süre, çağıranlar)
+        rows = sorted(stats.items(), key=lambda item: -item[1][2])[:self.top_n]
+        top = [{"function": _frame_label(*key), "calls": calls, "self_ms": round(tt * 1000.0, 2),
+                "self_pct": round(tt * 1000.0 / total_ms * 100.0, 1) if total_ms else 0.0,
+                "cumulative_ms": round(ct * 1000.0, 2)}
+               for key, (_, calls, tt, ct, _) in rows]
+        return RequestProfile(self.request_id, "cprofile", path, total_ms, top)
+
+    def _finish_sample(self, total_ms):
+        stacks = self._sampler.stacks
+        samples = sum(stacks.values())
+        path = self._path("collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+
+        # Öz süre: fonksiyonun yığının yaprağında olduğu örnekler; kümülatif: yığında bulunduğu örnekler
+        leaves, inclusive = Counter(), Counter()
+        for stack, count in stacks.items():
+            leaves[stack[-1]] += count
+            for name in set(stack):
+                inclusive[name] += count
+        ms_per_sample = total_ms / samples if samples else 0.0
+        top = [{"function": name, "samples": count, "self_ms": round(count * ms_per_sample, 2),
+                "self_pct": round(count / samples * 100.0, 1),
+                "cumulative_ms": round(inclusive[name] * ms_per_sample, 2)}
+               for name, count in leaves.most_common(self.top_n)]
+        return RequestProfile(self.request_id, "sample", path, total_ms, top, samples=samples)
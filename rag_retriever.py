@@ -1,13 +1,87 @@
+import json
 import os
+import threading
 import chromadb
 from dotenv import load_dotenv
 from chromadb.utils import embedding_functions
+from rag_tracing import progress, span, record_error
+from course_autocomplete import CourseAutocomplete, DEFAULT_LIMIT
+from course_digest import load_course_digests
+from course_store import open_course_store
+from domain_guard import DomainGuard, load_domain_guard
+from field_projection import columns_for
+from hnsw_index import hnsw_path_for, open_hnsw_collection
+from curriculum_views import format_course_line, load_curriculum_views
+from prerequisite_graph import load_prerequisite_graph
+from shards import default_shard_courses, load_shard_manifest, open_sharded_collection
+from spell_correction import load_spell_corrector
+from vector_create import (COLLECTION_NAME, SECTION_COLLECTION_NAME, SECTION_TITLES, JSON_FILE,
+                           build_course_document, build_placement, build_section_texts, content_hash,
+                           course_shard, department_flag, format_number, format_placements, load_course_data,
+                           year_flag)
+
+# Router'ın aralık filtresi verebileceği (metadata'da float saklanan) alanlar
+NUMERIC_FILTER_FIELDS = {"ects", "local_credit", "theory_hours", "lab_hours", "weekly_hours"}
+RANGE_OPERATORS = {
+    "gt": "$gt", ">": "$gt", "gte": "$gte", ">=": "$gte",
+    "lt": "$lt", "<": "$lt", "lte": "$lte", "<=": "$lte", "eq": "$eq", "=": "$eq",
+}
 
 load_dotenv()
 
 
 class CourseRetriever:
-    def __init__(self):
+    # --- retrieve_context AYARLARI ---
+    # benchmarks/eval_retrieval.py ile recall/token/latency ölçülerek seçilir; örnek üzerinde değiştirilebilir.
+    FILTERED_FETCH_LIMIT = 50  # Yıl/dönem filtresi Python'da uygulandığı için geniş çekilir
+    FETCH_MULTIPLIER = 2  # Filtresiz aramada n_results * FETCH_MULTIPLIER aday çekilir
+    MAX_DISTANCE = 1.6  # Filtresiz aramada benzerlik eşiği (karesel L2); None = eşik yok
+    HEAD_DOCS = 3  # İlk N doküman uzun, kalanlar kısa kesilir
+    HEAD_DOC_CHARS = 1000
+    TAIL_DOC_CHARS = 400
+    # Bölüm koleksiyonu varsa: parçalar derslere gruplanacağı için daha fazla aday çekilir
+    SECTION_FETCH_MULTIPLIER = 4
+    # Sorgu kelimeleri arama öncesi ders verisinden türetilen sözlükle düzeltilir (spell_correction.py)
+    SPELL_CORRECTION = True
+    # Alan dışı sorular (domain_guard.py) router / arama / LLM'e gitmeden reddedilir
+    DOMAIN_GUARD = True
+    # Arama altyapısı: "cloud" (Chroma Cloud) ya da "hnsw" (hnsw_index.py ile kaydedilen yerel ANN indeksi)
+    INDEX_BACKEND = os.getenv("RAG_INDEX_BACKEND", "cloud").lower()
+    # Generator context'i: "digest" (course_digest.py kompakt özetleri) ya da "full" (tam ders dokümanı).
+    # Özet modunda bile `detail="full"` ile istenen sorgu tam dokümanı alır.
+    CONTEXT_MODE = os.getenv("RAG_CONTEXT_MODE", "digest").lower()
+    # Özetin kapsadığı bölümler; bölüm koleksiyonunda bunların eşleşen parçaları özetle değiştirilir
+    DIGEST_SECTIONS = {"overview", "weekly_topics", "evaluation"}
+
+    def __init__(self, collection=None, embedding_function=None, section_collection=None, store=None,
+                 prerequisites=None, curriculum_views=None, spell_corrector=None, autocomplete=None,
+                 domain_guard=None, digests=None):
+        # Bölüm (section) koleksiyonu yoksa retrieve_context ders başına tam dokümanla çalışır.
+        self.section_collection = section_collection
+        # Yerel ders deposu (course_store.py): kod ile birebir aramada Cloud'a gitmeye gerek kalmaz
+        self.store = store
+        # Ön koşul grafiği (prerequisite_graph.py); verilmezse ilk kullanımda yüklenir
+        self._prerequisites = prerequisites
+        # Yazım düzeltme indeksi; verilmezse ilk kullanımda yüklenir
+        self._spell_corrector = spell_corrector
+        # Ders kodu / adı otomatik tamamlama indeksi (course_autocomplete.py); ilk kullanımda kurulur
+        self._autocomplete = autocomplete
+        # Alan dışı soru kontrolü; verilmezse Cloud'da ingest çıktısı yüklenir, yerelde koleksiyondan kurulur
+        self._domain_guard = domain_guard
+        # Önceden hesaplanmış müfredat listeleri (curriculum_views.py); varsa liste soruları koleksiyona gitmez
+        self.curriculum_views = curriculum_views
+        # Kompakt ders özetleri (course_digest.py); yoksa context tam dokümanlardan kurulur
+        self.digests = digests
+        # Tembel indeksler eşzamanlı oturumlarda bir kez kurulsun (component_pool.py)
+        self._lazy_lock = threading.Lock()
+
+        # Dışarıdan koleksiyon verildiyse (yerel/offline kurulum, benchmark) Cloud'a hiç bağlanma.
+        if collection is not None:
+            self.collection = collection
+            self.embedding_fn = embedding_function or getattr(collection, "embedding_function", None)
+            print(" Retriever Yerel Koleksiyona Bağlandı.")
+            return
+
         # 1. BAĞLANTI AYARLARI
         self.api_key = os.getenv("CHROMA_API_KEY")
         self.tenant = os.getenv("CHROMA_TENANT")
@@ -19,56 +93,228 @@ class CourseRetriever:
         )
 
         # 3. BAĞLANTIYI KUR
+        if self.INDEX_BACKEND == "hnsw":
+            self._open_hnsw_collections()
+        else:
+            self._connect_cloud()
+
+        if self.store is None:
+            self.store = open_course_store()
+        if self.curriculum_views is None:
+            self.curriculum_views = load_curriculum_views()
+        if self.digests is None:
+            self.digests = load_course_digests()
+        if self._domain_guard is None:
+            self._domain_guard = load_domain_guard() or False
+
+    def _open_hnsw_collections(self):
+        """RAG_INDEX_BACKEND=hnsw: ingest'te kaydedilen HNSW indeksleri (graf mmap ile) açılır, Cloud'a gidilmez."""
+        def opener(name):
+            return open_hnsw_collection(hnsw_path_for(JSON_FILE, name), embedding_function=self.embedding_fn)
+
+        manifest = load_shard_manifest()
+        if manifest:
+            self._open_shards(manifest, opener)
+        else:
+            path = hnsw_path_for(JSON_FILE)
+            self.collection = opener(COLLECTION_NAME)
+            if self.collection is None:
+                raise FileNotFoundError(f"HNSW indeksi bulunamadı: {path} (önce: python hnsw_index.py)")
+            # Bölüm koleksiyonu opsiyonel: yoksa ders bazlı aramaya düşülür
+            self.section_collection = opener(SECTION_COLLECTION_NAME)
+        print(f" Retriever Yerel HNSW İndeksine Bağlandı ({self.collection.count()} kayıt).")
+
+    def _open_shards(self, manifest, opener):
+        """
+        Parça manifesti (shards.py) varsa fakülte / müfredat sürümü parçaları tek koleksiyon gibi açılır;
+        sorgular sadece filtrenin seçtiği parçalara eşzamanlı gider.
+        """
+        self.collection = open_sharded_collection(manifest, opener)
+        if self.collection is None:
+            raise FileNotFoundError("Parça koleksiyonlarının hiçbiri açılamadı (önce: python vector_create.py)")
+        # Bölüm koleksiyonları opsiyonel: hiçbiri yoksa ders bazlı aramaya düşülür
+        self.section_collection = open_sharded_collection(manifest, opener, sections=True)
+        print(f" Parçalı koleksiyon: {len(self.collection)} parça "
+              f"({', '.join(s['faculty'] + '/' + s['curriculum'] for s in self.collection.shards)}).")
+
+    def _connect_cloud(self):
+        manifest = load_shard_manifest()
         try:
             self.client = chromadb.CloudClient(
                 api_key=self.api_key,
                 tenant=self.tenant,
                 database=self.database
             )
-            self.collection = self.client.get_collection(
-                name="engineering_courses",
-                embedding_function=self.embedding_fn
-            )
+            if manifest:
+                self._open_shards(manifest, lambda name: self.client.get_collection(
+                    name=name, embedding_function=self.embedding_fn))
+            else:
+                self.collection = self.client.get_collection(
+                    name=COLLECTION_NAME,
+                    embedding_function=self.embedding_fn
+                )
             print(" Retriever Başarıyla Bağlandı (Tüm Fonksiyonlar Aktif).")
         except Exception as e:
             print(f" Retriever Başlatılamadı: {e}")
             raise e
 
-    def _format_filters(self, filters):
-        chroma_filters = {}
+        if manifest:
+            return
+        # Bölüm koleksiyonu opsiyonel: henüz yüklenmediyse eski (ders bazlı) aramaya düşülür
+        try:
+            self.section_collection = self.client.get_collection(
+                name=SECTION_COLLECTION_NAME,
+                embedding_function=self.embedding_fn
+            )
+        except Exception as e:
+            print(f" Bölüm koleksiyonu bulunamadı, ders bazlı arama kullanılacak: {e}")
+
+    @staticmethod
+    def _target_departments(filters):
+        """Filtredeki bölüm(ler) -> liste; bölüm verilmediyse None."""
         if not filters:
             return None
-
-        # 1. Department Kontrolü (Liste mi Tekil mi?)
+        # (bazı yerlerde sadece 'department' gelebilir)
         if "target_department" in filters and filters["target_department"] != "None":
             dept_val = filters["target_department"]
-            if isinstance(dept_val, list):
-                # Eğer liste ise "$in" (OR mantığı) kullan
-                chroma_filters["department"] = {"$in": dept_val}
-            else:
-                chroma_filters["department"] = dept_val
-        # (bazı yerlerde sadece 'department' gelebilir)
-        elif "department" in filters:
-            dept_val = filters["department"]
-            if isinstance(dept_val, list):
-                chroma_filters["department"] = {"$in": dept_val}
-            else:
-                chroma_filters["department"] = dept_val
+        else:
+            dept_val = filters.get("department")
+        if not dept_val or dept_val == "None":
+            return None
+        return dept_val if isinstance(dept_val, list) else [dept_val]
+
+    @staticmethod
+    def _department_clause(departments):
+        """
+        Ortak dersler tek kayıt olduğu için bölüm, `department` alanıyla değil üyelik bayraklarıyla
+        (dept_<bölüm> = True) filtrelenir; liste verilirse bayraklar OR'lanır.
+        """
+        flags = [{department_flag(d): True} for d in departments]
+        return flags[0] if len(flags) == 1 else {"$or": flags}
+
+    @staticmethod
+    def _year_clause(filters):
+        """
+        Yıl ön elemesi (year_<yıl> = True bayrakları); yıl verilmediyse None. Seçmeli aramada havuz
+        dersleri (yıl 'Any') her yıla uyduğundan onlar da dahil edilir; kesin kontrol Python'da kalır.
+        """
+        target_year = filters.get("academic_year") or filters.get("year")
+        if not target_year or target_year == "None":
+            return None
+        years = [str(y) for y in (target_year if isinstance(target_year, list) else [target_year])]
+        if filters.get("course_type") == "Elective" or filters.get("type") == "Elective":
+            years.append("Any")
+        flags = [{year_flag(y): True} for y in dict.fromkeys(years)]
+        return flags[0] if len(flags) == 1 else {"$or": flags}
+
+    @staticmethod
+    def _curriculum_clause(filters):
+        """
+        Müfredat sürümü ('2025', 'before_2025'); verilmediyse None. Parçalı koleksiyonda sürüm koşulu
+        olmayan sorgular fakültenin varsayılan (güncel) sürümüne gider.
+        """
+        version = filters.get("curriculum_version") or filters.get("curriculum")
+        if not version or version == "None":
+            return None
+        versions = [str(v) for v in (version if isinstance(version, list) else [version])]
+        return {"curriculum": versions[0]} if len(versions) == 1 else {"curriculum": {"$in": versions}}
+
+    @staticmethod
+    def _section_clause(fields):
+        """Alan projeksiyonu: bölüm koleksiyonunda sadece istenen bölümlerin parçaları aranır / getirilir."""
+        fields = list(fields)
+        return {"section": fields[0]} if len(fields) == 1 else {"section": {"$in": fields}}
+
+    @staticmethod
+    def _and_clause(where, clause):
+        if not where:
+            return clause
+        if list(where) == ["$and"]:
+            return {"$and": where["$and"] + [clause]}
+        return {"$and": [where, clause]}
+
+    @staticmethod
+    def _placements(meta):
+        """Kaydın bölüm yerleşimleri; eski (tekilleştirilmemiş) kayıtlarda tek yerleşim."""
+        if meta.get("placements"):
+            return json.loads(meta["placements"])
+        return [{key: meta.get(key) for key in ("department", "semester", "year", "type")}]
+
+    def _membership_views(self, meta, departments=None):
+        """
+        Ortak dersin her bölümdeki görünümü (meta + o bölümdeki dönem / yıl / tür).
+        Yıl, dönem ve tür kontrolleri bu görünümler üzerinde yapılır; `departments` verilirse
+        sadece o bölümlerdeki yerleşimler döner.
+        """
+        views = [{**meta, **placement} for placement in self._placements(meta)]
+        if departments:
+            views = [view for view in views if view.get("department") in departments]
+        return views
+
+    def _format_filters(self, filters):
+        if not filters:
+            return None
+
+        clauses = []
+
+        # 1. Department Kontrolü (Liste mi Tekil mi?) — üyelik bayraklarıyla
+        departments = self._target_departments(filters)
+        if departments:
+            clauses.append(self._department_clause(departments))
 
         # 2. Type Kontrolü (Sadece Mandatory ise ekle)
+        # Ortak derste tür bölüme göre değişebilir: veritabanında "en az bir bölümde zorunlu" ön elemesi,
+        # kesin kontrol Python'da (_passes_filters / _check_counting_rules) bölüm görünümü üzerinde yapılır.
         if filters.get("course_type") == "Mandatory" or filters.get("type") == "Mandatory":
-            chroma_filters["type"] = "Mandatory"
+            clauses.append({"has_mandatory": True})
+
+        # 3. Yıl Kontrolü — üyelik bayraklarıyla ön eleme (bölüm + yıl eşleşmesi Python'da kesinleşir)
+        year_clause = self._year_clause(filters)
+        if year_clause:
+            clauses.append(year_clause)
 
-        # NOT: Yıl (year) filtresini Python tarafında yapıyoruz.
+        # 4. Sayısal Aralıklar (örn. ects > 6, lab_hours >= 2) — doğrudan veritabanında filtrelenir
+        clauses.extend(self._format_numeric_filters(filters.get("numeric_filters")))
 
-        if len(chroma_filters) > 1:
-            return {"$and": [{k: v} for k, v in chroma_filters.items()]}
-        elif len(chroma_filters) == 1:
-            return chroma_filters
+        # 5. Müfredat Sürümü — parçalı koleksiyonda hangi sürüm parçalarına gidileceğini de belirler
+        curriculum_clause = self._curriculum_clause(filters)
+        if curriculum_clause:
+            clauses.append(curriculum_clause)
+
+        if len(clauses) > 1:
+            return {"$and": clauses}
+        elif len(clauses) == 1:
+            return clauses[0]
         else:
             return None
 
-    def retrieve_exact_match(self, course_code):
+    def _format_numeric_filters(self, numeric_filters):
+        """[{"field": "ects", "op": "gt", "value": 6}] -> [{"ects": {"$gt": 6.0}}]; geçersiz koşullar atlanır."""
+        if not numeric_filters or numeric_filters == "None":
+            return []
+        if isinstance(numeric_filters, dict):
+            numeric_filters = [numeric_filters]
+
+        clauses = []
+        for condition in numeric_filters:
+            if not isinstance(condition, dict):
+                continue
+            field = condition.get("field")
+            operator = RANGE_OPERATORS.get(str(condition.get("op", "")).lower())
+            try:
+                # Metadata'daki sayılar float; Chroma tipe göre karşılaştırdığından değer de float olmalı
+                value = float(condition.get("value"))
+            except (TypeError, ValueError):
+                continue
+            if field in NUMERIC_FILTER_FIELDS and operator:
+                clauses.append({field: {operator: value}})
+        return clauses
+
+    def retrieve_exact_match(self, course_code, detail=None, fields=None):
+        """
+        Kod ile birebir arama. Özet modunda dersin kompakt özeti döner; `detail="full"` tam dokümanı getirir.
+        `fields` (field_projection.py) verilirse sadece o alanlar okunur ve döner.
+        """
 
         if not course_code or course_code == "None":
             return None
@@ -84,116 +330,456 @@ class CourseRetriever:
                     variations.append(base_code[:i] + " " + base_code[i:])
                     break
 
-        print(f"   🔍 Kod Varyasyonları deneniyor: {variations}")
+        progress(f"   🔍 Kod Varyasyonları deneniyor: {variations}")
+
+        with span("retrieve", method="exact_match", course_code=base_code, detail=detail,
+                  fields=fields) as retrieve_span:
+            if self.store is not None:
+                match = self._exact_match_from_store(variations, retrieve_span, detail, fields)
+                if match:
+                    return match
+            if fields and self.section_collection is not None:
+                match = self._exact_match_sections(variations, retrieve_span, fields)
+                if match:
+                    return match
+
+            for code in variations:
+                try:
+                    with span("metadata_fetch", method="exact_match", where={"course_code": code}) as fetch_span:
+                        result = self.collection.get(
+                            where={"course_code": code},
+                            include=['documents', 'metadatas']
+                        )
+                        fetch_span.set(hit_count=len(result['ids']))
+                    if result['ids']:
+                        retrieve_span.set(hit_count=len(result['ids']), matched_code=code)
+                        doc = result['documents'][0]
+                        meta = result['metadatas'][0]
+                        placements = self._placements(meta)
+                        body = self._digest_text(meta.get("content_hash"), detail) or f"Description: {doc}"
+                        return (
+                            f"=== EXACT MATCH FOUND: {meta.get('course_code')} ===\n"
+                            f"Name: {meta.get('course_name')}\n"
+                            f"Type: {format_placements(placements, 'type')} | "
+                            f"ECTS: {format_number(meta.get('ects'))}\n"
+                            f"Semester: {format_placements(placements, 'semester')}\n"
+                            f"{body}"
+                        )
+                except Exception as e:
+                    record_error("retrieve", e, "Kod Arama Hatası")
+                    continue
+            retrieve_span.set(hit_count=0)
+        return None
 
+    def _exact_match_from_store(self, variations, retrieve_span, detail=None, fields=None):
+        # Projeksiyonda sadece başlık + istenen alanların sütunları okunur
+        columns = columns_for(fields) if fields else None
         for code in variations:
-            try:
-                result = self.collection.get(
-                    where={"course_code": code},
-                    include=['documents', 'metadatas']
+            with span("metadata_fetch", method="exact_match", source="store", course_code=code,
+                      fields=fields) as fetch_span:
+                records = self.store.find_by_code(code, columns=columns)
+                fetch_span.set(hit_count=len(records))
+            # Kod birden çok müfredat sürümünde varsa varsayılan sürümünkiler
+            records = default_shard_courses(records)
+            if records:
+                retrieve_span.set(hit_count=len(records), matched_code=code, source="store")
+                course = records[0]
+                if fields:
+                    # Projeksiyonlu kayıtta içerik özeti hesaplanamaz: aynı koddaki yerleşimlerin hepsi
+                    placements = [build_placement(r) for r in records]
+                    body = self._projected_body(build_section_texts(course, placements, fields), fields)
+                else:
+                    # Aynı içerikli satırlar (ortak ders) tek dokümanda birleşir
+                    digest = content_hash(course)
+                    placements = [build_placement(r) for r in records if content_hash(r) == digest]
+                    body = (self._digest_text(digest, detail)
+                            or f"Description: {build_course_document(course, placements)}")
+                return (
+                    f"=== EXACT MATCH FOUND: {course.course_code} ===\n"
+                    f"Name: {course.course_name}\n"
+                    f"Type: {format_placements(placements, 'type')} | ECTS: {format_number(course.ects)}\n"
+                    f"Semester: {format_placements(placements, 'semester')}\n"
+                    f"{body}"
                 )
-                if result['ids']:
-                    doc = result['documents'][0]
-                    meta = result['metadatas'][0]
-                    return (
-                        f"=== EXACT MATCH FOUND: {meta.get('course_code')} ===\n"
-                        f"Name: {meta.get('course_name')}\n"
-                        f"Type: {meta.get('type')} | ECTS: {meta.get('ects')}\n"
-                        f"Semester: {meta.get('semester')}\n"
-                        f"Description: {doc}"
-                    )
-            except:
-                continue
         return None
 
-    def retrieve_context(self, query_text, n_results=15, filters=None):
-        try:
-            target_year = None
-            target_semester = None
+    def _exact_match_sections(self, variations, retrieve_span, fields):
+        """Depo yoksa: bölüm koleksiyonundan sadece istenen bölümlerin parçaları getirilir."""
+        for code in variations:
+            where = {"$and": [{"course_code": code}, self._section_clause(fields)]}
+            try:
+                with span("metadata_fetch", method="exact_match", source="sections", where=where) as fetch_span:
+                    result = self.section_collection.get(where=where, include=['documents', 'metadatas'])
+                    fetch_span.set(hit_count=len(result['ids']))
+            except Exception as e:
+                record_error("retrieve", e, "Kod Arama Hatası")
+                continue
+            if not result['ids']:
+                continue
+            retrieve_span.set(hit_count=len(result['ids']), matched_code=code, source="sections")
+            meta = result['metadatas'][0]
+            # Ortak derste tek kayıt; eski düzende aynı dersin başka bölüm kayıtları atlanır
+            chunks = [(m.get("section"), m.get("part", 0), self._chunk_text(doc))
+                      for doc, m in zip(result['documents'], result['metadatas'])
+                      if m.get("parent_id") == meta.get("parent_id")]
+            placements = self._placements(meta)
+            return (
+                f"=== EXACT MATCH FOUND: {meta.get('course_code')} ===\n"
+                f"Name: {meta.get('course_name')}\n"
+                f"Type: {format_placements(placements, 'type')} | ECTS: {format_number(meta.get('ects'))}\n"
+                f"Semester: {format_placements(placements, 'semester')}\n"
+                f"{self._section_body(chunks)}"
+            )
+        return None
 
-            if filters:
-                target_year = filters.get("academic_year")
-                if not target_year: target_year = filters.get("year")
-                target_semester = filters.get("semester")
-
-            # --- OPTİMİZASYON: Fetch Limit ---
-            if target_year and target_year != "None" or target_semester and target_semester != "None":
-                fetch_limit = 50
-                print(f"   🚀 Akıllı Mod (Eco): '{target_year}' için tarama...")
-            else:
-                fetch_limit = n_results * 2
+    @staticmethod
+    def _chunk_text(doc):
+        # İlk satır "<kod> <ad> - <BÖLÜM>:" önekidir; başlık zaten ders başlığında var
+        return doc.split("\n", 1)[1] if "\n" in doc else doc
+
+    @staticmethod
+    def _section_body(chunks):
+        """[(bölüm, parça no, metin)] -> başlıklı bölümler; bir bölümün parçaları yan yana ve sırasıyla."""
+        merged = {}
+        for section, part, text in sorted(chunks, key=lambda c: c[1]):
+            merged.setdefault(section, []).append(text)
+        return "\n".join(
+            f"[{SECTION_TITLES.get(section, str(section).upper())}]\n" + "\n".join(parts)
+            for section, parts in merged.items()
+        )
 
-            final_filter = self._format_filters(filters)
+    def _projected_body(self, sections, fields):
+        """Projeksiyonlu bölümler; istenen alanlar boşsa bunu açıkça söyleyen tek satır."""
+        if sections:
+            # Bölüm parçalarıyla aynı biçim: satır başı girintileri atılır (vector_create.split_section)
+            return self._section_body([(name, 0, "\n".join(line.strip() for line in text.splitlines()))
+                                       for name, text in sections.items()])
+        titles = ", ".join(SECTION_TITLES[f].lower() for f in fields)
+        return f"No {titles} information is recorded for this course."
+
+    def _projected_from_store(self, meta, fields):
+        """Ders bazlı aramada: kaydın sadece istenen alanları depodan (gereken sütunlarla) okunur; yoksa None."""
+        records = self.store.find_by_code(meta.get("course_code"), columns=columns_for(fields))
+        shard = (meta.get("faculty"), meta.get("curriculum"))
+        records = [r for r in records if not shard[1] or course_shard(r) == shard] or records
+        if not records:
+            return None
+        # Kaydın kendi bölümündeki satır tercih edilir (eski düzende bölüm başına ayrı kayıt)
+        course = next((r for r in records if r.department == meta.get("department")), records[0])
+        return self._projected_body(build_section_texts(course, self._placements(meta), fields), fields)
+
+    def get_full_text(self, course_code):
+        """Özet yetmediğinde dersin tam dokümanı (isteğe bağlı getirme; özet modundan bağımsız)."""
+        return self.retrieve_exact_match(course_code, detail="full")
+
+    @property
+    def prerequisites(self):
+        if self._prerequisites is None:
+            with self._lazy_lock:
+                if self._prerequisites is None:
+                    self._prerequisites = load_prerequisite_graph()
+        return self._prerequisites
+
+    def get_prerequisite_chain(self, course_code):
+        """Geçişli ön koşullar (en temel ders önce)."""
+        return self.prerequisites.transitive_prerequisites(course_code)
+
+    def get_dependents(self, course_code, transitive=True):
+        """Bu dersi (doğrudan veya dolaylı) ön koşul olarak isteyen dersler."""
+        return self.prerequisites.dependents(course_code, transitive=transitive)
+
+    def get_earliest_semester(self, course_code):
+        """Ön koşullar ve sınıf şartına göre en erken alınabilecek dönem (1..8)."""
+        return self.prerequisites.earliest_semester(course_code)
+
+    def describe_prerequisites(self, course_code):
+        """Tek ders veya kod listesi için kesin ön koşul özeti (Generator context'i)."""
+        codes = course_code if isinstance(course_code, list) else [course_code]
+        with span("retrieve", method="prerequisite", course_code=codes) as retrieve_span:
+            blocks = [self.prerequisites.describe(code) for code in codes if code and code != "None"]
+            retrieve_span.set(hit_count=sum(1 for code in codes if code in self.prerequisites))
+            return "\n\n".join(blocks)
+
+    @property
+    def autocomplete_index(self):
+        if self._autocomplete is None:
+            with self._lazy_lock:
+                if self._autocomplete is None:
+                    courses = list(self.store) if self.store is not None else load_course_data()
+                    self._autocomplete = CourseAutocomplete(default_shard_courses(courses))
+        return self._autocomplete
+
+    def autocomplete(self, prefix, limit=DEFAULT_LIMIT):
+        """Yarım ders kodu / adı için öneriler (router ve LLM'e gitmeden, bellek içi)."""
+        return self.autocomplete_index.complete(prefix, limit)
+
+    def resolve_course_selection(self, text):
+        """Girdi tam bir ders kodu veya seçilmiş bir öneriyse ders kodunu döner (router atlanabilir)."""
+        return self.autocomplete_index.resolve(text)
+
+    @property
+    def domain_guard(self):
+        if self._domain_guard is None:
+            with self._lazy_lock:
+                if self._domain_guard is None:
+                    # Yerel koleksiyon: embedding modeli ingest çıktısıyla aynı olmayabilir, koleksiyondan kurulur
+                    domain_guard = DomainGuard.from_collection(self.collection)
+                    domain_guard.calibrate(self.embedding_fn)
+                    self._domain_guard = domain_guard
+        return self._domain_guard
+
+    def check_domain(self, query_text):
+        """Soru müfredat alanında mı? Kontrol kapalıysa / kurulamıyorsa None (soru normal akışa girer)."""
+        if not self.DOMAIN_GUARD or self.embedding_fn is None or not self.domain_guard:
+            return None
+        with span("domain_check") as check_span:
+            verdict = self.domain_guard.check(query_text, self.embedding_fn)
+            check_span.set(**verdict)
+        return verdict
+
+    @property
+    def spell_corrector(self):
+        if self._spell_corrector is None:
+            with self._lazy_lock:
+                if self._spell_corrector is None:
+                    self._spell_corrector = load_spell_corrector() or False
+        return self._spell_corrector
+
+    def _correct_spelling(self, text):
+        """Sorgudaki yazım hatalarını düzeltir ('securty' -> 'security'); düzeltmeler trace'e yazılır."""
+        if not self.SPELL_CORRECTION or not text or not self.spell_corrector:
+            return text
+        with span("spell_correct", chars=len(text)) as spell_span:
+            corrected, corrections = self.spell_corrector.correct(text)
+            spell_span.set(hit_count=len(corrections), corrections=corrections)
+        if corrections:
+            progress(f"   ✏️ Yazım düzeltildi: {', '.join(f'{old} -> {new}' for old, new in corrections)}")
+        return corrected
+
+    def _embed_query(self, query_text):
+        with span("embed", chars=len(query_text)):
+            return self.embedding_fn([query_text])
+
+    def _passes_filters(self, meta, dist, filters, target_year, target_semester):
+        """Yıl / dönem / tür filtresi ve benzerlik eşiği (Chroma'nın yapamadığı kısım Python'da)."""
+        course_year = meta.get("year")
+
+        if filters and (filters.get("course_type") == "Mandatory" or filters.get("type") == "Mandatory"):
+            if meta.get("type") != "Mandatory":
+                return False
 
-            results = self.collection.query(
-                query_texts=[query_text],
-                n_results=fetch_limit,
-                where=final_filter
-            )
+        # --- A) YIL KONTROLÜ (LİSTE DESTEKLİ) ---
+        if target_year and target_year != "None":
+            # 1. Havuz Dersi Kontrolü
+            is_elective_search = False
+            if filters:
+                is_elective_search = (
+                            filters.get("course_type") == "Elective" or filters.get("type") == "Elective")
 
-            if not results['documents'] or not results['documents'][0]: return ""
+            is_pool_course = (course_year == "Any")
 
-            docs = results['documents'][0]
-            metadatas = results['metadatas'][0]
-            distances = results['distances'][0]
+            if is_elective_search and is_pool_course:
+                pass
+            else:
+                if isinstance(target_year, list):
+                    if str(course_year) not in [str(y) for y in target_year]: return False
+                else:
+                    if str(course_year) != str(target_year): return False
 
-            filtered_contexts = []
+        # B) DÖNEM KONTROLÜ
+        if target_semester and target_semester != "None":
+            if target_semester not in meta.get("semester", ""):
+                return False
 
-            for i, (doc, meta, dist) in enumerate(zip(docs, metadatas, distances)):
+        # C) BENZERLİK EŞİĞİ
+        if (not target_year or target_year == "None") and (
+                not target_semester or target_semester == "None") and \
+                self.MAX_DISTANCE is not None and dist > self.MAX_DISTANCE:
+            return False
 
-                course_year = meta.get("year")
+        return True
 
-                # --- A) YIL KONTROLÜ (LİSTE DESTEKLİ) ---
-                if target_year and target_year != "None":
-                    # 1. Havuz Dersi Kontrolü
-                    is_elective_search = False
-                    if filters:
-                        is_elective_search = (
-                                    filters.get("course_type") == "Elective" or filters.get("type") == "Elective")
+    def _matching_view(self, meta, dist, filters, target_year, target_semester):
+        """Filtreleri geçen ilk bölüm görünümü (yoksa None)."""
+        for view in self._membership_views(meta, self._target_departments(filters)):
+            if self._passes_filters(view, dist, filters, target_year, target_semester):
+                return view
+        return None
 
-                    is_pool_course = (course_year == "Any")
+    @staticmethod
+    def _course_key(meta):
+        # Eski düzende (bölüm başına kayıt) aynı ders birden çok kez gelebilir; sorgu anında tek sayılır
+        return meta.get("course_code"), meta.get("course_name")
+
+    def _course_header(self, meta):
+        departments = meta.get("departments", "")
+        shared = f" | Departments: {departments}" if "," in departments else ""
+        return (
+            f"[COURSE: {meta.get('course_code')} - {meta.get('course_name')}]\n"
+            f"INFO: Year {meta.get('year')} | {meta.get('type')} | {format_number(meta.get('ects'))} ECTS{shared}\n"
+        )
 
-                    if is_elective_search and is_pool_course:
-                        pass
-                    else:
-                        if isinstance(target_year, list):
-                            if str(course_year) not in [str(y) for y in target_year]: continue
-                        else:
-                            if str(course_year) != str(target_year): continue
+    def _digest_text(self, key, detail=None):
+        """Kaydın kompakt özeti; tam metin istendiyse, özet modu kapalıysa ya da özet yoksa None."""
+        if detail == "full" or self.CONTEXT_MODE != "digest" or not self.digests:
+            return None
+        return self.digests.text(key)
+
+    def _pack_courses(self, docs, metadatas, distances, filters, target_year, target_semester, n_results,
+                      detail=None, fields=None):
+        """
+        Ders bazlı koleksiyon: her aday tam ders dokümanıdır (özet modunda yerine dersin özeti).
+        `fields` verilirse (ve depo varsa) doküman hiç çekilmez; istenen alanlar depodan okunur.
+        """
+        filtered_contexts = []
+        seen = set()
+
+        for doc, meta, dist in zip(docs, metadatas, distances):
+            view = self._matching_view(meta, dist, filters, target_year, target_semester)
+            if view is None or self._course_key(meta) in seen:
+                continue
+            seen.add(self._course_key(meta))
+            meta = view
+
+            # --- Formatlama ---
+            compact = self._projected_from_store(meta, fields) if fields and self.store is not None else None
+            compact = compact or self._digest_text(meta.get("content_hash"), detail)
+            if compact:
+                filtered_contexts.append(self._course_header(meta) + compact)
+                if len(filtered_contexts) >= n_results:
+                    break
+                continue
 
-                # B) DÖNEM KONTROLÜ
-                if target_semester and target_semester != "None":
-                    if target_semester not in meta.get("semester", ""):
-                        continue
+            if doc is None:
+                continue
+            max_chars = self.TAIL_DOC_CHARS
+            if len(filtered_contexts) < self.HEAD_DOCS: max_chars = self.HEAD_DOC_CHARS
+            clean_doc = doc[:max_chars] + "..." if len(doc) > max_chars else doc
+
+            filtered_contexts.append(self._course_header(meta) + f"CONTENT: {clean_doc}")
+
+            if len(filtered_contexts) >= n_results:
+                break
+
+        return filtered_contexts
+
+    def _pack_sections(self, docs, metadatas, distances, filters, target_year, target_semester, n_results,
+                       detail=None, fields=None):
+        """
+        Bölüm koleksiyonu: eşleşen parçalar `parent_id` ile derslere gruplanır.
+        Dersler en iyi parçalarının sırasıyla gelir; her ders altında sadece eşleşen bölümler yer alır.
+        Özet modunda özetin kapsadığı bölümler (DIGEST_SECTIONS) yerine dersin özeti yazılır; projeksiyonda
+        (`fields`) sorgu zaten sadece istenen bölümlerden geldiği için özet eklenmez.
+        """
+        groups = {}  # parent_id -> {"meta":..., "sections": [(section, text)]}; dict sırası = en iyi eşleşme sırası
+        seen = set()
+
+        for doc, meta, dist in zip(docs, metadatas, distances):
+            view = self._matching_view(meta, dist, filters, target_year, target_semester)
+            if view is None:
+                continue
 
-                # C) BENZERLİK EŞİĞİ
-                if (not target_year or target_year == "None") and (
-                        not target_semester or target_semester == "None") and dist > 1.6:
+            parent_id = meta.get("parent_id")
+            if parent_id not in groups:
+                # n_results ders dolduysa yeni ders açma; mevcut derslerin diğer bölümleri yine eklenir
+                if len(groups) >= n_results or self._course_key(meta) in seen:
                     continue
+                seen.add(self._course_key(meta))
+                groups[parent_id] = {"meta": view, "sections": []}
+
+            groups[parent_id]["sections"].append(
+                (meta.get("section"), meta.get("part", 0), self._chunk_text(doc)))
+
+        filtered_contexts = []
+        for group in groups.values():
+            max_chars = self.TAIL_DOC_CHARS
+            if len(filtered_contexts) < self.HEAD_DOCS: max_chars = self.HEAD_DOC_CHARS
+
+            digest = None if fields else self._digest_text(group["meta"].get("content_hash"), detail)
+            body = self._section_body([c for c in group["sections"]
+                                       if not (digest and c[0] in self.DIGEST_SECTIONS)])
+            clean_body = body[:max_chars] + "..." if len(body) > max_chars else body
+            if digest:
+                clean_body = digest + ("\n" + clean_body if clean_body else "")
+
+            filtered_contexts.append(self._course_header(group["meta"]) + clean_body)
+
+        return filtered_contexts
+
+    def retrieve_context(self, query_text, n_results=15, filters=None, detail=None, fields=None):
+        """
+        Vektör araması + context paketleme. Özet modunda (CONTEXT_MODE) dersler kompakt özetleriyle gelir;
+        `detail="full"` bu sorgu için tam dokümanları kullanır. `fields` (field_projection.py) verilirse
+        sadece o alanlar aranır / getirilir: bölüm koleksiyonunda `section` koşulu, ders bazlı aramada
+        doküman yerine depodan sadece gereken sütunlar.
+        """
+        use_sections = self.section_collection is not None
+        with span("retrieve", method="context", n_results=n_results, filters=filters, detail=detail,
+                  fields=fields, chunking="section" if use_sections else "course") as retrieve_span:
+            try:
+                target_year = None
+                target_semester = None
+
+                if filters:
+                    target_year = filters.get("academic_year")
+                    if not target_year: target_year = filters.get("year")
+                    target_semester = filters.get("semester")
+
+                # --- OPTİMİZASYON: Fetch Limit ---
+                if target_year and target_year != "None" or target_semester and target_semester != "None":
+                    fetch_limit = self.FILTERED_FETCH_LIMIT
+                    progress(f"   🚀 Akıllı Mod (Eco): '{target_year}' için tarama...")
+                else:
+                    fetch_limit = n_results * self.FETCH_MULTIPLIER
+
+                collection = self.collection
+                if use_sections:
+                    collection = self.section_collection
+                    fetch_limit *= self.SECTION_FETCH_MULTIPLIER
+
+                final_filter = self._format_filters(filters)
+                query_text = self._correct_spelling(query_text)
+
+                # Embedding ve vektör sorgusu ayrı ölçülsün diye embedding'i burada hesaplıyoruz.
+                query_args = {"n_results": fetch_limit, "where": final_filter}
+                if fields and use_sections:
+                    query_args["where"] = self._and_clause(final_filter, self._section_clause(fields))
+                elif fields and self.store is not None:
+                    # Alanlar depodan okunacak: tam dokümanlar koleksiyondan hiç taşınmaz
+                    query_args["include"] = ["metadatas", "distances"]
+                if self.embedding_fn is not None:
+                    query_args["query_embeddings"] = self._embed_query(query_text)
+                else:
+                    query_args["query_texts"] = [query_text]
 
-                # --- Formatlama ---
-                max_chars = 400
-                if len(filtered_contexts) < 3: max_chars = 1000
-                clean_doc = doc[:max_chars] + "..." if len(doc) > max_chars else doc
+                with span("vector_query", fetch_limit=fetch_limit, where=query_args["where"]) as query_span:
+                    results = collection.query(**query_args)
+                    query_span.set(hit_count=len(results['ids'][0]) if results['ids'] else 0)
 
-                formatted_doc = (
-                    f"[COURSE: {meta.get('course_code')} - {meta.get('course_name')}]\n"
-                    f"INFO: Year {meta.get('year')} | {meta.get('type')} | {meta.get('ects')} ECTS\n"
-                    f"CONTENT: {clean_doc}"
-                )
-                filtered_contexts.append(formatted_doc)
+                if not results['ids'] or not results['ids'][0]:
+                    # Ön filtre (bölüm / yıl / tür) hiç kayıt bırakmadıysa Python filtresiyle aynı mesaj
+                    return "No specific records found strictly matching the filter." if final_filter else ""
 
-                if len(filtered_contexts) >= n_results:
-                    break
+                # Doküman istenmediyse (projeksiyon) Chroma 'documents' alanını None döner
+                docs = (results.get('documents') or [None])[0] or [None] * len(results['ids'][0])
+                metadatas = results['metadatas'][0]
+                distances = results['distances'][0]
 
-            if not filtered_contexts:
-                return "No specific records found strictly matching the filter."
+                with span("context_pack", candidates=len(docs)) as pack_span:
+                    pack = self._pack_sections if use_sections else self._pack_courses
+                    filtered_contexts = pack(docs, metadatas, distances, filters,
+                                             target_year, target_semester, n_results, detail, fields)
+                    pack_span.set(hit_count=len(filtered_contexts))
 
-            return "\n\n".join(filtered_contexts)
+                retrieve_span.set(hit_count=len(filtered_contexts))
+                if not filtered_contexts:
+                    return "No specific records found strictly matching the filter."
 
-        except Exception as e:
-            print(f"Arama Hatası: {e}")
-            return ""
+                return "\n\n".join(filtered_contexts)
+
+            except Exception as e:
+                record_error("retrieve", e, "Arama Hatası")
+                return ""
 
     def _clean_search_term(self, search_keyword):
         """1. ARAMA TERİMİNİ TEMİZLEME VE DÜZELTME"""
@@ -202,9 +788,6 @@ class CourseRetriever:
 
         raw = " ".join(search_keyword).lower() if isinstance(search_keyword, list) else str(search_keyword).lower()
 
-        if "securty" in raw: raw = raw.replace("securty", "security")
-        if "intelegence" in raw: raw = raw.replace("intelegence", "intelligence")
-
         for char in "?.,!/;:()": raw = raw.replace(char, "")
         # Yasaklı Kelimeler
         ignore_list = [
@@ -219,6 +802,9 @@ class CourseRetriever:
         ]
 
         words = [w for w in raw.split() if w not in ignore_list]
+        # Yazım düzeltmesi yasaklı kelimeler atıldıktan sonra (onlar zaten doğru yazılmış sayılır)
+        words = self._correct_spelling(" ".join(words)).split()
+        words = [w for w in words if w not in ignore_list]
         return " ".join(words).strip()
 
     def _check_metadata_match(self, meta, filters):
@@ -273,101 +859,143 @@ class CourseRetriever:
         else:
             return True
     def count_courses(self, filters=None, search_keyword=None, search_scope="title"):
-        try:
-            # A) Veriyi Çek (Limit Yok)
-            base_filter = self._format_filters(filters)
-            includes = ['metadatas']
-            if search_keyword and (search_scope == "content" or search_scope == "both"):
-                includes.append('documents')
-
-            result = self.collection.get(where=base_filter, include=includes, limit=None)
-            metadatas = result['metadatas']
-            documents = result['documents'] if 'documents' in result else None
-
-            # B) Terimi Temizle
-            clean_term = self._clean_search_term(search_keyword)
-            final_count = 0
-
-            # C) Döngü
-            for i, meta in enumerate(metadatas):
-                doc_content = documents[i].lower() if documents and i < len(documents) and documents[i] else ""
-
-                # 1. Filtre Kontrolü
-                if not self._check_metadata_match(meta, filters):
-                    continue
-
-                # 2. Kelime Kontrolü
-                if not self._check_keyword_match(clean_term, meta, doc_content, search_scope):
-                    continue
+        with span("retrieve", method="count", filters=filters, search_scope=search_scope) as retrieve_span:
+            try:
+                # Filtresiz sayımda (örn. sadece kelime) kontrol fonksiyonları boş sözlük bekler
+                filters = filters or {}
+
+                # A) Veriyi Çek (Limit Yok)
+                base_filter = self._format_filters(filters)
+                includes = ['metadatas']
+                if search_keyword and (search_scope == "content" or search_scope == "both"):
+                    includes.append('documents')
+
+                with span("metadata_fetch", method="count", where=base_filter) as fetch_span:
+                    result = self.collection.get(where=base_filter, include=includes, limit=None)
+                    fetch_span.set(hit_count=len(result['ids']))
+                metadatas = result['metadatas']
+                documents = result['documents'] if 'documents' in result else None
+
+                # B) Terimi Temizle
+                clean_term = self._clean_search_term(search_keyword)
+                departments = self._target_departments(filters)
+                final_count = 0
+                seen = set()
+
+                # C) Döngü
+                for i, meta in enumerate(metadatas):
+                    doc_content = documents[i].lower() if documents and i < len(documents) and documents[i] else ""
+
+                    # 1. Kelime Kontrolü
+                    if not self._check_keyword_match(clean_term, meta, doc_content, search_scope):
+                        continue
 
-                # 3. Sayma Kuralı
-                if self._check_counting_rules(meta, filters):
-                    final_count += 1
+                    # 2. Filtre Kontrolü ve Sayma Kuralı (ortak derste bölüm başına görünüm)
+                    matches = [view for view in self._membership_views(meta, departments)
+                               if self._check_metadata_match(view, filters) and self._check_counting_rules(view, filters)]
+                    if not matches:
+                        continue
 
-            return final_count
+                    # Bölüm sorulduysa müfredattaki her yerleşim sayılır (bölümler toplamı eskisiyle aynı),
+                    # sorulmadıysa ortak ders bir kez sayılır.
+                    if departments:
+                        final_count += len(matches)
+                    elif self._course_key(meta) not in seen:
+                        seen.add(self._course_key(meta))
+                        final_count += 1
 
-        except Exception as e:
-            print(f"Sayma Hatası: {e}")
-            return 0
+                retrieve_span.set(search_term=clean_term, hit_count=final_count)
+                return final_count
 
-    def get_courses_by_metadata(self, department, year=None, semester=None):
+            except Exception as e:
+                record_error("retrieve", e, "Sayma Hatası")
+                return 0
 
-        try:
-            chroma_filters = {}
+    def get_courses_by_metadata(self, department, year=None, semester=None, numeric_filters=None, curriculum=None):
 
-            # 1. Departman Filtresi (Liste Desteği ile)
-            if department:
-                if isinstance(department, list):
-                    chroma_filters["department"] = {"$in": department}
-                else:
-                    chroma_filters["department"] = department
+        with span("retrieve", method="list", department=department, year=year, semester=semester,
+                  numeric_filters=numeric_filters, curriculum=curriculum) as retrieve_span:
+            try:
+                curriculum_clause = self._curriculum_clause({"curriculum_version": curriculum})
+                # Sayısal aralık yoksa cevap önceden hesaplanmış görünümlerin birleşimidir
+                # (görünümler varsayılan müfredat sürümünden kurulur; başka sürüm sorulduysa koleksiyona gidilir)
+                if self.curriculum_views is not None and (not numeric_filters or numeric_filters == "None") \
+                        and not curriculum_clause:
+                    filtered_list = self.curriculum_views.lines(department, year, semester)
+                    retrieve_span.set(hit_count=len(filtered_list), source="views")
+                    if not filtered_list:
+                        return f"No courses found for {department} (Year: {year})."
+                    return "\n".join(filtered_list)
+
+                chroma_filters = {}
+                departments = self._target_departments({"department": department})
+
+                # 1. Departman Filtresi (Liste Desteği ile) — üyelik bayraklarıyla
+                clauses = [self._department_clause(departments)] if departments else []
+                year_clause = self._year_clause({"academic_year": year})
+                if year_clause:
+                    clauses.append(year_clause)
+
+                # Sayısal aralıklar (örn. lab_hours > 2) da veritabanında uygulanır
+                clauses += self._format_numeric_filters(numeric_filters)
+                if curriculum_clause:
+                    clauses.append(curriculum_clause)
+                if len(clauses) > 1:
+                    chroma_filters = {"$and": clauses}
+                elif clauses:
+                    chroma_filters = clauses[0]
+
+                # Veritabanından çek
+                with span("metadata_fetch", method="list", where=chroma_filters) as fetch_span:
+                    results = self.collection.get(
+                        where=chroma_filters,
+                        include=['metadatas']
+                    )
+                    fetch_span.set(hit_count=len(results['ids']))
+
+                if not results['metadatas']:
+                    return f"No courses found for criteria."
+
+                filtered_list = []
+
+                # Ortak ders, istenen bölümlerdeki her yerleşimiyle ayrı değerlendirilir
+                views = [view for meta in results['metadatas'] for view in self._membership_views(meta, departments)]
+                for meta in views:
+                    course_year = str(meta.get('year', ''))
+                    course_sem = meta.get('semester', '')
+
+                    # 2. Yıl Kontrolü (Liste Desteği ile)
+                    if year:
+                        if isinstance(year, list):
+                            # Örn: [2, 3] ise ve ders yılı bunlardan biri değilse atla
+                            # Not: 'Any' (Havuz) derslerini burada hariç tutuyoruz,
+                            # çünkü genelde müfredat listelenirken net yıl istenir.
+                            if course_year not in [str(y) for y in year]:
+                                continue
+                        else:
+                            # Tekil yıl kontrolü
+                            if course_year != str(year):
+                                continue
 
-            # Veritabanından çek
-            results = self.collection.get(
-                where=chroma_filters,
-                include=['metadatas']
-            )
+                    # 3. Dönem Kontrolü
+                    if semester and semester not in course_sem:
+                        continue
 
-            if not results['metadatas']:
-                return f"No courses found for criteria."
-
-            filtered_list = []
-
-            for meta in results['metadatas']:
-                course_year = str(meta.get('year', ''))
-                course_sem = meta.get('semester', '')
-
-                # 2. Yıl Kontrolü (Liste Desteği ile)
-                if year:
-                    if isinstance(year, list):
-                        # Örn: [2, 3] ise ve ders yılı bunlardan biri değilse atla
-                        # Not: 'Any' (Havuz) derslerini burada hariç tutuyoruz,
-                        # çünkü genelde müfredat listelenirken net yıl istenir.
-                        if course_year not in [str(y) for y in year]:
-                            continue
-                    else:
-                        # Tekil yıl kontrolü
-                        if course_year != str(year):
-                            continue
-
-                # 3. Dönem Kontrolü
-                if semester and semester not in course_sem:
-                    continue
+                    # Listeye Ekle
+                    filtered_list.append(format_course_line(
+                        meta.get('course_code'), meta.get('course_name'), meta.get('ects'), meta.get('type')
+                    ))
 
-                # Listeye Ekle
-                filtered_list.append(
-                    f"- {meta.get('course_code')} {meta.get('course_name')} "
-                    f"({meta.get('ects')} ECTS) [{meta.get('type')}]"
-                )
+                retrieve_span.set(hit_count=len(filtered_list))
 
-            # Sonuç Kontrolü
-            if not filtered_list:
-                return f"No courses found for {department} (Year: {year})."
+                # Sonuç Kontrolü
+                if not filtered_list:
+                    return f"No courses found for {department} (Year: {year})."
 
-            # Alfabetik sırala ve döndür
-            filtered_list.sort()
-            return "\n".join(filtered_list)
+                # Aynı satırları (birden çok bölümde aynı yerdeki ortak ders) birleştir, alfabetik sırala
+                filtered_list = sorted(set(filtered_list))
+                return "\n".join(filtered_list)
 
-        except Exception as e:
-            print(f"Liste Hatası: {e}")
-            return "An error occurred while fetching the course list."
\ No newline at end of file
+            except Exception as e:
+                record_error("retrieve", e, "Liste Hatası")
+                return "An error occurred while fetching the course list."
@@ -1,24 +1,234 @@
-import os
+import re
 import json
 from dotenv import load_dotenv
-from groq import Groq
+from llm_client import get_llm_client
+from llm_scheduler import PRIORITY_ROUTER
+from field_projection import fields_from_text
+from rag_tracing import span, record_error, record_llm_usage
 
 load_dotenv()
 
+# --- KURAL TABANLI YÖNLENDİRME SÖZLÜĞÜ (LLM'e ulaşılamadığında / bütçe azken) ---
+# (küçük harfli kelime kalıbı, büyük harf kısaltma kalıbı, bölüm adı) — "SE 302" gibi kodlar bölüm sayılmaz
+DEPARTMENT_KEYWORDS = [
+    (r"\bsoftware\b", r"\bSE\b(?!\s?\d)", "Software Engineering"),
+    (r"\bcomputer\b", r"\bCE\b(?!\s?\d)", "Computer Engineering"),
+    (r"\bindustrial\b", r"\bIE\b(?!\s?\d)", "Industrial Engineering"),
+    (r"\belectrical\b|\belectronics?\b", r"\bEEE\b(?!\s?\d)", "Electrical and Electronics Engineering"),
+]
+# aggregate niyeti: (kalıp, metrik) — ilk eşleşen kazanır
+AGGREGATE_METRIC_KEYWORDS = [
+    (r"\bweight(ing)?s?\b|\bpercent", "evaluation_weight"),
+    (r"\blab(oratory)? hours?\b", "lab_hours"),
+    (r"\btheory hours?\b|\blecture hours?\b", "theory_hours"),
+    (r"\bhours?\b|\bworkload\b|\bload\b", "weekly_hours"),
+    (r"\blocal credits?\b", "local_credit"),
+    (r"\bects\b|\bcredits?\b", "ects"),
+]
+AGGREGATE_FUNCTION_KEYWORDS = [
+    (r"\baverage\b|\bavg\b|\bmean\b", "avg"),
+    (r"\bmaximum\b|\bmax\b|\bhighest\b", "max"),
+    (r"\bminimum\b|\bmin\b|\blowest\b", "min"),
+]
+EVALUATION_ACTIVITIES = ["final", "midterm", "project", "quiz", "homework", "laboratory", "participation",
+                         "presentation", "seminar", "oral"]
+# Sayısal aralık ifadeleri: "more than 6 ECTS", "at least 2 lab hours", "labs over 2 hours"
+RANGE_OPERATOR_WORDS = [
+    (r"more than|greater than|over|above|exceeding", "gt"),
+    (r"at least|minimum of|min\.?|no less than", "gte"),
+    (r"less than|fewer than|under|below", "lt"),
+    (r"at most|maximum of|max\.?|no more than|up to", "lte"),
+    (r"exactly|equal to|with", "eq"),
+]
+RANGE_FIELD_WORDS = [
+    (r"local credits?", "local_credit"),
+    (r"lab(?:oratory)?s?(?: hours?)?", "lab_hours"),
+    (r"theory(?: hours?)?|lecture hours?", "theory_hours"),
+    (r"(?:weekly |contact )?hours?", "weekly_hours"),
+    (r"ects|credits?", "ects"),
+]
+_RANGE_OP = "|".join(f"(?:{pattern})" for pattern, _ in RANGE_OPERATOR_WORDS)
+_RANGE_FIELD = "|".join(f"(?:{pattern})" for pattern, _ in RANGE_FIELD_WORDS)
+# "<op> N <alan>" veya "<alan> <op> N [hours]"
+RANGE_PATTERN = re.compile(
+    rf"\b(?P<op>{_RANGE_OP})\s+(?P<value>\d+(?:\.\d+)?)\s*(?P<field>{_RANGE_FIELD})\b"
+    rf"|\b(?P<field2>{_RANGE_FIELD})\s+(?P<op2>{_RANGE_OP})\s+(?P<value2>\d+(?:\.\d+)?)(?:\s*hours?)?\b"
+)
+YEAR_KEYWORDS = [
+    (r"\b(1st|first|freshman)\b", "1"),
+    (r"\b(2nd|second|sophomore)\b", "2"),
+    (r"\b(3rd|third|junior)\b", "3"),
+    (r"\b(4th|fourth|senior)\b|\bfinal year\b", "4"),
+]
+# Müfredat sürümü ifadeleri -> sürüm adı (scraper'daki sayfa kimliği 'curr_<sürüm>' ile aynı)
+CURRICULUM_PATTERNS = [
+    (re.compile(r"\b(?:before|pre|prior to)[ -]?(20\d\d)\b(?:\s+curricul\w*)?"), "before_{}"),
+    (re.compile(r"\b(20\d\d)(?:\s*-\s*20?\d\d)?\s+curricul\w*"), "{}"),
+    (re.compile(r"\bcurricul\w*\s+(?:of|from|since|after)\s+(20\d\d)\b"), "{}"),
+]
+COURSE_PREFIXES = {"SE", "CE", "IE", "EEE", "MATH", "PHYS", "ENG", "FENG", "IUE", "MCE", "ELEC", "POOL"}
+COURSE_CODE_PATTERN = re.compile(r"\b([A-Za-z]{2,5})\s?(\d{3,4})\b")
+# Arama anahtar kelimesi sayılmayacak soru/filtre kelimeleri
+ROUTE_STOPWORDS = {
+    "how", "many", "much", "what", "which", "is", "are", "there", "the", "a", "an", "of", "in", "on", "for",
+    "to", "and", "or", "with", "does", "do", "can", "i", "me", "my", "must", "take", "have", "has", "any",
+    "offer", "offers", "offered", "course", "courses", "lesson", "lessons", "list", "show", "give", "compare",
+    "difference", "between", "vs", "versus", "count", "number", "total", "student", "students", "year", "years",
+    "semester", "term", "fall", "autumn", "spring", "mandatory", "elective", "electives", "compulsory",
+    "required", "software", "computer", "industrial", "electrical", "electronics", "engineering", "department",
+    "1st", "2nd", "3rd", "4th", "first", "second", "third", "fourth", "freshman", "sophomore", "junior",
+    "senior", "final", "title", "titled", "name", "named", "topic", "topics", "cover", "covers", "covering",
+    "content", "contents", "teach", "teaches", "about", "curriculum", "se", "ce", "ie", "eee",
+}
+
 
 class QueryRouter:
-    def __init__(self):
-        self.api_key = os.getenv("GROQ_API_KEY")
-        if not self.api_key:
-            raise ValueError("Groq API Key bulunamadı!")
+    # Kalan gecikme bütçesi bunun altındaysa LLM'e gitmeden kural tabanlı yönlendirme yapılır
+    MIN_LLM_BUDGET_S = 1.0
 
-        self.client = Groq(api_key=self.api_key)
+    def __init__(self, client=None):
+        # Paylaşılan (havuzlu, yeniden denemeli) Groq istemcisi
+        self.client = client or get_llm_client()
         # HIZLI VE KESİN MODEL (70b yerine 8b-instant kullanıyoruz)
         self.model_name = "llama-3.1-8b-instant"
 
-    def route_query(self, user_query):
+    @staticmethod
+    def extract_numeric_filters(text):
+        """
+        Küçük harfli sorudan aralık koşullarını çıkarır.
+        Döner: ([{"field", "op", "value"}], koşul ifadeleri silinmiş metin)
+        """
+        conditions = []
+
+        def lookup(table, phrase):
+            return next(name for pattern, name in table if re.fullmatch(pattern, phrase))
+
+        def collect(match):
+            op = match.group("op") or match.group("op2")
+            field = match.group("field") or match.group("field2")
+            value = float(match.group("value") or match.group("value2"))
+            conditions.append({"field": lookup(RANGE_FIELD_WORDS, field),
+                               "op": lookup(RANGE_OPERATOR_WORDS, op),
+                               "value": int(value) if value.is_integer() else value})
+            return " "
+
+        return conditions, RANGE_PATTERN.sub(collect, text)
+
+    @staticmethod
+    def extract_curriculum_version(text):
+        """'courses in the 2025 curriculum' -> ('2025', metin); sürüm geçmiyorsa ('None', metin)."""
+        for pattern, version in CURRICULUM_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                return version.format(match.group(1)), text[:match.start()] + " " + text[match.end():]
+        return "None", text
+
+    def rule_based_route(self, user_query):
+        """
+        LLM olmadan, anahtar kelime kurallarıyla Router JSON'unun aynısını üretir.
+        Daha kaba ama milisaniyeler sürer; hata ve düşük bütçe durumunda kullanılır.
+        """
+        # Aralık koşulları ("more than 6 ECTS") önce ayrılır: ECTS/saat kelimeleri toplama niyeti
+        # ya da arama kelimesi sanılmasın
+        numeric_filters, text = self.extract_numeric_filters(user_query.lower())
+        # Sürüm ifadesi ("2025 curriculum") arama kelimelerinden ayrılır: yıl sayısı anahtar kelime sanılmasın
+        curriculum_version, keyword_text = self.extract_curriculum_version(text)
+
+        metric = next((m for pattern, m in AGGREGATE_METRIC_KEYWORDS if re.search(pattern, text)), None)
+        is_aggregate = metric and re.search(
+            r"\btotal\b|\bsum\b|\baverage\b|\bavg\b|\bmean\b|\bhow many\b|\bhow much\b"
+            r"|\bmaximum\b|\bminimum\b|\bhighest\b|\blowest\b", text)
+
+        if re.search(r"\bpre-?req|\bprerequisite|\bbefore (taking|i take|i can take)|\btake before\b"
+                     r"|\brequire[sd]? .*\b(for|to take)\b|\bunlock|\bdepends? on\b|\bearliest\b"
+                     r"|\bwhen can i take\b", text) and COURSE_CODE_PATTERN.search(user_query):
+            intent = "prerequisite"
+        elif is_aggregate:
+            intent = "aggregate"
+        elif "how many" in text or "count" in text or "number of" in text:
+            intent = "count"
+        elif re.search(r"\bcompare\b|\bdifference\b|\bvs\.?\b|\bversus\b|which has more", text):
+            intent = "compare"
+        elif re.search(r"\blist\b|\bshow\b|\bcurriculum\b|what are the courses", text):
+            intent = "list_curriculum"
+        else:
+            intent = "search"
+
+        codes = []
+        for prefix, number in COURSE_CODE_PATTERN.findall(user_query):
+            if prefix.isupper() or prefix.upper() in COURSE_PREFIXES:
+                code = f"{prefix.upper()} {number}"
+                if code not in codes:
+                    codes.append(code)
+
+        departments = [name for words, abbreviation, name in DEPARTMENT_KEYWORDS
+                       if re.search(words, text) or re.search(abbreviation, user_query)]
+        years = [year for pattern, year in YEAR_KEYWORDS if re.search(pattern, text)]
+
+        semester = "None"
+        if "fall" in text or "autumn" in text:
+            semester = "Fall"
+        elif "spring" in text:
+            semester = "Spring"
+
+        course_type = "None"
+        if "elective" in text:
+            course_type = "Elective"
+        elif "mandatory" in text or "compulsory" in text or "required" in text:
+            course_type = "Mandatory"
+
+        search_scope = "both"
+        if re.search(r"\btitle\b|\bnamed?\b", text):
+            search_scope = "title"
+        elif re.search(r"\btopics?\b|\bcover|\bcontent\b|\bteach", text):
+            search_scope = "content"
+
+        keywords = [w for w in re.findall(r"[a-z0-9+#]+", COURSE_CODE_PATTERN.sub(" ", keyword_text))
+                    if w not in ROUTE_STOPWORDS]
+        if keywords:
+            search_queries = [" ".join(keywords)]
+        else:
+            search_queries = [] if codes or numeric_filters or intent in ("count", "list_curriculum") \
+                else [user_query]
+
+        def one_or_list(values):
+            if not values:
+                return "None"
+            return values[0] if len(values) == 1 else values
+
+        aggregate_fields = {}
+        if intent == "aggregate":
+            group_by = "None"
+            match = re.search(r"\b(?:per|by|for each|each)\s+(department|year|semester|term|type)\b", text)
+            if match:
+                group_by = match.group(1)
+            aggregate_fields = {
+                "aggregate_metric": metric,
+                "aggregate_function": next(
+                    (f for pattern, f in AGGREGATE_FUNCTION_KEYWORDS if re.search(pattern, text)), "sum"),
+                "group_by": group_by,
+                "evaluation_activity": next((a for a in EVALUATION_ACTIVITIES if a in text), "None"),
+            }
+
+        return {
+            **aggregate_fields,
+            "intent": intent,
+            "target_department": one_or_list(departments),
+            "course_type": course_type,
+            "specific_course_code": one_or_list(codes),
+            "academic_year": one_or_list(years),
+            "semester": semester,
+            "search_queries": search_queries,
+            "search_scope": search_scope,
+            "numeric_filters": numeric_filters or "None",
+            "curriculum_version": curriculum_version,
+            "fields": list(fields_from_text(text) or []) or "None"
+        }
+
+    def route_query(self, user_query, deadline=None):
         """
         Kullanıcı sorusunu analiz eder ve JSON formatında filtreleri döner.
+        `deadline` verilirse ve kalan bütçe azsa LLM yerine kural tabanlı yönlendirme yapılır.
         """
 
         system_prompt = """
@@ -31,8 +241,20 @@ class QueryRouter:
            - Do NOT set "search" for these queries.
             "count": Questions asking for the PHYSICAL QUANTITY of items (e.g., "How many courses...", 
             "Count the number of...").
-           - EXCEPTION: If user asks for "Total ECTS", "Sum of credits", "Total load", set intent to "search". 
-           (Because this requires math/reading, not just counting rows).
+           - EXCEPTION: If user asks for "Total ECTS", "Sum of credits", "Total load", "Average hours",
+           set intent to "aggregate" (see below), NOT "count" and NOT "search".
+        1b. **AGGREGATE INTENT:**
+           - IF the user asks for a SUM / AVERAGE / MIN / MAX of ECTS, local credits, weekly hours, or
+             evaluation weights (e.g. "Total ECTS of 1st year SE", "Average final exam weight in CE",
+             "Total lab hours per semester").
+           - Set "intent": "aggregate" and fill "aggregate_metric", "aggregate_function", "group_by"
+             ("per department / by year / each semester") and "evaluation_activity" (only for weights,
+             e.g. "Final Exam", "Midterm", "Project").
+        1c. **PREREQUISITE INTENT:**
+           - IF the user asks what must be taken before a course, what a course is a prerequisite for,
+             or when a course can be taken at the earliest (e.g. "What must I take before SE 302?",
+             "Prerequisites of CE 221", "Which courses require SE 115?", "Earliest semester for FENG 498").
+           - Set "intent": "prerequisite" and put the course code(s) into "specific_course_code".
         2. **LIST INTENT:** - IF the user asks "List...", "What are the courses...", "Show curriculum...", "List all...".
            - Set "intent": "list_curriculum".
 
@@ -43,8 +265,7 @@ class QueryRouter:
         4. **SEARCH INTENT:**
            - Specific topic searches (e.g., "Content of SE 302", "Does it have AI course?").
            - Set "intent": "search".
-            "search": Queries asking for specific details, rules, OR CALCULATIONS
-             (e.g., "Calculate total ECTS", "Sum of credits", "Content of SE 302").
+            "search": Queries asking for specific details or rules (e.g., "Content of SE 302").
         
         DOMAIN KNOWLEDGE:
         - 'SE', 'Software' -> Software Engineering
@@ -64,12 +285,27 @@ class QueryRouter:
              "academic_year": ["2", "3"]
            -If the question specifically uses terms like title, course, code, year, or topic, add them 
               to the search_quaries section so that it searches among the required attributes
-        2. **SEARCH SCOPE (NEW):** - If user asks for course NAMES/TITLES (e.g. "Security courses") -> "search_scope": "title"
+        2. **NUMERIC RANGES:**
+           - For conditions on ECTS, local credits or hours (e.g. "more than 6 ECTS", "labs over 2 hours",
+             "at most 3 theory hours"), output "numeric_filters" as a LIST of
+             {"field": "ects" | "local_credit" | "theory_hours" | "lab_hours" | "weekly_hours",
+              "op": "gt" | "gte" | "lt" | "lte" | "eq", "value": number}.
+           - Do NOT put these conditions into search_queries. If there are none, output "None".
+        3. **CURRICULUM VERSION:**
+           - Only if the user explicitly names a curriculum version (e.g. "2025 curriculum", "before 2025"),
+             output "curriculum_version": "2025" or "before_2025". Otherwise output "None".
+        4. **SEARCH SCOPE (NEW):** - If user asks for course NAMES/TITLES (e.g. "Security courses") -> "search_scope": "title"
            - If user asks for TOPICS/CONTENT (e.g. "courses covering Java") -> "search_scope": "content"
            - If unsure -> "search_scope": "both"     
+        5. **FIELDS (OPTIONAL):**
+           - If the question needs only some parts of a course, output "fields" as a LIST of
+             "overview" (ECTS, credits, hours, prerequisites, description) | "objectives" | "weekly_topics"
+             | "learning_outcomes" | "evaluation" (grading, exams, weights).
+             e.g. "How is SE 302 graded?" -> ["evaluation"], "What topics does CE 466 cover?" -> ["weekly_topics"].
+           - If the whole course is relevant or unsure, output "None".
         OUTPUT JSON SCHEMA:
         {
-          "intent": "count" | "search" | "compare" | "list_curriculum",
+          "intent": "count" | "aggregate" | "prerequisite" | "search" | "compare" | "list_curriculum",
           "target_department": "Software Engineering" | "Computer Engineering" 
           | "Industrial Engineering" | "Electrical and Electronics Engineering" | "None",
           "course_type": "Mandatory" | "Elective" | "None",
@@ -77,33 +313,44 @@ class QueryRouter:
           "academic_year": "1" | "2" | "3" | "4" | "None",
           "semester": "Fall" | "Spring" | "None",
           "search_queries": ["keywords"],
-          "search_scope": "title" | "content" | "both"
+          "search_scope": "title" | "content" | "both",
+          "numeric_filters": [{"field": "ects", "op": "gt", "value": 6}] | "None",
+          "curriculum_version": "2025" | "before_2025" | "None",
+          "fields": ["evaluation"] | "None",
+          "aggregate_metric": "ects" | "local_credit" | "theory_hours" | "lab_hours" | "weekly_hours"
+          | "evaluation_weight" | "None",
+          "aggregate_function": "sum" | "avg" | "min" | "max" | "None",
+          "group_by": "department" | "year" | "semester" | "type" | "None",
+          "evaluation_activity": "String" | "None"
         }
         """
 
-        try:
-            response = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_query}
-                ],
-                model=self.model_name,
-                temperature=0.0,
-                response_format={"type": "json_object"}
-            )
-            return json.loads(response.choices[0].message.content)
-
-        except Exception as e:
-            print(f"Router Hatası: {e}")
-            # Fallback: Eğer hata olursa ve 'how many' varsa count yap
-            intent = "search"
-            if "how many" in user_query.lower() or "count" in user_query.lower():
-                intent = "count"
-
-            return {
-                "intent": intent,
-                "target_department": "None",
-                "course_type": "None",
-                "search_queries": [user_query],
-                "search_scope": "both"
-            }
\ No newline at end of file
+        with span("route", model=self.model_name) as route_span:
+            if deadline is not None and deadline.remaining() < self.MIN_LLM_BUDGET_S:
+                result = self.rule_based_route(user_query)
+                route_span.set(intent=result.get("intent"), fallback="budget")
+                return result
+
+            try:
+                response = self.client.chat(
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_query}
+                    ],
+                    model=self.model_name,
+                    deadline=deadline,
+                    priority=PRIORITY_ROUTER,
+                    temperature=0.0,
+                    response_format={"type": "json_object"}
+                )
+                record_llm_usage("router", response, route_span)
+                result = json.loads(response.choices[0].message.content)
+                route_span.set(intent=result.get("intent"), fallback=None)
+                return result
+
+            except Exception as e:
+                record_error("route", e, "Router Hatası")
+                # Fallback: LLM'e ulaşılamazsa kural tabanlı yönlendirme
+                result = self.rule_based_route(user_query)
+                route_span.set(intent=result.get("intent"), fallback="rules")
+                return result
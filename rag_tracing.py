@@ -0,0 +1,315 @@
+"""
+Router -> Retriever -> Generator hattı için hafif izleme (tracing) ve metrik katmanı.
+
+- `start_trace()` bir istek (soru) için iz başlatır; `span()` ile açılan her aşama
+  bu ize süre, durum ve özniteliklerle (intent, filtre, hit sayısı, token ...) eklenir.
+- Her span kapanışında süresi ve hata durumu `METRICS` kaydına da işlenir;
+  `METRICS.to_prometheus()` Prometheus metin formatında çıktı verir.
+- `progress()` isteğin ilerleme mesajlarını yazar; `start_trace(quiet=True)` ile başlatılan izde
+  (toplu mod) sadece o isteğin mesajları susar, sys.stdout ve diğer thread'ler etkilenmez.
+"""
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("rag")
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_trace = contextvars.ContextVar("rag_current_trace", default=None)
+_current_span = contextvars.ContextVar("rag_current_span", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + list(extra or [])
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                    for k, v in items)
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """Sayaç (counter), anlık değer (gauge) ve histogram tutan, thread-safe küçük kayıt."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._hist_counts = {}
+        self._hist_sums = defaultdict(float)
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, labels=None, value=1.0):
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += value
+
+    def set_gauge(self, name, value, labels=None):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, labels=None):
+        key = (name, _label_key(labels))
+        with self._lock:
+            counts = self._hist_counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._hist_sums[key] += value
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._hist_counts.clear()
+            self._hist_sums.clear()
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            groups = defaultdict(list)
+            for (name, key), value in self._counters.items():
+                groups[(name, "counter")].append((key, value))
+            for (name, key), value in self._gauges.items():
+                groups[(name, "gauge")].append((key, value))
+            for (name, key), counts in self._hist_counts.items():
+                groups[(name, "histogram")].append((key, (list(counts), self._hist_sums[(name, key)])))
+
+        for (name, kind), series in sorted(groups.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(series, key=lambda s: s[0]):
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+                    continue
+                counts, total = value
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {counts[-1]}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{name}_count{_format_labels(key)} {counts[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("rag_stage_duration_seconds", "Duration of pipeline stages (route, embed, vector_query, ...).")
+METRICS.describe("rag_stage_errors_total", "Exceptions raised inside pipeline stages.")
+METRICS.describe("rag_requests_total", "Answered requests by intent.")
+METRICS.describe("rag_request_duration_seconds", "End-to-end request latency.")
+METRICS.describe("rag_llm_tokens_total", "LLM tokens by component and kind (prompt/completion).")
+METRICS.describe("rag_retrieval_hits_total", "Documents returned by the store per stage.")
+METRICS.describe("rag_cache_events_total", "Cache lookups by cache name and result (hit/miss).")
+
+
+class Span:
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.error = None
+        self.start = time.perf_counter()
+        self.end = None
+
+    @property
+    def duration_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000.0
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def record_error(self, exc):
+        self.status = "error"
+        self.error = f"{type(exc).__name__}: {exc}"
+
+
+class Trace:
+    """Tek bir isteğin (sorunun) tüm span'lerini tutar."""
+
+    def __init__(self, request_id=None, quiet=False, **attributes):
+        self.request_id = request_id or uuid.uuid4().hex[:12]
+        # quiet: isteğin ilerleme mesajları (progress) yazılmaz (toplu mod); diğer thread'ler etkilenmez
+        self.quiet = quiet
+        self.attributes = dict(attributes)
+        self.spans = []
+        self.start = time.perf_counter()
+        self.end = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+        return self
+
+    @property
+    def total_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000.0
+
+    def stage_totals(self):
+        """Aynı isimli span'lerin toplam süresi (ms): {'route': 412.3, 'embed': 8.1, ...}"""
+        totals = defaultdict(float)
+        for s in self.spans:
+            totals[s.name] += s.duration_ms
+        return dict(totals)
+
+    def to_dict(self):
+        return {
+            "request_id": self.request_id,
+            "total_ms": round(self.total_ms, 2),
+            "attributes": self.attributes,
+            "spans": [
+                {
+                    "name": s.name,
+                    "parent": s.parent,
+                    "offset_ms": round((s.start - self.start) * 1000.0, 2),
+                    "duration_ms": round(s.duration_ms, 2),
+                    "status": s.status,
+                    "error": s.error,
+                    "attributes": s.attributes,
+                }
+                for s in self.spans
+            ],
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def current_span():
+    return _current_span.get()
+
+
+def start_trace(request_id=None, quiet=False, **attributes):
+    """Yeni bir iz başlatır ve bu thread/context için 'aktif' iz yapar."""
+    trace = Trace(request_id, quiet=quiet, **attributes)
+    _current_trace.set(trace)
+    return trace
+
+
+def progress(*args, **kwargs):
+    """İsteğe ait ilerleme mesajı (print ile aynı imza); aktif iz sessiz başlatıldıysa yazılmaz."""
+    trace = _current_trace.get()
+    if trace is not None and trace.quiet:
+        return
+    print(*args, **kwargs)
+
+
+def finish_trace(trace=None):
+    trace = trace or _current_trace.get()
+    if trace is None:
+        return None
+    trace.finish()
+    intent = trace.attributes.get("intent", "unknown")
+    METRICS.inc("rag_requests_total", {"intent": intent})
+    METRICS.observe("rag_request_duration_seconds", trace.total_ms / 1000.0, {"intent": intent})
+    _current_trace.set(None)
+    return trace
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Bir aşamayı ölçer. Aktif iz yoksa yalnızca metrikler güncellenir.
+    İçeride fırlayan hata span'e işlenir ve yeniden fırlatılır.
+    """
+    parent = _current_span.get()
+    s = Span(name, parent.name if parent else None, attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except Exception as e:
+        s.record_error(e)
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _current_span.reset(token)
+
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(s)
+
+        METRICS.observe("rag_stage_duration_seconds", s.duration_ms / 1000.0, {"stage": name})
+        if s.status == "error":
+            METRICS.inc("rag_stage_errors_total", {"stage": name})
+
+
+def record_error(stage, exc, message):
+    """Yutulan hatalar için ortak kayıt: log + aktif span + hata sayacı."""
+    s = _current_span.get()
+    if s is None:
+        METRICS.inc("rag_stage_errors_total", {"stage": stage})
+    elif s.status != "error":
+        # Sayaç span kapanırken artırılır
+        s.record_error(exc)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes.setdefault("errors", []).append(f"{stage}: {type(exc).__name__}: {exc}")
+    logger.warning("%s: %s", message, exc)
+
+
+def record_llm_usage(component, response, s=None):
+    """Groq cevabındaki token kullanımını span'e ve sayaçlara işler."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    if s is not None:
+        s.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    METRICS.inc("rag_llm_tokens_total", {"component": component, "kind": "prompt"}, prompt_tokens)
+    METRICS.inc("rag_llm_tokens_total", {"component": component, "kind": "completion"}, completion_tokens)
+
+
+def record_cache(cache_name, hit):
+    """Önbellek kullanan bileşenler için: aktif span'e ve sayaçlara hit/miss işler."""
+    s = _current_span.get()
+    if s is not None:
+        key = "cache_hits" if hit else "cache_misses"
+        s.attributes[key] = s.attributes.get(key, 0) + 1
+    METRICS.inc("rag_cache_events_total", {"cache": cache_name, "result": "hit" if hit else "miss"})
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """/metrics ucunu ayrı bir thread'de yayınlar (Prometheus scrape için)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = METRICS.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
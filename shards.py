@@ -0,0 +1,329 @@
+"""
+Fakülte ve müfredat sürümü başına parçalı (sharded) koleksiyonlar.
+
+Scraper her dersi `faculty` (bölüm sayfasının alan adındaki fakülte: 'se.cs.ieu.edu.tr' -> 'cs') ve
+`curriculum` (sayfanın sürüm kimliği: 'curr_before_2025' -> 'before_2025') ile işaretler. Tek bir dev
+koleksiyon yerine her (fakülte, sürüm) ikilisi kendi ders + bölüm koleksiyonuna yüklenir:
+
+- Parça listesi veri dosyasının yanındaki manifestte durur (`<veri>.shards.json`): bölümler,
+  koleksiyon adları, içerik özeti ve fakültenin varsayılan (güncel) sürümü olup olmadığı,
+- Her parça tek başına yeniden kurulabilir (`python vector_create.py --shard cs/2025`); içeriği
+  değişmeyen parçalar atlanır,
+- ShardedCollection, Chroma Collection API'siyle (get / query / count) parçaların önünde durur:
+  `where` içindeki bölüm bayraklarından (dept_*) ve `curriculum` koşulundan sadece ilgili parçaları
+  seçer, sorguyu onlara eşzamanlı gönderir ve sonuçları uzaklığa göre birleştirir.
+  Sürüm belirtilmeyen sorgular sadece varsayılan sürüm parçalarına gider (sürümler karışmaz).
+
+    manifest = load_shard_manifest()
+    collection = open_sharded_collection(manifest, lambda name: client.get_collection(name, ef))
+    collection.query(query_embeddings=q, n_results=10, where={"dept_software_engineering": True})
+"""
+import contextvars
+import hashlib
+import heapq
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from rag_tracing import span
+from vector_create import (COLLECTION_NAME, DEFAULT_CURRICULUM, DEPARTMENT_FLAG_PREFIX, JSON_FILE,
+                           SECTION_COLLECTION_NAME, content_hash, course_shard, department_flag)
+
+SHARDS_VERSION = 1
+# Fan-out için en fazla bu kadar parça aynı anda sorgulanır
+MAX_WORKERS = 8
+
+
+def shards_path_for(json_file):
+    return os.path.splitext(json_file)[0] + ".shards.json"
+
+
+def shard_slug(value):
+    """'before_2025' -> 'before_2025', 'CS Faculty' -> 'cs_faculty' (koleksiyon adında güvenli)."""
+    return re.sub(r"[^a-z0-9]+", "_", str(value).lower()).strip("_") or "default"
+
+
+def shard_label(key):
+    """('cs', 'before_2025') -> 'cs/before_2025' (CLI ve loglarda parça adı)."""
+    return "/".join(key)
+
+
+def shard_collection_name(base, key):
+    """Parçanın koleksiyon adı: 'engineering_courses-cs-before_2025'."""
+    return "-".join([base] + [shard_slug(part) for part in key])
+
+
+def group_by_shard(course_data):
+    """{(fakülte, sürüm): [ders, ...]} (ilk görülme sırasıyla)."""
+    groups = {}
+    for course in course_data:
+        groups.setdefault(course_shard(course), []).append(course)
+    return groups
+
+
+def default_curricula(keys):
+    """Fakülte başına varsayılan sürüm: DEFAULT_CURRICULUM varsa o, yoksa fakültenin ilk görülen sürümü."""
+    defaults = {}
+    for faculty, curriculum in keys:
+        defaults.setdefault(faculty, curriculum)
+        if curriculum == DEFAULT_CURRICULUM:
+            defaults[faculty] = curriculum
+    return defaults
+
+
+def default_shard_courses(course_data):
+    """
+    Sadece varsayılan sürüm parçalarındaki dersler. Bölüm bazlı türetilmiş çıktılar (müfredat listeleri,
+    ön koşul grafiği, yazım sözlüğü, analitik) sürümler karışmasın diye bunlardan kurulur.
+    """
+    course_data = list(course_data)
+    defaults = default_curricula(group_by_shard(course_data))
+    return [course for course in course_data if defaults[course_shard(course)[0]] == course_shard(course)[1]]
+
+
+def shard_digest(courses):
+    """Parçanın içerik özeti: ders içerikleri + yerleşimleri (değişmediyse parça yeniden yüklenmez)."""
+    digest = hashlib.sha1()
+    for course in courses:
+        digest.update(content_hash(course).encode("ascii"))
+        digest.update(f"|{course.get('department')}|{course.get('semester')}|{course.get('type')}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_shard_manifest(course_data):
+    """Ders listesinden manifest sözlüğü (kaydetmez; bkz. save_shard_manifest)."""
+    groups = group_by_shard(course_data)
+    defaults = default_curricula(groups)
+    shards = []
+    for key, courses in groups.items():
+        shards.append({
+            "faculty": key[0],
+            "curriculum": key[1],
+            "default": defaults[key[0]] == key[1],
+            "departments": sorted({str(c.get('department', '')) for c in courses}),
+            "courses": len(courses),
+            "digest": shard_digest(courses),
+            "collection": shard_collection_name(COLLECTION_NAME, key),
+            "section_collection": shard_collection_name(SECTION_COLLECTION_NAME, key),
+        })
+    return {"version": SHARDS_VERSION, "shards": shards}
+
+
+def save_shard_manifest(manifest, json_file=JSON_FILE):
+    path = shards_path_for(json_file)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_shard_manifest(json_file=JSON_FILE):
+    """Kayıtlı manifest; yoksa veya sürümü uyumsuzsa None (tek koleksiyon düzeni kullanılır)."""
+    path = shards_path_for(json_file)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Parça manifesti okunamadı, tek koleksiyon kullanılacak: {e}")
+        return None
+    return manifest if manifest.get("version") == SHARDS_VERSION else None
+
+
+def carry_over_digests(manifest, previous, rebuilt):
+    """
+    Bu çalıştırmada yüklenmeyen parçalar önceki özetini korur (koleksiyonları hâlâ eski içerikte);
+    böylece sonraki çalıştırma onları değişmiş görüp yükler. `rebuilt`: yüklenen koleksiyon adları.
+    """
+    old = {s["collection"]: s.get("digest") for s in (previous or {}).get("shards", [])}
+    for shard in manifest["shards"]:
+        if shard["collection"] not in rebuilt:
+            shard["digest"] = old.get(shard["collection"])
+    return manifest
+
+
+def select_shards(manifest, labels):
+    """'cs/2025' biçimindeki etiketlere uyan parçalar; bilinmeyen etiket ValueError."""
+    by_label = {shard_label((s["faculty"], s["curriculum"])): s for s in manifest["shards"]}
+    missing = [label for label in labels if label not in by_label]
+    if missing:
+        raise ValueError(f"Bilinmeyen parça: {', '.join(missing)} (mevcut: {', '.join(by_label)})")
+    return [by_label[label] for label in labels]
+
+
+# --- WHERE'DEN PARÇA SEÇİMİ ---
+
+def _constraint(where, leaf):
+    """
+    `where` ağacından bir alanın izin verilen değer kümesi; kısıt yoksa None.
+    `leaf(anahtar, koşul)` yaprak koşul için küme ya da None döner. $and kesişim, $or birleşim alır
+    ($or'un bir dalı kısıtsızsa tamamı kısıtsızdır).
+    """
+    if not isinstance(where, dict):
+        return None
+    allowed = None
+    for key, cond in where.items():
+        if key == "$and":
+            parts = [_constraint(c, leaf) for c in cond]
+        elif key == "$or":
+            branches = [_constraint(c, leaf) for c in cond]
+            parts = [set().union(*branches)] if branches and all(b is not None for b in branches) else []
+        else:
+            parts = [leaf(key, cond)]
+        for part in parts:
+            if part is not None:
+                allowed = part if allowed is None else allowed & part
+    return allowed
+
+
+def _department_leaf(key, cond):
+    return {key} if key.startswith(DEPARTMENT_FLAG_PREFIX) and cond is True else None
+
+
+def _curriculum_leaf(key, cond):
+    if key != "curriculum":
+        return None
+    if isinstance(cond, dict):
+        if "$eq" in cond:
+            return {cond["$eq"]}
+        if "$in" in cond:
+            return set(cond["$in"])
+        return None
+    return {cond}
+
+
+class ShardedCollection:
+    """Parça koleksiyonlarını tek bir Chroma Collection gibi gösterir (salt okunur: get / query / count)."""
+
+    def __init__(self, shards, collections, max_workers=MAX_WORKERS):
+        # shards: manifest girdileri; collections: aynı sırayla açılmış koleksiyonlar
+        self.shards = list(shards)
+        self.collections = list(collections)
+        self.name = "+".join(getattr(c, "name", "?") for c in self.collections)
+        self.embedding_function = next(
+            (c.embedding_function for c in self.collections if getattr(c, "embedding_function", None)), None)
+        self._flags = [{department_flag(d) for d in s["departments"]} for s in self.shards]
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.collections))),
+                                            thread_name_prefix="shard")
+
+    def __len__(self):
+        return len(self.collections)
+
+    def select(self, where=None):
+        """`where`'in gerektirdiği parçalar: bölüm bayrağı kesişimi + sürüm (verilmediyse varsayılan sürüm)."""
+        departments = _constraint(where, _department_leaf)
+        curricula = _constraint(where, _curriculum_leaf)
+        selected = []
+        for shard, flags, collection in zip(self.shards, self._flags, self.collections):
+            if curricula is None and not shard["default"]:
+                continue
+            if curricula is not None and shard["curriculum"] not in curricula:
+                continue
+            if departments is not None and not departments & flags:
+                continue
+            selected.append((shard, collection))
+        return selected
+
+    def _fan_out(self, targets, call):
+        """Seçilen parçalara eşzamanlı çağrı; tek parçada thread'e gerek yok. Sonuçlar parça sırasıyla."""
+        if len(targets) <= 1:
+            return [call(collection) for _, collection in targets]
+        # Trace bağlamı (rag_tracing) işçi thread'lerine de taşınsın
+        futures = [self._executor.submit(contextvars.copy_context().run, call, collection)
+                   for _, collection in targets]
+        return [future.result() for future in futures]
+
+    def count(self):
+        """Müfredat filtresiz get() / query() ile aynı kapsam: yalnızca varsayılan sürüm parçaları sayılır."""
+        return sum(collection.count() for _, collection in self.select(None))
+
+    def get(self, ids=None, where=None, include=None, limit=None, offset=None):
+        include = include or ["documents", "metadatas"]
+        # id ile istenen kayıt sürümü bilinmediği için (where yoksa) tüm parçalara bakılır
+        targets = list(zip(self.shards, self.collections)) if ids is not None and not where else self.select(where)
+        shard_limit = None if limit is None else (offset or 0) + limit
+        with span("shard_fanout", op="get", shards=[s["collection"] for s, _ in targets]):
+            results = self._fan_out(targets, lambda c: c.get(ids=ids, where=where, include=include,
+                                                              limit=shard_limit))
+
+        merged = {"ids": []}
+        for key in include:
+            merged[key] = []
+        for result in results:
+            for key in merged:
+                if result.get(key) is not None:
+                    merged[key].extend(list(result[key]))
+        end = None if limit is None else (offset or 0) + limit
+        merged = {key: values[offset or 0:end] for key, values in merged.items()}
+        if "embeddings" in merged:
+            merged["embeddings"] = np.asarray(merged["embeddings"], dtype=np.float32)
+        return merged
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None, include=None):
+        include = include or ["documents", "metadatas", "distances"]
+        # Sorgu bir kez embed edilir (her parça ayrı ayrı embed etmesin)
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(list(query_texts))
+        shard_include = include if "distances" in include else list(include) + ["distances"]
+
+        targets = self.select(where)
+        with span("shard_fanout", op="query", shards=[s["collection"] for s, _ in targets]) as fanout_span:
+            results = self._fan_out(targets, lambda c: c.query(query_embeddings=query_embeddings,
+                                                                n_results=n_results, where=where,
+                                                                include=shard_include))
+            fanout_span.set(hit_count=sum(len(r["ids"][0]) for r in results if r["ids"]))
+
+        keys = ["ids"] + list(include)
+        merged = {key: [] for key in keys}
+        for q in range(len(query_embeddings)):
+            # Parçalar aynı embedding modelini kullandığından uzaklıklar doğrudan karşılaştırılabilir
+            rows = heapq.nsmallest(n_results, (
+                (dist, s, j) for s, result in enumerate(results) for j, dist in enumerate(result["distances"][q])
+            ))
+            for key in keys:
+                merged[key].append([results[s][key][q][j] for _, s, j in rows])
+        return merged
+
+
+def open_sharded_collection(manifest, opener, sections=False, max_workers=MAX_WORKERS):
+    """
+    Manifestteki parçaları `opener(koleksiyon adı)` ile açar (Cloud, HNSW ya da yerel); açılamayan parça
+    uyarıyla atlanır. Hiç parça açılamazsa None.
+    """
+    if not manifest:
+        return None
+    field = "section_collection" if sections else "collection"
+    shards, collections = [], []
+    for shard in manifest["shards"]:
+        try:
+            collection = opener(shard[field])
+        except Exception as e:
+            print(f"⚠️ Parça açılamadı ({shard[field]}): {e}")
+            collection = None
+        if collection is not None:
+            shards.append(shard)
+            collections.append(collection)
+    return ShardedCollection(shards, collections, max_workers) if collections else None
+
+
+def build_local_shards(course_data, embedding_function=None, sections=False, dedup=True):
+    """Chroma Cloud'a gitmeden parça başına LocalCollection kurar (benchmark / offline)."""
+    from local_collection import LocalCollection
+    from vector_create import build_records, build_section_records
+
+    manifest = build_shard_manifest(course_data)
+    groups = group_by_shard(course_data)
+    build = build_section_records if sections else build_records
+    collections = {}
+    for shard in manifest["shards"]:
+        name = shard["section_collection" if sections else "collection"]
+        collection = LocalCollection(name=name, embedding_function=embedding_function)
+        documents, metadatas, ids = build(groups[(shard["faculty"], shard["curriculum"])], dedup=dedup)
+        collection.add(ids=ids, documents=documents, metadatas=metadatas)
+        collections[name] = collection
+    return open_sharded_collection(manifest, collections.get, sections=sections)
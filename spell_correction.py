@@ -0,0 +1,227 @@
+"""
+Ders verisinden türetilen yazım düzeltme indeksi (SymSpell tarzı simetrik silme).
+
+Kelime hazinesi ingest sırasında ders adları, açıklamalar, hedefler, haftalık konular ve
+kazanımlardan (frekanslarıyla) çıkarılır ve veri dosyasının yanına kaydedilir (`<veri>.spell.json`).
+Yüklemede her kelimenin (ilk PREFIX_LENGTH harfi üzerinden) en fazla MAX_EDIT_DISTANCE silme
+varyantı tek bir sözlüğe yazılır. Sorgu kelimesinin silme varyantları aynı sözlükte aranır;
+adaylar gerçek düzenleme uzaklığıyla doğrulanır, en yakın ve en sık geçen seçilir.
+Sözlükte olmayan her kelime yazım hatası değildir ("compilers", "drones"): bilinen bir kelimenin
+çekimi olan kelimelere dokunulmaz, ilk harfi farklı adaylar elenir ve 7 harfe kadar kelimelerde
+tek harf fark şartı aranır (benchmarks/eval_spelling.py "sözlük dışı" setiyle ölçülür).
+Sorgu başına maliyet birkaç sözlük erişimi kadardır (mikrosaniye).
+
+    corrector = load_spell_corrector()
+    corrector.correct("securty and artifical intelegence")
+    # -> ("security and artificial intelligence", [("securty", "security"), ...])
+"""
+import json
+import os
+import re
+from collections import Counter
+
+from rag_tracing import record_cache
+from derived_artefacts import artefact_path, build_artefact, load_artefact
+from vector_create import JSON_FILE
+
+SPELL_VERSION = 1
+SPELL_SUFFIX = ".spell.json"
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+# Kısa kelimeler (and, lab, ...) düzeltilmez: tek harf farkla çok sayıda geçerli kelimeye denk gelir
+MIN_WORD_LENGTH = 4
+# Bu uzunluğa kadar kelimelerde iki harf fark başka bir geçerli kelime demektir (drones -> diodes)
+SHORT_WORD_LENGTH = 7
+# Bilinen kelimenin çekimi sayılan ekler (uzundan kısaya; "ies" -> "y" ayrıca ele alınır)
+INFLECTION_SUFFIXES = ("ings", "ing", "ers", "er", "ies", "es", "ed", "s", "ly")
+WORD_PATTERN = re.compile(r"[a-z]+")
+VOCABULARY_FIELDS = ("course_name", "description", "objectives", "weekly_topics", "learning_outcomes")
+# Ders metinlerinde az geçse de sorularda sık kullanılan, düzeltilmemesi gereken kelimeler
+EXTRA_WORDS = (
+    "ects", "credit", "credits", "local", "theory", "hours", "weekly", "prerequisite", "prerequisites",
+    "mandatory", "elective", "compulsory", "semester", "spring", "fall", "year", "freshman", "sophomore",
+    "junior", "senior", "department", "curriculum", "courses", "course", "which", "what", "many", "list",
+)
+
+
+def spell_path_for(json_file):
+    return artefact_path(json_file, SPELL_SUFFIX)
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Damerau-Levenshtein (bitişik harf yer değiştirmesi dahil), sadece köşegen etrafındaki
+    `max_distance` genişliğindeki bantta hesaplanır; sınır aşılınca erken çıkar.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    limit = max_distance + 1
+    previous2, previous = None, [j if j <= max_distance else limit for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [limit] * (len(b) + 1)
+        current[0] = i if i <= max_distance else limit
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and cost and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return limit
+        previous2, previous = previous, current
+    return min(previous[-1], limit)
+
+
+def _deletes(word, max_distance):
+    """Kelimeden en fazla `max_distance` harf silinerek elde edilen tüm varyantlar (kelimenin kendisi dahil)."""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+def _text_of(value):
+    return " ".join(str(v) for v in value) if isinstance(value, list) else str(value or "")
+
+
+class SpellCorrector:
+    """Kelime -> frekans sözlüğünden kurulan simetrik silme indeksi."""
+
+    def __init__(self, frequencies, max_edit_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH):
+        self.frequencies = frequencies
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self._index = {}
+        self._cache = {}  # kelime -> düzeltme (aynı yazım hatası tekrar hesaplanmasın)
+        for word in frequencies:
+            for variant in _deletes(word[:prefix_length], max_edit_distance):
+                self._index.setdefault(variant, []).append(word)
+
+    @classmethod
+    def from_courses(cls, courses):
+        counts = Counter()
+        for course in courses:
+            for field in VOCABULARY_FIELDS:
+                counts.update(w for w in WORD_PATTERN.findall(_text_of(course.get(field)).lower())
+                              if len(w) >= MIN_WORD_LENGTH)
+        for word in EXTRA_WORDS:
+            counts[word] += 1
+        return cls(dict(counts))
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def __contains__(self, word):
+        return word in self.frequencies
+
+    def _inflection_stem(self, word):
+        """Kelime sözlükteki bir kelimenin çekimiyse ekten arındırılmış kök (compilers -> compil), yoksa None."""
+        for suffix in INFLECTION_SUFFIXES:
+            stem = word[:-len(suffix)]
+            if not word.endswith(suffix) or len(stem) < 3:
+                continue
+            stems = (stem + "y",) if suffix == "ies" else (stem, stem + "e")
+            if len(stem) > 3 and stem[-1] == stem[-2]:
+                stems += (stem[:-1],)
+            if any(s in self.frequencies for s in stems):
+                return stem
+        return None
+
+    def lookup(self, word):
+        """Tek kelimenin düzeltilmiş hali; bilinen, kısa veya harf dışı karakter içeren kelimeler aynen döner."""
+        if len(word) < MIN_WORD_LENGTH or word in self.frequencies or not word.isalpha() or not word.isascii():
+            return word
+        hit = word in self._cache
+        record_cache("spell", hit)
+        if hit:
+            return self._cache[word]
+
+        max_distance = 1 if len(word) <= SHORT_WORD_LENGTH else self.max_edit_distance
+
+        # Uzaklık kademeli artırılır: 1 harf farkla aday bulunduysa 2 silmelik varyantlara hiç bakılmaz.
+        # İlk harf nadiren yanlış yazılır; farklıysa aday başka bir kelimedir (cooking -> looking)
+        best = word
+        for distance_limit in range(1, max_distance + 1):
+            best_key, checked = None, set()
+            for variant in _deletes(word[:self.prefix_length], distance_limit):
+                for candidate in self._index.get(variant, ()):
+                    if (candidate in checked or candidate[0] != word[0]
+                            or abs(len(candidate) - len(word)) > distance_limit):
+                        continue
+                    checked.add(candidate)
+                    distance = edit_distance(word, candidate, distance_limit)
+                    if distance > distance_limit:
+                        continue
+                    key = (distance, -self.frequencies[candidate], candidate)
+                    if best_key is None or key < best_key:
+                        best, best_key = candidate, key
+            if best_key is not None:
+                break
+
+        # Bilinen kelimenin çekimi geçerli sayılır; aday aynı kökün daha uzun hali değilse (programing ->
+        # programming) düzeltilmez
+        stem = self._inflection_stem(word) if best != word else None
+        if stem is not None and not (best.startswith(stem) and len(best) > len(word)):
+            best = word
+
+        self._cache[word] = best
+        return best
+
+    def correct(self, text):
+        """
+        Metindeki kelimeleri düzeltir; (düzeltilmiş metin, [(eski, yeni), ...]) döner.
+        Harf dışı karakterler ve ders kodları (SE 115) dokunulmadan kalır.
+        """
+        corrections = []
+
+        def replace(match):
+            original = match.group(0)
+            fixed = self.lookup(original.lower())
+            if fixed == original.lower():
+                return original
+            corrections.append((original, fixed))
+            return fixed
+
+        corrected = re.sub(r"[A-Za-z]+", replace, text or "")
+        return corrected, corrections
+
+    # --- KALICILIK ---
+    def to_dict(self):
+        return {"version": SPELL_VERSION, "max_edit_distance": self.max_edit_distance,
+                "prefix_length": self.prefix_length, "words": self.frequencies}
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SPELL_VERSION:
+            raise ValueError(f"Yazım düzeltme indeksi sürümü uyumsuz: {path}")
+        return cls(data["words"], data["max_edit_distance"], data["prefix_length"])
+
+
+def build_spell_corrector(json_file=JSON_FILE, courses=None):
+    """Ingest adımı: kelime hazinesini çıkarır ve kaydeder (bkz. derived_artefacts.build_artefact)."""
+    return build_artefact(SpellCorrector.from_courses, json_file, SPELL_SUFFIX, courses)
+
+
+def load_spell_corrector(json_file=JSON_FILE):
+    """Kayıtlı indeks ya da veriden yeniden kurulan; veri yoksa None."""
+    return load_artefact(SpellCorrector.load, json_file, SPELL_SUFFIX, "Yazım düzeltme indeksi",
+                         build=build_spell_corrector)
+
+
+if __name__ == "__main__":
+    c = build_spell_corrector()
+    print(f"✅ {len(c)} kelime -> {spell_path_for(JSON_FILE)}")
@@ -0,0 +1,30 @@
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+# Modüller repo kökünde (düz yapı); testler kökten ya da tests/ içinden çalıştırılabilsin
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA_FILE = os.path.join(ROOT, "all_engineering_curricula.json")
+
+
+@pytest.fixture(scope="session")
+def _all_courses():
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def course_data(_all_courses):
+    """Gerçek veriden küçük, testin değiştirebileceği bir ders listesi (tek fakülte, varsayılan sürüm)."""
+    return copy.deepcopy(_all_courses[:12])
+
+
+@pytest.fixture
+def embedding_fn():
+    from local_collection import HashEmbeddingFunction
+    return HashEmbeddingFunction(dim=64)
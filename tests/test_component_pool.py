@@ -0,0 +1,141 @@
+"""component_pool testleri: işçi havuzunda sıra / kuyruk sınırı, toplu ve önbellekli embedding, eşzamanlılık sınırı."""
+import threading
+import time
+
+import pytest
+
+from component_pool import BatchingEmbeddingFunction, GuardedEmbeddingFunction, PipelinePool, PoolBusyError
+
+
+class CountingModel:
+    """Her çağrıyı kaydeden sahte embedding modeli (metin -> [uzunluk])."""
+
+    def __init__(self, delay_s=0.0, fail_times=0):
+        self.batches = []
+        self.delay_s = delay_s
+        self.fail_times = fail_times
+        self.name = "counting"
+
+    def __call__(self, input):
+        self.batches.append(list(input))
+        time.sleep(self.delay_s)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("model down")
+        return [[float(len(text))] for text in input]
+
+
+@pytest.fixture
+def pool():
+    pool = PipelinePool(workers=1, max_queue=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_waiting_jobs_know_their_position_and_full_queue_rejects(pool):
+    started, release = threading.Event(), threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+        return "first"
+
+    running = pool.submit(blocker)
+    assert started.wait(5)
+    second, third = pool.submit(lambda: "second"), pool.submit(lambda: "third")
+    assert [running.position(), second.position(), third.position()] == [0, 1, 2]
+    assert pool.stats() == {"workers": 1, "active": 1, "waiting": 2}
+    with pytest.raises(PoolBusyError):
+        pool.submit(lambda: "fourth")
+
+    release.set()
+    assert [t.result(5) for t in (running, second, third)] == ["first", "second", "third"]
+    assert third.position() == 0 and third.done()
+    assert pool.stats() == {"workers": 1, "active": 0, "waiting": 0}
+
+
+def test_failed_job_frees_its_worker(pool):
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        pool.submit(fail).result(5)
+    assert pool.submit(lambda x: x * 2, 21).result(5) == 42
+    assert pool.stats()["active"] == 0
+
+
+def test_concurrent_calls_share_model_calls():
+    model = CountingModel(delay_s=0.02)
+    embed = BatchingEmbeddingFunction(model, batch_size=64, window_s=0.05)
+    texts = [f"query {'x' * i}" for i in range(8)]
+    barrier = threading.Barrier(len(texts))
+    results = {}
+
+    def worker(text):
+        barrier.wait()
+        results[text] = embed([text, "shared"])
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert all(results[t] == [[float(len(t))], [6.0]] for t in texts)
+    assert embed.model_calls == len(model.batches) < len(texts)
+    embedded = [text for batch in model.batches for text in batch]
+    assert sorted(embedded) == sorted(texts + ["shared"])
+
+
+def test_cache_hits_skip_the_model_and_evict_least_recent():
+    model = CountingModel()
+    embed = BatchingEmbeddingFunction(model, window_s=0, cache_size=2)
+    assert embed(["a", "bb"]) == [[1.0], [2.0]]
+    assert embed(["bb", "a", "a"]) == [[2.0], [1.0], [1.0]]
+    assert embed.model_calls == 1
+
+    embed(["ccc"])  # "bb" en eski kullanılan: önbellekten düşer
+    embed(["a"])
+    embed(["bb"])
+    assert model.batches == [["a", "bb"], ["ccc"], ["bb"]]
+    assert embed.name == "counting"
+
+
+def test_prefetch_embeds_unique_texts_in_batches():
+    model = CountingModel()
+    embed = BatchingEmbeddingFunction(model, batch_size=3, window_s=0)
+    embed.prefetch(["a", "b", "", "a", "c", "d", None, "e"])
+    assert model.batches == [["a", "b", "c"], ["d", "e"]]
+    embed(["e", "c"])
+    assert embed.model_calls == 2
+
+
+def test_failed_batch_is_retried_by_next_call():
+    model = CountingModel(fail_times=1)
+    embed = BatchingEmbeddingFunction(model, window_s=0)
+    with pytest.raises(RuntimeError):
+        embed(["a"])
+    assert embed(["a"]) == [[1.0]]
+    assert model.batches == [["a"], ["a"]]
+
+
+def test_guarded_embedding_limits_concurrent_calls():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def model(input):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return [[0.0] for _ in input]
+
+    guarded = GuardedEmbeddingFunction(model, max_concurrent=2)
+    threads = [threading.Thread(target=guarded, args=(["x"],)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert peak[0] == 2
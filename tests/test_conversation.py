@@ -0,0 +1,40 @@
+"""conversation.ConversationState.resolve testleri (kural tabanlı router; LLM'e gidilmez)."""
+import pytest
+
+from conversation import ConversationState
+from rag_router import QueryRouter
+
+
+@pytest.fixture
+def router():
+    # Sadece rule_based_route kullanılır; Groq istemcisi kurulmaz
+    return QueryRouter.__new__(QueryRouter)
+
+
+@pytest.fixture
+def conversation():
+    state = ConversationState()
+    state.route = {"intent": "search", "specific_course_code": "None", "search_queries": ["machine learning"],
+                   "target_department": "Software Engineering", "fields": "None"}
+    state.codes = ["SE 302", "SE 420"]
+    return state
+
+
+def test_pronoun_with_new_topic_searches_within_working_set(conversation, router):
+    follow_up = conversation.resolve("Is it hard?", router)
+    assert follow_up["query"] == "Is SE 302 and SE 420 hard?"
+    assert follow_up["route"]["specific_course_code"] == ["SE 302", "SE 420"]
+    assert follow_up["route"]["search_queries"] == ["hard"]
+    assert not follow_up["reuse"]
+
+
+def test_pronoun_without_new_topic_reuses_previous_results(conversation, router):
+    follow_up = conversation.resolve("and its ECTS?", router)
+    assert follow_up["route"]["specific_course_code"] == "None"
+    assert follow_up["reuse"]
+
+
+def test_new_topic_without_pronoun_starts_new_search(conversation, router):
+    follow_up = conversation.resolve("and database ones?", router)
+    assert follow_up["route"]["specific_course_code"] == "None"
+    assert follow_up["route"]["search_queries"] == ["database"]
@@ -0,0 +1,52 @@
+"""course_analytics.CourseAnalytics testleri: tipli toplama sorguları ve değerlendirme ağırlıkları."""
+import pytest
+
+from course_analytics import CourseAnalytics
+
+
+def course(code, department, semester, ects, evaluation, course_type="Mandatory"):
+    return {"course_code": code, "course_name": code, "department": department, "semester": semester,
+            "type": course_type, "ects": str(ects), "local_credit": "3", "theory_hours": "3", "lab_hours": "0",
+            "evaluation_system": evaluation}
+
+
+@pytest.fixture
+def analytics():
+    midterm_final = [{"activity": "Midterm", "count": "1", "weight_percent": "40"},
+                     {"activity": "Final Exam", "count": "1", "weight_percent": "60"}]
+    return CourseAnalytics([
+        course("SE 302", "Software Engineering", "3. Year Fall Semester", 6,
+               [{"activity": "Project", "count": "1", "weight_percent": "30"}, *midterm_final[:1],
+                {"activity": "Final Exam", "count": "1", "weight_percent": "30"}]),
+        course("SE 115", "Software Engineering", "1. Year Fall Semester", 5, midterm_final),
+        course("ELEC 001", "Software Engineering", "3. Year Fall Semester", 5, []),
+    ])
+
+
+def test_sum_ects_by_year_skips_placeholders(analytics):
+    result = analytics.aggregate("ects", "sum", group_by="year",
+                                 filters={"target_department": "Software Engineering"})
+    assert [(r["group"], r["value"]) for r in result["rows"]] == [("1", 5.0), ("3", 6.0)]
+    assert result["placeholders"] == 1
+
+
+def test_evaluation_weight_for_named_activity(analytics):
+    result = analytics.aggregate("evaluation_weight", "avg", activity="final")
+    assert [r["value"] for r in result["rows"]] == [45.0]
+    assert "Average Final evaluation weight" in CourseAnalytics.format_result(result)
+
+
+def test_evaluation_weight_without_activity_is_split_per_activity(analytics):
+    result = analytics.aggregate("evaluation_weight", "sum", filters={"specific_course_code": "SE 302"})
+    assert {r["activity"]: r["value"] for r in result["rows"]} == {"Final Exam": 30.0, "Midterm": 40.0,
+                                                                   "Project": 30.0}
+    text = CourseAnalytics.format_result(result)
+    assert "by activity" in text and "- Project: **30**" in text
+
+
+def test_evaluation_weight_grouped_and_split_per_activity(analytics):
+    result = analytics.aggregate("evaluation_weight", "avg", group_by="year")
+    assert {(r["group"], r["activity"]): r["value"] for r in result["rows"]} == {
+        ("1", "Final Exam"): 60.0, ("1", "Midterm"): 40.0,
+        ("3", "Final Exam"): 30.0, ("3", "Midterm"): 40.0, ("3", "Project"): 30.0}
+    assert "- Year 1 / Midterm: **40**" in CourseAnalytics.format_result(result)
@@ -0,0 +1,89 @@
+"""course_digest testleri: deterministik özet çıkarımı, içerik özetine göre saklama ve tam metin isteği tespiti."""
+import pytest
+
+from course_digest import CourseDigests, extract_digest, format_digest, wants_full_text
+from vector_create import content_hash
+
+
+@pytest.fixture
+def course():
+    return {
+        "department": "Software Engineering", "course_code": "SE 302", "course_name": "Software Project Management",
+        "semester": "3. Year Fall Semester", "type": "Mandatory", "ects": "5", "prerequisites": "None",
+        "description": "Covers planning and tracking of software projects. Students also work in teams.",
+        "objectives": "To teach project management.",
+        "weekly_topics": ["Week 1: Introduction", "Week 2: Software Processes", "Week 3: Agile Development",
+                          "Week 4: Agile Development", "Week 5: Midterm", "Week 6: Risk Management.",
+                          "Week 7: Review of the Semester"],
+        "learning_outcomes": ["Plan a project."],
+        "evaluation_system": [{"activity": "Semester Activities", "count": "Number", "weight_percent": "Weighting"},
+                              {"activity": "Quizzes", "count": "2", "weight_percent": "20"},
+                              {"activity": "Midterm", "count": "1", "weight_percent": "30"},
+                              {"activity": "Final Exam", "count": "1", "weight_percent": "50"}],
+    }
+
+
+def test_extract_digest_keeps_answerable_facts_only(course):
+    digest = extract_digest(course)
+    assert digest["description"] == "Covers planning and tracking of software projects."
+    assert digest["topics"] == ["Software Processes", "Agile Development", "Risk Management"]
+    assert digest["evaluation"] == "Quizzes (2) 20%, Midterm 30%, Final Exam 50%"
+    assert digest["prerequisites"] == "" and digest["outcomes"] == []
+
+
+def test_extract_digest_falls_back_to_outcomes(course):
+    course.update(description="N/A", objectives="", weekly_topics=["Week 1: Midterm"])
+    digest = extract_digest(course)
+    assert digest["description"] == "" and digest["topics"] == []
+    assert digest["outcomes"] == ["Plan a project."]
+    assert "Outcomes: Plan a project." in format_digest(digest)
+
+
+def test_format_digest_prefers_summary_and_can_drop_header(course):
+    digest = dict(extract_digest(course), summary="Teaches software project management.")
+    text = format_digest(digest, header=False)
+    assert text.splitlines()[0] == "Summary: Teaches software project management."
+    assert "SE 302" not in text and "Prerequisites" not in text
+    assert format_digest(digest).startswith("SE 302 - Software Project Management | 5 ECTS | Mandatory")
+
+
+def test_shared_courses_get_one_digest_keyed_by_content_hash(tmp_path, course):
+    shared = dict(course, department="Computer Engineering", semester="4. Year Spring Semester", type="Elective")
+    other = dict(course, course_code="SE 303", description="A different course.")
+    digests = CourseDigests.from_courses([course, shared, other])
+
+    assert len(digests) == 2
+    assert content_hash(course) == content_hash(shared)
+    assert digests.get(content_hash(course))["departments"] == "Software Engineering, Computer Engineering"
+    assert digests.text(content_hash(other)).startswith("Summary: A different course.")
+    assert digests.text(None) is None and digests.text("missing") is None
+
+    loaded = CourseDigests.load(digests.save(str(tmp_path / "x.digests.json")))
+    assert loaded.digests == digests.digests and loaded.model == ""
+
+
+def test_summarizer_replaces_description_line(course):
+    calls = []
+
+    def summarizer(courses):
+        calls.append(sorted(courses))
+        return {key: f"Summary of {c['course_code']}." for key, c in courses.items()}
+
+    digests = CourseDigests.from_courses([course], summarizer=summarizer, model="test-model")
+    key = content_hash(course)
+    assert calls == [[key]]
+    assert "Summary: Summary of SE 302." in digests.text(key)
+    assert digests.model == "test-model"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("What is taught in week 5 of SE 302?", True),
+    ("List the learning outcomes of SE 302", True),
+    ("Explain SE 302 in detail", True),
+    ("How many lab hours does SE 302 have?", True),
+    ("What are the prerequisites of SE 302?", False),
+    ("Which electives cover machine learning?", False),
+    (None, False),
+])
+def test_wants_full_text(query, expected):
+    assert wants_full_text(query) is expected
@@ -0,0 +1,94 @@
+"""derived_artefacts ve onu kullanan türetilmiş çıktılar (görünümler, ön koşul grafiği, yazım sözlüğü, özetler)."""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from course_digest import load_course_digests
+from derived_artefacts import is_fresh, load_artefact
+from vector_create import content_hash
+from curriculum_views import CurriculumViews, build_curriculum_views, load_curriculum_views, views_path_for
+from prerequisite_graph import build_prerequisite_graph, load_prerequisite_graph
+from spell_correction import build_spell_corrector, load_spell_corrector
+
+
+@pytest.fixture
+def two_versions(tmp_path, course_data):
+    """Aynı fakültenin iki sürümü: varsayılan (before_2025) ve yeni sürüm (2025, farklı ad / ön koşul)."""
+    for course in course_data:
+        course["faculty"], course["curriculum"] = "eng", "before_2025"
+    target = next(c for c in course_data if c["prerequisites"] != "None")
+    newer = [dict(c, curriculum="2025", course_name=f"Revised {c['course_name']}",
+                  description="Quadcopter telemetry.", prerequisites="SE 999") for c in course_data]
+    json_file = str(tmp_path / "courses.json")
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(course_data + newer, f)
+    return json_file, course_data + newer, target
+
+
+def read_text(path):
+    return Path(path).read_text(encoding="utf-8")
+
+
+def make_stale(json_file):
+    """Scraper JSON'u yeniden yazmış gibi: veri dosyası kayıtlı çıktılardan yeni."""
+    later = os.path.getmtime(json_file) + 10
+    os.utime(json_file, (later, later))
+
+
+def test_stale_artefacts_rebuild_from_default_version(two_versions):
+    json_file, all_courses, target = two_versions
+    # Eski (sürümleri karıştıran) kayıtlı çıktılar
+    build_curriculum_views(json_file, courses=all_courses)
+    build_prerequisite_graph(json_file, courses=all_courses)
+    build_spell_corrector(json_file, courses=all_courses)
+    make_stale(json_file)
+
+    lines = load_curriculum_views(json_file).lines()
+    assert lines and not any("Revised" in line for line in lines)
+
+    graph = load_prerequisite_graph(json_file)
+    codes = [option["code"] for group in graph.direct_prerequisites(target["course_code"]) for option in group]
+    assert codes and "SE 999" not in codes
+
+    corrector = load_spell_corrector(json_file)
+    assert "quadcopter" not in corrector and "revised" not in corrector
+
+
+def test_rebuilt_artefacts_are_persisted_default_only(two_versions):
+    json_file, _, _ = two_versions
+    load_curriculum_views(json_file)
+    saved = CurriculumViews.load(views_path_for(json_file))
+    assert saved.lines() and not any("Revised" in line for line in saved.lines())
+
+
+def test_digests_rebuild_from_every_version(two_versions):
+    json_file, all_courses, _ = two_versions
+    digests = load_course_digests(json_file)
+    # Özetler içerik özetine göre: her sürümün kaydı kendi özetini bulur
+    assert all(digests.get(content_hash(course)) for course in all_courses)
+
+
+def test_unreadable_artefact_is_rebuilt(two_versions, capsys):
+    json_file, _, _ = two_versions
+    path = views_path_for(json_file)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{broken")
+    assert is_fresh(path, json_file)
+
+    assert load_curriculum_views(json_file).lines()
+    assert "yeniden kuruluyor" in capsys.readouterr().out
+    assert CurriculumViews.load(path).lines()
+
+
+def test_artefact_without_builder_is_loaded_even_if_stale(tmp_path):
+    json_file = str(tmp_path / "courses.json")
+    with open(json_file, "w", encoding="utf-8") as f:
+        f.write("[]")
+    with open(str(tmp_path / "courses.extra.json"), "w", encoding="utf-8") as f:
+        f.write("saved")
+    make_stale(json_file)
+
+    assert load_artefact(read_text, json_file, ".extra.json", "Test") == "saved"
+    assert load_artefact(read_text, json_file, ".missing.json", "Test") is None
@@ -0,0 +1,56 @@
+"""field_projection testleri: sorudan / router ipucundan alan seçimi ve ders deposundan projeksiyonla okuma."""
+import pytest
+
+from course_store import CourseStore, build_course_store
+from field_projection import FIELDS, HEADER_COLUMNS, columns_for, fields_from_text, projection_for
+from vector_create import build_section_texts
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("What is the grading of SE 302?", ("evaluation",)),
+    ("How many ECTS and what are the prerequisites of SE 302?", ("overview",)),
+    ("What topics are covered in week 5, and how is it assessed?", ("weekly_topics", "evaluation")),
+    ("What will I be able to do after SE 302?", ("learning_outcomes",)),
+    ("Tell me about SE 302", None),
+    ("", None),
+])
+def test_fields_from_text(query, expected):
+    assert fields_from_text(query) == expected
+
+
+def test_all_fields_matching_means_no_projection():
+    assert fields_from_text("ects, aims, topics, outcomes and exams of SE 302") is None
+
+
+def test_router_hint_wins_over_keywords():
+    route = {"intent": "search", "fields": ["Weekly_Topics", "evaluation", "bogus"]}
+    assert projection_for(route, "What are the ECTS?") == ("weekly_topics", "evaluation")
+    assert projection_for({"intent": "search", "fields": "None"}, "What are the ECTS?") == ("overview",)
+    assert projection_for(None, "grading?") == ("evaluation",)
+
+
+@pytest.mark.parametrize("intent", ["count", "aggregate", "list_curriculum"])
+def test_listing_intents_are_not_projected(intent):
+    assert projection_for({"intent": intent, "fields": "evaluation"}, "average midterm weight") is None
+
+
+def test_columns_for_adds_sources_after_header():
+    columns = columns_for(("weekly_topics", "overview"))
+    assert columns[:len(HEADER_COLUMNS)] == HEADER_COLUMNS
+    assert columns[len(HEADER_COLUMNS):] == ("weekly_topics", "local_credit", "theory_hours", "lab_hours",
+                                              "prerequisites", "description")
+    assert columns_for(()) == HEADER_COLUMNS
+
+
+@pytest.mark.parametrize("field", FIELDS)
+def test_projected_store_read_gives_same_section_text(tmp_path, course_data, field):
+    store = CourseStore(build_course_store(course_data, str(tmp_path / "courses.db")))
+    try:
+        course = next(c for c in course_data if build_section_texts(c, fields=(field,)))
+        record = store.find_by_code(course["course_code"], columns=columns_for((field,)))[0]
+        assert build_section_texts(record, fields=(field,)) == build_section_texts(course, fields=(field,))
+        unread = [c for c in ("description", "objectives", "weekly_topics", "evaluation_system")
+                  if c not in columns_for((field,))]
+        assert all(record.get(c) is None for c in unread)
+    finally:
+        store.close()
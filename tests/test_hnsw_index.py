@@ -0,0 +1,201 @@
+"""
+hnsw_index testleri: graf araması (tam aramaya karşı recall), filtre, silme / yeniden kurma, kaydet / yükle (mmap),
+nicemlenmiş hassasiyetlerde yeniden puanlama ve ingest senkronu (boş dizinden kurulum, artımlı güncelleme, hassasiyet değişimi).
+"""
+import numpy as np
+import pytest
+
+import hnsw_index
+from hnsw_index import HNSWCollection, HNSWIndex, hnsw_path_for, open_hnsw_collection, sync_hnsw_collections
+from shards import build_shard_manifest
+
+
+def random_vectors(count, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top(vectors, query, k, allowed=None):
+    sims = vectors @ (query / np.linalg.norm(query))
+    if allowed is not None:
+        sims = np.where(allowed, sims, -np.inf)
+    return set(np.argsort(-sims)[:k].tolist())
+
+
+@pytest.fixture
+def graph_only(monkeypatch):
+    # Küçük indekslerde de tam arama yerine graf gezintisi kullanılsın
+    monkeypatch.setattr(hnsw_index, "BRUTE_FORCE_LIMIT", 0)
+
+
+@pytest.fixture(scope="module")
+def graph():
+    vectors = random_vectors(2000)
+    index = HNSWIndex(vectors.shape[1], seed=0)
+    index.add(vectors)
+    return index, vectors
+
+
+@pytest.fixture
+def collection():
+    vectors = random_vectors(300, seed=1)
+    collection = HNSWCollection("test", embedding_function=lambda texts: random_vectors(len(texts), seed=2))
+    collection.add(ids=[f"c{i}" for i in range(len(vectors))], documents=[f"doc {i}" for i in range(len(vectors))],
+                   metadatas=[{"year": i % 4 + 1, "type": "Elective" if i % 3 else "Mandatory"}
+                              for i in range(len(vectors))],
+                   embeddings=vectors)
+    return collection
+
+
+def test_graph_search_recall_matches_exact_search(graph, graph_only):
+    index, vectors = graph
+    queries = random_vectors(20, seed=3)
+    recall = np.mean([len({n for _, n in index.search(q, 10)} & exact_top(vectors, q, 10)) / 10 for q in queries])
+    assert recall >= 0.95
+
+
+def test_filtered_graph_search_returns_only_allowed_nodes(graph, graph_only):
+    index, vectors = graph
+    allowed = np.arange(len(vectors)) % 5 == 0
+
+    query = random_vectors(1, seed=4)[0]
+    hits = index.search(query, 10, allowed=allowed)
+    assert len(hits) == 10 and all(allowed[n] for _, n in hits)
+    assert len({n for _, n in hits} & exact_top(vectors, query, 10, allowed)) >= 9
+    assert [d for d, _ in hits] == sorted(d for d, _ in hits)
+
+
+def test_query_with_where_filters_and_returns_squared_l2(collection):
+    query = random_vectors(1, seed=5)
+    result = collection.query(query_embeddings=query, n_results=5,
+                              where={"$and": [{"year": {"$in": [1, 2]}}, {"type": "Mandatory"}]})
+    assert len(result["ids"][0]) == 5
+    assert all(m["year"] in (1, 2) and m["type"] == "Mandatory" for m in result["metadatas"][0])
+    assert all(0.0 <= d <= 4.0 for d in result["distances"][0])
+
+
+def test_deleted_records_are_skipped_then_rebuilt(collection):
+    query = random_vectors(1, seed=6)
+    nearest = collection.query(query_embeddings=query, n_results=3)["ids"][0]
+    collection.delete(ids=nearest[:1])
+    assert nearest[0] not in collection.query(query_embeddings=query, n_results=3)["ids"][0]
+    assert collection.index.count == 300 and collection.count() == 299
+
+    # Silinen oran REBUILD_RATIO'yu geçince graf canlı kayıtlardan yeniden kurulur
+    collection.delete(where={"year": {"$in": [1, 2]}})
+    assert collection.count() == collection.index.count == 150
+    assert not collection.index.deleted[:collection.index.count].any()
+    result = collection.query(query_embeddings=query, n_results=5)
+    assert all(m["year"] in (3, 4) for m in result["metadatas"][0])
+    assert collection.get(ids=["c2"])["documents"] == ["doc 2"]
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_load_round_trip(tmp_path, collection, mmap):
+    collection.delete(ids=["c0", "c1"])
+    path = collection.save(str(tmp_path / "index"))
+    loaded = HNSWCollection.load(path, embedding_function=collection.embedding_function, mmap=mmap)
+    assert isinstance(loaded.index.vectors, np.memmap) == mmap
+    assert loaded.count() == collection.count() == 298
+
+    query = random_vectors(3, seed=7)
+    where = {"year": {"$gte": 2}}
+    assert loaded.query(query_embeddings=query, n_results=8, where=where) == \
+        collection.query(query_embeddings=query, n_results=8, where=where)
+
+    # mmap'li (salt okunur) indekse ekleme diziler belleğe kopyalanarak yapılır
+    loaded.add(ids=["new"], documents=["new doc"], embeddings=random_vectors(1, seed=8))
+    assert loaded.get(ids=["new"])["documents"] == ["new doc"]
+    assert HNSWCollection.load(path, embedding_function=collection.embedding_function).count() == 298
+
+
+def test_sync_builds_from_empty_directory(tmp_path, course_data, embedding_fn):
+    json_file = str(tmp_path / "courses.json")
+    collections = sync_hnsw_collections(json_file, embedding_fn, course_data=course_data)
+
+    courses = collections[0]
+    assert courses.count() == len(course_data)
+    reopened = open_hnsw_collection(hnsw_path_for(json_file, courses.name), embedding_fn)
+    assert reopened.count() == len(course_data)
+    assert reopened.index.precision == hnsw_index.DEFAULT_PRECISION
+
+
+def test_resync_applies_diff_and_new_precision(tmp_path, course_data, embedding_fn, monkeypatch):
+    json_file = str(tmp_path / "courses.json")
+    sync_hnsw_collections(json_file, embedding_fn, course_data=course_data)
+
+    course_data[0]["description"] += " Updated."
+    monkeypatch.setattr(hnsw_index, "DEFAULT_PRECISION", "int8")
+    courses = sync_hnsw_collections(json_file, embedding_fn, course_data=course_data[:-1])[0]
+
+    reopened = open_hnsw_collection(courses.path, embedding_fn)
+    assert reopened.index.precision == "int8"
+    assert reopened.count() == len(course_data) - 1
+    code = course_data[0]["course_code"]
+    found = reopened.get(where={"course_code": code})
+    assert found["documents"] and "Updated." in found["documents"][0]
+
+
+def test_sync_creates_collections_for_new_shard(tmp_path, course_data, embedding_fn):
+    json_file = str(tmp_path / "courses.json")
+    sync_hnsw_collections(json_file, embedding_fn, course_data=course_data)
+
+    # Yeni kazınan fakülte: manifest'e yeni parça eklenir, mevcutlar artımlı güncellenir
+    extra = [dict(course, faculty="arts") for course in course_data[:3]]
+    manifest = build_shard_manifest(course_data + extra)
+    collections = sync_hnsw_collections(json_file, embedding_fn, course_data=course_data + extra,
+                                        manifest=manifest)
+    assert len(collections) == 2 * len(manifest["shards"]) == 4
+    assert sorted(c.count() for c in collections[::2]) == [3, len(course_data)]
+
+
+def test_collection_rejects_unknown_precision(embedding_fn):
+    collection = HNSWCollection("x", embedding_fn, precision="int4")
+    with pytest.raises(ValueError):
+        collection.add(ids=["a"], documents=["text"])
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8", "binary"])
+def test_quantized_search_is_rescored_to_exact_results(graph, precision):
+    index, vectors = graph
+    quantized = HNSWIndex(vectors.shape[1], seed=0, precision=precision)
+    quantized.add(vectors)
+
+    queries = random_vectors(20, seed=9)
+    recall = np.mean([len({n for _, n in quantized.search(q, 10)} & exact_top(vectors, q, 10)) / 10
+                      for q in queries])
+    assert recall >= 0.9
+    # Dönen uzaklıklar yaklaşık kodlardan değil float32 vektörlerden hesaplanır
+    distance, node = quantized.search(queries[0], 1)[0]
+    assert distance == pytest.approx(1.0 - float(vectors[node] @ queries[0]), abs=1e-5)
+
+
+def test_set_precision_reencodes_and_shrinks_codes(graph):
+    _, vectors = graph
+    index = HNSWIndex(vectors.shape[1], seed=0)
+    index.add(vectors[:500])
+    sizes = {}
+    for precision in ("float16", "int8", "binary", "float32"):
+        index.set_precision(precision)
+        sizes[precision] = index.memory_bytes()["codes"]
+        assert {n for _, n in index.search(vectors[7], 1)} == {7}
+    assert sizes["float32"] == 0
+    assert sizes["float16"] > sizes["int8"] > sizes["binary"] > 0
+    with pytest.raises(ValueError):
+        index.set_precision("int4")
+
+
+def test_quantized_index_save_and_load(tmp_path, graph):
+    _, vectors = graph
+    index = HNSWIndex(vectors.shape[1], seed=0, precision="int8")
+    index.add(vectors[:500])
+    index.save(str(tmp_path))
+
+    loaded = HNSWIndex.load(str(tmp_path), mmap=True)
+    assert loaded.precision == "int8"
+    np.testing.assert_array_equal(loaded.codes, index.codes[:500])
+    np.testing.assert_array_equal(loaded.scale, index.scale)
+    # float32 vektörleri mmap'li kalır: bellekte sadece kodlar ve graf
+    assert loaded.memory_bytes()["vectors_resident"] == 0
+    query = random_vectors(1, seed=10)[0]
+    assert loaded.search(query, 5) == index.search(query, 5)
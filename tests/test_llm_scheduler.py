@@ -0,0 +1,187 @@
+"""llm_scheduler (token bucket, öncelikli kuyruk, bütçe) ve llm_client (devre kesici, yeniden deneme) testleri."""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm_client import CircuitBreaker, Deadline, DeadlineExceededError, LLMClient, LLMUnavailableError
+from llm_scheduler import PRIORITY_GENERATE, PRIORITY_ROUTER, LLMScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            return self.now
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+class RetryableError(Exception):
+    status_code = 429
+
+
+class StubCompletions:
+    """Sırayla verilen sonuçları döner; Exception örnekleri fırlatılır."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def stub_client(*outcomes):
+    return SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions(outcomes)))
+
+
+def wait_until(predicate, timeout_s=2.0):
+    end = time.monotonic() + timeout_s
+    while not predicate():
+        assert time.monotonic() < end, "koşul zamanında sağlanmadı"
+        time.sleep(0.001)
+
+
+# --- TokenBucket ---
+def test_token_bucket_refills_at_rate_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=10, clock=clock)
+    bucket.consume(10)
+    assert bucket.time_until(4) == pytest.approx(2.0)
+
+    clock.advance(1.5)
+    assert bucket.time_until(3) == 0.0
+    clock.advance(100)
+    bucket.consume(0)
+    assert bucket.tokens == 10
+
+
+def test_token_bucket_refund_is_capped():
+    bucket = TokenBucket(rate=1, capacity=5, clock=FakeClock())
+    bucket.consume(2)
+    bucket.refund(10)
+    assert bucket.tokens == 5
+
+
+# --- LLMScheduler ---
+def test_acquire_waits_on_fake_clock_until_capacity():
+    clock = FakeClock()
+    scheduler = LLMScheduler(60, 600, clock=clock, wait=lambda cond, timeout: clock.advance(timeout or 0))
+    scheduler.token_bucket.consume(600)
+
+    waited = scheduler.acquire(100, PRIORITY_GENERATE)
+    assert waited == pytest.approx(10.0)  # 100 token / (600 / 60 token/sn)
+    assert scheduler.queue_depth == 0
+
+
+def test_router_calls_overtake_queued_generations():
+    clock = FakeClock()
+    scheduler = LLMScheduler(60, 60000, clock=clock, wait=lambda cond, timeout: cond.wait(0.005))
+    scheduler.request_bucket.consume(60)
+    order = []
+
+    def call(name, priority):
+        scheduler.acquire(10, priority)
+        order.append(name)
+
+    generate = threading.Thread(target=call, args=("generate", PRIORITY_GENERATE))
+    generate.start()
+    wait_until(lambda: scheduler.queue_depth == 1)
+    router = threading.Thread(target=call, args=("router", PRIORITY_ROUTER))
+    router.start()
+    wait_until(lambda: scheduler.queue_depth == 2)
+
+    # Saniyede bir istek hakkı: önce sonra gelen router çağrısı geçer
+    clock.advance(1.0)
+    wait_until(lambda: len(order) == 1)
+    assert order == ["router"]
+    clock.advance(1.0)
+    generate.join(2)
+    router.join(2)
+    assert order == ["router", "generate"]
+
+
+def test_acquire_rejects_when_wait_exceeds_deadline():
+    clock = FakeClock()
+    scheduler = LLMScheduler(60, 600, clock=clock, wait=lambda cond, timeout: clock.advance(timeout or 0))
+    scheduler.request_bucket.consume(60)
+
+    with pytest.raises(DeadlineExceededError):
+        scheduler.acquire(10, PRIORITY_ROUTER, Deadline(0.5, clock=clock))
+    assert scheduler.queue_depth == 0
+    assert scheduler.token_bucket.tokens == 600
+
+
+def test_settle_corrects_estimate_with_actual_usage():
+    clock = FakeClock()
+    scheduler = LLMScheduler(60, 1000, clock=clock)
+    scheduler.acquire(300)
+    scheduler.settle(300, 100)
+    assert scheduler.token_bucket.tokens == 900
+    scheduler.settle(100, 250)
+    assert scheduler.token_bucket.tokens == 750
+
+
+# --- CircuitBreaker ---
+def test_circuit_breaker_transitions():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=30, clock=clock)
+    assert breaker.allow() and breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.advance(30)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # half_open: tek deneme
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+# --- LLMClient + zamanlayıcı ---
+def make_client(client, scheduler, max_retries=1):
+    return LLMClient(client=client, scheduler=scheduler, max_retries=max_retries, sleep=lambda s: None,
+                     breaker=CircuitBreaker(failure_threshold=5))
+
+
+def test_failed_attempts_refund_reserved_tokens():
+    clock = FakeClock()
+    scheduler = LLMScheduler(60, 6000, clock=clock)
+    client = stub_client(RetryableError("rate limited"), RetryableError("rate limited"))
+    llm = make_client(client, scheduler)
+
+    with pytest.raises(LLMUnavailableError):
+        llm.chat([{"role": "user", "content": "x" * 400}], model="m", max_tokens=100)
+    assert client.chat.completions.calls == 2
+    assert scheduler.token_bucket.tokens == 6000
+    assert scheduler.request_bucket.tokens == 58
+
+
+def test_successful_retry_settles_actual_usage():
+    clock = FakeClock()
+    scheduler = LLMScheduler(60, 6000, clock=clock)
+    response = SimpleNamespace(usage=SimpleNamespace(total_tokens=50))
+    client = stub_client(RetryableError("rate limited"), response)
+    llm = make_client(client, scheduler)
+
+    assert llm.chat([{"role": "user", "content": "hello"}], model="m", max_tokens=100) is response
+    assert scheduler.token_bucket.tokens == 5950
+    assert llm.breaker.state == "closed"
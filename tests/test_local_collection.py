@@ -0,0 +1,45 @@
+"""local_collection.LocalCollection testleri: ekleme, filtreli sorgu ve hatalı eklemenin koleksiyonu bozmaması."""
+import pytest
+
+from local_collection import LocalCollection, match_where
+
+
+@pytest.fixture
+def collection(embedding_fn):
+    collection = LocalCollection(embedding_function=embedding_fn)
+    collection.add(ids=["a", "b"], documents=["software testing", "circuit design"],
+                   metadatas=[{"dept": "se", "ects": 6}, {"dept": "ee", "ects": 5}])
+    return collection
+
+
+def test_duplicate_id_leaves_collection_unchanged(collection):
+    with pytest.raises(ValueError):
+        collection.add(ids=["c", "a"], documents=["databases", "again"])
+    with pytest.raises(ValueError):
+        collection.add(ids=["d", "d"], documents=["one", "two"])
+
+    assert collection.count() == 2
+    assert collection.get(ids=["c", "d"])["ids"] == []
+    collection.add(ids=["c"], documents=["databases"])
+    assert collection.get(ids=["c"])["documents"] == ["databases"]
+    assert collection.query(query_texts=["databases"], n_results=3)["ids"][0][0] == "c"
+
+
+def test_query_filters_and_orders_by_distance(collection):
+    result = collection.query(query_texts=["software testing"], n_results=2)
+    assert result["ids"][0] == ["a", "b"]
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+    assert collection.query(query_texts=["software testing"], where={"dept": "ee"})["ids"][0] == ["b"]
+
+
+def test_delete_reindexes_rows(collection):
+    collection.delete(where={"dept": "se"})
+    assert collection.get()["ids"] == ["b"]
+    assert collection.get(ids=["b"])["metadatas"] == [{"dept": "ee", "ects": 5}]
+
+
+def test_match_where_operators():
+    meta = {"dept": "se", "ects": 6}
+    assert match_where(meta, {"$and": [{"dept": {"$in": ["se", "ce"]}}, {"ects": {"$gte": 5}}]})
+    assert not match_where(meta, {"$or": [{"dept": "ee"}, {"ects": {"$lt": 6}}]})
+    assert not match_where(meta, {"ects": {"$gt": "5"}})  # tip uyuşmazlığı eşleşmez
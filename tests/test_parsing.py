@@ -0,0 +1,88 @@
+"""
+webScraping.parse_course_details testleri: hızlı ayrıştırıcılar eski BeautifulSoup ayrıştırmasıyla birebir aynı,
+eksik alanlarda aynı varsayılanlara düşer; etiketler tek geçişte bulunur.
+"""
+import json
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from benchmarks.bench_parsing import legacy_parse, methods, synthetic_page
+from webScraping import find_labels
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "all_engineering_curricula.json")
+SCRIPT = '<script>var x=1;</script><style>.a {color: red}</style>'
+
+COURSE = {
+    "course_code": "SE 302", "course_name": "Principles of Software Engineering", "semester": "Fall",
+    "theory_hours": "3", "lab_hours": "2", "local_credit": "4", "ects": "6", "prerequisites": "SE 115",
+    "type": "Required", "objectives": "Teach software process.", "description": "Requirements & design.",
+    "learning_outcomes": ["Apply UML", "Write tests"], "weekly_topics": ["Introduction", "Requirements"],
+    "evaluation_system": [{"activity": "Midterm", "count": "1", "weight_percent": "40"}],
+}
+
+
+def pages():
+    result = [("synthetic", synthetic_page(COURSE))]
+    # Etiket hücresinde ve kredi div'inde gömülü script / style: metne karışmamalı
+    result.append(("script in cells", synthetic_page(COURSE)
+                   .replace("<td colspan=\"5\">SE 115</td>", f"<td colspan=\"5\">SE 115{SCRIPT}</td>")
+                   .replace('<div id="ieu_credit">4</div>', f'<div id="ieu_credit">4{SCRIPT}</div>')))
+    result.append(("bytes", synthetic_page(COURSE).encode("utf-8")))
+    if os.path.exists(DATA_FILE):
+        with open(DATA_FILE, "r", encoding="utf-8") as f:
+            result += [(c["course_code"], synthetic_page(c)) for c in json.load(f)[:20]]
+    return result
+
+
+@pytest.mark.parametrize("name, parse", [(n, p) for n, p in methods().items() if not n.startswith("legacy")])
+def test_parsers_match_legacy_output(name, parse):
+    for page, html in pages():
+        assert parse(html) == legacy_parse(html), page
+
+
+def test_script_text_is_dropped():
+    html = pages()[1][1]
+    assert SCRIPT in html
+    for parse in methods().values():
+        details = parse(html)
+        assert details["prerequisites_text"] == "SE 115"
+        assert details["local_credit"] == "4"
+
+
+def test_parsed_fields():
+    for parse in methods().values():
+        details = parse(synthetic_page(COURSE))
+        assert details["evaluation_system"] == COURSE["evaluation_system"]
+        assert details["weekly_topics"] == ["Week 1: Introduction", "Week 2: Requirements"]
+        assert details["learning_outcomes"] == ["Apply UML", "Write tests"]
+        assert details["description"] == "Requirements & design."
+        assert (details["theory_hours"], details["lab_hours"], details["ects_confirmed"]) == ("3", "2", "6")
+
+
+def test_missing_sections_fall_back_to_defaults():
+    course = dict(COURSE, learning_outcomes=[], weekly_topics=[],
+                  evaluation_system=[{"activity": "Quiz", "count": "-", "weight_percent": "-"},
+                                     {"activity": "Final", "count": "1", "weight_percent": "0"}])
+    html = (synthetic_page(course)
+            .replace('<div id="ieu_credit">4</div>', "4")
+            .replace("<strong>Course Description</strong>", "<strong>Summary</strong>"))
+    for parse in methods().values():
+        details = parse(html)
+        assert details == legacy_parse(html)
+        assert (details["local_credit"], details["theory_hours"], details["lab_hours"]) == ("0", "0", "0")
+        assert details["evaluation_system"] == details["weekly_topics"] == details["learning_outcomes"] == []
+        assert details["description"] == "None" and details["objectives"] == "Teach software process."
+
+
+def test_find_labels_returns_first_match_per_label():
+    soup = BeautifulSoup("<p><strong>Course <em>Objectives</em></strong><strong>Prerequisites</strong>"
+                         "<strong>Course Objectives</strong><strong>Prerequisites (old)</strong></p>",
+                         "html.parser")
+    found = find_labels(soup, ["Course Objectives", "Prerequisites", "Prerequisite", "Course Description"])
+    assert found["Course Objectives"].string == "Course Objectives"
+    # "Prerequisite" aynı etiketin alt dizgisi: ilk <strong> her iki etikete de eşleşir
+    assert found["Prerequisites"] is found["Prerequisite"]
+    assert found["Prerequisites"].string == "Prerequisites"
+    assert "Course Description" not in found
@@ -0,0 +1,96 @@
+"""rag_profiling testleri: iki modda dosya ve en pahalı fonksiyonlar, mod adları, meşgul cProfile'da örneklemeye düşme."""
+import os
+import pstats
+import threading
+
+import pytest
+
+import rag_profiling
+from rag_profiling import RequestProfiler, profile_mode
+
+
+def hot_loop(iterations=1_000_000):
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total
+
+
+def cold_loop(iterations=1_000_000):
+    total = 0
+    for i in range(iterations):
+        total -= i
+    return total
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("cprofile", "cprofile"), ("PSTATS", "cprofile"), ("1", "cprofile"), (" sample ", "sample"),
+    ("sampling", "sample"), ("collapsed", "sample"), ("off", None), ("0", None), ("", None), (None, None),
+])
+def test_profile_mode(value, expected):
+    assert profile_mode(value) == expected
+
+
+def test_unknown_profile_mode_is_rejected():
+    with pytest.raises(ValueError):
+        profile_mode("perf")
+
+
+def test_cprofile_writes_pstats_and_ranks_self_time(tmp_path):
+    profiler = RequestProfiler("req-1", "cprofile", out_dir=str(tmp_path)).start()
+    hot_loop()
+    profile = profiler.stop()
+
+    assert profile.mode == "cprofile" and profile.path == os.path.join(str(tmp_path), "req-1.pstats")
+    assert "hot_loop" in profile.top[0]["function"] and profile.top[0]["calls"] == 1
+    assert profile.top[0]["self_ms"] <= profile.total_ms
+    assert any("hot_loop" in func for _, _, func in pstats.Stats(profile.path).stats)
+    # Kilit bırakıldı: sıradaki istek yine cProfile kullanabilir
+    assert RequestProfiler("req-2", "cprofile", out_dir=str(tmp_path)).start().stop().mode == "cprofile"
+
+
+def test_sample_writes_collapsed_stacks(tmp_path):
+    profiler = RequestProfiler("req/3 ?", "sample", out_dir=str(tmp_path), interval_s=0.001).start()
+    hot_loop()
+    profile = profiler.stop()
+
+    assert profile.mode == "sample" and os.path.basename(profile.path) == "req_3_.collapsed"
+    assert profile.samples > 0
+    assert profile.top[0]["function"].endswith("(hot_loop)")
+    with open(profile.path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profile.samples
+    # Yığınlar kökten yaprağa: çağıran test fonksiyonu hot_loop'tan hemen önce gelir
+    stacks = [line.rsplit(" ", 1)[0].split(";") for line in lines]
+    assert any(s[-1].endswith("(hot_loop)") and s[-2].endswith("(test_sample_writes_collapsed_stacks)")
+               for s in stacks)
+
+
+def test_concurrent_samplers_only_see_their_own_thread(tmp_path):
+    profiles = {}
+
+    def run(name, loop):
+        profiler = RequestProfiler(name, "sample", out_dir=str(tmp_path), interval_s=0.001).start()
+        loop()
+        profiles[name] = profiler.stop()
+
+    threads = [threading.Thread(target=run, args=("hot", hot_loop)),
+               threading.Thread(target=run, args=("cold", cold_loop))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    hot = {row["function"] for row in profiles["hot"].top}
+    cold = {row["function"] for row in profiles["cold"].top}
+    assert any(f.endswith("(hot_loop)") for f in hot) and not any(f.endswith("(cold_loop)") for f in hot)
+    assert any(f.endswith("(cold_loop)") for f in cold) and not any(f.endswith("(hot_loop)") for f in cold)
+
+
+def test_busy_cprofile_falls_back_to_sampling(tmp_path, capsys):
+    with rag_profiling._CPROFILE_LOCK:
+        profiler = RequestProfiler("busy", "cprofile", out_dir=str(tmp_path), interval_s=0.001).start()
+        hot_loop(100_000)
+        profile = profiler.stop()
+    assert profile.mode == "sample" and profile.path.endswith("busy.collapsed")
+    assert "örneklenecek" in capsys.readouterr().out
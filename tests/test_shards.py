@@ -0,0 +1,32 @@
+"""shards.ShardedCollection testleri: parça seçimi ve count()'un get() ile aynı kapsamı görmesi."""
+from types import SimpleNamespace
+
+import pytest
+
+from shards import ShardedCollection
+
+
+def stub_collection(name, ids):
+    return SimpleNamespace(name=name, embedding_function=None, count=lambda: len(ids),
+                           get=lambda **kwargs: {"ids": list(ids), "documents": [""] * len(ids),
+                                                 "metadatas": [{}] * len(ids)})
+
+
+@pytest.fixture
+def sharded():
+    layout = [("eng", "2025", True, "Software Engineering", ["a", "b"]),
+              ("eng", "2019", False, "Software Engineering", ["c", "d", "e"]),
+              ("arts", "2025", True, "Design", ["f"])]
+    shards = [{"faculty": faculty, "curriculum": curriculum, "default": default, "departments": [department],
+               "collection": f"{faculty}_{curriculum}"} for faculty, curriculum, default, department, _ in layout]
+    collections = [stub_collection(s["collection"], ids) for s, (*_, ids) in zip(shards, layout)]
+    return ShardedCollection(shards, collections)
+
+
+def test_select_without_curriculum_uses_default_versions(sharded):
+    assert [s["curriculum"] for s, _ in sharded.select(None)] == ["2025", "2025"]
+    assert [s["curriculum"] for s, _ in sharded.select({"curriculum": "2019"})] == ["2019"]
+
+
+def test_count_matches_unfiltered_get(sharded):
+    assert sharded.count() == len(sharded.get()["ids"]) == 3
@@ -0,0 +1,37 @@
+"""spell_correction.SpellCorrector testleri: yazım hataları düzelir, sözlük dışı geçerli kelimeler korunur."""
+import pytest
+
+from spell_correction import SpellCorrector
+
+WORDS = {"security": 12, "artificial": 9, "intelligence": 9, "programming": 20, "program": 15, "compiler": 3,
+         "computers": 9, "diodes": 5, "starts": 4, "reading": 6, "looking": 3, "robot": 24}
+
+
+@pytest.fixture
+def corrector():
+    return SpellCorrector(dict(WORDS))
+
+
+@pytest.mark.parametrize("typo, expected", [
+    ("securty", "security"), ("artifical", "artificial"), ("intelegence", "intelligence"),
+    ("programing", "programming"), ("robto", "robot"),
+])
+def test_typos_are_corrected(corrector, typo, expected):
+    assert corrector.lookup(typo) == expected
+
+
+@pytest.mark.parametrize("word", [
+    "compilers",  # compiler'ın çekimi (computers'a 2 harf uzak)
+    "drones",     # 7 harften kısa: diodes 2 harf uzak
+    "startup", "welding",
+    "cooking",    # looking'e 1 harf uzak ama ilk harf farklı
+    "robots",     # robot'un çekimi
+])
+def test_valid_out_of_vocabulary_words_are_kept(corrector, word):
+    assert corrector.lookup(word) == word
+
+
+def test_correct_keeps_codes_and_reports_changes(corrector):
+    text, corrections = corrector.correct("SE 115 securty courses on compilers")
+    assert text == "SE 115 security courses on compilers"
+    assert corrections == [("securty", "security")]
@@ -0,0 +1,21 @@
+"""rag_tracing testleri: sessiz izde ilerleme mesajları sadece o isteğin context'inde susar."""
+import threading
+
+from rag_tracing import finish_trace, progress, start_trace
+
+
+def test_progress_is_silenced_only_for_quiet_trace(capsys):
+    start_trace("loud")
+    progress("visible")
+    finish_trace()
+
+    start_trace("quiet", quiet=True)
+    progress("hidden")
+    # Başka thread'in (kendi izi olmayan) mesajları etkilenmez
+    other = threading.Thread(target=progress, args=("other thread",))
+    other.start()
+    other.join()
+    finish_trace()
+
+    progress("after")
+    assert capsys.readouterr().out.split("\n") == ["visible", "other thread", "after", ""]
@@ -1,117 +1,237 @@
+import hashlib
 import json
 import os
+import re
+from collections import Counter
 import chromadb
 from chromadb.utils import embedding_functions
 from dotenv import load_dotenv
+from course_store import is_store_fresh, open_course_store, store_path_for
 
 # 1. ORTAM DEĞİŞKENLERİNİ YÜKLE
 load_dotenv()
 
-api_key = os.getenv("CHROMA_API_KEY")
-tenant = os.getenv("CHROMA_TENANT")
-database = os.getenv("CHROMA_DATABASE")
-
-if not api_key:
-    print("HATA: .env dosyasında CHROMA_API_KEY bulunamadı.")
-    exit()
+COLLECTION_NAME = "engineering_courses"
+SECTION_COLLECTION_NAME = "engineering_course_sections"
+JSON_FILE = 'all_engineering_curricula.json'
+BATCH_SIZE = 50
+
+# Sayısal olarak saklanan (ve aralık filtresi uygulanabilen) alanlar
+NUMERIC_FIELDS = ("ects", "local_credit", "theory_hours", "lab_hours")
+
+# Ortak derslerde bölümden bölüme değişebilen (içerik özetine girmeyen) alanlar
+PLACEMENT_FIELDS = ("department", "semester", "type", "link")
+# Parça (shard) anahtarı: fakülte + müfredat sürümü. Bir parçada hepsi aynıdır, içerik özetine girmez
+# (böylece eski, bu alanları taşımayan veriyle id'ler değişmez). Alanı olmayan dersler varsayılan parçadadır.
+SHARD_FIELDS = ("faculty", "curriculum")
+DEFAULT_FACULTY = os.getenv("RAG_DEFAULT_FACULTY", "cs")
+DEFAULT_CURRICULUM = os.getenv("RAG_DEFAULT_CURRICULUM", "before_2025")
+# Çok değerli bölüm üyeliği: Chroma metadata'sı liste tutamadığı için bölüm başına bool bayrak
+DEPARTMENT_FLAG_PREFIX = "dept_"
+YEAR_FLAG_PREFIX = "year_"
+
+# Bölüm (section) parçaları bu kelime sayısını aşarsa satır satır bölünür
+SECTION_MAX_WORDS = 150
+SECTION_TITLES = {
+    "overview": "OVERVIEW",
+    "objectives": "OBJECTIVES",
+    "weekly_topics": "WEEKLY TOPICS",
+    "learning_outcomes": "LEARNING OUTCOMES",
+    "evaluation": "EVALUATION SYSTEM",
+}
+
+
+def load_course_data(json_file=JSON_FILE):
+    """
+    Scraper çıktısını okur ve ders listesini döner.
+    Yanında güncel bir ders deposu (.db, bkz. course_store.py) varsa JSON yerine oradan okunur;
+    kayıtlar dict gibi `.get()` desteklediği için aşağıdaki fonksiyonlar ikisiyle de çalışır.
+    Depo eski şemadaysa (açılamazsa) JSON okunur.
+    """
+    store_file = store_path_for(json_file)
+    store = open_course_store(store_file) if is_store_fresh(json_file, store_file) else None
+    if store is not None:
+        try:
+            return list(store)
+        finally:
+            store.close()
 
-print("🌐 Chroma Cloud'a bağlanılıyor...")
+    with open(json_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
-# 2. MODEL VE İSTEMCİ AYARLARI
-sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2"
-)
 
-try:
-    client = chromadb.CloudClient(
-        api_key=api_key,
-        tenant=tenant,
-        database=database
-    )
+# --- DOĞRULAMA VE NORMALİZASYON ---
+# Scraper her değeri metin olarak yazar; filtrelenecek alanlar burada tipine çevrilir.
 
-    # Temiz başlangıç: Eski koleksiyonu sil
+def to_number(value):
+    """'3', '3.5', '3,5' -> float; boş / '-' / 'Number' gibi değerler -> None."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
     try:
-        client.delete_collection("engineering_courses")
-        print("🧹 Eski koleksiyon silindi, temiz sayfa açılıyor.")
-    except:
-        pass  # Zaten yoksa hata vermesin
-
-    # Yeni koleksiyon oluştur
-    collection = client.create_collection(
-        name="engineering_courses",
-        embedding_function=sentence_transformer_ef
-    )
-    print("✅ Yeni 'engineering_courses' koleksiyonu oluşturuldu.")
-
-except Exception as e:
-    print(f"❌ Bağlantı Hatası: {e}")
-    exit()
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
 
-# 3. VERİ OKUMA VE HAZIRLIK
-json_file = 'all_engineering_curricula.json'
-
-try:
-    with open(json_file, 'r', encoding='utf-8') as f:
-        course_data = json.load(f)
-    print(f"📂 JSON yüklendi. İşlenecek ders sayısı: {len(course_data)}")
-except FileNotFoundError:
-    print("❌ JSON dosyası bulunamadı! Dosya adını kontrol et.")
-    exit()
 
-documents = []
-metadatas = []
-ids = []
+def format_number(value):
+    """6.0 -> '6', 2.5 -> '2.5'; sayı değilse olduğu gibi."""
+    return f"{value:g}" if isinstance(value, float) else str(value)
 
-print("🚀 Veriler işleniyor (Her detay dahil ediliyor)...")
-
-for index, course in enumerate(course_data):
-
-    # --- A. LİSTELERİ VE KARMAŞIK YAPILARI METNE ÇEVİRME ---
 
+def normalize_evaluation(evaluation_system):
+    """
+    Değerlendirme tablosunu tipli satırlara çevirir:
+    [{"activity": str, "count": int, "weight_percent": float}, ...]
+    Scraper'ın tablo başlığını da satır olarak aldığı ("Number" / "Weighting") kayıtlar atılır.
+    """
+    rows = []
+    for item in evaluation_system or []:
+        weight = to_number(item.get("weight_percent"))
+        if weight is None:
+            continue
+        count = to_number(item.get("count"))
+        rows.append({
+            "activity": str(item.get("activity", "")).strip(),
+            "count": int(count) if count is not None else 0,
+            "weight_percent": weight,
+        })
+    return rows
+
+
+def validate_course(course):
+    """Bir dersteki veri sorunlarını döner (boş liste = temiz). Yükleme sırasında özetlenir."""
+    issues = []
+    if not course.get('course_code'):
+        issues.append("course_code eksik")
+    for field in NUMERIC_FIELDS:
+        raw = course.get(field)
+        if raw not in (None, "") and to_number(raw) is None:
+            issues.append(f"{field} sayı değil: {raw!r}")
+    return issues
+
+
+def format_topics(course):
     # 1. Weekly Topics (Liste -> String)
     topics_list = course.get('weekly_topics', [])
     if isinstance(topics_list, list):
         # Her konuyu alt alta madde işaretiyle yaz
-        topics_str = "\n".join([f"  - {t}" for t in topics_list])
-    else:
-        topics_str = str(topics_list)
+        return "\n".join([f"  - {t}" for t in topics_list])
+    return str(topics_list)
+
 
+def format_outcomes(course):
     # 2. Learning Outcomes (Liste -> String)
     outcomes_list = course.get('learning_outcomes', [])
     if isinstance(outcomes_list, list):
-        outcomes_str = "\n".join([f"  - {o}" for o in outcomes_list])
-    else:
-        outcomes_str = str(outcomes_list)
+        return "\n".join([f"  - {o}" for o in outcomes_list])
+    return str(outcomes_list)
 
+
+def format_evaluation(course):
     # 3. Evaluation System (Liste içinde Sözlük -> Detaylı String)
-    # Örn: [{"activity": "Midterm", "count": 1, "weight_percent": 30}, ...]
-    eval_list = course.get('evaluation_system', [])
-    eval_str = ""
-    if isinstance(eval_list, list):
-        for item in eval_list:
-            activity = item.get('activity', 'Unknown Activity')
-            count = item.get('count', '-')
-            weight = item.get('weight_percent', '-')
-            eval_str += f"  - {activity}: Count ({count}), Weight (%{weight})\n"
-    elif eval_list:
-        eval_str = str(eval_list)
-    else:
-        eval_str = "  No evaluation information provided."
+    # Örn: [{"activity": "Midterm", "count": 1, "weight_percent": 30}, ...] — başlık satırı normalize edilirken atılır
+    eval_list = normalize_evaluation(course.get('evaluation_system'))
+    if not eval_list:
+        return "  No evaluation information provided."
+    return "".join(
+        f"  - {item['activity']}: Count ({item['count']}), Weight (%{format_number(item['weight_percent'])})\n"
+        for item in eval_list
+    )
+
+
+# --- ORTAK DERSLER (İÇERİK ÖZETİ İLE TEKİLLEŞTİRME) ---
+# MATH 153, SE 311 gibi dersler birden çok bölümün müfredatında aynı içerikle yer alır.
+# İçerik bir kez embed edilip saklanır; hangi bölümde hangi dönem/türde olduğu `placements`'ta durur.
+
+def content_hash(course):
+    """Dersin bölümden bağımsız içeriğinin özeti (bölüm, dönem, tür, link ve parça anahtarı hariç tüm alanlar)."""
+    content = course.to_dict() if hasattr(course, "to_dict") else dict(course)
+    for field in PLACEMENT_FIELDS + SHARD_FIELDS:
+        content.pop(field, None)
+    payload = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def group_shared_courses(course_data, dedup=True):
+    """
+    Dersleri içerik özetine göre gruplar: [[(index, course), ...], ...] (ilk görülme sırasıyla).
+    `dedup=False` ise her ders kendi grubundadır (eski, bölüm başına bir kayıt düzeni).
+    """
+    if not dedup:
+        return [[(index, course)] for index, course in enumerate(course_data)]
+
+    groups = {}
+    for index, course in enumerate(course_data):
+        groups.setdefault(content_hash(course), []).append((index, course))
+    return list(groups.values())
+
+
+def course_shard(course):
+    """Dersin parça anahtarı: ('cs', 'before_2025'). Eski verideki alansız dersler varsayılan parçadadır."""
+    return (str(course.get('faculty') or DEFAULT_FACULTY), str(course.get('curriculum') or DEFAULT_CURRICULUM))
+
+
+def department_flag(department):
+    """'Software Engineering' -> 'dept_software_engineering' (metadata'daki üyelik bayrağı)."""
+    return DEPARTMENT_FLAG_PREFIX + re.sub(r"[^a-z0-9]+", "_", str(department).lower()).strip("_")
+
+
+def year_flag(year):
+    """'3' -> 'year_3', 'Any' -> 'year_any' (metadata'daki yıl üyelik bayrağı)."""
+    return YEAR_FLAG_PREFIX + re.sub(r"[^a-z0-9]+", "_", str(year).lower()).strip("_")
+
+
+def build_placement(course):
+    """Dersin bir bölüm müfredatındaki yeri: {department, semester, year, type}."""
+    return {
+        "department": str(course.get('department', '')),
+        "semester": str(course.get('semester', '')),
+        "year": get_academic_year(course.get('semester', '')),
+        "type": str(course.get('type', '')),
+    }
+
+
+def format_placements(placements, field):
+    """Tüm bölümlerde aynıysa tek değer, değilse 'Bölüm: değer; ...' (dokümanlarda kullanılır)."""
+    values = [p[field] for p in placements]
+    if len(set(values)) == 1:
+        return values[0]
+    return "; ".join(f"{p['department']}: {p[field]}" for p in placements)
+
+
+def list_departments(placements):
+    return list(dict.fromkeys(p["department"] for p in placements))
+
+
+def build_course_document(course, placements=None):
+    """
+    Tek bir dersin LLM'in okuyacağı detaylı metin bloğunu üretir.
+    `placements` birden çok bölüm içeriyorsa (ortak ders) bölüm / dönem / tür satırları hepsini listeler.
+    """
+    placements = placements or [build_placement(course)]
+    departments = ", ".join(list_departments(placements))
+
+    # --- A. LİSTELERİ VE KARMAŞIK YAPILARI METNE ÇEVİRME ---
+    topics_str = format_topics(course)
+    outcomes_str = format_outcomes(course)
+    eval_str = format_evaluation(course)
 
     # --- B. TÜM DETAYLARI İÇEREN METİN BLOĞU (LLM BUNU OKUYACAK) ---
     # Burası LLM'in "Context" olarak göreceği kısımdır. Ne kadar düzenli olursa o kadar iyi anlar.
 
     text_content = f"""
     ================ COURSE DETAILS ================
-    DEPARTMENT: {course.get('department')}
+    DEPARTMENT: {departments}
     Course Code: {course.get('course_code', 'N/A')}
     Course Name: {course.get('course_name', 'N/A')}
-    Department: {course.get('department', 'N/A')}
+    Department: {departments or 'N/A'}
     Link: {course.get('link', 'N/A')}
 
     --- ACADEMIC INFO ---
-    Semester: {course.get('semester', 'N/A')}
-    Type: {course.get('type', 'N/A')}
+    Semester: {format_placements(placements, 'semester') or 'N/A'}
+    Type: {format_placements(placements, 'type') or 'N/A'}
     ECTS Credits: {course.get('ects', 'N/A')}
     Local Credit: {course.get('local_credit', 'N/A')}
 
@@ -136,57 +256,332 @@ for index, course in enumerate(course_data):
     {outcomes_str}
     ================================================
     """
-    sem_str = course.get('semester', '')
-    academic_year = "Unknown"
+    return text_content.strip()
+
+
+def get_academic_year(semester):
+    """'3. Year Fall Semester' -> '3', 'Elective Courses' -> 'Any'."""
+    sem_str = semester or ''
 
     if "1." in sem_str:
-        academic_year = "1"
+        return "1"
     elif "2." in sem_str:
-        academic_year = "2"
+        return "2"
     elif "3." in sem_str:
-        academic_year = "3"
+        return "3"
     elif "4." in sem_str:
-        academic_year = "4"
+        return "4"
     elif "Elective" in sem_str:
-        academic_year = "Any"
+        return "Any"
+    return "Unknown"
 
+
+def build_course_metadata(course, placements=None):
     # --- C. METADATA HAZIRLIĞI (FİLTRELEME İÇİN) ---
     # Sadece sayısal veya kesin filtreleme yapılacak alanları buraya alıyoruz.
     # Not: ChromaDB metadata değerleri string, int, float veya bool olmalıdır.
+    # department / semester / year / type ilk yerleşimi taşır (eski filtrelerle uyum);
+    # ortak derslerin tüm yerleşimleri `placements` (JSON) ve bölüm bayraklarındadır.
+    placements = placements or [build_placement(course)]
 
-    meta = {
+    metadata = {
         "course_code": str(course.get('course_code', '')),
+        "course_name": str(course.get('course_name', '')),
         "department": str(course.get('department', '')),
         "semester": str(course.get('semester', '')),
-        "year": academic_year,
+        "year": get_academic_year(course.get('semester', '')),
         "type": str(course.get('type', '')),
-        "ects": str(course.get('ects', '0')),
         "link": str(course.get('link', ''))
     }
+    # Parça anahtarı da metadata'da: parçalı koleksiyon (shards.py) sürüm filtresini buradan okur
+    metadata["faculty"], metadata["curriculum"] = course_shard(course)
+    # Kompakt ders özeti (course_digest.py) bu anahtarla bulunur
+    metadata["content_hash"] = content_hash(course)
+
+    # Sayısal alanlar float olarak saklanır: Chroma $gt/$lte karşılaştırmasını tipe göre yaptığından
+    # hepsi aynı tipte olmalı (filtre değerleri de _format_filters'ta float'a çevrilir).
+    # Değeri okunamayan alan hiç yazılmaz; aralık filtresi o dersi dışarıda bırakır.
+    for field in NUMERIC_FIELDS:
+        value = to_number(course.get(field))
+        if value is not None:
+            metadata[field] = value
+    if "theory_hours" in metadata and "lab_hours" in metadata:
+        metadata["weekly_hours"] = metadata["theory_hours"] + metadata["lab_hours"]
+
+    metadata["departments"] = ", ".join(list_departments(placements))
+    metadata["has_mandatory"] = any(p["type"] == "Mandatory" for p in placements)
+    metadata["placements"] = json.dumps(placements, ensure_ascii=False)
+    for department in list_departments(placements):
+        metadata[department_flag(department)] = True
+    # Yıl da bayrakla ön filtrelenir (ortak ders farklı bölümlerde farklı yılda olabilir)
+    for year in dict.fromkeys(p["year"] for p in placements):
+        metadata[year_flag(year)] = True
+
+    return metadata
+
+
+def build_records(course_data, dedup=True):
+    """
+    Tüm dersler için (documents, metadatas, ids) üçlüsünü hazırlar.
+    Hem Chroma Cloud yüklemesi hem de yerel (offline) koleksiyonlar bunu kullanır.
+    `dedup=True`: içeriği aynı olan ortak dersler tek kayıt olur (id'si içerik özetinden, build_course_id).
+    """
+    documents = []
+    metadatas = []
+    ids = []
+
+    invalid = 0
+    taken = Counter()
+    for members in group_shared_courses(course_data, dedup):
+        _, course = members[0]
+        issues = validate_course(course)
+        if issues:
+            invalid += 1
+            print(f"   ⚠️ {course.get('department')} {course.get('course_code')}: {'; '.join(issues)}")
+        placements = [build_placement(c) for _, c in members]
+        documents.append(build_course_document(course, placements))
+        metadatas.append(build_course_metadata(course, placements))
+        ids.append(build_course_id(course, taken))
+
+    if invalid:
+        print(f"   ⚠️ {invalid} derste veri sorunu var (sayısal alanlar metadata'ya yazılmadı).")
+    return documents, metadatas, ids
+
+
+def build_course_id(course, taken):
+    # Kalıcı ID: Dept_Code_<içerik özeti>. Satır sırasına bağlı değil; JSON'a ders eklenip çıkarılınca
+    # diğer kayıtların id'si kaymaz (artımlı indeks güncellemesi: hnsw_index.sync_collection).
+    # Aynı bölümde aynı kod ve içerik tekrar ederse (dedup kapalı, ELEC kutuları) sıra numarası eklenir.
+    base = f"{course.get('department')}_{course.get('course_code')}_{content_hash(course)[:10]}"
+    taken[base] += 1
+    return base if taken[base] == 1 else f"{base}_{taken[base]}"
+
+
+def build_section_texts(course, placements=None, fields=None):
+    """
+    Dersi bölümlerine ayırır: {bölüm adı: metin}. Boş bölümler atlanır.
+    `fields` verilirse sadece o bölümler döner (alan projeksiyonu, field_projection.py).
+    """
+    placements = placements or [build_placement(course)]
+    overview = "\n".join([
+        f"Department: {', '.join(list_departments(placements)) or 'N/A'}",
+        f"Semester: {format_placements(placements, 'semester') or 'N/A'} | "
+        f"Type: {format_placements(placements, 'type') or 'N/A'}",
+        f"ECTS: {course.get('ects', 'N/A')} | Local Credit: {course.get('local_credit', 'N/A')} | "
+        f"Theory Hours: {course.get('theory_hours', 'N/A')} | Lab Hours: {course.get('lab_hours', 'N/A')}",
+        f"Prerequisites: {course.get('prerequisites', 'None')}",
+        f"Description: {course.get('description', 'N/A')}",
+    ])
+
+    sections = {
+        "overview": overview,
+        "objectives": str(course.get('objectives') or '').strip(),
+        "weekly_topics": format_topics(course).strip() if course.get('weekly_topics') else "",
+        "learning_outcomes": format_outcomes(course).strip() if course.get('learning_outcomes') else "",
+        "evaluation": format_evaluation(course).strip() if normalize_evaluation(course.get('evaluation_system')) else "",
+    }
+    return {name: text for name, text in sections.items()
+            if text and text != "N/A" and (fields is None or name in fields)}
+
+
+def split_section(text, max_words=SECTION_MAX_WORDS):
+    """Uzun bölümü satır sınırlarından (gerekirse kelimeden) `max_words` altındaki parçalara böler."""
+    # Tek başına sınırı aşan satırlar önce kelime gruplarına ayrılır
+    lines = []
+    for line in text.splitlines():
+        words = line.split()
+        for start in range(0, len(words), max_words):
+            lines.append(" ".join(words[start:start + max_words]) if len(words) > max_words else line.strip())
+
+    parts, current, count = [], [], 0
+    for line in lines:
+        n_words = len(line.split())
+        if current and count + n_words > max_words:
+            parts.append("\n".join(current))
+            current, count = [], 0
+        current.append(line)
+        count += n_words
+    if current:
+        parts.append("\n".join(current))
+    return parts
+
+
+def build_section_records(course_data, dedup=True):
+    """
+    Bölüm seviyesinde (overview, objectives, weekly topics, outcomes, evaluation) parçalar.
+    Her parça ayrı embed edilir ve `parent_id` ile ait olduğu ders kaydına bağlanır
+    (ortak dersler build_records'taki gibi bir kez parçalanır).
+    """
+    documents = []
+    metadatas = []
+    ids = []
 
-    documents.append(text_content.strip())
-    metadatas.append(meta)
-    # Benzersiz ID: Dept_Code_Index (Index ekledik ki aynı kodlu ders varsa çakışmasın)
-    ids.append(f"{course.get('department')}_{course.get('course_code')}_{index}")
+    taken = Counter()
+    for members in group_shared_courses(course_data, dedup):
+        _, course = members[0]
+        placements = [build_placement(c) for _, c in members]
+        parent_id = build_course_id(course, taken)
+        base_meta = build_course_metadata(course, placements)
+        # Her parçanın başında ders kimliği olsun ki tek başına embed edildiğinde de bağlamı korunsun
+        prefix = f"{course.get('course_code', '')} {course.get('course_name', '')}"
 
+        for section, text in build_section_texts(course, placements).items():
+            for part, chunk in enumerate(split_section(text)):
+                documents.append(f"{prefix} - {SECTION_TITLES[section]}:\n{chunk}")
+                metadatas.append({**base_meta, "parent_id": parent_id, "section": section, "part": part})
+                ids.append(f"{parent_id}#{section}-{part}")
+
+    return documents, metadatas, ids
+
+
+def upload_records(collection, documents, metadatas, ids, batch_size=BATCH_SIZE):
     # --- D. PARÇA PARÇA YÜKLEME (BATCH UPLOAD) ---
-    if len(documents) >= 50:
+    for start in range(0, len(documents), batch_size):
+        end = start + batch_size
         collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+            ids=ids[start:end]
         )
-        print(f"   -> {index + 1} ders yüklendi...")
-        documents = []
-        metadatas = []
-        ids = []
-
-# Kalan son paket
-if documents:
-    collection.add(
-        documents=documents,
-        metadatas=metadatas,
-        ids=ids
+        print(f"   -> {min(end, len(documents))} ders yüklendi...")
+
+
+def upload_shard(client, shard, courses, embedding_function):
+    """Tek parçanın ders + bölüm koleksiyonlarını silip yeniden yükler (diğer parçalara dokunmaz)."""
+    for name, build in ((shard["collection"], build_records), (shard["section_collection"], build_section_records)):
+        try:
+            client.delete_collection(name)
+            print(f"🧹 Eski '{name}' koleksiyonu silindi.")
+        except Exception:
+            pass  # Zaten yoksa hata vermesin
+        collection = client.create_collection(name=name, embedding_function=embedding_function)
+        documents, metadatas, ids = build(courses)
+        upload_records(collection, documents, metadatas, ids)
+        print(f"   -> '{name}': {len(courses)} ders satırından {len(ids)} kayıt.")
+
+
+def main():
+    import argparse
+    from shards import (build_shard_manifest, carry_over_digests, default_shard_courses, group_by_shard,
+                        load_shard_manifest, open_sharded_collection, save_shard_manifest, select_shards,
+                        shard_label, shards_path_for)
+
+    parser = argparse.ArgumentParser(description="Ders verisini fakülte / müfredat sürümü parçalarına yükler")
+    parser.add_argument("--shard", action="append", default=[],
+                        help="Sadece bu parçayı yeniden kur, örn. 'cs/2025' (tekrarlanabilir)")
+    parser.add_argument("--all", action="store_true", help="İçeriği değişmemiş parçaları da yeniden yükle")
+    parser.add_argument("--llm-digests", action="store_true",
+                        help="Ders özetlerinin açıklama satırını toplu LLM özetiyle yaz (Groq gerekir)")
+    args = parser.parse_args()
+
+    api_key = os.getenv("CHROMA_API_KEY")
+    tenant = os.getenv("CHROMA_TENANT")
+    database = os.getenv("CHROMA_DATABASE")
+
+    if not api_key:
+        print("HATA: .env dosyasında CHROMA_API_KEY bulunamadı.")
+        exit()
+
+    print("🌐 Chroma Cloud'a bağlanılıyor...")
+
+    # 2. MODEL VE İSTEMCİ AYARLARI
+    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name="all-MiniLM-L6-v2"
     )
 
-print(f"\n🎉 İŞLEM TAMAMLANDI! Toplam {len(course_data)} ders tüm detaylarıyla yüklendi.")
\ No newline at end of file
+    try:
+        client = chromadb.CloudClient(
+            api_key=api_key,
+            tenant=tenant,
+            database=database
+        )
+    except Exception as e:
+        print(f"❌ Bağlantı Hatası: {e}")
+        exit()
+
+    # 3. VERİ OKUMA VE HAZIRLIK
+    try:
+        course_data = load_course_data(JSON_FILE)
+        print(f"📂 JSON yüklendi. İşlenecek ders sayısı: {len(course_data)}")
+    except FileNotFoundError:
+        print("❌ JSON dosyası bulunamadı! Dosya adını kontrol et.")
+        exit()
+
+    # 4. PARÇALAR: her (fakülte, müfredat sürümü) kendi ders + bölüm koleksiyonunda
+    manifest = build_shard_manifest(course_data)
+    previous = load_shard_manifest(JSON_FILE)
+    try:
+        if args.shard:
+            targets = select_shards(manifest, args.shard)
+        else:
+            old_digests = {s["collection"]: s.get("digest") for s in (previous or {}).get("shards", [])}
+            targets = [s for s in manifest["shards"] if args.all or old_digests.get(s["collection"]) != s["digest"]]
+    except ValueError as e:
+        print(f"❌ {e}")
+        exit()
+
+    groups = group_by_shard(course_data)
+    print(f"🚀 {len(manifest['shards'])} parçadan {len(targets)} tanesi yeniden yüklenecek "
+          f"(değişmeyenler atlanır)...")
+    for shard in targets:
+        print(f"🧩 Parça {shard_label((shard['faculty'], shard['curriculum']))}: {', '.join(shard['departments'])}")
+        upload_shard(client, shard, groups[(shard["faculty"], shard["curriculum"])], sentence_transformer_ef)
+
+    # Veriden düşen parçaların koleksiyonları silinir
+    current = {s["collection"] for s in manifest["shards"]}
+    for stale in (previous or {}).get("shards", []):
+        if stale["collection"] not in current:
+            for name in (stale["collection"], stale["section_collection"]):
+                try:
+                    client.delete_collection(name)
+                    print(f"🧹 Artık olmayan parça koleksiyonu silindi: '{name}'")
+                except Exception:
+                    pass
+
+    carry_over_digests(manifest, previous, {s["collection"] for s in targets})
+    save_shard_manifest(manifest, JSON_FILE)
+    print(f"🗂️ Parça manifesti kaydedildi: {shards_path_for(JSON_FILE)}")
+
+    # Bölüm bazlı türetilmiş çıktılar varsayılan (güncel) müfredat sürümünden kurulur; sürümler karışmaz
+    current_courses = default_shard_courses(course_data)
+
+    # Ön koşul grafiği (yerel dosya; retriever mikrosaniyede sorgular)
+    from prerequisite_graph import build_prerequisite_graph, graph_path_for
+    graph = build_prerequisite_graph(JSON_FILE, current_courses)
+    print(f"🔗 Ön koşul grafiği kaydedildi: {graph_path_for(JSON_FILE)} ({len(graph.nodes)} ders)")
+
+    # Müfredat listeleri (list_curriculum soruları koleksiyona gitmeden cevaplanır)
+    from curriculum_views import build_curriculum_views, views_path_for
+    views = build_curriculum_views(JSON_FILE, current_courses)
+    print(f"📋 Müfredat görünümleri kaydedildi: {views_path_for(JSON_FILE)} ({len(views)} görünüm)")
+
+    # Sorgu yazım düzeltmesi için kelime hazinesi
+    from spell_correction import build_spell_corrector, spell_path_for
+    corrector = build_spell_corrector(JSON_FILE, current_courses)
+    print(f"✏️ Yazım düzeltme indeksi kaydedildi: {spell_path_for(JSON_FILE)} ({len(corrector)} kelime)")
+
+    # Kompakt ders özetleri (Generator'ın varsayılan context'i): tüm parçalar, içerik özetine göre
+    from course_digest import LLMSummarizer, build_course_digests, digests_path_for
+    summarizer = LLMSummarizer() if args.llm_digests else None
+    digests = build_course_digests(JSON_FILE, course_data, summarizer=summarizer,
+                                   model=summarizer.model_name if summarizer else "")
+    print(f"📝 Ders özetleri kaydedildi: {digests_path_for(JSON_FILE)} ({len(digests)} ders)")
+
+    # Alan dışı soru kısa devresi: ders embedding'leri + bölüm merkezleri, etiketli kümeyle kalibre eşik
+    # (parçalı koleksiyonun varsayılan sürüm parçalarından)
+    from domain_guard import build_domain_guard, domain_path_for
+    collection = open_sharded_collection(
+        manifest, lambda name: client.get_collection(name=name, embedding_function=sentence_transformer_ef))
+    guard = build_domain_guard(collection, sentence_transformer_ef, JSON_FILE, model="all-MiniLM-L6-v2")
+    print(f"🛡️ Alan kontrolü kaydedildi: {domain_path_for(JSON_FILE)} (eşik {guard.threshold})")
+
+    # Yerel HNSW indeksi kullanılıyorsa (RAG_INDEX_BACKEND=hnsw) parça başına sadece fark uygulanır
+    from hnsw_index import hnsw_enabled, sync_hnsw_collections
+    if hnsw_enabled(JSON_FILE, manifest):
+        sync_hnsw_collections(JSON_FILE, sentence_transformer_ef, course_data, manifest)
+
+    print(f"\n🎉 İŞLEM TAMAMLANDI! Toplam {len(course_data)} ders tüm detaylarıyla yüklendi.")
+
+
+if __name__ == "__main__":
+    main()
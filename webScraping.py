@@ -1,14 +1,33 @@
+import argparse
 import requests
 from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
 import json
+import os
 import time
 import re
+from urllib.parse import parse_qs, urljoin, urlparse
+
+from course_store import build_course_store, store_path_for
+
+try:
+    import lxml.etree
+    import lxml.html  # C tabanlı ayrıştırıcı; yoksa BeautifulSoup + saf Python html.parser
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+try:
+    from bs4.filter import ElementFilter  # beautifulsoup4 >= 4.13
+except ImportError:
+    ElementFilter = None
 
 # --- AYARLAR VE LİNKLER ---
 BASE_URL = "https://ects.ieu.edu.tr/new/"
 
-# Taranacak Bölümler Listesi
-# İsimleri ve URL'leri buraya ekliyoruz. Kod sırayla hepsini gezecek.
+# Tohum Bölümler Listesi
+# Keşif (discover_programs) bu sayfalardan başlar: sayfalardaki akademik.php bağlantılarından diğer
+# bölümler ve müfredat sürümleri bulunur. Ağ yoksa / keşif kapalıysa sadece bunlar taranır.
 DEPARTMENTS = [
     {
         "name": "Software Engineering",
@@ -29,100 +48,368 @@ DEPARTMENTS = [
 ]
 
 
+# Keşif ayarları
+PROGRAM_PAGE = "akademik.php"
+CURRICULUM_SID_PREFIX = "curr_"
+DEFAULT_SID = "curr_before_2025"
+MAX_DISCOVERY_PAGES = 200
+OUTPUT_FILE = 'all_engineering_curricula.json'
+
+
+# Ders sayfasında okunan alt ağaçlar: bu id'lere sahip elemanlar ve etiket hücrelerinin satırları (<tr>).
+# Geri kalanı (head, menü, script, program çıktıları matrisi, alt bilgi) ağaca hiç girmez.
+DETAIL_IDS = frozenset({"ieu_credit", "ects_credit", "semester", "weekly_hours", "app_hours",
+                        "evaluation_table1", "outcome", "weeks"})
+DETAIL_LABELS = {
+    "objectives": ("Course Objectives",),
+    "description": ("Course Description",),
+    "prerequisites_text": ("Prerequisites", "Prerequisite"),
+}
+
+
+if ElementFilter is not None:
+    class DetailStrainer(ElementFilter):
+        """parse_only: sadece DETAIL_IDS elemanları ve tablo satırları (içerikleriyle) oluşturulur."""
+
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return name == "tr" or (attrs or {}).get("id") in DETAIL_IDS
+
+        def allow_string_creation(self, string):
+            return False
+
+    DETAIL_STRAINER = DetailStrainer()
+else:
+    DETAIL_STRAINER = None
+
+
 def clean_text(text):
     if text:
         return re.sub(r'\s+', ' ', text).strip()
     return ""
 
 
+def program_url(section, sid):
+    return f"{BASE_URL}{PROGRAM_PAGE}?section={section}&sid={sid}&lang=en"
+
+
+def faculty_of(section):
+    """'se.cs.ieu.edu.tr' -> 'cs' (bölüm alan adındaki fakülte etiketi)."""
+    labels = section.split(".")
+    return labels[1] if len(labels) > 2 else labels[0]
+
+
+def curriculum_version(sid):
+    """'curr_before_2025' -> 'before_2025' (router ve parça adlarında kullanılan sürüm adı)."""
+    return sid[len(CURRICULUM_SID_PREFIX):] if sid.startswith(CURRICULUM_SID_PREFIX) else sid
+
+
+def parse_program_link(href, base=BASE_URL):
+    """akademik.php bağlantısından (section, sid); bölüm sayfası değilse None."""
+    url = urlparse(urljoin(base, href))
+    if not url.path.endswith(PROGRAM_PAGE):
+        return None
+    query = parse_qs(url.query)
+    section = (query.get("section") or [""])[0].strip().lower()
+    if not section:
+        return None
+    return section, (query.get("sid") or [""])[0].strip()
+
+
+def make_program(name, section, sid):
+    return {"name": name, "section": section, "faculty": faculty_of(section),
+            "curriculum": curriculum_version(sid), "url": program_url(section, sid)}
+
+
+def seed_programs(seeds=DEPARTMENTS):
+    """Keşif yapmadan tohum listesindeki bölüm sayfaları."""
+    programs = []
+    for seed in seeds:
+        section, sid = parse_program_link(seed["url"])
+        programs.append(make_program(seed["name"], section, sid or DEFAULT_SID))
+    return programs
+
+
+def discover_programs(seeds=DEPARTMENTS, max_pages=MAX_DISCOVERY_PAGES):
+    """
+    Tohum bölüm sayfalarından başlayarak bölüm ve müfredat sürümü sayfalarını bulur:
+    [{"name", "section", "faculty", "curriculum", "url"}, ...].
+
+    - Sayfadaki her akademik.php bağlantısı bir bölüm (section) bildirir; yeni bölümün varsayılan
+      sürüm sayfası (DEFAULT_SID) kuyruğa girer, bağlantı metni bölüm adı olur,
+    - 'sid=curr_*' bağlantıları o bölümün müfredat sürümleridir (sürüm sekmeleri) ve kuyruğa girer,
+    - Sadece müfredat tablosu (table-bordered) içeren sayfalar program sayılır.
+    Hiçbir sayfa okunamazsa (ağ yok) tohum listesi döner.
+    """
+    names = {}
+    queue = []
+    for program in seed_programs(seeds):
+        names[program["section"]] = program["name"]
+        queue.append((program["section"], program["url"]))
+
+    programs = {}
+    queued = {url for _, url in queue}
+    fetched = 0
+    while queue and fetched < max_pages:
+        section, url = queue.pop(0)
+        try:
+            response = requests.get(url, timeout=12)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"  Keşif: sayfa okunamadı ({url}): {e}")
+            continue
+        fetched += 1
+        soup = BeautifulSoup(response.content, 'html.parser')
+
+        _, sid = parse_program_link(url)
+        if soup.find("table", class_="table-bordered"):
+            programs[(section, sid)] = make_program(names.get(section, section), section, sid)
+
+        for link in soup.find_all("a", href=True):
+            parsed = parse_program_link(link["href"], url)
+            if not parsed:
+                continue
+            linked_section, linked_sid = parsed
+            text = clean_text(link.get_text())
+            if linked_section not in names:
+                names[linked_section] = text or linked_section
+                linked_sid = linked_sid if linked_sid.startswith(CURRICULUM_SID_PREFIX) else DEFAULT_SID
+            elif not linked_sid.startswith(CURRICULUM_SID_PREFIX):
+                continue
+            linked_url = program_url(linked_section, linked_sid)
+            if linked_url not in queued:
+                queued.add(linked_url)
+                queue.append((linked_section, linked_url))
+
+    if not fetched:
+        print("  Keşif yapılamadı, tohum bölüm listesi kullanılacak.")
+        return seed_programs(seeds)
+    print(f"  Keşif: {fetched} sayfa gezildi, {len(programs)} bölüm / sürüm sayfası bulundu.")
+    return list(programs.values())
+
+
+def find_labels(soup, labels):
+    """
+    Etiket -> metninde etiketi içeren ilk <strong> (belge sırasıyla). Tüm <strong>'lar tek geçişte taranır
+    (her etiket için ayrı `find(string=...)` taraması yerine).
+    """
+    found = {}
+    for tag in soup.find_all("strong"):
+        text = tag.string
+        if not text:
+            continue
+        for label in labels:
+            if label not in found and label in text:
+                found[label] = tag
+        if len(found) == len(labels):
+            break
+    return found
+
+
+def parse_course_details(html, parser=HTML_PARSER):
+    """
+    Ders sayfasının HTML'inden detaylar (Evaluation, Lab/Theory, Objectives vb.); sayfa beklenmeyen
+    yapıdaysa hata fırlatır (get_course_details None döner). Çıktı iki yolda da aynıdır
+    (benchmarks/bench_parsing.py ile doğrulanır):
+      - lxml: sayfa C'de ağaca çevrilir, alanlar doğrudan lxml üzerinden okunur (Python'da eleman başına iş yok),
+      - html.parser: BeautifulSoup ağacına sadece gereken alt ağaçlar girer (DETAIL_STRAINER).
+    """
+    if parser == "lxml":
+        return _parse_details_lxml(html)
+    return _parse_details_soup(html, parser)
+
+
+def _lxml_text(element):
+    return clean_text(element.text_content())
+
+
+def _lxml_string(element):
+    """BeautifulSoup `Tag.string` karşılığı: tek çocuklu zincirin metni, yoksa None."""
+    while True:
+        children = list(element)
+        if not children:
+            return element.text
+        if len(children) > 1 or element.text or children[0].tail:
+            return None
+        element = children[0]
+        if not isinstance(element.tag, str):  # yorum
+            return element.text
+
+
+def _parse_details_lxml(html):
+    if isinstance(html, bytes):
+        # Kod çözme eski yol (BeautifulSoup) ile aynı: bildirilen / tespit edilen kodlama
+        html = UnicodeDammit(html, is_html=True).unicode_markup
+    root = lxml.html.fromstring(html)
+    # text_content() <script> / <style> metnini de döner; BeautifulSoup get_text() dönmez ("SE 115var x=1;")
+    lxml.etree.strip_elements(root, "script", "style", with_tail=False)
+
+    def by_id(tag, element_id):
+        return root.find(f".//{tag}[@id='{element_id}']")
+
+    details = {}
+
+    # 1. Metadata ve Saatler
+    try:
+        details['local_credit'] = _lxml_text(by_id("div", "ieu_credit"))
+        ects_div = by_id("div", "ects_credit")
+        details['ects_confirmed'] = _lxml_text(ects_div) if ects_div is not None else ""
+
+        sem_div = by_id("div", "semester")
+        details['semester_detail'] = _lxml_text(sem_div) if sem_div is not None else ""
+
+        theo_div = by_id("div", "weekly_hours")
+        details['theory_hours'] = _lxml_text(theo_div) if theo_div is not None else "0"
+
+        lab_div = by_id("div", "app_hours")
+        details['lab_hours'] = _lxml_text(lab_div) if lab_div is not None else "0"
+    except AttributeError:
+        details.update({'local_credit': "0", 'ects_confirmed': "0", 'theory_hours': "0", 'lab_hours': "0"})
+
+    # 2. Değerlendirme Sistemi (Evaluation)
+    evaluation_data = []
+    eval_table = by_id("table", "evaluation_table1")
+    if eval_table is not None:
+        for row in eval_table.iter("tr"):
+            cols = list(row.iter("td"))
+            if len(cols) >= 3:
+                percentage = _lxml_text(cols[2])
+                if percentage and percentage not in ["-", "0", ""]:
+                    evaluation_data.append({
+                        "activity": _lxml_text(cols[0]),
+                        "count": _lxml_text(cols[1]),
+                        "weight_percent": percentage
+                    })
+    details['evaluation_system'] = evaluation_data
+
+    # 3. Metin İçerikler (tüm <strong>'lar tek geçişte)
+    all_labels = [label for label_list in DETAIL_LABELS.values() for label in label_list]
+    labels = {}
+    for tag in root.iter("strong"):
+        text = _lxml_string(tag)
+        if not text:
+            continue
+        for label in all_labels:
+            if label not in labels and label in text:
+                labels[label] = tag
+        if len(labels) == len(all_labels):
+            break
+    for key, label_list in DETAIL_LABELS.items():
+        details[key] = "None"
+        for label in label_list:
+            tag = labels.get(label)
+            if tag is not None:
+                label_td = next(tag.iterancestors("td"), None)
+                details[key] = _lxml_text(next(label_td.itersiblings("td"), None))
+                break
+
+    # 4. Çıktılar ve Haftalık Konular
+    ul_tag = by_id("ul", "outcome")
+    details['learning_outcomes'] = [_lxml_text(li) for li in ul_tag.iter("li")] if ul_tag is not None else []
+
+    weekly_topics = []
+    weeks_table = by_id("table", "weeks")
+    if weeks_table is not None:
+        for row in weeks_table.iter("tr"):
+            if not (row.get("id") or "").startswith('hafta_'):
+                continue
+            cols = list(row.iter("td"))
+            if len(cols) >= 2:
+                weekly_topics.append(f"Week {_lxml_text(cols[0])}: {_lxml_text(cols[1])}")
+    details['weekly_topics'] = weekly_topics
+    return details
+
+
+def _parse_details_soup(html, parser):
+    soup = BeautifulSoup(html, parser, parse_only=DETAIL_STRAINER)
+    details = {}
+
+    # 1. Metadata ve Saatler
+    try:
+        details['local_credit'] = clean_text(soup.find("div", id="ieu_credit").get_text())
+        ects_div = soup.find("div", id="ects_credit")
+        details['ects_confirmed'] = clean_text(ects_div.get_text()) if ects_div else ""
+
+        sem_div = soup.find("div", id="semester")
+        details['semester_detail'] = clean_text(sem_div.get_text()) if sem_div else ""
+
+        theo_div = soup.find("div", id="weekly_hours")
+        details['theory_hours'] = clean_text(theo_div.get_text()) if theo_div else "0"
+
+        lab_div = soup.find("div", id="app_hours")
+        details['lab_hours'] = clean_text(lab_div.get_text()) if lab_div else "0"
+    except AttributeError:
+        details.update({'local_credit': "0", 'ects_confirmed': "0", 'theory_hours': "0", 'lab_hours': "0"})
+
+    # 2. Değerlendirme Sistemi (Evaluation)
+    evaluation_data = []
+    eval_table = soup.find("table", id="evaluation_table1")
+    if eval_table:
+        rows = eval_table.find_all("tr")
+        for row in rows:
+            cols = row.find_all("td")
+            if len(cols) >= 3:
+                activity_name = clean_text(cols[0].get_text())
+                count = clean_text(cols[1].get_text())
+                percentage = clean_text(cols[2].get_text())
+                if percentage and percentage not in ["-", "0", ""]:
+                    evaluation_data.append({
+                        "activity": activity_name,
+                        "count": count,
+                        "weight_percent": percentage
+                    })
+    details['evaluation_system'] = evaluation_data
+
+    # 3. Metin İçerikler (etiket hücreleri tek geçişte)
+    labels = find_labels(soup, [label for label_list in DETAIL_LABELS.values() for label in label_list])
+    for key, label_list in DETAIL_LABELS.items():
+        details[key] = "None"
+        for label in label_list:
+            tag = labels.get(label)
+            if tag:
+                content_td = tag.find_parent("td").find_next_sibling("td")
+                details[key] = clean_text(content_td.get_text())
+                break
+
+    # 4. Çıktılar ve Haftalık Konular
+    outcomes_list = []
+    ul_tag = soup.find("ul", id="outcome")
+    if ul_tag:
+        li_tags = ul_tag.find_all("li")
+        outcomes_list = [clean_text(li.get_text()) for li in li_tags]
+    details['learning_outcomes'] = outcomes_list
+
+    weekly_topics = []
+    weeks_table = soup.find("table", id="weeks")
+    if weeks_table:
+        rows = weeks_table.find_all("tr", id=lambda x: x and x.startswith('hafta_'))
+        for row in rows:
+            cols = row.find_all("td")
+            if len(cols) >= 2:
+                week_num = clean_text(cols[0].get_text())
+                topic = clean_text(cols[1].get_text())
+                weekly_topics.append(f"Week {week_num}: {topic}")
+
+    details['weekly_topics'] = weekly_topics
+    return details
+
+
 def get_course_details(course_url):
     """
     Ders detaylarını (Evaluation, Lab/Theory, Objectives vb.) çeker.
     """
     try:
         response = requests.get(course_url, timeout=12)  # Timeout biraz arttırıldı
-        soup = BeautifulSoup(response.content, 'html.parser')
-        details = {}
-
-        # 1. Metadata ve Saatler
-        try:
-            details['local_credit'] = clean_text(soup.find("div", id="ieu_credit").get_text())
-            ects_div = soup.find("div", id="ects_credit")
-            details['ects_confirmed'] = clean_text(ects_div.get_text()) if ects_div else ""
-
-            sem_div = soup.find("div", id="semester")
-            details['semester_detail'] = clean_text(sem_div.get_text()) if sem_div else ""
-
-            theo_div = soup.find("div", id="weekly_hours")
-            details['theory_hours'] = clean_text(theo_div.get_text()) if theo_div else "0"
-
-            lab_div = soup.find("div", id="app_hours")
-            details['lab_hours'] = clean_text(lab_div.get_text()) if lab_div else "0"
-        except AttributeError:
-            details.update({'local_credit': "0", 'ects_confirmed': "0", 'theory_hours': "0", 'lab_hours': "0"})
-
-        # 2. Değerlendirme Sistemi (Evaluation)
-        evaluation_data = []
-        eval_table = soup.find("table", id="evaluation_table1")
-        if eval_table:
-            rows = eval_table.find_all("tr")
-            for row in rows:
-                cols = row.find_all("td")
-                if len(cols) >= 3:
-                    activity_name = clean_text(cols[0].get_text())
-                    count = clean_text(cols[1].get_text())
-                    percentage = clean_text(cols[2].get_text())
-                    if percentage and percentage not in ["-", "0", ""]:
-                        evaluation_data.append({
-                            "activity": activity_name,
-                            "count": count,
-                            "weight_percent": percentage
-                        })
-        details['evaluation_system'] = evaluation_data
-
-        # 3. Metin İçerikler
-        def get_text_by_label(label_list):
-            for label in label_list:
-                tag = soup.find("strong", string=lambda t: t and label in t)
-                if tag:
-                    content_td = tag.find_parent("td").find_next_sibling("td")
-                    return clean_text(content_td.get_text())
-            return "None"
-
-        details['objectives'] = get_text_by_label(["Course Objectives"])
-        details['description'] = get_text_by_label(["Course Description"])
-        details['prerequisites_text'] = get_text_by_label(["Prerequisites", "Prerequisite"])
-
-        # 4. Çıktılar ve Haftalık Konular
-        outcomes_list = []
-        ul_tag = soup.find("ul", id="outcome")
-        if ul_tag:
-            li_tags = ul_tag.find_all("li")
-            outcomes_list = [clean_text(li.get_text()) for li in li_tags]
-        details['learning_outcomes'] = outcomes_list
-
-        weekly_topics = []
-        weeks_table = soup.find("table", id="weeks")
-        if weeks_table:
-            rows = weeks_table.find_all("tr", id=lambda x: x and x.startswith('hafta_'))
-            for row in rows:
-                cols = row.find_all("td")
-                if len(cols) >= 2:
-                    week_num = clean_text(cols[0].get_text())
-                    topic = clean_text(cols[1].get_text())
-                    weekly_topics.append(f"Week {week_num}: {topic}")
-
-        details['weekly_topics'] = weekly_topics
-        return details
+        return parse_course_details(response.content)
 
     except Exception as e:
         print(f"!!! Hata ({course_url}): {e}")
         return None
 
 
-def scrape_department(dept_name, dept_url):
+def scrape_department(dept_name, dept_url, faculty=None, curriculum=None):
     """
-    Tek bir departmanı tarar ve ders listesini döndürür.
+    Tek bir departmanı (bir müfredat sürümünü) tarar ve ders listesini döndürür.
+    `faculty` / `curriculum` verilirse her derse yazılır (parça anahtarı, bkz. shards.py).
     """
     print(f"\n{'=' * 60}\nScraping Department: {dept_name}\n{'=' * 60}")
 
@@ -196,6 +483,10 @@ def scrape_department(dept_name, dept_url):
                             "learning_outcomes": details['learning_outcomes'],
                             "link": full_link
                         }
+                        if faculty:
+                            course_obj["faculty"] = faculty
+                        if curriculum:
+                            course_obj["curriculum"] = curriculum
                         dept_courses.append(course_obj)
                         print(" OK.")
                     else:
@@ -212,26 +503,56 @@ def scrape_department(dept_name, dept_url):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Bölüm ve müfredat sürümü sayfalarını tarar")
+    parser.add_argument("--shard", action="append", default=[],
+                        help="Sadece bu parçayı yeniden tara, örn. 'cs/before_2025' (tekrarlanabilir)")
+    parser.add_argument("--faculty", action="append", default=[], help="Sadece bu fakülte(ler)in bölümleri")
+    parser.add_argument("--no-discover", action="store_true", help="Keşif yapma, sadece tohum listesini tara")
+    args = parser.parse_args()
+
+    programs = seed_programs() if args.no_discover else discover_programs()
+    if args.faculty:
+        programs = [p for p in programs if p["faculty"] in args.faculty]
+    if args.shard:
+        programs = [p for p in programs if f"{p['faculty']}/{p['curriculum']}" in args.shard]
+    if not programs:
+        print("Taranacak bölüm bulunamadı.")
+        return
+
     master_list = []
 
-    # Tüm departmanları döngüye al
-    for dept in DEPARTMENTS:
-        courses = scrape_department(dept["name"], dept["url"])
+    # Tüm departmanları (ve müfredat sürümlerini) döngüye al
+    for program in programs:
+        courses = scrape_department(program["name"], program["url"], program["faculty"], program["curriculum"])
         master_list.extend(courses)
-        print(f"  >> {dept['name']} tamamlandı. Toplam {len(courses)} ders eklendi.")
+        print(f"  >> {program['name']} ({program['faculty']}/{program['curriculum']}) tamamlandı. "
+              f"Toplam {len(courses)} ders eklendi.")
         time.sleep(1)  # Departmanlar arası bekleme
 
+    filename = OUTPUT_FILE
+    # Seçili parçalar tarandıysa diğer parçaların dersleri dosyada korunur (parça bağımsız yenilenir)
+    if (args.shard or args.faculty) and os.path.exists(filename):
+        from vector_create import course_shard
+
+        scraped = {(p["faculty"], p["curriculum"]) for p in programs}
+        with open(filename, 'r', encoding='utf-8') as f:
+            kept = [c for c in json.load(f) if course_shard(c) not in scraped]
+        print(f"  >> Diğer parçalardan {len(kept)} ders korundu.")
+        master_list = kept + master_list
+
     # Tek JSON dosyasına kaydet
-    filename = 'all_engineering_curricula.json'
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(master_list, f, ensure_ascii=False, indent=4)
 
+    # Araçların hızlı okuması için kompakt ders deposu (JSON ile aynı içerik)
+    store_file = build_course_store(master_list, store_path_for(filename), source=filename)
+
     print(f"\n{'=' * 60}")
     print(f"TÜM İŞLEMLER BİTTİ.")
     print(f"Toplam {len(master_list)} ders kaydedildi.")
-    print(f"Dosya: {filename}")
+    print(f"Dosya: {filename} (+ {store_file})")
     print(f"{'=' * 60}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()